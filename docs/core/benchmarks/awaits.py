@@ -0,0 +1,72 @@
+"""
+Measure how many times per second L{ensureDeferred} can run a deep chain of
+coroutines awaiting each other, with the L{Deferred} at the bottom of the
+chain already fired or fired later, and how many L{Deferred}s per second a
+coroutine can await in turn.  Needs Python 3.5 or later.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet.defer import Deferred, ensureDeferred, succeed
+
+
+
+async def chain(depth, bottom):
+    if depth == 0:
+        return await bottom
+    return await chain(depth - 1, bottom) + 1
+
+
+
+async def sequence(deferreds):
+    total = 0
+    for d in deferreds:
+        total += await d
+    return total
+
+
+
+def benchmarkChain(depth, wait, iterations=2000):
+    before = time.time()
+    for i in range(iterations):
+        if wait:
+            bottom = Deferred()
+            ensureDeferred(chain(depth, bottom))
+            bottom.callback(0)
+        else:
+            ensureDeferred(chain(depth, succeed(0)))
+    after = time.time()
+    return iterations / (after - before)
+
+
+
+def benchmarkSequence(wait, count=100000):
+    if wait:
+        deferreds = [Deferred() for i in range(count)]
+    else:
+        deferreds = [succeed(1) for i in range(count)]
+    before = time.time()
+    ensureDeferred(sequence(deferreds))
+    if wait:
+        for d in deferreds:
+            d.callback(1)
+    after = time.time()
+    return count / (after - before)
+
+
+
+def main():
+    for depth in (10, 100):
+        for name, wait in [('fired', False), ('waiting', True)]:
+            print("chain of %3d, %7s: %8d chains/sec" % (
+                depth, name, benchmarkChain(depth, wait)))
+    for name, wait in [('fired', False), ('waiting', True)]:
+        print("sequence, %7s: %8d awaits/sec" % (
+            name, benchmarkSequence(wait)))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -75,7 +75,7 @@ def instantiateAddCallbacksNoResult(n):
     d = defer.Deferred()
     def f(result):
         return result
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -90,7 +90,7 @@ def instantiateAddCallbacksBeforeResult(n):
     d = defer.Deferred()
     def f(result):
         return result
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -108,7 +108,7 @@ def instantiateAddCallbacksAfterResult(n):
     def f(result):
         return result
     d.callback(1)
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -126,7 +126,7 @@ def pauseUnpause(n):
         return result
     d.callback(1)
     d.pause()
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -134,6 +134,81 @@ def pauseUnpause(n):
     d.unpause()
 pauseUnpause = benchmarkNFunc(20, ns)(pauseUnpause)
 
+def chainDeferreds(n):
+    """
+    Create the given number of deferreds, each one returned by a callback on
+    the one before it, and shoot a result through the whole chain.
+    """
+    first = d = defer.Deferred()
+    for i in range(n):
+        nextD = defer.Deferred()
+        d.addCallback(lambda result, nextD=nextD: nextD)
+        d = nextD
+    first.callback(1)
+    d.callback(1)
+chainDeferreds = benchmarkNFunc(20, ns)(chainDeferreds)
+
+def succeedCallback():
+    """
+    Create an already fired deferred with succeed and add a callback to it
+    """
+    defer.succeed(1).addCallback(lambda x: x)
+succeedCallback = benchmarkFunc(100000)(succeedCallback)
+
+def maybeDeferred():
+    """
+    Call a function that doesn't return a deferred with maybeDeferred
+    """
+    defer.maybeDeferred(lambda: 1)
+maybeDeferred = benchmarkFunc(100000)(maybeDeferred)
+
+def inlineCallbacksFired(n):
+    """
+    Run an inlineCallbacks generator which yields the given number of already
+    fired deferreds.
+    """
+    @defer.inlineCallbacks
+    def f():
+        for i in range(n):
+            yield defer.succeed(i)
+    f()
+inlineCallbacksFired = benchmarkNFunc(20, ns)(inlineCallbacksFired)
+
+def inlineCallbacksWaiting(n):
+    """
+    Run an inlineCallbacks generator which yields the given number of
+    deferreds, firing each of them once it is waited for.
+    """
+    waiting = []
+    @defer.inlineCallbacks
+    def f():
+        for i in range(n):
+            d = defer.Deferred()
+            waiting.append(d)
+            yield d
+    f()
+    while waiting:
+        waiting.pop().callback(None)
+inlineCallbacksWaiting = benchmarkNFunc(20, ns)(inlineCallbacksWaiting)
+
+def gatherResults(n):
+    """
+    Gather the results of the given number of deferreds, fired after being
+    gathered.
+    """
+    ds = [defer.Deferred() for i in range(n)]
+    defer.gatherResults(ds)
+    for d in ds:
+        d.callback(1)
+gatherResults = benchmarkNFunc(20, ns)(gatherResults)
+
+def deferredListFired(n):
+    """
+    Make a DeferredList of the given number of already fired deferreds.
+    """
+    defer.DeferredList([defer.succeed(i) for i in range(n)])
+deferredListFired = benchmarkNFunc(20, ns)(deferredListFired)
+
 def benchmark():
     """
     Run all of the benchmarks registered in the benchmarkFuncs list
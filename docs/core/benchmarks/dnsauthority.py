@@ -0,0 +1,80 @@
+"""
+Measure how many queries per second a DNS server answers from a zone kept by a
+L{FileAuthority}, when each answer is found and encoded afresh and when the
+answers and their encodings are kept.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet import defer
+from twisted.names import authority, dns, server
+
+
+
+class Authority(authority.FileAuthority):
+    """
+    An authority serving a zone with a few records for each of a hundred
+    names, rather than one loaded from a file.
+    """
+    def __init__(self, keep):
+        authority.FileAuthority.__init__(self, None)
+        self.keep = keep
+
+
+    def loadFile(self, filename):
+        soa = dns.Record_SOA(b'ns1.example.com', b'admin.example.com')
+        self.soa = (b'example.com', soa)
+        self.records = {b'example.com': [soa, dns.Record_NS(b'ns1.example.com')]}
+        for i in range(100):
+            self.records[('host%d.example.com' % (i,)).encode('ascii')] = [
+                dns.Record_A('10.0.0.%d' % (i,)),
+                dns.Record_AAAA('::%d' % (i + 1,)),
+                dns.Record_MX(10, b'mail.example.com'),
+                dns.Record_TXT(('host number %d' % (i,)).encode('ascii'))]
+
+
+    def _lookup(self, name, cls, type, timeout=None):
+        if self.keep:
+            return authority.FileAuthority._lookup(
+                self, name, cls, type, timeout)
+        return defer.succeed(self._findAnswer(name, type))
+
+
+
+class Protocol(object):
+    """
+    A protocol which only encodes the messages it is given.
+    """
+    def writeMessage(self, message, address):
+        message.toStr()
+
+
+
+def benchmark(keep, iterations=20000):
+    factory = server.DNSServerFactory(authorities=[Authority(keep)])
+    protocol = Protocol()
+    requests = []
+    for i in range(100):
+        request = dns.Message(id=i, recDes=1)
+        request.queries = [
+            dns.Query(('host%d.example.com' % (i,)).encode('ascii'), dns.A)]
+        request.timeReceived = time.time()
+        requests.append(request)
+    before = time.time()
+    for i in range(iterations):
+        factory.handleQuery(requests[i % 100], protocol, ('127.0.0.1', 53))
+    after = time.time()
+    return iterations / (after - before)
+
+
+
+def main():
+    for name, keep in [('found', False), ('kept', True)]:
+        print("%6s: %8.1f queries/sec" % (name, benchmark(keep)))
+
+
+
+if __name__ == '__main__':
+    main()
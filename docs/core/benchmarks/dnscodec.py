@@ -0,0 +1,85 @@
+"""
+Measure how many queries per second an authoritative server could decode and
+answer, counting only the DNS message codec: with the stream based
+Message.decode and Message.encode, and with Message.fromStr and Message.toStr.
+"""
+
+from __future__ import print_function
+
+import time
+from io import BytesIO
+
+from twisted.names import dns
+
+
+
+def query():
+    """
+    Encode a query with an EDNS OPT record, as sent by most resolvers.
+    """
+    m = dns._EDNSMessage(id=4321, recDes=True, maxSize=1232)
+    m.queries = [dns.Query(b'www.example.com', dns.A)]
+    return m.toStr()
+
+
+
+ANSWERS = [
+    dns.RRHeader(b'www.example.com', dns.A, ttl=300,
+                 payload=dns.Record_A('10.0.0.%d' % (i,), 300))
+    for i in range(1, 4)]
+
+AUTHORITY = [
+    dns.RRHeader(b'example.com', dns.NS, ttl=300,
+                 payload=dns.Record_NS(
+                     ('ns%d.example.com' % (i,)).encode('ascii'), 300))
+    for i in range(1, 3)]
+
+
+
+def answer(request):
+    """
+    Make a response to a query with a few answer and authority records, as
+    an authority holding them in memory would.
+    """
+    response = dns.Message(request.id, answer=1, auth=1, recDes=request.recDes)
+    response.queries = request.queries
+    response.answers = ANSWERS
+    response.authority = AUTHORITY
+    return response
+
+
+
+def stream(data):
+    request = dns.Message()
+    request.decode(BytesIO(data))
+    strio = BytesIO()
+    answer(request).encode(strio)
+    return strio.getvalue()
+
+
+
+def fast(data):
+    request = dns.Message()
+    request.fromStr(data)
+    return answer(request).toStr()
+
+
+
+def benchmark(codec, iterations=20000):
+    data = query()
+    before = time.time()
+    for i in range(iterations):
+        codec(data)
+    after = time.time()
+    return iterations / (after - before)
+
+
+
+def main():
+    for name, codec in [('stream', stream), ('toStr/fromStr', fast)]:
+        print("%14s: %8d queries/sec" % (name, benchmark(codec)))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure how many times per second flattenString can flatten a large table
+built by renderers, when none of them returns a Deferred and when the first
+of them waits for one.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet.defer import Deferred
+from twisted.web.template import Element, TagLoader, renderer, tags, slot
+from twisted.web.template import flattenString
+
+
+
+class Table(Element):
+    """
+    A table of C{rowCount} rows of C{columnCount} cells, each filled in by a
+    renderer through slots.
+    """
+    loader = TagLoader(tags.table(
+        tags.tr(render='rows')(
+            tags.td(render='cells', class_=slot('class'))(slot('value')))))
+
+    def __init__(self, rows, columns):
+        self.rowCount = rows
+        self.columnCount = columns
+        self.waitFor = None
+
+
+    @renderer
+    def rows(self, request, tag):
+        for i in range(self.rowCount):
+            yield tag.clone().fillSlots(row=i)
+
+
+    @renderer
+    def cells(self, request, tag):
+        waitFor, self.waitFor = self.waitFor, None
+        if waitFor is not None:
+            yield waitFor
+        for j in range(self.columnCount):
+            yield tag.clone().fillSlots(
+                **{'class': u'cell-%d' % (j,), 'value': u'%d & more' % (j,)})
+
+
+
+def benchmark(wait, iterations=20):
+    before = time.time()
+    for i in range(iterations):
+        table = Table(100, 10)
+        if wait:
+            table.waitFor = waitFor = Deferred()
+        flattenString(None, table)
+        if wait:
+            waitFor.callback(u'')
+    after = time.time()
+    return iterations / (after - before)
+
+
+
+def main():
+    for name, wait in [('synchronous', False), ('waiting', True)]:
+        print("%12s: %8.1f tables/sec" % (name, benchmark(wait)))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure how many small concurrent HTTP/2 streams per second L{H2Connection}
+can answer over one connection, and how many writes to its transport that
+takes, with different limits on the data it sends per reactor iteration.
+"""
+
+from __future__ import print_function
+
+import time
+
+import h2.connection
+
+from twisted.internet.task import Clock
+from twisted.test.proto_helpers import StringTransport
+from twisted.web import http
+from twisted.web._http2 import H2Connection
+
+
+
+class SmallResponseRequest(http.Request):
+    """
+    A request which answers with a few small chunks of data as soon as it is
+    received.
+    """
+    def process(self):
+        for i in range(4):
+            self.write(b'x' * 100)
+        self.finish()
+
+
+
+class CountingTransport(StringTransport):
+    """
+    A transport which counts the writes to it, and throws the data away.
+    """
+    writes = 0
+
+    def write(self, data):
+        self.writes += 1
+
+
+
+def requestBytes(streams):
+    """
+    Build the bytes of a connection preface followed by C{streams} GET
+    requests, one per stream.
+    """
+    client = h2.connection.H2Connection(client_side=True)
+    client.initiate_connection()
+    for i in range(streams):
+        client.send_headers(i * 2 + 1, [
+            (b':method', b'GET'),
+            (b':authority', b'localhost'),
+            (b':path', b'/'),
+            (b':scheme', b'https'),
+        ], end_stream=True)
+    return client.data_to_send()
+
+
+
+def benchmark(streams, maxBytesPerIteration):
+    reactor = Clock()
+    connection = H2Connection(reactor)
+    connection.requestFactory = SmallResponseRequest
+    connection.maxBytesPerIteration = maxBytesPerIteration
+    transport = CountingTransport()
+    data = requestBytes(streams)
+
+    before = time.time()
+    connection.makeConnection(transport)
+    connection.dataReceived(data)
+    while connection.streams:
+        reactor.advance(0)
+    after = time.time()
+
+    connection.connectionLost("done")
+    return streams / (after - before), transport.writes
+
+
+
+def main():
+    for streams in (10, 100):
+        for maxBytesPerIteration in (400, 2 ** 16, None):
+            rate, writes = benchmark(streams, maxBytesPerIteration)
+            print("%3d streams, %5s bytes per iteration: "
+                  "%8d streams/sec, %4d writes" % (
+                      streams, maxBytesPerIteration, rate, writes))
+
+
+
+if __name__ == '__main__':
+    main()
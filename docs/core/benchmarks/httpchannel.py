@@ -0,0 +1,74 @@
+"""
+Measure how many pipelined GET requests per second L{HTTPChannel} can parse
+and dispatch, with the request line and headers of each request parsed all at
+once and, for comparison, line by line.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.test.proto_helpers import StringTransport
+from twisted.web import http
+
+
+
+class NullRequest(http.Request):
+    """
+    A request which finishes as soon as it is received, without writing any
+    response.
+    """
+    def requestReceived(self, command, path, version):
+        self.channel.requestDone(self)
+
+
+
+class LineByLineChannel(http.HTTPChannel):
+    """
+    An L{HTTPChannel} which parses requests line by line, as it did before it
+    learned to parse them all at once.
+    """
+    def lineReceived(self, line):
+        return http.HTTPChannel.lineReceived(self, line)
+
+
+
+REQUEST = (
+    b"GET /some/resource?with=arguments HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:49.0) Firefox/49.0\r\n"
+    b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9\r\n"
+    b"Accept-Language: en-US,en;q=0.5\r\n"
+    b"Accept-Encoding: gzip, deflate\r\n"
+    b"Cookie: session=0123456789abcdef\r\n"
+    b"Connection: keep-alive\r\n"
+    b"\r\n")
+
+
+
+def benchmark(channelFactory, pipelined, chunks):
+    channel = channelFactory()
+    channel.requestFactory = NullRequest
+    channel.makeConnection(StringTransport())
+    chunk = REQUEST * pipelined
+
+    before = time.time()
+    for i in range(chunks):
+        channel.dataReceived(chunk)
+    after = time.time()
+
+    return pipelined * chunks / (after - before)
+
+
+
+def main():
+    for pipelined in (1, 10, 100):
+        for channelFactory in (http.HTTPChannel, LineByLineChannel):
+            rate = benchmark(channelFactory, pipelined, 10000 // pipelined)
+            print("%-18s %3d pipelined: %8d requests/sec" % (
+                channelFactory.__name__, pipelined, rate))
+
+
+
+if __name__ == '__main__':
+    main()
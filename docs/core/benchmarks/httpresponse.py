@@ -0,0 +1,110 @@
+"""
+Measure how many responses per second L{http.Request} can start, with the
+I{Date} header and status line cached and the header block written all at
+once and, for comparison, with all of them built afresh for every response.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet import reactor
+from twisted.test.proto_helpers import StringTransport
+from twisted.web import http
+
+
+
+class NullTransport(StringTransport):
+    """
+    A transport which discards everything written to it.
+    """
+    def write(self, data):
+        pass
+
+
+    def writeSequence(self, data):
+        pass
+
+
+
+currentDatetimeString = http._DatetimeCache(reactor)
+
+
+
+class CachedRequest(http.Request):
+    """
+    A request which sets its I{Date} header from a per-second cache.
+    """
+    def process(self):
+        self.setHeader(b"date", currentDatetimeString())
+        self.setHeader(b"content-type", b"text/plain")
+        self.setHeader(b"content-length", b"12")
+        self.write(b"Hello world!")
+        self.finish()
+
+
+
+class UncachedRequest(CachedRequest):
+    """
+    A request which formats its own I{Date} header.
+    """
+    def process(self):
+        self.setHeader(b"date", http.datetimeToString())
+        self.setHeader(b"content-type", b"text/plain")
+        self.setHeader(b"content-length", b"12")
+        self.write(b"Hello world!")
+        self.finish()
+
+
+
+class UncachedChannel(http.HTTPChannel):
+    """
+    An L{HTTPChannel} which builds the status line of every response and
+    writes its header lines as a sequence, as it did before it learned to
+    use precomputed status lines.
+    """
+    def writeHeaders(self, version, code, reason, headers):
+        responseLine = version + b" " + code + b" " + reason + b"\r\n"
+        headerSequence = [responseLine]
+        headerSequence.extend(
+            name + b': ' + value + b"\r\n" for name, value in headers
+        )
+        headerSequence.append(b"\r\n")
+        self.transport.writeSequence(headerSequence)
+
+
+
+REQUEST = (
+    b"GET / HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"\r\n")
+
+
+
+def benchmark(channelFactory, requestFactory, count):
+    channel = channelFactory()
+    channel.requestFactory = requestFactory
+    channel.makeConnection(NullTransport())
+    chunk = REQUEST * 100
+
+    before = time.time()
+    for i in range(count // 100):
+        channel.dataReceived(chunk)
+    after = time.time()
+
+    return (after - before) / count
+
+
+
+def main():
+    count = 50000
+    cached = benchmark(http.HTTPChannel, CachedRequest, count)
+    uncached = benchmark(UncachedChannel, UncachedRequest, count)
+    print("cached:   %6.2f usec/response" % (cached * 1e6,))
+    print("uncached: %6.2f usec/response" % (uncached * 1e6,))
+    print("saving:   %6.2f usec/response" % ((uncached - cached) * 1e6,))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Measure how many events per second can be logged through the global log
+beginner to a text file observer which only wants events at L{LogLevel.info}
+and above, for events it wants and for L{LogLevel.debug} events it filters
+out.
+"""
+
+from __future__ import print_function
+
+import io
+import time
+
+from twisted.logger import (
+    Logger, LogLevel, FilteringLogObserver, LogLevelFilterPredicate,
+    globalLogBeginner, textFileLogObserver)
+
+
+
+def benchmark(log, level, count=50000):
+    before = time.time()
+    for i in range(count):
+        log.emit(level, "Event {i} of {count}: {what!r}", i=i, count=count,
+                 what=log)
+    after = time.time()
+    return count / (after - before)
+
+
+
+def main():
+    observer = FilteringLogObserver(
+        textFileLogObserver(io.StringIO()),
+        [LogLevelFilterPredicate(LogLevel.info)])
+    globalLogBeginner.beginLoggingTo(
+        [observer], discardBuffer=True, redirectStandardIO=False)
+    log = Logger()
+    for level in (LogLevel.info, LogLevel.debug):
+        print("%5s: %8d events/sec" % (level.name, benchmark(log, level)))
+
+
+
+if __name__ == '__main__':
+    main()
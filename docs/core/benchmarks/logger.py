@@ -0,0 +1,53 @@
+"""
+Measure how many events per second a L{Logger} can emit to a text file
+observer, called directly or through a L{ThreadedLogObserver}, when writing
+to the file is fast and when each write takes a millisecond.
+"""
+
+from __future__ import print_function
+
+import io
+import time
+
+from twisted.logger import (
+    Logger, ThreadedLogObserver, OverflowPolicy, textFileLogObserver)
+
+
+
+class SlowFile(io.StringIO):
+    """
+    A file which takes a millisecond for each write.
+    """
+    def write(self, data):
+        time.sleep(0.001)
+        return io.StringIO.write(self, data)
+
+
+
+def benchmark(fileFactory, threaded, count=10000):
+    observer = textFileLogObserver(fileFactory())
+    if threaded:
+        observer = ThreadedLogObserver(observer, policy=OverflowPolicy.block)
+    log = Logger(observer=observer)
+    before = time.time()
+    for i in range(count):
+        log.info("Event {i} of {count}", i=i, count=count)
+    emitted = time.time()
+    if threaded:
+        observer.stop()
+    return count / (emitted - before), count / (time.time() - before)
+
+
+
+def main():
+    for fileName, fileFactory in [('fast', io.StringIO), ('slow', SlowFile)]:
+        for name, threaded in [('direct', False), ('threaded', True)]:
+            emitted, written = benchmark(fileFactory, threaded)
+            print("%4s file, %8s: %8d events/sec emitted, "
+                  "%8d events/sec written" % (
+                      fileName, name, emitted, written))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure how many times per second a mostly static template can be flattened,
+with and without compiling its static parts ahead of time, and how many writes
+that takes.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.web.template import Element, XMLString, TagLoader, flatten
+from twisted.web.template import renderer
+
+
+
+TEMPLATE = (
+    '<html xmlns:t="http://twistedmatrix.com/ns/twisted.web.template/0.1">'
+    '<head><title>Benchmark</title></head><body>' +
+    '<div class="row"><p>Some <em>static</em> text &amp; markup.</p></div>' *
+    200 +
+    '<ul><li t:render="items"><t:slot name="item" /></li></ul>'
+    '</body></html>')
+
+
+
+class Page(Element):
+    """
+    A page with a few dynamic items in a lot of static markup.
+    """
+    @renderer
+    def items(self, request, tag):
+        for i in range(10):
+            yield tag.clone().fillSlots(item=u'item %d' % (i,))
+
+
+
+def benchmark(loader, iterations=200):
+    writes = []
+    before = time.time()
+    for i in range(iterations):
+        del writes[:]
+        flatten(None, Page(loader), writes.append)
+    after = time.time()
+    return iterations / (after - before), len(writes)
+
+
+
+def main():
+    compiled = XMLString(TEMPLATE)
+    uncompiled = TagLoader(compiled.load())
+    for name, loader in [('uncompiled', uncompiled), ('compiled', compiled)]:
+        rate, writes = benchmark(loader)
+        print("%10s: %8d pages/sec, %4d writes" % (name, rate, writes))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -69,10 +69,15 @@ def getReactorTypes():
 
 
 
-def installReactor(shortName):
+def installReactor(shortName, timerWheelResolution=None):
     """
     Install the reactor with the given C{shortName} attribute.
 
+    @param timerWheelResolution: If not L{None}, the installed reactor keeps
+        its timed calls in a timer wheel with ticks of this many seconds (see
+        L{twisted.internet.base.ReactorBase.useTimerWheel}).
+    @type timerWheelResolution: L{float} or L{None}
+
     @raise NoSuchReactor: If no reactor is found with a matching C{shortName}.
 
     @raise: anything that the specified reactor can raise when installed.
@@ -81,5 +86,7 @@ def installReactor(shortName):
         if installer.shortName == shortName:
             installer.install()
             from twisted.internet import reactor
+            if timerWheelResolution is not None:
+                reactor.useTimerWheel(timerWheelResolution)
             return reactor
     raise NoSuchReactor(shortName)
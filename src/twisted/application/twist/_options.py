@@ -6,9 +6,15 @@
 Command line options for C{twist}.
 """
 
+from os import environ
 from sys import stdout, stderr
 from textwrap import dedent
 
+try:
+    from socket import SO_REUSEPORT
+except ImportError:
+    SO_REUSEPORT = None
+
 from twisted.copyright import version
 from twisted.python.usage import Options, UsageError
 from twisted.logger import (
@@ -23,6 +29,10 @@ from ..service import IServiceMaker
 
 openFile = open
 
+# The environment variable which tells a process it is a worker process started
+# by "twist --workers", and which worker it is.
+workerEnvironmentVariable = "TWIST_WORKER"
+
 
 
 class TwistOptions(Options):
@@ -39,6 +49,8 @@ class TwistOptions(Options):
         self["reactorName"] = "default"
         self["logLevel"] = self.defaultLogLevel
         self["logFile"] = stdout
+        self["workers"] = 1
+        self["worker"] = None
 
 
     def getSynopsis(self):
@@ -137,6 +149,45 @@ class TwistOptions(Options):
     opt_log_format.__doc__ = dedent(opt_log_format.__doc__)
 
 
+    def opt_workers(self, count):
+        """
+        Number of worker processes to run the application in, each listening
+        on the same TCP ports; the kernel spreads incoming connections between
+        them.  (default: 1)
+        """
+        try:
+            count = int(count)
+        except ValueError:
+            raise UsageError("Invalid number of workers: {}".format(count))
+        if count < 1:
+            raise UsageError("Invalid number of workers: {}".format(count))
+        if count > 1 and SO_REUSEPORT is None:
+            raise UsageError(
+                "Multiple workers require SO_REUSEPORT, "
+                "which is not available on this platform."
+            )
+        self["workers"] = count
+
+    opt_workers.__doc__ = dedent(opt_workers.__doc__)
+
+
+    def selectWorkerMode(self):
+        """
+        If this process is a worker process started by C{twist --workers},
+        set C{worker} to the worker's number and log to standard output in
+        text format, for the supervising process to collect.
+        """
+        worker = environ.get(workerEnvironmentVariable)
+        if worker is None:
+            return
+
+        self["worker"] = int(worker)
+        self["workers"] = 1
+        self["logFile"] = stdout
+        self["fileLogObserverFactory"] = textFileLogObserver
+        self["logFormat"] = "text"
+
+
     def selectDefaultLogObserver(self):
         """
         Set C{fileLogObserverFactory} to the default appropriate for the
@@ -192,3 +243,5 @@ class TwistOptions(Options):
 
         if self.subCommand is None:
             raise UsageError("No plugin specified.")
+
+        self.selectWorkerMode()
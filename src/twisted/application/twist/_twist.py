@@ -7,12 +7,19 @@ Run a Twisted application.
 """
 
 import sys
+from os import environ
 
 from twisted.python.usage import UsageError
 from ..service import Application, IService
 from ..runner._exit import exit, ExitStatus
 from ..runner._runner import Runner, RunnerOptions
-from ._options import TwistOptions
+from ._options import TwistOptions, workerEnvironmentVariable
+
+# Python code run by a worker process, with the command line arguments of the
+# supervising process.
+_workerCode = (
+    "from twisted.application.twist._twist import Twist; Twist.main()"
+)
 
 
 
@@ -64,6 +71,45 @@ class Twist(object):
         return IService(application)
 
 
+    @staticmethod
+    def workerService(reactor, argv, workers):
+        """
+        Create a service which runs the application in several worker
+        processes, restarting any which exit, and logs their output.
+
+        Each worker process runs C{twist} with the same command line arguments
+        and listens on its TCP ports with C{SO_REUSEPORT}, so that they can all
+        listen on the same ports.
+
+        @param reactor: The reactor to run the worker processes with.
+        @type reactor: L{twisted.internet.interfaces.IReactorProcess}
+
+        @param argv: Command line arguments.
+        @type argv: L{list}
+
+        @param workers: The number of worker processes.
+        @type workers: L{int}
+
+        @return: The created service.
+        @rtype: L{twisted.runner.procmon.ProcessMonitor}
+        """
+        # Importing procmon installs the default reactor, so only do it once
+        # the right one has been installed.
+        from twisted.runner.procmon import ProcessMonitor
+
+        monitor = ProcessMonitor(reactor=reactor)
+        args = [sys.executable, "-c", _workerCode] + list(argv[1:])
+
+        for worker in range(workers):
+            env = dict(environ)
+            env[workerEnvironmentVariable] = str(worker)
+            monitor.addProcess(
+                "worker-{}".format(worker), args, env=env
+            )
+
+        return monitor
+
+
     @staticmethod
     def startService(reactor, service):
         """
@@ -132,10 +178,18 @@ class Twist(object):
         options = cls.options(argv)
 
         reactor = options["reactor"]
-        service = cls.service(
-            plugin=options.plugins[options.subCommand],
-            options=options.subOptions,
-        )
+
+        if options["workers"] > 1:
+            service = cls.workerService(reactor, argv, options["workers"])
+        else:
+            if options["worker"] is not None:
+                # Let all of the workers listen on the same ports.
+                reactor._reusePorts = True
+
+            service = cls.service(
+                plugin=options.plugins[options.subCommand],
+                options=options.subOptions,
+            )
 
         cls.startService(reactor, service)
         cls.run(cls.runnerOptions(options))
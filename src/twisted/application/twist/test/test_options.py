@@ -360,6 +360,73 @@ class OptionsTests(twisted.trial.unittest.TestCase):
         self.assertEqual(subCommands, plugins)
 
 
+    def test_workers(self):
+        """
+        L{TwistOptions.opt_workers} sets the number of worker processes.
+        """
+        options = TwistOptions()
+        self.assertEqual(options["workers"], 1)
+        options.opt_workers("4")
+
+        self.assertEqual(options["workers"], 4)
+
+
+    def test_workersInvalid(self):
+        """
+        L{TwistOptions.opt_workers} raises L{UsageError} if the number of
+        workers is not a positive integer.
+        """
+        options = TwistOptions()
+
+        self.assertRaises(UsageError, options.opt_workers, "0")
+        self.assertRaises(UsageError, options.opt_workers, "two")
+
+
+    def test_workersWithoutReusePort(self):
+        """
+        L{TwistOptions.opt_workers} raises L{UsageError} if more than one
+        worker is requested but C{SO_REUSEPORT} is not available.
+        """
+        self.patch(_options, "SO_REUSEPORT", None)
+        options = TwistOptions()
+        options.opt_workers("1")
+
+        self.assertRaises(UsageError, options.opt_workers, "2")
+
+
+    def test_workerMode(self):
+        """
+        If the worker environment variable is set, L{TwistOptions} records
+        the worker's number, ignores the number of workers and logs to stdout
+        in text format.
+        """
+        self.patch(_options, "installReactor", lambda name: MemoryReactor())
+        self.patch(_options, "environ", {"TWIST_WORKER": "3"})
+        options = TwistOptions()
+        options.parseOptions(["--workers=4", "--log-format=json", "web"])
+
+        self.assertEqual(options["worker"], 3)
+        self.assertEqual(options["workers"], 1)
+        self.assertIdentical(options["logFile"], stdout)
+        self.assertIdentical(
+            options["fileLogObserverFactory"], textFileLogObserver
+        )
+
+
+    def test_notWorkerMode(self):
+        """
+        If the worker environment variable is not set, L{TwistOptions} does
+        not consider itself a worker.
+        """
+        self.patch(_options, "installReactor", lambda name: MemoryReactor())
+        self.patch(_options, "environ", {})
+        options = TwistOptions()
+        options.parseOptions(["--workers=4", "web"])
+
+        self.assertIdentical(options["worker"], None)
+        self.assertEqual(options["workers"], 4)
+
+
     def test_postOptionsNoSubCommand(self):
         """
         L{TwistOptions.postOptions} raises L{UsageError} is it has no
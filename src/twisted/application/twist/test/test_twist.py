@@ -5,9 +5,12 @@
 Tests for L{twisted.application.twist._twist}.
 """
 
+import sys
 from sys import stdout
 
 from twisted.logger import LogLevel, jsonFileLogObserver
+from twisted.internet import tcp
+from twisted.runner.procmon import ProcessMonitor
 from twisted.test.proto_helpers import MemoryReactor
 from ...service import IService, MultiService
 from ...runner._exit import ExitStatus
@@ -124,6 +127,29 @@ class TwistTests(twisted.trial.unittest.TestCase):
         )
 
 
+    def test_workerService(self):
+        """
+        L{Twist.workerService} returns a L{ProcessMonitor} which runs the given
+        number of worker processes with the same command line arguments, each
+        told which worker it is by the C{TWIST_WORKER} environment variable.
+        """
+        reactor = MemoryReactor()
+        argv = ["twist", "--workers=2", "web", "--port=tcp:8080"]
+        service = Twist.workerService(reactor, argv, 2)
+
+        self.assertIsInstance(service, ProcessMonitor)
+        self.assertIdentical(service._reactor, reactor)
+        self.assertEqual(sorted(service.processes), ["worker-0", "worker-1"])
+        for worker in range(2):
+            args, uid, gid, env = service.processes[
+                "worker-{}".format(worker)
+            ]
+            self.assertEqual(
+                args, [sys.executable, "-c", _twist._workerCode] + argv[1:]
+            )
+            self.assertEqual(env["TWIST_WORKER"], str(worker))
+
+
     def test_runnerOptions(self):
         """
         L{Twist.runnerOptions} translates L{TwistOptions} to a L{RunnerOptions}
@@ -199,3 +225,37 @@ class TwistTests(twisted.trial.unittest.TestCase):
             }
         )
         self.assertEqual(runners[0].runs, 1)
+
+
+    def test_mainWorkers(self):
+        """
+        L{Twist.main} given more than one worker starts a service which runs
+        the worker processes rather than the application.
+        """
+        starts = []
+        self.patch(
+            ProcessMonitor, "startService", lambda self: starts.append(self)
+        )
+        self.patch(Runner, "run", lambda self: None)
+        self.patch(_options, "environ", {})
+
+        Twist.main(["twist", "--workers=3", "web"])
+
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(len(starts[0].processes), 3)
+
+
+    def test_mainWorker(self):
+        """
+        L{Twist.main} in a worker process runs the application, listening on
+        TCP ports with C{SO_REUSEPORT}.
+        """
+        self.patchStartService()
+        self.patch(Runner, "run", lambda self: None)
+        self.patch(_options, "environ", {"TWIST_WORKER": "0"})
+
+        Twist.main(["twist", "--workers=3", "web"])
+
+        self.assertEqual(len(self.serviceStarts), 1)
+        self.assertTrue(self.installedReactors["default"]._reusePorts)
+        self.assertFalse(tcp.Port._reusePort)
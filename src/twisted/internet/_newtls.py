@@ -15,7 +15,8 @@ from __future__ import division, absolute_import
 from zope.interface import implementer
 from zope.interface import directlyProvides
 
-from twisted.internet.interfaces import ITLSTransport, ISSLTransport
+from twisted.internet.interfaces import (
+    ITLSTransport, ISSLTransport, INegotiated)
 from twisted.internet.abstract import FileDescriptor
 
 from twisted.protocols.tls import TLSMemoryBIOFactory, TLSMemoryBIOProtocol
@@ -143,8 +144,9 @@ def startTLS(transport, contextFactory, normal, bypass):
     transport.getHandle = tlsProtocol.getHandle
     transport.getPeerCertificate = tlsProtocol.getPeerCertificate
 
-    # Mark the transport as secure.
-    directlyProvides(transport, ISSLTransport)
+    # Mark the transport as secure, and as able to tell which protocol was
+    # negotiated.
+    directlyProvides(transport, ISSLTransport, INegotiated)
 
     # Remember we did this so that write and writeSequence can send the
     # data to the right place.
@@ -179,6 +181,19 @@ class ConnectionMixin(object):
         startTLS(self, ctx, normal, FileDescriptor)
 
 
+    @property
+    def negotiatedProtocol(self):
+        """
+        The protocol selected with ALPN or NPN during the TLS handshake, or
+        L{None} if TLS is not in use or no protocol was selected.
+
+        @see: L{INegotiated.negotiatedProtocol}
+        """
+        if self.TLS:
+            return self.protocol.negotiatedProtocol
+        return None
+
+
     def write(self, bytes):
         """
         Write some bytes to this connection, passing them through a TLS layer if
@@ -0,0 +1,343 @@
+# -*- test-case-name: twisted.internet.test.test_timerwheel -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A hierarchical timer wheel for scheduling L{DelayedCall}s.
+
+L{ReactorBase} keeps its timed calls in a binary heap, which makes
+re-scheduling a call sooner a linear-time operation and which accumulates
+cancelled calls until they are swept out.  A program with a very large number
+of coarse timeouts which are constantly being pushed back or cancelled (for
+example, idle timeouts on many persistent connections) spends a lot of time
+maintaining that heap.  L{TimerWheel} offers constant-time insertion,
+cancellation and re-scheduling instead, at the cost of a small, bounded amount
+of work every time the reactor wakes up.
+
+Calls are still run no earlier than their scheduled time and in time order;
+the wheel's resolution only affects how calls are grouped internally.
+
+@since: 16.5
+"""
+
+from __future__ import division, absolute_import
+
+_SLOT_BITS = 6
+_SLOTS = 1 << _SLOT_BITS
+_SLOT_MASK = _SLOTS - 1
+_LEVELS = 5
+_MAX_OFFSET = (1 << (_SLOT_BITS * _LEVELS)) - 1
+
+
+
+class TimerWheel(object):
+    """
+    A hierarchical timer wheel of L{DelayedCall} instances.
+
+    The wheel is divided into ticks of C{resolution} seconds.  The first level
+    has one slot for each of the next C{64} ticks; every subsequent level has
+    C{64} slots each covering C{64} times as many ticks as a slot of the level
+    below it.  As time advances the calls in a higher-level slot are cascaded
+    down into the lower levels, until they land in a first-level slot and are
+    run.
+
+    @ivar resolution: The length of one tick of the wheel, in seconds.
+    @type resolution: L{float}
+
+    @ivar _ticks: The first tick whose slot has not been fully expired.
+    @type _ticks: L{int}
+
+    @ivar _cascadedTick: The last tick at which the higher levels were
+        cascaded, so that they are only cascaded once per rotation.
+    @type _cascadedTick: L{int} or L{None}
+
+    @ivar _levels: A L{list} of levels, each of which is a L{list} of slots.
+        Each slot is a L{dict} whose keys are the L{DelayedCall}s in it; a
+        L{dict} is used so that calls can be removed in constant time while
+        preserving the order in which they were scheduled.
+
+    @ivar _counts: A L{list} giving the number of calls in each level.
+
+    @ivar _slots: A L{dict} mapping each scheduled L{DelayedCall} to the
+        C{(level, slot)} it is stored in.
+    """
+
+    defaultResolution = 0.01
+
+    def __init__(self, now, resolution=None):
+        """
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @param resolution: The length of one tick of the wheel, in seconds, or
+            L{None} to use L{TimerWheel.defaultResolution}.
+        @type resolution: L{float} or L{None}
+        """
+        if resolution is None:
+            resolution = self.defaultResolution
+        if resolution <= 0:
+            raise ValueError(
+                "Timer wheel resolution must be positive, not %r" % (
+                    resolution,))
+        self.resolution = resolution
+        self._ticks = int(now // resolution)
+        self._cascadedTick = None
+        self._levels = [[{} for i in range(_SLOTS)] for j in range(_LEVELS)]
+        self._counts = [0] * _LEVELS
+        self._slots = {}
+
+
+    def __len__(self):
+        return len(self._slots)
+
+
+    def __contains__(self, call):
+        return call in self._slots
+
+
+    def _tickFor(self, time):
+        """
+        Compute the tick in which a call scheduled at C{time} belongs.
+
+        @param time: A time in seconds since the epoch.
+        @type time: L{float}
+
+        @return: The tick number, never earlier than the current tick.
+        @rtype: L{int}
+        """
+        try:
+            tick = int(time // self.resolution)
+        except OverflowError:
+            # Absurdly distant calls (see test_distantDelayedCall) are parked
+            # as far in the future as the wheel can represent; cascading
+            # will keep them there.
+            return self._ticks + _MAX_OFFSET
+        if tick < self._ticks:
+            return self._ticks
+        return tick
+
+
+    def _place(self, call, tick):
+        """
+        Put C{call} into the slot responsible for C{tick}.
+        """
+        offset = tick - self._ticks
+        if offset > _MAX_OFFSET:
+            offset = _MAX_OFFSET
+            tick = self._ticks + offset
+        level = 0
+        while offset >= _SLOTS and level < _LEVELS - 1:
+            offset >>= _SLOT_BITS
+            level += 1
+        index = (tick >> (_SLOT_BITS * level)) & _SLOT_MASK
+        self._levels[level][index][call] = None
+        self._counts[level] += 1
+        self._slots[call] = (level, index)
+
+
+    def add(self, call):
+        """
+        Schedule C{call}.
+
+        Any pending delay on C{call} (see L{DelayedCall.delay}) is folded into
+        its scheduled time first.
+
+        @param call: The call to schedule.  It must not already be in the
+            wheel.
+        @type call: L{DelayedCall}
+        """
+        call.activate_delay()
+        self._place(call, self._tickFor(call.time))
+
+
+    def remove(self, call):
+        """
+        Unschedule C{call}, if it is in the wheel.
+
+        @param call: The call to unschedule.
+        @type call: L{DelayedCall}
+        """
+        position = self._slots.pop(call, None)
+        if position is not None:
+            level, index = position
+            del self._levels[level][index][call]
+            self._counts[level] -= 1
+
+
+    def reschedule(self, call):
+        """
+        Move C{call} to the slot for its current scheduled time.  This is
+        suitable for use as the C{reset} callable of a L{DelayedCall}.
+
+        @param call: The call which has been rescheduled.
+        @type call: L{DelayedCall}
+        """
+        self.remove(call)
+        self.add(call)
+
+
+    def getDelayedCalls(self):
+        """
+        @return: All of the calls in the wheel, in no particular order.
+        @rtype: L{list} of L{DelayedCall}
+        """
+        return list(self._slots)
+
+
+    def _cascade(self, level):
+        """
+        Redistribute the calls in the current slot of C{level} into the lower
+        levels.
+
+        @return: The index of the slot which was cascaded.
+        @rtype: L{int}
+        """
+        index = (self._ticks >> (_SLOT_BITS * level)) & _SLOT_MASK
+        slot = self._levels[level][index]
+        if slot:
+            self._levels[level][index] = {}
+            self._counts[level] -= len(slot)
+            slots = self._slots
+            for call in slot:
+                del slots[call]
+                self._place(call, self._tickFor(call.time))
+        return index
+
+
+    def _cascadeAll(self):
+        """
+        Cascade the higher levels as required when the current tick reaches
+        the start of a new first-level rotation.
+        """
+        level = 1
+        while level < _LEVELS and self._cascade(level) == 0:
+            level += 1
+
+
+    def expire(self, now):
+        """
+        Remove and return every call which is due to run at C{now}.
+
+        Calls which have been delayed (see L{DelayedCall.delay}) are not
+        returned; they are rescheduled for their new time instead.
+
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @return: The due calls, ordered by their scheduled time.
+        @rtype: L{list} of L{DelayedCall}
+        """
+        nowTick = int(now // self.resolution)
+        due = []
+        delayed = []
+        levels = self._levels
+        counts = self._counts
+        slots = self._slots
+        while self._ticks <= nowTick:
+            index = self._ticks & _SLOT_MASK
+            if index == 0 and self._cascadedTick != self._ticks:
+                self._cascadedTick = self._ticks
+                self._cascadeAll()
+            if not counts[0]:
+                # Nothing at all in the first level; skip ahead to the first
+                # tick at which there is something to cascade.
+                if not len(slots):
+                    self._ticks = nowTick
+                    break
+                nextCascade = self._nextCascadeTick()
+                if nextCascade > nowTick:
+                    self._ticks = nowTick
+                    break
+                self._ticks = nextCascade
+                continue
+            slot = levels[0][index]
+            if slot:
+                if self._ticks < nowTick:
+                    levels[0][index] = {}
+                    ready = list(slot)
+                else:
+                    ready = [call for call in slot if call.time <= now]
+                for call in ready:
+                    del slot[call]
+                    del slots[call]
+                    if call.delayed_time > 0:
+                        delayed.append(call)
+                    else:
+                        due.append(call)
+                counts[0] -= len(ready)
+            if self._ticks == nowTick:
+                break
+            self._ticks += 1
+
+        for call in delayed:
+            # A call may have been delayed to a time which has also passed.
+            call.activate_delay()
+            if call.time <= now:
+                due.append(call)
+            else:
+                self._place(call, self._tickFor(call.time))
+        due.sort(key=_callTime)
+        return due
+
+
+    def nextTime(self):
+        """
+        Determine a time no later than the earliest scheduled call.
+
+        This is the exact time of the earliest call in the first level, unless
+        one of the higher-level slots holding calls, which may be earlier, is
+        cascaded before it; then it is the start of that slot, at which point
+        those calls will be cascaded closer.
+
+        @return: The time, in seconds since the epoch, or L{None} if the wheel
+            is empty.
+        @rtype: L{float} or L{None}
+        """
+        if not self._slots:
+            return None
+        earliest = None
+        if self._counts[0]:
+            first = self._levels[0]
+            for offset in range(_SLOTS):
+                slot = first[(self._ticks + offset) & _SLOT_MASK]
+                if slot:
+                    earliest = min([call.time for call in slot])
+                    break
+        cascade = self._nextCascadeTick()
+        if cascade is not None:
+            cascade *= self.resolution
+            if earliest is None or cascade < earliest:
+                earliest = cascade
+        return earliest
+
+
+    def _nextCascadeTick(self):
+        """
+        Find the first tick at which a non-empty slot of one of the higher
+        levels will be cascaded.
+
+        @return: The tick, or L{None} if the higher levels are empty.
+        @rtype: L{int} or L{None}
+        """
+        earliest = None
+        for level in range(1, _LEVELS):
+            if not self._counts[level]:
+                continue
+            shift = _SLOT_BITS * level
+            block = self._ticks >> shift
+            slots = self._levels[level]
+            for offset in range(1, _SLOTS + 1):
+                if slots[(block + offset) & _SLOT_MASK]:
+                    tick = (block + offset) << shift
+                    if earliest is None or tick < earliest:
+                        earliest = tick
+                    break
+        return earliest
+
+
+
+def _callTime(call):
+    """
+    Sort key for L{DelayedCall}s.
+    """
+    return call.time
@@ -175,6 +175,15 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
 
     SEND_LIMIT = 128*1024
 
+    # Subclasses which implement _writeSomeVectors set this to True to have
+    # doWrite hand the buffered chunks to it as they are, instead of first
+    # concatenating them for writeSomeData.
+    _vectoredWrites = False
+
+    # The most chunks to hand to _writeSomeVectors at once; the smallest
+    # IOV_MAX of the platforms which support it.
+    _VECTOR_LIMIT = 1024
+
     def __init__(self, reactor=None):
         """
         @param reactor: An L{IReactorFDSet} provider which this descriptor will
@@ -221,6 +230,21 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                                   reflect.qual(self.__class__))
 
 
+    def _writeSomeVectors(self, vectors):
+        """
+        Write as much as possible of the given chunks of data, immediately,
+        with a single scatter/gather write.
+
+        This is only called if C{_vectoredWrites} is true.  Its result is
+        interpreted in the same way as the result of L{writeSomeData}.
+
+        @param vectors: The chunks of data to write, in order.
+        @type vectors: L{list} of L{bytes} or L{memoryview}
+        """
+        raise NotImplementedError("%s does not implement _writeSomeVectors" %
+                                  reflect.qual(self.__class__))
+
+
     def doRead(self):
         """
         Called when data is available for reading.
@@ -240,28 +264,35 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
 
         @see: L{twisted.internet.interfaces.IWriteDescriptor.doWrite}.
         """
-        if len(self.dataBuffer) - self.offset < self.SEND_LIMIT:
-            # If there is currently less than SEND_LIMIT bytes left to send
-            # in the string, extend it with the array data.
-            self.dataBuffer = _concatenate(
-                self.dataBuffer, self.offset, self._tempDataBuffer)
-            self.offset = 0
-            self._tempDataBuffer = []
-            self._tempDataLen = 0
-
-        # Send as much data as you can.
-        if self.offset:
-            l = self.writeSomeData(lazyByteSlice(self.dataBuffer, self.offset))
+        if self._vectoredWrites:
+            l = self._doWriteVectors()
+            if isinstance(l, Exception) or l < 0:
+                return l
         else:
-            l = self.writeSomeData(self.dataBuffer)
-
-        # There is no writeSomeData implementation in Twisted which returns
-        # < 0, but the documentation for writeSomeData used to claim negative
-        # integers meant connection lost.  Keep supporting this here,
-        # although it may be worth deprecating and removing at some point.
-        if isinstance(l, Exception) or l < 0:
-            return l
-        self.offset += l
+            if len(self.dataBuffer) - self.offset < self.SEND_LIMIT:
+                # If there is currently less than SEND_LIMIT bytes left to
+                # send in the string, extend it with the array data.
+                self.dataBuffer = _concatenate(
+                    self.dataBuffer, self.offset, self._tempDataBuffer)
+                self.offset = 0
+                self._tempDataBuffer = []
+                self._tempDataLen = 0
+
+            # Send as much data as you can.
+            if self.offset:
+                l = self.writeSomeData(
+                    lazyByteSlice(self.dataBuffer, self.offset))
+            else:
+                l = self.writeSomeData(self.dataBuffer)
+
+            # There is no writeSomeData implementation in Twisted which
+            # returns < 0, but the documentation for writeSomeData used to
+            # claim negative integers meant connection lost.  Keep supporting
+            # this here, although it may be worth deprecating and removing at
+            # some point.
+            if isinstance(l, Exception) or l < 0:
+                return l
+            self.offset += l
         # If there is nothing left to send,
         if self.offset == len(self.dataBuffer) and not self._tempDataLen:
             self.dataBuffer = b""
@@ -288,6 +319,59 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                 return result
         return None
 
+    def _doWriteVectors(self):
+        """
+        Send as much buffered data as possible using L{_writeSomeVectors},
+        without copying it into a single string first.
+
+        Afterwards C{dataBuffer} and C{offset} describe the partially sent
+        chunk, if there is one, and C{_tempDataBuffer} holds the chunks which
+        were not sent at all.
+
+        @return: The result of L{_writeSomeVectors}.
+        """
+        vectors = []
+        size = 0
+        pending = len(self.dataBuffer) - self.offset
+        if pending:
+            vectors.append(lazyByteSlice(self.dataBuffer, self.offset))
+            size = pending
+        temp = self._tempDataBuffer
+        limit = self._VECTOR_LIMIT
+        for chunk in temp:
+            if size >= self.SEND_LIMIT or len(vectors) >= limit:
+                break
+            vectors.append(chunk)
+            size += len(chunk)
+
+        l = self._writeSomeVectors(vectors)
+        if isinstance(l, Exception) or l < 0:
+            return l
+
+        if l < pending:
+            self.offset += l
+            return l
+        sent = l - pending
+        index = 0
+        consumed = 0
+        while index < len(temp) and len(temp[index]) <= sent:
+            sent -= len(temp[index])
+            consumed += len(temp[index])
+            index += 1
+        if sent:
+            # A chunk was only partially sent; it becomes the new dataBuffer.
+            self.dataBuffer = temp[index]
+            self.offset = sent
+            consumed += len(temp[index])
+            index += 1
+        else:
+            self.dataBuffer = b""
+            self.offset = 0
+        del temp[:index]
+        self._tempDataLen -= consumed
+        return l
+
+
     def _postLoseConnection(self):
         """Called after a loseConnection(), when all data has been written.
 
@@ -364,8 +448,8 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
             for chunk in iovec:
                 fd.write(chunk)
 
-        It may have a more efficient implementation at a later time or in a
-        different reactor.
+        Transports which support scatter/gather writes send the chunks
+        without joining them together first.
 
         As with the C{write()} method, if a buffer size limit is reached and a
         streaming producer is registered, it will be paused until the buffered
@@ -25,6 +25,7 @@ from twisted.python import log, failure, reflect
 from twisted.python.compat import unicode, iteritems
 from twisted.python.runtime import seconds as runtimeSeconds, platform
 from twisted.internet.defer import Deferred, DeferredList
+from twisted.internet._timerwheel import TimerWheel
 
 # This import is for side-effects!  Even if you don't see any code using it
 # in this module, don't delete it.
@@ -461,9 +462,14 @@ class ReactorBase(object):
     @ivar _registerAsIOThread: A flag controlling whether the reactor will
         register the thread it is running in as the I/O thread when it starts.
         If C{True}, registration will be done, otherwise it will not be.
+
+    @ivar _timerWheel: The L{TimerWheel} holding this reactor's timed calls if
+        L{useTimerWheel} has been called, otherwise L{None}, in which case
+        the timed calls are kept in the C{_pendingTimedCalls} heap.
     """
 
     _registerAsIOThread = True
+    _timerWheel = None
 
     _stopped = True
     installed = False
@@ -706,6 +712,13 @@ class ReactorBase(object):
         assert callable(_f), "%s is not callable" % _f
         assert _seconds >= 0, \
                "%s is not greater than or equal to 0 seconds" % (_seconds,)
+        wheel = self._timerWheel
+        if wheel is not None:
+            tple = DelayedCall(self.seconds() + _seconds, _f, args, kw,
+                               wheel.remove, wheel.reschedule,
+                               seconds=self.seconds)
+            wheel.add(tple)
+            return tple
         tple = DelayedCall(self.seconds() + _seconds, _f, args, kw,
                            self._cancelCallLater,
                            self._moveCallLaterSooner,
@@ -713,6 +726,38 @@ class ReactorBase(object):
         self._newTimedCalls.append(tple)
         return tple
 
+
+    def useTimerWheel(self, resolution=None):
+        """
+        Keep this reactor's timed calls in a L{TimerWheel} instead of a heap.
+
+        A timer wheel makes scheduling, cancelling and re-scheduling a
+        L{DelayedCall} constant-time operations, which helps programs which
+        manage very large numbers of coarse timeouts, such as idle timeouts on
+        many connections.  Calls are still run no earlier than their scheduled
+        time and in time order.
+
+        Any calls which are already scheduled are moved into the wheel.
+
+        @param resolution: The length, in seconds, of one tick of the wheel,
+            or L{None} to use L{TimerWheel.defaultResolution}.
+        @type resolution: L{float} or L{None}
+
+        @since: 16.5
+        """
+        if self._timerWheel is not None:
+            raise RuntimeError("This reactor is already using a timer wheel.")
+        wheel = TimerWheel(self.seconds(), resolution)
+        for call in self._pendingTimedCalls + self._newTimedCalls:
+            if not call.cancelled:
+                call.canceller = wheel.remove
+                call.resetter = wheel.reschedule
+                wheel.add(call)
+        self._pendingTimedCalls = []
+        self._newTimedCalls = []
+        self._cancellations = 0
+        self._timerWheel = wheel
+
     def _moveCallLaterSooner(self, tple):
         # Linear time find: slow.
         heap = self._pendingTimedCalls
@@ -742,6 +787,8 @@ class ReactorBase(object):
         They are returned in no particular order.
         This method is not efficient -- it is really only meant for
         test cases."""
+        if self._timerWheel is not None:
+            return self._timerWheel.getDelayedCalls()
         return [x for x in (self._pendingTimedCalls + self._newTimedCalls) if not x.cancelled]
 
     def _insertNewDelayedCalls(self):
@@ -763,13 +810,20 @@ class ReactorBase(object):
         @return: The maximum number of seconds the reactor may sleep.
         @rtype: L{float}
         """
-        # insert new delayed calls to make sure to include them in timeout value
-        self._insertNewDelayedCalls()
+        if self._timerWheel is not None:
+            nextTime = self._timerWheel.nextTime()
+            if nextTime is None:
+                return None
+            delay = nextTime - self.seconds()
+        else:
+            # insert new delayed calls to make sure to include them in timeout
+            # value
+            self._insertNewDelayedCalls()
 
-        if not self._pendingTimedCalls:
-            return None
+            if not self._pendingTimedCalls:
+                return None
 
-        delay = self._pendingTimedCalls[0].time - self.seconds()
+            delay = self._pendingTimedCalls[0].time - self.seconds()
 
         # Pick a somewhat arbitrary maximum possible value for the timeout.
         # This value is 2 ** 31 / 1000, which is the number of seconds which can
@@ -805,6 +859,13 @@ class ReactorBase(object):
             if self.threadCallQueue:
                 self.wakeUp()
 
+        if self._timerWheel is not None:
+            self._runTimerWheel()
+            if self._justStopped:
+                self._justStopped = False
+                self.fireSystemEvent("shutdown")
+            return
+
         # insert new delayed calls now
         self._insertNewDelayedCalls()
 
@@ -820,19 +881,7 @@ class ReactorBase(object):
                 heappush(self._pendingTimedCalls, call)
                 continue
 
-            try:
-                call.called = 1
-                call.func(*call.args, **call.kw)
-            except:
-                log.deferr()
-                if hasattr(call, "creator"):
-                    e = "\n"
-                    e += " C: previous exception occurred in " + \
-                         "a DelayedCall created here:\n"
-                    e += " C:"
-                    e += "".join(call.creator).rstrip().replace("\n","\n C:")
-                    e += "\n"
-                    log.msg(e)
+            self._runDelayedCall(call)
 
 
         if (self._cancellations > 50 and
@@ -846,6 +895,42 @@ class ReactorBase(object):
             self._justStopped = False
             self.fireSystemEvent("shutdown")
 
+
+    def _runTimerWheel(self):
+        """
+        Run the calls in C{_timerWheel} which are due.
+        """
+        wheel = self._timerWheel
+        for call in wheel.expire(self.seconds()):
+            # An earlier call in this batch may have cancelled, delayed or
+            # rescheduled this one.
+            if call.cancelled or call.called:
+                continue
+            if call.delayed_time > 0:
+                wheel.reschedule(call)
+                continue
+            wheel.remove(call)
+            self._runDelayedCall(call)
+
+
+    def _runDelayedCall(self, call):
+        """
+        Run a L{DelayedCall} which is due, logging any exception it raises.
+        """
+        try:
+            call.called = 1
+            call.func(*call.args, **call.kw)
+        except:
+            log.deferr()
+            if hasattr(call, "creator"):
+                e = "\n"
+                e += " C: previous exception occurred in " + \
+                     "a DelayedCall created here:\n"
+                e += " C:"
+                e += "".join(call.creator).rstrip().replace("\n","\n C:")
+                e += "\n"
+                log.msg(e)
+
     # IReactorProcess
 
     def _checkProcessArgs(self, args, env):
@@ -14,6 +14,10 @@ Maintainer: Glyph Lefkowitz
 @var _CONTINUE: A marker left in L{Deferred.callback}s to indicate a Deferred
     chain.  Always accompanied by a Deferred instance in the args tuple pointing
     at the Deferred which is chained to the Deferred which has this marker.
+
+@var _PASSTHRU: The entry of L{Deferred.callbacks} for the callback or errback
+    left out by L{Deferred.addErrback} or L{Deferred.addCallback}, shared by
+    all of them.
 """
 
 from __future__ import division, absolute_import, print_function
@@ -83,8 +87,15 @@ def succeed(result):
 
     @rtype: L{Deferred}
     """
+    assert not isinstance(result, Deferred)
     d = Deferred()
-    d.callback(result)
+    if d.debug:
+        d.callback(result)
+    else:
+        # A new Deferred has no callbacks to run, so all callback() would do
+        # is record the result.
+        d.called = True
+        d.result = result
     return d
 
 
@@ -190,6 +201,7 @@ def getDebugging():
 # See module docstring.
 _NO_RESULT = object()
 _CONTINUE = object()
+_PASSTHRU = (passthru, None, None)
 
 
 
@@ -298,9 +310,12 @@ class Deferred:
         """
         assert callable(callback)
         assert errback is None or callable(errback)
-        cbs = ((callback, callbackArgs, callbackKeywords),
-               (errback or (passthru), errbackArgs, errbackKeywords))
-        self.callbacks.append(cbs)
+        if errback is None:
+            errbackEntry = _PASSTHRU
+        else:
+            errbackEntry = (errback, errbackArgs, errbackKeywords)
+        self.callbacks.append(
+            ((callback, callbackArgs, callbackKeywords), errbackEntry))
 
         if self.called:
             self._runCallbacks()
@@ -313,8 +328,12 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(callback, callbackArgs=args,
-                                 callbackKeywords=kw)
+        assert callable(callback)
+        self.callbacks.append(((callback, args, kw), _PASSTHRU))
+
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addErrback(self, errback, *args, **kw):
@@ -323,9 +342,12 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(passthru, errback,
-                                 errbackArgs=args,
-                                 errbackKeywords=kw)
+        assert callable(errback)
+        self.callbacks.append((_PASSTHRU, (errback, args, kw)))
+
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addBoth(self, callback, *args, **kw):
@@ -505,8 +527,8 @@ class Deferred:
         """
         Build a tuple of callback and errback with L{_CONTINUE}.
         """
-        return ((_CONTINUE, (self,), None),
-                (_CONTINUE, (self,), None))
+        continuation = (_CONTINUE, (self,), None)
+        return (continuation, continuation)
 
 
     def _runCallbacks(self):
@@ -545,6 +567,7 @@ class Deferred:
         # and then that second Deferred being fired.  ie, if ever had _chainedTo
         # set to something other than None, you might end up on this stack.
         chain = [self]
+        Failure = failure.Failure
 
         while chain:
             current = chain[-1]
@@ -557,76 +580,90 @@ class Deferred:
 
             finished = True
             current._chainedTo = None
-            while current.callbacks:
-                item = current.callbacks.pop(0)
-                callback, args, kw = item[
-                    isinstance(current.result, failure.Failure)]
-                args = args or ()
-                kw = kw or {}
-
-                # Avoid recursion if we can.
-                if callback is _CONTINUE:
-                    # Give the waiting Deferred our current result and then
-                    # forget about that result ourselves.
-                    chainee = args[0]
-                    chainee.result = current.result
-                    current.result = None
-                    # Making sure to update _debugInfo
-                    if current._debugInfo is not None:
-                        current._debugInfo.failResult = None
-                    chainee.paused -= 1
-                    chain.append(chainee)
-                    # Delay cleaning this Deferred and popping it from the chain
-                    # until after we've dealt with chainee.
-                    finished = False
-                    break
+            callbacks = current.callbacks
+            result = current.result
+            # Nothing but the callbacks themselves can add callbacks to this
+            # Deferred while this loop runs, so mark it as running them for
+            # the whole loop rather than around each of them.
+            current._runningCallbacks = True
+            try:
+                while callbacks:
+                    callback, args, kw = callbacks.pop(0)[
+                        isinstance(result, Failure)]
+
+                    # Avoid recursion if we can.
+                    if callback is _CONTINUE:
+                        # Give the waiting Deferred our current result and
+                        # then forget about that result ourselves.
+                        chainee = args[0]
+                        chainee.result = result
+                        current.result = None
+                        # Making sure to update _debugInfo
+                        if current._debugInfo is not None:
+                            current._debugInfo.failResult = None
+                        chainee.paused -= 1
+                        chain.append(chainee)
+                        # Delay cleaning this Deferred and popping it from the
+                        # chain until after we've dealt with chainee.
+                        finished = False
+                        break
 
-                try:
-                    current._runningCallbacks = True
                     try:
-                        current.result = callback(current.result, *args, **kw)
-                        if current.result is current:
+                        if args or kw:
+                            result = callback(result, *(args or ()),
+                                              **(kw or {}))
+                        else:
+                            result = callback(result)
+                        if result is current:
                             warnAboutFunction(
                                 callback,
                                 "Callback returned the Deferred "
                                 "it was attached to; this breaks the "
                                 "callback chain and will raise an "
                                 "exception in the future.")
-                    finally:
-                        current._runningCallbacks = False
-                except:
-                    # Including full frame information in the Failure is quite
-                    # expensive, so we avoid it unless self.debug is set.
-                    current.result = failure.Failure(captureVars=self.debug)
-                else:
-                    if isinstance(current.result, Deferred):
-                        # The result is another Deferred.  If it has a result,
-                        # we can take it and keep going.
-                        resultResult = getattr(current.result, 'result', _NO_RESULT)
-                        if resultResult is _NO_RESULT or isinstance(resultResult, Deferred) or current.result.paused:
-                            # Nope, it didn't.  Pause and chain.
-                            current.pause()
-                            current._chainedTo = current.result
-                            # Note: current.result has no result, so it's not
-                            # running its callbacks right now.  Therefore we can
-                            # append to the callbacks list directly instead of
-                            # using addCallbacks.
-                            current.result.callbacks.append(current._continuation())
-                            break
-                        else:
-                            # Yep, it did.  Steal it.
-                            current.result.result = None
-                            # Make sure _debugInfo's failure state is updated.
-                            if current.result._debugInfo is not None:
-                                current.result._debugInfo.failResult = None
-                            current.result = resultResult
+                    except:
+                        # Including full frame information in the Failure is
+                        # quite expensive, so we avoid it unless self.debug is
+                        # set.
+                        result = Failure(captureVars=self.debug)
+                    else:
+                        if isinstance(result, Deferred):
+                            # The result is another Deferred.  If it has a
+                            # result, we can take it and keep going.
+                            resultResult = getattr(result, 'result',
+                                                   _NO_RESULT)
+                            if (resultResult is _NO_RESULT or
+                                    isinstance(resultResult, Deferred) or
+                                    result.paused):
+                                # Nope, it didn't.  Pause and chain.
+                                current.result = result
+                                current.pause()
+                                current._chainedTo = result
+                                # Note: result has no result, so it's not
+                                # running its callbacks right now.  Therefore
+                                # we can append to the callbacks list directly
+                                # instead of using addCallbacks.
+                                result.callbacks.append(
+                                    current._continuation())
+                                break
+                            else:
+                                # Yep, it did.  Steal it.
+                                result.result = None
+                                # Make sure _debugInfo's failure state is
+                                # updated.
+                                if result._debugInfo is not None:
+                                    result._debugInfo.failResult = None
+                                result = resultResult
+                    current.result = result
+            finally:
+                current._runningCallbacks = False
 
             if finished:
                 # As much of the callback chain - perhaps all of it - as can be
                 # processed right now has been.  The current Deferred is waiting on
                 # another Deferred or for more callbacks.  Before finishing with it,
                 # make sure its _debugInfo is in the proper state.
-                if isinstance(current.result, failure.Failure):
+                if isinstance(current.result, Failure):
                     # Stash the Failure in the _debugInfo for unhandled error
                     # reporting.
                     current.result.cleanFailure()
@@ -662,15 +699,147 @@ class Deferred:
 
 
     def __iter__(self):
+        """
+        Support C{yield from} and C{await} on this L{Deferred}.
 
-        if getattr(self, "result", _NO_RESULT) is _NO_RESULT:
-            yield self
-        raise StopIteration(self.result)
+        @return: An iterator which stops with this L{Deferred}'s result if it
+            already has a successful one, and otherwise yields this
+            L{Deferred} once to whatever is driving the generator or
+            coroutine (such as L{ensureDeferred}) and stops with the value it
+            is sent back.
+        @rtype: L{_DeferredIterator}
+        """
+        return _DeferredIterator(self)
 
     # For PEP492/async + await
     __await__ = __iter__
 
 
+    def asFuture(self, loop):
+        """
+        Adapt this L{Deferred} into an L{asyncio.Future} bound to C{loop}, so
+        that it can be awaited by coroutines run by asyncio, such as those
+        scheduled on the event loop of
+        L{twisted.internet.asyncioreactor.AsyncioSelectorReactor}.
+
+        Converting a L{Deferred} to a future consumes its result, whether a
+        value or a failure: afterwards this L{Deferred} fires with L{None}.
+        Cancelling the future cancels this L{Deferred}.
+
+        @param loop: The asyncio event loop to bind the future to.
+
+        @return: A future which gets this L{Deferred}'s result, or the
+            exception it fails with.
+        @rtype: L{asyncio.Future}
+
+        @since: 16.5
+        """
+        try:
+            createFuture = loop.create_future
+        except AttributeError:
+            from asyncio import Future
+            def createFuture():
+                return Future(loop=loop)
+        future = createFuture()
+
+        def succeeded(result):
+            if not future.cancelled():
+                future.set_result(result)
+
+        def failed(reason):
+            if not future.cancelled():
+                future.set_exception(reason.value)
+
+        def done(future):
+            if future.cancelled():
+                self.cancel()
+
+        self.addCallbacks(succeeded, failed)
+        future.add_done_callback(done)
+        return future
+
+
+    @classmethod
+    def fromFuture(cls, future):
+        """
+        Adapt an L{asyncio.Future} into a L{Deferred}.
+
+        Cancelling the returned L{Deferred} cancels C{future}.
+
+        @param future: The future to adapt.
+        @type future: L{asyncio.Future}
+
+        @return: A L{Deferred} which fires with the future's result, or fails
+            with the exception it is set to.
+        @rtype: L{Deferred}
+
+        @since: 16.5
+        """
+        def cancel(deferred):
+            future.cancel()
+
+        deferred = cls(cancel)
+
+        def done(future):
+            if deferred.called:
+                # The Deferred was cancelled, and has failed already.
+                return
+            try:
+                result = future.result()
+            except:
+                result = failure.Failure()
+            deferred.callback(result)
+
+        future.add_done_callback(done)
+        return deferred
+
+
+
+class _DeferredIterator(object):
+    """
+    The iterator returned by L{Deferred.__iter__} and L{Deferred.__await__}.
+
+    A successful result the L{Deferred} already has is returned straight
+    away, without yielding to the driver of the coroutine; otherwise the
+    L{Deferred} is yielded once and the value the driver sends back, or the
+    exception it throws in, is the outcome of the C{await}.
+
+    @ivar _deferred: The L{Deferred} being waited for.
+
+    @ivar _yielded: Whether C{_deferred} has been yielded to the driver yet.
+    """
+    __slots__ = ('_deferred', '_yielded')
+
+    def __init__(self, deferred):
+        self._deferred = deferred
+        self._yielded = False
+
+
+    def __iter__(self):
+        return self
+
+
+    def send(self, value):
+        """
+        Yield the L{Deferred} if there is nothing to return yet, or stop with
+        the value to return.
+        """
+        if self._yielded:
+            raise StopIteration(value)
+        deferred = self._deferred
+        if (deferred.called and not deferred.paused and
+                not isinstance(deferred.result, failure.Failure)):
+            raise StopIteration(deferred.result)
+        self._yielded = True
+        return deferred
+
+
+    def __next__(self):
+        return self.send(None)
+
+    next = __next__
+
+
 
 def ensureDeferred(coro):
     """
@@ -699,8 +868,15 @@ def ensureDeferred(coro):
             return d
 
         react(main)
+
+    The coroutine is resumed as soon as each L{Deferred} it awaits fires, or
+    right away if it has already fired.  It may also await L{asyncio.Future}s,
+    which is useful with
+    L{twisted.internet.asyncioreactor.AsyncioSelectorReactor}.
     """
-    return _inlineCallbacks(None, coro, Deferred())
+    deferred = Deferred()
+    _runCoroutine(None, coro, deferred)
+    return deferred
 
 
 
@@ -1147,6 +1323,67 @@ def returnValue(val):
 
 
 
+def _runCoroutine(result, coro, deferred):
+    """
+    Resume C{coro} with C{result}, and keep going until it waits for a
+    L{Deferred} without a result yet, or until it is done and C{deferred} is
+    fired with its outcome.
+
+    Unlike L{_inlineCallbacks}, this makes no closure for each step and
+    doesn't check where C{returnValue} was called from: coroutines which await a L{Deferred} that has
+    already fired never yield here at all, so only a single callback on each
+    L{Deferred} that has to be waited for is needed.
+
+    @param result: The value to send into C{coro}, or a
+        L{failure.Failure} to throw into it.
+
+    @param coro: The coroutine, or generator used as one, to run.
+
+    @param deferred: The L{Deferred} to fire when C{coro} is done.
+
+    @return: L{None}, so that this can be a callback itself.
+    """
+    while 1:
+        try:
+            if isinstance(result, failure.Failure):
+                awaited = result.throwExceptionIntoGenerator(coro)
+            else:
+                awaited = coro.send(result)
+        except StopIteration as e:
+            deferred.callback(getattr(e, "value", None))
+            return
+        except _DefGen_Return as e:
+            # A generator used as a coroutine called returnValue().
+            deferred.callback(e.value)
+            return
+        except:
+            deferred.errback()
+            return
+
+        if not isinstance(awaited, Deferred):
+            if not getattr(awaited, "_asyncio_future_blocking", False):
+                # Not something to wait for: send it straight back, as
+                # _inlineCallbacks does.
+                result = awaited
+                continue
+            # An asyncio future is being awaited; its own iterator gets the
+            # result from it once it is done, whatever is sent back in.
+            awaited._asyncio_future_blocking = False
+            awaited = Deferred.fromFuture(awaited)
+
+        if (awaited.called and not awaited.paused and
+                not awaited._runningCallbacks):
+            result = awaited.result
+            awaited.result = None
+            if awaited._debugInfo is not None:
+                awaited._debugInfo.failResult = None
+            continue
+
+        awaited.addBoth(_runCoroutine, coro, deferred)
+        return
+
+
+
 def _inlineCallbacks(result, g, deferred):
     """
     See L{inlineCallbacks}.
@@ -1216,6 +1453,18 @@ def _inlineCallbacks(result, g, deferred):
             return deferred
 
         if isinstance(result, Deferred):
+            if (result.called and not result.paused and
+                    not result._runningCallbacks):
+                # The Deferred already has its result, and nothing else to do
+                # with it: take it, leaving None in its place as gotResult
+                # would, and carry on without adding a callback.
+                resultResult = result.result
+                result.result = None
+                if result._debugInfo is not None:
+                    result._debugInfo.failResult = None
+                result = resultResult
+                continue
+
             # a deferred was yielded, get the result.
             def gotResult(r):
                 if waiting[0]:
@@ -9,11 +9,16 @@ listeners or connectors are added)::
 
     from twisted.internet import epollreactor
     epollreactor.install()
+
+To use edge-triggered notifications instead (see L{EPollReactor})::
+
+    from twisted.internet import epollreactor
+    epollreactor.install(edgeTriggered=True)
 """
 
 from __future__ import division, absolute_import
 
-from select import epoll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT
+from select import epoll, poll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT
 import errno
 
 from zope.interface import implementer
@@ -23,6 +28,13 @@ from twisted.internet.interfaces import IReactorFDSet
 from twisted.python import log
 from twisted.internet import posixbase
 
+try:
+    from select import EPOLLET
+except ImportError:
+    # Python 2's select module does not define it; this is its value on every
+    # Linux architecture.
+    EPOLLET = 1 << 31
+
 
 @implementer(IReactorFDSet)
 class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
@@ -51,6 +63,36 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
     @ivar _continuousPolling: A L{_ContinuousPolling} instance, used to handle
         file descriptors (e.g. filesystem files) that are not supported by
         C{epoll(7)}.
+
+    @ivar _edgeTriggered: Whether descriptors are registered for
+        edge-triggered notifications.
+    @type _edgeTriggered: L{bool}
+
+    @ivar _registered: In level-triggered mode, a L{dict} mapping each
+        registered file descriptor to the events it is registered with
+        C{_poller} for.
+
+    @ivar _changed: In level-triggered mode, a L{set} of the registered file
+        descriptors whose events may need to be modified before the next poll.
+
+    @ivar _ready: In edge-triggered mode, a L{dict} mapping file descriptors
+        to the events they are believed to be ready for.  Once the kernel has
+        reported an event for a descriptor it will not report it again until
+        the descriptor's state changes, so this remembers it until the event
+        is known to have been dealt with.
+
+    @ivar _pending: In edge-triggered mode, a L{set} of the file descriptors
+        in C{_ready} which should be dispatched as soon as possible, without
+        waiting for the kernel to report anything new about them.
+
+    @ivar _levels: In edge-triggered mode, a C{poll} object which the
+        descriptors in C{_pending} are registered with, only while it is
+        used to check their readiness.
+
+    @ivar debug: In edge-triggered mode, whether events are dispatched within
+        the logging context of their C{FileDescriptor}, as they always are in
+        level-triggered mode.  This adds noticeable overhead to every event.
+    @type debug: L{bool}
     """
 
     # Attributes for _PollLikeMixin
@@ -58,10 +100,23 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
     _POLL_IN = EPOLLIN
     _POLL_OUT = EPOLLOUT
 
-    def __init__(self):
+    debug = False
+
+    def __init__(self, edgeTriggered=False):
         """
         Initialize epoll object, file descriptor tracking dictionaries, and the
         base class.
+
+        @param edgeTriggered: If C{True}, register descriptors for
+            edge-triggered rather than level-triggered notifications.  Each
+            descriptor is then registered for both reading and writing
+            while it is in either set, so that starting or stopping reading
+            or writing on a descriptor which is already registered needs no
+            system call, and events are dispatched without the per-event
+            overhead of setting up a logging context (see C{debug}).
+        @type edgeTriggered: L{bool}
+
+        @since: 16.5
         """
         # Create the poller we're going to use.  The 1024 here is just a hint
         # to the kernel, it is not a hard maximum.  After Linux 2.6.8, the size
@@ -71,6 +126,12 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         self._writes = set()
         self._selectables = {}
         self._continuousPolling = posixbase._ContinuousPolling(self)
+        self._edgeTriggered = edgeTriggered
+        self._registered = {}
+        self._changed = set()
+        self._ready = {}
+        self._pending = set()
+        self._levels = poll()
         posixbase.PosixReactorBase.__init__(self)
 
 
@@ -83,17 +144,15 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         """
         fd = xer.fileno()
         if fd not in primary:
-            flags = event
-            # epoll_ctl can raise all kinds of IOErrors, and every one
-            # indicates a bug either in the reactor or application-code.
-            # Let them all through so someone sees a traceback and fixes
-            # something.  We'll do the same thing for every other call to
-            # this method in this file.
             if fd in other:
-                flags |= antievent
-                self._poller.modify(fd, flags)
+                self._interestChanged(fd)
             else:
-                self._poller.register(fd, flags)
+                # epoll_ctl can raise all kinds of IOErrors, and every one
+                # indicates a bug either in the reactor or application-code.
+                # Let them all through so someone sees a traceback and fixes
+                # something.  We'll do the same thing for every other call to
+                # this method in this file.
+                self._register(fd, event)
 
             # Update our own tracking state *only* after the epoll call has
             # succeeded.  Otherwise we may get out of sync.
@@ -101,6 +160,87 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             selectables[fd] = xer
 
 
+    def _register(self, fd, event):
+        """
+        Register a new file descriptor with the poller.
+
+        @param fd: The file descriptor.
+        @type fd: L{int}
+
+        @param event: The event the descriptor is first wanted for; in
+            edge-triggered mode it is registered for all events regardless.
+        @type event: L{int}
+        """
+        if self._edgeTriggered:
+            self._poller.register(fd, EPOLLIN | EPOLLOUT | EPOLLET)
+        else:
+            self._poller.register(fd, event)
+            self._registered[fd] = event
+
+
+    def _unregister(self, fd):
+        """
+        Unregister a file descriptor from the poller and forget everything
+        about it.
+
+        @param fd: The file descriptor.
+        @type fd: L{int}
+        """
+        self._poller.unregister(fd)
+        self._registered.pop(fd, None)
+        self._changed.discard(fd)
+        self._ready.pop(fd, None)
+        self._pending.discard(fd)
+
+
+    def _interestChanged(self, fd):
+        """
+        Note that a registered file descriptor has started or stopped being
+        read or written.
+
+        In level-triggered mode the events it is registered for are updated
+        before the next poll, so that a descriptor which starts and stops
+        writing (or vice versa) several times in one iteration costs at most
+        one system call.  In edge-triggered mode the descriptor is registered
+        for all events anyway, but if it is already known to be ready it must
+        be dispatched without waiting for the kernel.
+
+        @param fd: The file descriptor.
+        @type fd: L{int}
+        """
+        if self._edgeTriggered:
+            if fd in self._ready:
+                self._pending.add(fd)
+        else:
+            self._changed.add(fd)
+
+
+    def _applyChanges(self):
+        """
+        Update the events registered with the poller for the file descriptors
+        in C{_changed}.
+        """
+        changed = self._changed
+        self._changed = set()
+        for fd in changed:
+            flags = 0
+            if fd in self._reads:
+                flags |= EPOLLIN
+            if fd in self._writes:
+                flags |= EPOLLOUT
+            if flags != self._registered[fd]:
+                try:
+                    # See comment above _register call in _add.
+                    self._poller.modify(fd, flags)
+                except IOError as e:
+                    # The descriptor was closed without being removed from
+                    # the reactor first, so the kernel has already forgotten
+                    # about it; the application will find out soon enough.
+                    if e.errno not in (errno.ENOENT, errno.EBADF):
+                        raise
+                self._registered[fd] = flags
+
+
     def addReader(self, reader):
         """
         Add a FileDescriptor for notification of data available to read.
@@ -151,13 +291,11 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
                 return
         if fd in primary:
             if fd in other:
-                flags = antievent
-                # See comment above modify call in _add.
-                self._poller.modify(fd, flags)
+                self._interestChanged(fd)
             else:
+                # See comment above _register call in _add.
+                self._unregister(fd)
                 del selectables[fd]
-                # See comment above _control call in _add.
-                self._poller.unregister(fd)
             primary.remove(fd)
 
 
@@ -207,7 +345,12 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         """
         Poll the poller for new events.
         """
-        if timeout is None:
+        if self._changed:
+            self._applyChanges()
+        if self._pending:
+            # There are events to dispatch already.
+            timeout = 0
+        elif timeout is None:
             timeout = -1  # Wait indefinitely.
 
         try:
@@ -225,6 +368,10 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             # loudly.
             raise
 
+        if self._edgeTriggered:
+            self._dispatchReady(l)
+            return
+
         _drdw = self._doReadOrWrite
         for fd, event in l:
             try:
@@ -234,14 +381,90 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             else:
                 log.callWithLogger(selectable, _drdw, selectable, fd, event)
 
+
+    def _dispatchReady(self, events):
+        """
+        Record the events reported by the poller in edge-triggered mode, then
+        dispatch every ready event which is currently wanted.
+
+        A C{FileDescriptor} may not read or write everything it could in one
+        go, and the kernel will not report the descriptor again unless its
+        state changes, so every descriptor which is dispatched is added to
+        C{_pending} and its readiness is checked again, for all of them with
+        a single system call, on the next iteration.  Descriptors which are
+        ready but not wanted, such as every idle connection which is
+        writable, cost nothing per iteration.
+
+        @param events: The C{(fd, event)} pairs reported by the poller.
+        @type events: L{list}
+        """
+        ready = self._ready
+        pending = self._pending
+        # Only these descriptors can have wanted events: any other descriptor
+        # in ready was not wanted when it was last looked at, and would have
+        # been added to pending if it had been wanted since.
+        candidates = list(pending)
+        if pending:
+            levels = self._levels
+            for fd in pending:
+                ready.pop(fd, None)
+                levels.register(fd, EPOLLIN | EPOLLOUT)
+            try:
+                results = levels.poll(0)
+            finally:
+                for fd in pending:
+                    levels.unregister(fd)
+            pending.clear()
+            for fd, event in results:
+                # poll(2) and epoll(7) event bits have the same values.
+                event &= EPOLLIN | EPOLLOUT | EPOLLHUP | EPOLLERR
+                if event:
+                    ready[fd] = event
+        for fd, event in events:
+            ready[fd] = ready.get(fd, 0) | event
+            candidates.append(fd)
+
+        reads = self._reads
+        writes = self._writes
+        selectables = self._selectables
+        _drdw = self._doReadOrWrite
+        debug = self.debug
+        for fd in candidates:
+            if fd in pending:
+                # Already dispatched.
+                continue
+            event = ready.get(fd, 0)
+            wanted = self._POLL_DISCONNECTED
+            if fd in reads:
+                wanted |= EPOLLIN
+            if fd in writes:
+                wanted |= EPOLLOUT
+            event &= wanted
+            if not event:
+                continue
+            selectable = selectables[fd]
+            pending.add(fd)
+            if debug:
+                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+            else:
+                try:
+                    _drdw(selectable, fd, event)
+                except:
+                    # Like callWithLogger, make sure the remaining events
+                    # are dispatched; they will not be reported again.
+                    log.err()
+
     doIteration = doPoll
 
 
-def install():
+def install(edgeTriggered=False):
     """
     Install the epoll() reactor.
+
+    @param edgeTriggered: See L{EPollReactor.__init__}.
+    @type edgeTriggered: L{bool}
     """
-    p = EPollReactor()
+    p = EPollReactor(edgeTriggered)
     from twisted.internet.main import installReactor
     installReactor(p)
 
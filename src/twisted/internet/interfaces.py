@@ -1994,6 +1994,27 @@ class IFileDescriptorReceiver(Interface):
 
 
 
+class IBufferAwareProtocol(Interface):
+    """
+    A marker interface for an L{IProtocol} whose C{dataReceived} accepts any
+    object supporting the buffer protocol, such as a L{memoryview}, and not
+    just L{bytes}.
+
+    Transports which support it may deliver received data to such a protocol
+    as a L{memoryview} of a buffer which the transport re-uses for subsequent
+    reads, avoiding an allocation for every read.  The view is only valid for
+    the duration of the C{dataReceived} call: a protocol which needs to keep
+    any of the data around afterwards must copy it, for example with
+    C{bytes(data)} or by concatenating it to some L{bytes}.
+
+    Transports which do not support it simply deliver L{bytes}, so a protocol
+    providing this interface must handle those too.
+
+    @since: 16.5
+    """
+
+
+
 class IProtocolFactory(Interface):
     """
     Interface for protocol factories.
@@ -2186,6 +2207,43 @@ class IUNIXTransport(ITransport):
 
 
 
+class ISendFileTransport(Interface):
+    """
+    A transport which can send the contents of a file without copying them
+    through user space, using a facility such as C{sendfile(2)}.
+
+    @since: 16.5
+    """
+    def sendFile(fileObject, offset, count):
+        """
+        Send part of a file over this transport.
+
+        The file data is sent after any data already written to the transport
+        and before any data written to it afterwards.  Only one file can be
+        sent at a time.  The caller must not use or close C{fileObject} until
+        the returned L{Deferred} has fired.
+
+        @param fileObject: A file object with a C{fileno} method.
+
+        @param offset: The offset in the file of the first byte to send.
+        @type offset: L{int}
+
+        @param count: The number of bytes to send.
+        @type count: L{int}
+
+        @return: A L{Deferred} which fires with the number of bytes sent,
+            which is less than C{count} only if the file ended first, or which
+            fails if the connection is lost before all of them are sent.
+        @rtype: L{Deferred}
+
+        @raise NotImplementedError: If the file cannot be sent this way right
+            now; for example because TLS has been started on the transport or
+            because C{fileObject} is not backed by a file descriptor.  The
+            caller should send the file by other means instead.
+        """
+
+
+
 class IOpenSSLServerConnectionCreator(Interface):
     """
     A provider of L{IOpenSSLServerConnectionCreator} can create
@@ -267,6 +267,11 @@ class PosixReactorBase(_SignalReactorMixin, _DisconnectSelectableMixin,
 
     @ivar _childWaker: L{None} or a reference to the L{_SIGCHLDWaker}
         which is used to properly notice child process termination.
+
+    @ivar _reusePorts: If C{True}, set C{SO_REUSEPORT} on the sockets of the
+        TCP ports this reactor listens on (see L{tcp.Port._reusePort}).  The
+        worker processes of C{twist --workers} set this on their reactor.
+    @type _reusePorts: L{bool}
     """
 
     # Callable that creates a waker, overrideable so that subclasses can
@@ -287,6 +292,8 @@ class PosixReactorBase(_SignalReactorMixin, _DisconnectSelectableMixin,
 
 
     _childWaker = None
+    _reusePorts = False
+
     def _handleSignals(self):
         """
         Extend the basic signal handling logic to also support
@@ -475,6 +482,7 @@ class PosixReactorBase(_SignalReactorMixin, _DisconnectSelectableMixin,
 
     def listenTCP(self, port, factory, backlog=50, interface=''):
         p = tcp.Port(port, factory, backlog, interface, self)
+        p._reusePort = self._reusePorts
         p.startListening()
         return p
 
@@ -508,6 +516,7 @@ class PosixReactorBase(_SignalReactorMixin, _DisconnectSelectableMixin,
         elif ssl is not None:
             p = ssl.Port(
                 port, factory, contextFactory, backlog, interface, self)
+            p._reusePort = self._reusePorts
             p.startListening()
             return p
         else:
@@ -11,12 +11,13 @@ End users shouldn't use this module directly - use the reactor APIs instead.
 from __future__ import division, absolute_import
 
 # System Imports
+import os
 import socket
 import sys
 import operator
 import struct
 
-from zope.interface import implementer
+from zope.interface import implementer, classImplements
 
 from twisted.python.compat import _PY3, lazyByteSlice
 from twisted.python.runtime import platformType
@@ -59,6 +60,7 @@ if platformType == 'win32':
     ENOMEM = object()
     EAGAIN = EWOULDBLOCK
     from errno import WSAECONNRESET as ECONNABORTED
+    from errno import WSAEINTR as EINTR
 
     from twisted.python.win32 import formatError as strerror
 else:
@@ -74,6 +76,7 @@ else:
     from errno import ENOMEM
     from errno import EAGAIN
     from errno import ECONNABORTED
+    from errno import EINTR
 
     from os import strerror
 
@@ -87,11 +90,15 @@ from twisted.python import log, failure, reflect
 from twisted.python.util import untilConcludes
 from twisted.internet.error import CannotListenError
 from twisted.internet import abstract, main, interfaces, error
+from twisted.internet.defer import Deferred
 from twisted.internet.protocol import Protocol
 
 # Not all platforms have, or support, this flag.
 _AI_NUMERICSERV = getattr(socket, "AI_NUMERICSERV", 0)
 
+# os.sendfile is only available on Python 3 on POSIX platforms.
+_sendfile = getattr(os, "sendfile", None)
+
 
 # The type for service names passed to socket.getservbyname:
 if _PY3:
@@ -135,6 +142,107 @@ class _SocketCloser(object):
 
 
 
+class _FileRegion(object):
+    """
+    The state of a file being sent by L{Connection.sendFile}.
+
+    @ivar fileno: The file descriptor of the file.
+    @type fileno: L{int}
+
+    @ivar offset: The offset in the file of the next byte to send.
+    @type offset: L{int}
+
+    @ivar remaining: The number of bytes left to send.
+    @type remaining: L{int}
+
+    @ivar sent: The number of bytes sent so far.
+    @type sent: L{int}
+
+    @ivar ahead: The number of bytes which were written to the connection
+        before the file and which have yet to be sent.
+    @type ahead: L{int}
+
+    @ivar deferred: The L{Deferred} returned by L{Connection.sendFile}.
+    """
+    def __init__(self, fileno, offset, count, ahead):
+        self.fileno = fileno
+        self.offset = offset
+        self.remaining = count
+        self.sent = 0
+        self.ahead = ahead
+        self.deferred = Deferred()
+
+
+
+class _ReadBuffer(object):
+    """
+    A re-usable buffer for reading from a socket with C{recv_into}, whose
+    size adapts to the sizes of the reads which have been made into it.
+
+    The buffer doubles in size, up to C{maximumSize}, whenever a read fills
+    it, and halves in size, down to C{minimumSize}, after C{shrinkAfter}
+    consecutive reads which used no more than a quarter of it.  A new buffer
+    is allocated when the size changes, rather than resizing the existing one,
+    since a protocol may not have released its view of it yet.
+
+    @ivar buffer: The buffer to read into.
+    @type buffer: L{bytearray}
+
+    @ivar view: A L{memoryview} of C{buffer}, from which the slices delivered
+        to the protocol are taken.
+    @type view: L{memoryview}
+
+    @ivar maximumSize: The largest the buffer may grow to.
+    @type maximumSize: L{int}
+
+    @ivar _small: The number of consecutive reads which used no more than a
+        quarter of the buffer.
+    @type _small: L{int}
+    """
+    initialSize = 2 ** 12
+    minimumSize = 2 ** 10
+    shrinkAfter = 16
+
+    def __init__(self, maximumSize):
+        """
+        @param maximumSize: The largest the buffer may grow to.
+        @type maximumSize: L{int}
+        """
+        self.maximumSize = maximumSize
+        self._small = 0
+        self._allocate(min(self.initialSize, maximumSize))
+
+
+    def _allocate(self, size):
+        """
+        Replace the buffer with a new one of C{size} bytes.
+        """
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+
+    def adapt(self, count):
+        """
+        Adjust the size of the buffer after a read.
+
+        @param count: The number of bytes the read placed in the buffer.
+        @type count: L{int}
+        """
+        size = len(self.buffer)
+        if count == size:
+            self._small = 0
+            if size < self.maximumSize:
+                self._allocate(min(size * 2, self.maximumSize))
+        elif count <= size // 4 and size > self.minimumSize:
+            self._small += 1
+            if self._small >= self.shrinkAfter:
+                self._small = 0
+                self._allocate(max(size // 2, self.minimumSize))
+        else:
+            self._small = 0
+
+
+
 class _AbortingMixin(object):
     """
     Common implementation of C{abortConnection}.
@@ -175,6 +283,17 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
     @type logstr: C{str}
     """
 
+    # Where the platform offers sendmsg(2), write all buffered chunks with a
+    # single scatter/gather call instead of concatenating them first.
+    _vectoredWrites = getattr(socket.socket, "sendmsg", None) is not None
+
+    # The _FileRegion being sent by sendFile, if any.
+    _sendingFile = None
+
+    # The _ReadBuffer used to deliver data to a protocol which provides
+    # IBufferAwareProtocol, created the first time one is read for.
+    _readBuffer = None
+
 
     def __init__(self, skt, protocol, reactor=None):
         abstract.FileDescriptor.__init__(self, reactor=reactor)
@@ -196,7 +315,15 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         calls self.dataReceived(data) to process it.  If the connection is not
         lost through an error in the physical recv(), this function will return
         the result of the dataReceived call.
+
+        If the protocol provides L{interfaces.IBufferAwareProtocol}, the data
+        is instead read into a re-usable buffer and delivered as a
+        L{memoryview}; see L{_ReadBuffer}.
         """
+        # On Python 2 a memoryview cannot be concatenated to a str, which
+        # is what most protocols will do with it.
+        if _PY3 and interfaces.IBufferAwareProtocol.providedBy(self.protocol):
+            return self._doReadInto()
         try:
             data = self.socket.recv(self.bufferSize)
         except socket.error as se:
@@ -208,6 +335,29 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         return self._dataReceived(data)
 
 
+    def _doReadInto(self):
+        """
+        Like L{doRead}, but read into a re-usable buffer and deliver a
+        L{memoryview} of the data read to a protocol which provides
+        L{interfaces.IBufferAwareProtocol}.
+        """
+        readBuffer = self._readBuffer
+        if readBuffer is None:
+            readBuffer = self._readBuffer = _ReadBuffer(self.bufferSize)
+        try:
+            count = self.socket.recv_into(readBuffer.buffer)
+        except socket.error as se:
+            if se.args[0] == EWOULDBLOCK:
+                return
+            else:
+                return main.CONNECTION_LOST
+        if not count:
+            return main.CONNECTION_DONE
+        data = readBuffer.view[:count]
+        readBuffer.adapt(count)
+        return self._dataReceived(data)
+
+
     def _dataReceived(self, data):
         if not data:
             return main.CONNECTION_DONE
@@ -245,6 +395,96 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
                 return main.CONNECTION_LOST
 
 
+    def _writeSomeVectors(self, vectors):
+        """
+        Write as much as possible of the given chunks of data to this TCP
+        connection with a single C{sendmsg} call.
+
+        If the connection is lost, an exception is returned.  Otherwise, the
+        number of bytes successfully written is returned.
+        """
+        try:
+            return untilConcludes(self.socket.sendmsg, vectors)
+        except socket.error as se:
+            if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                return 0
+            else:
+                return main.CONNECTION_LOST
+
+
+    def sendFile(self, fileObject, offset, count):
+        """
+        Send part of a file over this connection using C{sendfile(2)}.
+
+        @see: L{twisted.internet.interfaces.ISendFileTransport.sendFile}
+        """
+        if _sendfile is None or self.TLS:
+            raise NotImplementedError(
+                "sendfile is not available on this connection")
+        try:
+            fileno = fileObject.fileno()
+        except (AttributeError, ValueError, IOError, OSError):
+            raise NotImplementedError(
+                "%r has no file descriptor" % (fileObject,))
+        if self._sendingFile is not None:
+            raise RuntimeError("A file is already being sent")
+        ahead = len(self.dataBuffer) - self.offset + self._tempDataLen
+        region = _FileRegion(fileno, offset, count, ahead)
+        self._sendingFile = region
+        self.startWriting()
+        return region.deferred
+
+
+    def doWrite(self):
+        """
+        Send buffered data and, if L{sendFile} has been called, the file.
+
+        @see: L{abstract.FileDescriptor.doWrite}
+        """
+        region = self._sendingFile
+        if region is None:
+            return abstract.FileDescriptor.doWrite(self)
+
+        if region.ahead:
+            # First send what was written before the file.
+            if len(self.dataBuffer) - self.offset < region.ahead:
+                self.dataBuffer = abstract._concatenate(
+                    self.dataBuffer, self.offset, self._tempDataBuffer)
+                self.offset = 0
+                self._tempDataBuffer = []
+                self._tempDataLen = 0
+            l = self.writeSomeData(
+                lazyByteSlice(self.dataBuffer, self.offset, region.ahead))
+            if isinstance(l, Exception) or l < 0:
+                return l
+            self.offset += l
+            region.ahead -= l
+            if region.ahead:
+                return None
+
+        try:
+            sent = _sendfile(
+                self.fileno(), region.fileno, region.offset,
+                min(region.remaining, self.SEND_LIMIT))
+        except (IOError, OSError) as e:
+            if e.errno in (EWOULDBLOCK, EAGAIN, EINTR):
+                return None
+            return main.CONNECTION_LOST
+        region.offset += sent
+        region.remaining -= sent
+        region.sent += sent
+        if sent and region.remaining:
+            return None
+
+        self._sendingFile = None
+        region.deferred.callback(region.sent)
+        if self.offset < len(self.dataBuffer) or self._tempDataBuffer:
+            # Send what was written after the file on the next iteration.
+            return None
+        # Let the base implementation deal with the now empty buffer.
+        return abstract.FileDescriptor.doWrite(self)
+
+
     def _closeWriteConnection(self):
         try:
             self.socket.shutdown(1)
@@ -283,6 +523,10 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         # since twisted.internet._oldtls does evil things to it:
         if not hasattr(self, "socket"):
             return
+        region = self._sendingFile
+        if region is not None:
+            self._sendingFile = None
+            region.deferred.errback(reason)
         abstract.FileDescriptor.connectionLost(self, reason)
         self._closeSocket(not reason.check(error.ConnectionAborted))
         protocol = self.protocol
@@ -313,6 +557,9 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, enabled)
 
 
+if _sendfile is not None:
+    classImplements(Connection, interfaces.ISendFileTransport)
+
 
 
 class _BaseBaseClient(object):
@@ -891,6 +1138,12 @@ class Port(base.BasePort, _SocketCloser):
         was created and initialized outside of the reactor and will be used to
         listen for connections (instead of a new socket being created by this
         L{Port}).
+
+    @ivar _reusePort: If C{True}, set C{SO_REUSEPORT} on the listening socket,
+        so that several processes can each listen on the same address and have
+        the kernel spread incoming connections between them.  This is set for
+        the ports of a reactor whose C{_reusePorts} attribute is true.
+    @type _reusePort: L{bool}
     """
 
     socketType = socket.SOCK_STREAM
@@ -910,6 +1163,8 @@ class Port(base.BasePort, _SocketCloser):
     # our own.
     _preexistingSocket = None
 
+    _reusePort = False
+
     addressFamily = socket.AF_INET
     _addressType = address.IPv4Address
 
@@ -961,6 +1216,8 @@ class Port(base.BasePort, _SocketCloser):
         s = base.BasePort.createInternetSocket(self)
         if platformType == "posix" and sys.platform != "cygwin":
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self._reusePort:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         return s
 
 
@@ -47,6 +47,23 @@ class TestTimeoutError(Exception):
 
 
 
+try:
+    from twisted.internet.epollreactor import EPollReactor
+except ImportError:
+    pass
+else:
+    class _EdgeTriggeredEPollReactor(EPollReactor):
+        """
+        An L{EPollReactor} using edge-triggered notifications, so that
+        L{ReactorBuilder} tests are run against that mode as well.
+        """
+        _edgeTriggered = True
+
+        def __init__(self):
+            EPollReactor.__init__(self, edgeTriggered=True)
+
+
+
 def needsRunningReactor(reactor, thunk):
     """
     Various functions within these tests need an already-running reactor at
@@ -157,7 +174,9 @@ class ReactorBuilder:
         else:
             _reactors.extend([
                     "twisted.internet.pollreactor.PollReactor",
-                    "twisted.internet.epollreactor.EPollReactor"])
+                    "twisted.internet.epollreactor.EPollReactor",
+                    "twisted.internet.test.reactormixins."
+                    "_EdgeTriggeredEPollReactor"])
             if not platform.isLinux():
                 # Presumably Linux is not going to start supporting kqueue, so
                 # skip even trying this configuration.
@@ -7,11 +7,17 @@ Tests for L{twisted.internet.epollreactor}.
 
 from __future__ import division, absolute_import
 
+import socket
+
 from twisted.trial.unittest import TestCase
 try:
     from twisted.internet.epollreactor import _ContinuousPolling
 except ImportError:
     _ContinuousPolling = None
+try:
+    from twisted.internet.epollreactor import EPollReactor, EPOLLIN, EPOLLOUT
+except ImportError:
+    EPollReactor = None
 from twisted.internet.task import Clock
 from twisted.internet.error import ConnectionDone
 
@@ -246,3 +252,204 @@ class ContinuousPollingTests(TestCase):
 
     if _ContinuousPolling is None:
         skip = "epoll not supported in this environment."
+
+
+
+class RecordingPoller(object):
+    """
+    A wrapper around an C{epoll} object which records the registrations made
+    with it.
+
+    @ivar calls: A L{list} of C{(method name, fd, flags)} tuples, with a
+        C{flags} of L{None} for C{unregister}.
+    """
+    def __init__(self, poller):
+        self._poller = poller
+        self.calls = []
+
+
+    def register(self, fd, flags):
+        self.calls.append(("register", fd, flags))
+        self._poller.register(fd, flags)
+
+
+    def modify(self, fd, flags):
+        self.calls.append(("modify", fd, flags))
+        self._poller.modify(fd, flags)
+
+
+    def unregister(self, fd):
+        self.calls.append(("unregister", fd, None))
+        self._poller.unregister(fd)
+
+
+    def poll(self, *args):
+        return self._poller.poll(*args)
+
+
+
+class SocketDescriptor(object):
+    """
+    Records reads and writes on a socket, reading only one byte at a time.
+    """
+    def __init__(self, skt):
+        self.socket = skt
+        self.events = []
+
+
+    def fileno(self):
+        return self.socket.fileno()
+
+
+    def logPrefix(self):
+        return "SocketDescriptor"
+
+
+    def doRead(self):
+        self.events.append(self.socket.recv(1))
+
+
+    def doWrite(self):
+        self.events.append("write")
+
+
+    def connectionLost(self, reason):
+        self.events.append("lost")
+
+
+
+class EPollReactorTests(TestCase):
+    """
+    Tests for the management of descriptors by L{EPollReactor}.
+    """
+    def buildReactor(self, edgeTriggered):
+        """
+        Create an L{EPollReactor} whose poller is a L{RecordingPoller}, and a
+        L{SocketDescriptor} for one end of a connected pair of sockets.
+
+        @return: The reactor, the descriptor and the other socket.
+        """
+        ours, theirs = socket.socketpair()
+        self.addCleanup(ours.close)
+        self.addCleanup(theirs.close)
+        reactor = EPollReactor(edgeTriggered)
+        reactor._poller = RecordingPoller(reactor._poller)
+        self.addCleanup(reactor._poller._poller.close)
+        self.addCleanup(reactor.waker.connectionLost, None)
+        self.addCleanup(reactor.removeAll)
+        descriptor = SocketDescriptor(ours)
+        reactor._poller.calls = []
+        return reactor, descriptor, theirs
+
+
+    def test_coalesceInterestChanges(self):
+        """
+        In level-triggered mode, starting and stopping writing on a descriptor
+        which is also being read from only modifies its registration when it
+        is next polled, and not at all if it ends up the same.
+        """
+        reactor, descriptor, theirs = self.buildReactor(False)
+        fd = descriptor.fileno()
+        reactor.addReader(descriptor)
+        for i in range(3):
+            reactor.addWriter(descriptor)
+            reactor.removeWriter(descriptor)
+        reactor.addWriter(descriptor)
+        self.assertEqual(reactor._poller.calls, [("register", fd, EPOLLIN)])
+        reactor.doIteration(0)
+        self.assertEqual(
+            reactor._poller.calls,
+            [("register", fd, EPOLLIN), ("modify", fd, EPOLLIN | EPOLLOUT)])
+        self.assertEqual(descriptor.events, ["write"])
+
+        reactor._poller.calls = []
+        reactor.removeWriter(descriptor)
+        reactor.addWriter(descriptor)
+        reactor.doIteration(0)
+        self.assertEqual(reactor._poller.calls, [])
+
+
+    def test_unregisterImmediately(self):
+        """
+        In level-triggered mode, a descriptor which is no longer being read
+        from or written to is unregistered straight away, even if its
+        registration was due to be modified, since it may be closed and its
+        file descriptor re-used before the next poll.
+        """
+        reactor, descriptor, theirs = self.buildReactor(False)
+        fd = descriptor.fileno()
+        reactor.addReader(descriptor)
+        reactor.addWriter(descriptor)
+        reactor.removeReader(descriptor)
+        reactor.removeWriter(descriptor)
+        self.assertEqual(
+            reactor._poller.calls,
+            [("register", fd, EPOLLIN), ("unregister", fd, None)])
+        reactor.doIteration(0)
+        self.assertEqual(len(reactor._poller.calls), 2)
+
+
+    def test_edgeTriggeredRegistration(self):
+        """
+        In edge-triggered mode, a descriptor is registered once for all
+        events, and starting and stopping reading or writing does not modify
+        its registration.
+        """
+        reactor, descriptor, theirs = self.buildReactor(True)
+        reactor.addReader(descriptor)
+        reactor.addWriter(descriptor)
+        reactor.removeWriter(descriptor)
+        reactor.doIteration(0)
+        reactor.addWriter(descriptor)
+        reactor.removeReader(descriptor)
+        reactor.doIteration(0)
+        self.assertEqual(
+            [call[0] for call in reactor._poller.calls], ["register"])
+
+
+    def test_edgeTriggeredPartialRead(self):
+        """
+        In edge-triggered mode, a descriptor which does not read all of the
+        available data is dispatched again until it has, even though the
+        kernel only reports it as readable once.
+        """
+        reactor, descriptor, theirs = self.buildReactor(True)
+        reactor.addReader(descriptor)
+        theirs.send(b"abc")
+        for i in range(5):
+            reactor.doIteration(0)
+        self.assertEqual(descriptor.events, [b"a", b"b", b"c"])
+
+
+    def test_edgeTriggeredReadyWhileNotReading(self):
+        """
+        In edge-triggered mode, a descriptor which became readable while it
+        was not being read from is dispatched as soon as it starts reading
+        again, without waiting for the kernel to report anything new.
+        """
+        reactor, descriptor, theirs = self.buildReactor(True)
+        reactor.addWriter(descriptor)
+        theirs.send(b"a")
+        reactor.doIteration(0)
+        reactor.removeWriter(descriptor)
+        reactor.addReader(descriptor)
+        descriptor.events = []
+        reactor.doIteration(5)
+        self.assertEqual(descriptor.events, [b"a"])
+
+
+    def test_edgeTriggeredIdleWritable(self):
+        """
+        In edge-triggered mode, a descriptor which is writable but not being
+        written to is not dispatched, and does not stop the reactor from
+        blocking.
+        """
+        reactor, descriptor, theirs = self.buildReactor(True)
+        reactor.addReader(descriptor)
+        reactor.doIteration(0)
+        reactor.doIteration(0)
+        self.assertEqual(descriptor.events, [])
+        self.assertEqual(reactor._pending, set())
+
+    if EPollReactor is None:
+        skip = "epoll not supported in this environment."
@@ -286,8 +286,8 @@ class ReactorFDSetTestsBuilder(ReactorBuilder):
         reactor = self.buildReactor()
 
         name = reactor.__class__.__name__
-        if name in ('EPollReactor', 'KQueueReactor', 'CFReactor',
-                    'AsyncioSelectorReactor'):
+        if name in ('EPollReactor', '_EdgeTriggeredEPollReactor',
+                    'KQueueReactor', 'CFReactor', 'AsyncioSelectorReactor'):
             # Closing a file descriptor immediately removes it from the epoll
             # set without generating a notification.  That means epollreactor
             # will not call any methods on Victim after the close, so there's
@@ -97,3 +97,109 @@ class WriteDescriptorTests(SynchronousTestCase):
         descriptor = MemoryFile()
         descriptor.write(b"hello, world")
         self.assertIsNone(descriptor.doWrite())
+
+
+
+class VectoredMemoryFile(MemoryFile):
+    """
+    A L{MemoryFile} which supports scatter/gather writes.
+
+    @ivar _vectors: A C{list} of the C{list}s of chunks passed to each call of
+        C{_writeSomeVectors}.
+    """
+    _vectoredWrites = True
+
+    def __init__(self):
+        MemoryFile.__init__(self)
+        self._vectors = []
+
+
+    def writeSomeData(self, data):
+        raise AssertionError("writeSomeData should not be called")
+
+
+    def _writeSomeVectors(self, vectors):
+        """
+        Copy at most C{self._freeSpace} bytes from C{vectors} into
+        C{self._written}.
+
+        @return: A C{int} indicating how many bytes were copied.
+        """
+        vectors = [bytes(v) for v in vectors]
+        self._vectors.append(vectors)
+        return MemoryFile.writeSomeData(self, b"".join(vectors))
+
+
+
+class VectoredWriteTests(SynchronousTestCase):
+    """
+    Tests for L{FileDescriptor.doWrite} with a descriptor which supports
+    scatter/gather writes.
+    """
+    def test_chunksNotConcatenated(self):
+        """
+        The buffered chunks are passed to C{_writeSomeVectors} separately.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor._freeSpace = 100
+        descriptor.write(b"head")
+        descriptor.writeSequence([b"body", b"tail"])
+        self.assertIsNone(descriptor.doWrite())
+        self.assertEqual(descriptor._vectors, [[b"head", b"body", b"tail"]])
+        self.assertEqual(b"".join(descriptor._written), b"headbodytail")
+        self.assertEqual(descriptor._tempDataBuffer, [])
+        self.assertEqual(descriptor._tempDataLen, 0)
+
+
+    def test_partialWrite(self):
+        """
+        When only part of the chunks can be written, the rest is sent by later
+        calls to L{FileDescriptor.doWrite}, starting with the remainder of the
+        partially written chunk.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor._freeSpace = 6
+        descriptor.writeSequence([b"abcd", b"efgh", b"ijkl"])
+        descriptor.doWrite()
+        self.assertEqual(descriptor.dataBuffer, b"efgh")
+        self.assertEqual(descriptor.offset, 2)
+        self.assertEqual(descriptor._tempDataBuffer, [b"ijkl"])
+        self.assertEqual(descriptor._tempDataLen, 4)
+
+        descriptor._freeSpace = 1
+        descriptor.doWrite()
+        self.assertEqual(descriptor.offset, 3)
+
+        descriptor._freeSpace = 100
+        descriptor.doWrite()
+        self.assertEqual(descriptor._vectors[-1], [b"h", b"ijkl"])
+        self.assertEqual(b"".join(descriptor._written), b"abcdefghijkl")
+        self.assertEqual(descriptor.dataBuffer, b"")
+        self.assertEqual(descriptor.offset, 0)
+        self.assertEqual(descriptor._tempDataLen, 0)
+
+
+    def test_vectorLimit(self):
+        """
+        No more than C{_VECTOR_LIMIT} chunks are passed to
+        C{_writeSomeVectors} at once.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor._VECTOR_LIMIT = 2
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"a", b"b", b"c"])
+        descriptor.doWrite()
+        descriptor.doWrite()
+        self.assertEqual(descriptor._vectors, [[b"a", b"b"], [b"c"]])
+
+
+    def test_connectionLost(self):
+        """
+        If C{_writeSomeVectors} returns an exception, L{FileDescriptor.doWrite}
+        returns it.
+        """
+        descriptor = VectoredMemoryFile()
+        exception = Exception()
+        descriptor._writeSomeVectors = lambda vectors: exception
+        descriptor.write(b"hello")
+        self.assertIs(descriptor.doWrite(), exception)
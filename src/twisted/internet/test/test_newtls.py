@@ -56,6 +56,30 @@ class BypassTLSTests(unittest.TestCase):
 
 
 
+class ConnectionMixinTests(unittest.TestCase):
+    """
+    Tests for the L{_newtls.ConnectionMixin} class.
+    """
+
+    if not _newtls:
+        skip = "Couldn't import _newtls, perhaps pyOpenSSL is old or missing"
+
+    def test_negotiatedProtocol(self):
+        """
+        C{ConnectionMixin.negotiatedProtocol} is L{None} until TLS is
+        started, and afterwards the protocol negotiated by the TLS layer.
+        """
+        class FakeTLS(object):
+            negotiatedProtocol = b'h2'
+
+        connection = _newtls.ConnectionMixin()
+        self.assertIsNone(connection.negotiatedProtocol)
+        connection.TLS = True
+        connection.protocol = FakeTLS()
+        self.assertEqual(connection.negotiatedProtocol, b'h2')
+
+
+
 class FakeProducer(object):
     """
     A producer that does nothing.
@@ -13,12 +13,14 @@ __metaclass__ = type
 import errno
 import socket
 
+from io import BytesIO
+
 from functools import wraps
 
 from zope.interface import implementer
 from zope.interface.verify import verifyClass
 
-from twisted.python.compat import long
+from twisted.python.compat import _PY3, long, intToBytes
 from twisted.python.runtime import platform
 from twisted.python.failure import Failure
 from twisted.python import log
@@ -42,8 +44,10 @@ from twisted.internet.defer import (
 from twisted.internet.endpoints import TCP4ServerEndpoint, TCP4ClientEndpoint
 from twisted.internet.protocol import ServerFactory, ClientFactory, Protocol
 from twisted.internet.interfaces import (
-    IPushProducer, IPullProducer, IHalfCloseableProtocol)
-from twisted.internet.tcp import Connection, Server, _resolveIPv6
+    IPushProducer, IPullProducer, IHalfCloseableProtocol, IBufferAwareProtocol)
+from twisted.internet.main import CONNECTION_DONE
+from twisted.internet.tcp import (
+    Connection, Port, Server, _ReadBuffer, _resolveIPv6, _sendfile)
 from twisted.internet.test.test_core import ObjectModelIntegrationMixin
 from twisted.test.test_tcp import MyClientFactory, MyServerFactory
 from twisted.test.test_tcp import ClosingFactory, ClientStartStopFactory
@@ -134,6 +138,17 @@ class FakeSocket(object):
     def recv(self, size):
         return self.data
 
+
+    def recv_into(self, buffer):
+        """
+        Copy as much of C{self.data} as will fit into C{buffer}.
+
+        @return: The number of bytes copied.
+        """
+        count = min(len(buffer), len(self.data))
+        buffer[:count] = self.data[:count]
+        return count
+
     def send(self, bytes):
         """
         I{Send} all of C{bytes} by accumulating it into C{self.sendBuffer}.
@@ -220,6 +235,30 @@ class FakeProtocol(Protocol):
 
 
 
+class AccumulatingProtocol(Protocol):
+    """
+    An L{IProtocol} which records the objects passed to its C{dataReceived}.
+
+    @ivar received: A L{list} of C{(type, bytes)} pairs giving the type of each
+        object passed to C{dataReceived} and its contents.
+    """
+    def __init__(self):
+        self.received = []
+
+
+    def dataReceived(self, data):
+        self.received.append((type(data), bytes(data)))
+
+
+
+@implementer(IBufferAwareProtocol)
+class BufferAwareProtocol(AccumulatingProtocol):
+    """
+    An L{AccumulatingProtocol} which accepts L{memoryview}s.
+    """
+
+
+
 @implementer(IReactorFDSet)
 class _FakeFDSetReactor(object):
     """
@@ -330,6 +369,41 @@ class TCPServerTests(TestCase):
 
 
 
+class TCPPortTests(TestCase):
+    """
+    Whitebox tests for L{twisted.internet.tcp.Port}.
+    """
+    def getReusePort(self, port):
+        """
+        Create the listening socket for C{port} and return its C{SO_REUSEPORT}
+        option.
+        """
+        skt = port.createInternetSocket()
+        self.addCleanup(skt.close)
+        return skt.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+
+
+    def test_reusePortDefault(self):
+        """
+        L{Port} does not set C{SO_REUSEPORT} on its socket by default.
+        """
+        self.assertFalse(self.getReusePort(Port(0, ServerFactory())))
+
+
+    def test_reusePort(self):
+        """
+        L{Port} sets C{SO_REUSEPORT} on its socket if its C{_reusePort}
+        attribute is true.
+        """
+        port = Port(0, ServerFactory())
+        port._reusePort = True
+        self.assertTrue(self.getReusePort(port))
+
+    if getattr(socket, "SO_REUSEPORT", None) is None:
+        skip = "SO_REUSEPORT is not available on this platform."
+
+
+
 class TCPConnectionTests(TestCase):
     """
     Whitebox tests for L{twisted.internet.tcp.Connection}.
@@ -379,6 +453,116 @@ class TCPConnectionTests(TestCase):
         test_tlsAfterStartTLS.skip = "No SSL support available"
 
 
+    def test_doReadBytes(self):
+        """
+        L{Connection.doRead} delivers L{bytes} to a protocol which does not
+        provide L{IBufferAwareProtocol}.
+        """
+        protocol = AccumulatingProtocol()
+        conn = Connection(FakeSocket(b"someData"), protocol)
+        conn.doRead()
+        self.assertEqual(protocol.received, [(bytes, b"someData")])
+        self.assertIs(conn._readBuffer, None)
+
+
+    def test_doReadBufferAware(self):
+        """
+        L{Connection.doRead} reads into a re-usable buffer and delivers a
+        L{memoryview} of the data read to a protocol which provides
+        L{IBufferAwareProtocol}.
+        """
+        skt = FakeSocket(b"someData")
+        protocol = BufferAwareProtocol()
+        conn = Connection(skt, protocol)
+        conn.doRead()
+        readBuffer = conn._readBuffer
+        skt.data = b"more"
+        conn.doRead()
+        self.assertEqual(
+            protocol.received,
+            [(memoryview, b"someData"), (memoryview, b"more")])
+        self.assertIs(conn._readBuffer, readBuffer)
+
+
+    def test_doReadBufferAwareConnectionDone(self):
+        """
+        L{Connection.doRead} returns L{CONNECTION_DONE} without calling the
+        protocol when reading into a buffer reads nothing.
+        """
+        protocol = BufferAwareProtocol()
+        conn = Connection(FakeSocket(b""), protocol)
+        self.assertIs(conn.doRead(), CONNECTION_DONE)
+        self.assertEqual(protocol.received, [])
+
+    if not _PY3:
+        skip = "Buffers are only read into on Python 3."
+        test_doReadBufferAware.skip = skip
+        test_doReadBufferAwareConnectionDone.skip = skip
+        del skip
+
+
+
+class ReadBufferTests(TestCase):
+    """
+    Tests for L{twisted.internet.tcp._ReadBuffer}.
+    """
+    def test_initialSize(self):
+        """
+        The buffer starts out at L{_ReadBuffer.initialSize} bytes, or the
+        maximum size if that is smaller.
+        """
+        self.assertEqual(
+            len(_ReadBuffer(2 ** 16).buffer), _ReadBuffer.initialSize)
+        self.assertEqual(len(_ReadBuffer(100).buffer), 100)
+
+
+    def test_grow(self):
+        """
+        The buffer doubles in size, up to the maximum size, whenever a read
+        fills it.
+        """
+        readBuffer = _ReadBuffer(_ReadBuffer.initialSize * 3)
+        readBuffer.adapt(_ReadBuffer.initialSize)
+        self.assertEqual(len(readBuffer.buffer), _ReadBuffer.initialSize * 2)
+        readBuffer.adapt(_ReadBuffer.initialSize * 2)
+        self.assertEqual(len(readBuffer.buffer), _ReadBuffer.initialSize * 3)
+        readBuffer.adapt(_ReadBuffer.initialSize * 3)
+        self.assertEqual(len(readBuffer.buffer), _ReadBuffer.initialSize * 3)
+        self.assertEqual(len(readBuffer.view), len(readBuffer.buffer))
+
+
+    def test_shrink(self):
+        """
+        The buffer halves in size after L{_ReadBuffer.shrinkAfter}
+        consecutive reads using no more than a quarter of it, but never
+        becomes smaller than L{_ReadBuffer.minimumSize}.
+        """
+        readBuffer = _ReadBuffer(2 ** 16)
+        size = _ReadBuffer.initialSize
+        for i in range(_ReadBuffer.shrinkAfter - 1):
+            readBuffer.adapt(1)
+        self.assertEqual(len(readBuffer.buffer), size)
+        readBuffer.adapt(1)
+        self.assertEqual(len(readBuffer.buffer), size // 2)
+        for i in range(_ReadBuffer.shrinkAfter * 10):
+            readBuffer.adapt(1)
+        self.assertEqual(len(readBuffer.buffer), _ReadBuffer.minimumSize)
+
+
+    def test_shrinkInterrupted(self):
+        """
+        A read using more than a quarter of the buffer resets the count of
+        consecutive small reads.
+        """
+        readBuffer = _ReadBuffer(2 ** 16)
+        size = _ReadBuffer.initialSize
+        for i in range(_ReadBuffer.shrinkAfter - 1):
+            readBuffer.adapt(1)
+        readBuffer.adapt(size // 2)
+        readBuffer.adapt(1)
+        self.assertEqual(len(readBuffer.buffer), size)
+
+
 
 class TCPCreator(EndpointCreator):
     """
@@ -1287,7 +1471,26 @@ class TCPPortTestsMixin(object):
 class TCPPortTestsBuilder(ReactorBuilder, ListenTCPMixin, TCPPortTestsMixin,
                           ObjectModelIntegrationMixin,
                           StreamTransportTestsMixin):
-    pass
+
+    def test_reusePorts(self):
+        """
+        The ports of a reactor whose C{_reusePorts} attribute is true set
+        C{SO_REUSEPORT} on their sockets, and so can listen on the same
+        address.
+        """
+        if getattr(socket, "SO_REUSEPORT", None) is None:
+            raise SkipTest("SO_REUSEPORT is not available on this platform.")
+        reactor = self.buildReactor()
+        if not hasattr(reactor, "_reusePorts"):
+            raise SkipTest("%r cannot reuse ports." % (reactor,))
+        reactor._reusePorts = True
+        first = reactor.listenTCP(0, ServerFactory(), interface="127.0.0.1")
+        second = reactor.listenTCP(
+            first.getHost().port, ServerFactory(), interface="127.0.0.1")
+        self.assertEqual(
+            [port.socket.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+             for port in (first, second)],
+            [1, 1])
 
 
 
@@ -1577,6 +1780,99 @@ class TCPConnectionTestsBuilder(ReactorBuilder):
             self, ListenerProtocol(), Client(), TCPCreator())
 
 
+    def test_sendFile(self):
+        """
+        C{sendFile} sends the given region of a file after any data written
+        before it and before any data written after it, and the L{Deferred} it
+        returns fires with the number of bytes sent.
+        """
+        content = b"".join(
+            [intToBytes(i) for i in range(Connection.SEND_LIMIT // 2)])
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(content)
+        offset = 3
+        count = len(content) - 10
+        results = []
+
+        class Sender(ConnectableProtocol):
+            def connectionMade(self):
+                self.source = open(path, "rb")
+                self.transport.write(b"before")
+                d = self.transport.sendFile(self.source, offset, count)
+                d.addCallback(results.append)
+                d.addBoth(lambda ignored: self.source.close())
+                self.transport.write(b"after")
+                self.transport.loseConnection()
+
+        class Receiver(ConnectableProtocol):
+            def __init__(self):
+                self.received = []
+
+            def dataReceived(self, data):
+                self.received.append(data)
+
+        receiver = Receiver()
+        runProtocolsWithReactor(self, Sender(), receiver, TCPCreator())
+        self.assertEqual(results, [count])
+        self.assertEqual(
+            b"".join(receiver.received),
+            b"before" + content[offset:offset + count] + b"after")
+
+    if _sendfile is None:
+        test_sendFile.skip = "sendfile is not available on this platform."
+
+
+    def test_sendFileWithoutDescriptor(self):
+        """
+        C{sendFile} raises L{NotImplementedError} if the file has no file
+        descriptor.
+        """
+        class Sender(ConnectableProtocol):
+            def connectionMade(self):
+                self.error = None
+                try:
+                    self.transport.sendFile(BytesIO(b"data"), 0, 4)
+                except NotImplementedError as e:
+                    self.error = e
+                self.transport.loseConnection()
+
+        sender = Sender()
+        runProtocolsWithReactor(self, sender, ConnectableProtocol(),
+                                TCPCreator())
+        self.assertIsInstance(sender.error, NotImplementedError)
+
+    if _sendfile is None:
+        test_sendFileWithoutDescriptor.skip = (
+            "sendfile is not available on this platform.")
+
+
+    def test_bufferAwareProtocol(self):
+        """
+        A protocol which provides L{IBufferAwareProtocol} receives all of the
+        data written to the connection, even though the buffer it is read
+        into is re-used and resized between reads.
+        """
+        content = b"".join([intToBytes(i) for i in range(100000)])
+
+        class Sender(ConnectableProtocol):
+            def connectionMade(self):
+                self.transport.write(content)
+                self.transport.loseConnection()
+
+        @implementer(IBufferAwareProtocol)
+        class Receiver(ConnectableProtocol):
+            def __init__(self):
+                self.received = []
+
+            def dataReceived(self, data):
+                self.received.append(bytes(data))
+
+        receiver = Receiver()
+        runProtocolsWithReactor(self, Sender(), receiver, TCPCreator())
+        self.assertEqual(b"".join(receiver.received), content)
+
+
 
 class WriteSequenceTestsMixin(object):
     """
@@ -0,0 +1,341 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet._timerwheel} and its use by
+L{twisted.internet.base.ReactorBase}.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.internet._timerwheel import TimerWheel
+from twisted.internet.base import DelayedCall, ReactorBase
+from twisted.trial.unittest import SynchronousTestCase
+
+
+
+def _call(time):
+    """
+    Create a L{DelayedCall} which does nothing, scheduled at C{time}.
+    """
+    return DelayedCall(time, lambda: None, (), {}, None, None)
+
+
+
+class TimerWheelTests(SynchronousTestCase):
+    """
+    Tests for L{TimerWheel}.
+    """
+    def test_invalidResolution(self):
+        """
+        L{TimerWheel} raises L{ValueError} if the resolution is not positive.
+        """
+        self.assertRaises(ValueError, TimerWheel, 0, 0)
+        self.assertRaises(ValueError, TimerWheel, 0, -1)
+
+
+    def test_defaultResolution(self):
+        """
+        If no resolution is given, L{TimerWheel.defaultResolution} is used.
+        """
+        self.assertEqual(
+            TimerWheel(0).resolution, TimerWheel.defaultResolution)
+
+
+    def test_expireDueOnly(self):
+        """
+        L{TimerWheel.expire} returns only the calls scheduled no later than the
+        given time, even when they share a tick with calls which are not yet
+        due.
+        """
+        wheel = TimerWheel(0, 1)
+        early = _call(2.25)
+        late = _call(2.75)
+        wheel.add(late)
+        wheel.add(early)
+        self.assertEqual(wheel.expire(2.5), [early])
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.expire(2.6), [])
+        self.assertEqual(wheel.expire(2.75), [late])
+        self.assertEqual(len(wheel), 0)
+
+
+    def test_expireOrdered(self):
+        """
+        L{TimerWheel.expire} returns the due calls ordered by their scheduled
+        time, including calls which were cascaded from the higher levels.
+        """
+        wheel = TimerWheel(0, 0.5)
+        times = [1000.0, 3.0, 70.25, 5000.5, 0.5, 40.0, 70.0]
+        calls = [_call(t) for t in times]
+        for call in calls:
+            wheel.add(call)
+        expired = wheel.expire(10000)
+        self.assertEqual(
+            [call.time for call in expired], sorted(times))
+
+
+    def test_expireIncrementally(self):
+        """
+        Calls spread over all the levels of the wheel are each returned by the
+        first L{TimerWheel.expire} call at or after their scheduled time.
+        """
+        wheel = TimerWheel(0, 1)
+        times = [5, 63, 64, 65, 4095, 4096, 4097, 262144 + 7, 16777216 + 9]
+        calls = dict((t, _call(t)) for t in times)
+        for call in calls.values():
+            wheel.add(call)
+        now = 0
+        for t in times:
+            self.assertEqual(wheel.expire(t - 1), [])
+            self.assertEqual(wheel.expire(t), [calls[t]])
+            now = t
+        self.assertEqual(wheel.expire(now * 2), [])
+
+
+    def test_expirePast(self):
+        """
+        A call scheduled before the current time is returned by the next
+        L{TimerWheel.expire}.
+        """
+        wheel = TimerWheel(100, 1)
+        call = _call(50)
+        wheel.add(call)
+        self.assertEqual(wheel.expire(100), [call])
+
+
+    def test_remove(self):
+        """
+        L{TimerWheel.remove} unschedules a call, and does nothing for a call
+        which is not in the wheel.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(300)
+        wheel.add(call)
+        self.assertIn(call, wheel)
+        wheel.remove(call)
+        self.assertNotIn(call, wheel)
+        wheel.remove(call)
+        self.assertEqual(wheel.expire(1000), [])
+        self.assertEqual(wheel.nextTime(), None)
+
+
+    def test_reschedule(self):
+        """
+        L{TimerWheel.reschedule} moves a call to the slot for its new time.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(300)
+        wheel.add(call)
+        call.time = 10
+        wheel.reschedule(call)
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.expire(10), [call])
+
+
+    def test_delayed(self):
+        """
+        A call which has been delayed is not returned by L{TimerWheel.expire}
+        at its original time but at its delayed time.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(10)
+        wheel.add(call)
+        call.delayed_time = 20
+        self.assertEqual(wheel.expire(10), [])
+        self.assertEqual(call.time, 30)
+        self.assertEqual(wheel.expire(30), [call])
+
+
+    def test_delayedAlreadyDue(self):
+        """
+        A call which has been delayed to a time which has also passed is
+        returned by the same L{TimerWheel.expire}.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(10)
+        wheel.add(call)
+        call.delayed_time = 5
+        self.assertEqual(wheel.expire(20), [call])
+        self.assertEqual(call.time, 15)
+
+
+    def test_expireFarAhead(self):
+        """
+        Expiring far ahead of the only call, which is distant itself, leaves
+        it to be returned once it is due.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(2 ** 29)
+        wheel.add(call)
+        self.assertEqual(wheel.expire(2 ** 28), [])
+        self.assertEqual(wheel.expire(2 ** 29), [call])
+
+
+    def test_nextTime(self):
+        """
+        L{TimerWheel.nextTime} returns L{None} for an empty wheel, the exact
+        time of the earliest call if it is in the first level and otherwise a
+        time no later than that of the earliest call.
+        """
+        wheel = TimerWheel(0, 1)
+        self.assertEqual(wheel.nextTime(), None)
+        distant = _call(100000.5)
+        wheel.add(distant)
+        self.assertTrue(wheel.nextTime() <= distant.time)
+        soon = _call(10.5)
+        wheel.add(soon)
+        self.assertEqual(wheel.nextTime(), 10.5)
+
+
+    def test_nextTimeHigherLevel(self):
+        """
+        L{TimerWheel.nextTime} is no later than a call waiting in a higher
+        level, even when the first level holds a later one.
+        """
+        wheel = TimerWheel(0, 1.0)
+        early = _call(65.0)
+        wheel.add(early)
+        self.assertEqual(wheel.expire(14.0), [])
+        wheel.add(_call(69.0))
+        self.assertTrue(wheel.nextTime() <= early.time)
+
+
+    def test_distant(self):
+        """
+        Calls too far in the future to be represented by the wheel are kept
+        in it without ever being returned by L{TimerWheel.expire}.
+        """
+        wheel = TimerWheel(0, 1)
+        call = _call(2 ** 128 + 1)
+        wheel.add(call)
+        self.assertEqual(wheel.expire(2 ** 31), [])
+        self.assertEqual(wheel.getDelayedCalls(), [call])
+
+
+
+class WheelReactor(ReactorBase):
+    """
+    A L{ReactorBase} using a timer wheel and a fake clock.
+
+    @ivar now: The current time.
+    """
+    now = 1000.0
+
+    def __init__(self):
+        ReactorBase.__init__(self)
+        self.useTimerWheel(0.1)
+
+
+    def installWaker(self):
+        pass
+
+
+    def seconds(self):
+        return self.now
+
+
+
+class ReactorTimerWheelTests(SynchronousTestCase):
+    """
+    Tests for L{ReactorBase.useTimerWheel}.
+    """
+    def test_callLater(self):
+        """
+        Calls scheduled with L{ReactorBase.callLater} are run in time order by
+        L{ReactorBase.runUntilCurrent} once they are due.
+        """
+        reactor = WheelReactor()
+        calls = []
+        reactor.callLater(2, calls.append, 2)
+        reactor.callLater(1.01, calls.append, 1)
+        reactor.callLater(0, calls.append, 0)
+        self.assertEqual(reactor.timeout(), 0)
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [0])
+        self.assertAlmostEqual(reactor.timeout(), 1.01)
+        reactor.now += 1
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [0])
+        reactor.now += 1
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(reactor.timeout(), None)
+
+
+    def test_cancel(self):
+        """
+        A cancelled call is removed from the wheel and never run.
+        """
+        reactor = WheelReactor()
+        calls = []
+        call = reactor.callLater(1, calls.append, None)
+        call.cancel()
+        self.assertEqual(reactor.getDelayedCalls(), [])
+        reactor.now += 2
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [])
+
+
+    def test_reset(self):
+        """
+        L{DelayedCall.reset} moves a call earlier or later.
+        """
+        reactor = WheelReactor()
+        calls = []
+        call = reactor.callLater(10, calls.append, None)
+        call.reset(1)
+        reactor.now += 1
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [None])
+
+        del calls[:]
+        call = reactor.callLater(1, calls.append, None)
+        call.reset(5)
+        reactor.now += 1
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [])
+        self.assertEqual(reactor.getDelayedCalls(), [call])
+        reactor.now += 4
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [None])
+
+
+    def test_cancelledByEarlierCall(self):
+        """
+        A due call which is cancelled by another call which runs before it in
+        the same iteration is not run.
+        """
+        reactor = WheelReactor()
+        calls = []
+        second = reactor.callLater(2, calls.append, 2)
+        reactor.callLater(1, second.cancel)
+        reactor.now += 3
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [])
+
+
+    def test_existingCalls(self):
+        """
+        Calls scheduled before L{ReactorBase.useTimerWheel} is called are
+        moved into the wheel.
+        """
+        reactor = WheelReactor()
+        reactor._timerWheel = None
+        calls = []
+        call = reactor.callLater(1, calls.append, None)
+        reactor.useTimerWheel()
+        self.assertEqual(reactor.getDelayedCalls(), [call])
+        call.reset(2)
+        reactor.now += 2
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [None])
+
+
+    def test_alreadyUsingTimerWheel(self):
+        """
+        L{ReactorBase.useTimerWheel} raises L{RuntimeError} if the reactor is
+        already using a timer wheel.
+        """
+        reactor = WheelReactor()
+        self.assertRaises(RuntimeError, reactor.useTimerWheel)
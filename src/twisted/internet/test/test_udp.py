@@ -170,6 +170,12 @@ class UDPPortTestsMixin(object):
         Datagram transports implement L{ILoggingContext.logPrefix} to return a
         message reflecting the protocol they are running.
         """
+        if getattr(self.reactorFactory, '_edgeTriggered', False):
+            raise SkipTest(
+                "EPollReactor in edge-triggered mode only dispatches events "
+                "within the logging context of their transport when "
+                "debugging.")
+
         class CustomLogPrefixDatagramProtocol(DatagramProtocol):
             def __init__(self, prefix):
                 self._prefix = prefix
@@ -152,6 +152,17 @@ class _SendmsgMixin(object):
             return result
 
 
+    def _writeSomeVectors(self, vectors):
+        """
+        Send as much of C{vectors} as possible with a single scatter/gather
+        write, unless there are file descriptors to send, in which case they
+        are sent along with the data by L{writeSomeData}.
+        """
+        if self._sendmsgQueue:
+            return self.writeSomeData(b"".join(vectors))
+        return self._writeSomeDataBase._writeSomeVectors(self, vectors)
+
+
     def doRead(self):
         """
         Calls L{IFileDescriptorReceiver.fileDescriptorReceived} and
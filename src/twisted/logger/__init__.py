@@ -65,6 +65,9 @@ __all__ = [
     # From ._file
     "FileLogObserver", "textFileLogObserver",
 
+    # From ._threaded
+    "ThreadedLogObserver", "OverflowPolicy",
+
     # From ._filter
     "PredicateResult", "ILogFilterPredicate",
     "FilteringLogObserver", "LogLevelFilterPredicate",
@@ -102,6 +105,8 @@ from ._buffer import LimitedHistoryLogObserver
 
 from ._file import FileLogObserver, textFileLogObserver
 
+from ._threaded import ThreadedLogObserver, OverflowPolicy
+
 from ._filter import (
     PredicateResult, ILogFilterPredicate, FilteringLogObserver,
     LogLevelFilterPredicate
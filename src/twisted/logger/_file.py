@@ -47,6 +47,43 @@ class FileLogObserver(object):
         @param event: An event.
         @type event: L{dict}
         """
+        text = self._formatText(event)
+
+        if text:
+            self._outFile.write(text)
+            self._outFile.flush()
+
+
+    def _writeEvents(self, events):
+        """
+        Write several events to the file at once, with a single write and
+        flush.
+
+        @param events: The events to write.
+        @type events: iterable of L{dict}
+        """
+        if self._encoding is not None:
+            empty = b""
+        else:
+            empty = u""
+        text = empty.join([self._formatText(event) for event in events])
+
+        if text:
+            self._outFile.write(text)
+            self._outFile.flush()
+
+
+    def _formatText(self, event):
+        """
+        Format an event, with the traceback of its failure if it has one, and
+        encode it as required by the file.
+
+        @param event: An event.
+        @type event: L{dict}
+
+        @return: The text to write for C{event}.
+        @rtype: L{unicode} or L{bytes}
+        """
         text = self.formatEvent(event)
 
         if text is None:
@@ -62,9 +99,7 @@ class FileLogObserver(object):
         if self._encoding is not None:
             text = text.encode(self._encoding)
 
-        if text:
-            self._outFile.write(text)
-            self._outFile.flush()
+        return text
 
 
 
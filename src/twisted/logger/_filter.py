@@ -13,7 +13,7 @@ from zope.interface import Interface, implementer
 from constantly import NamedConstant, Names
 
 from ._levels import InvalidLogLevelError, LogLevel
-from ._observer import ILogObserver
+from ._observer import ILogObserver, _levelsChanged, _minimumPriority
 
 
 
@@ -93,6 +93,17 @@ def shouldLogEvent(predicates, event):
 
 
 
+def _ignoreEvent(event):
+    """
+    The default negative observer of L{FilteringLogObserver}, which does
+    nothing.
+
+    @param event: An event.
+    @type event: L{dict}
+    """
+
+
+
 @implementer(ILogObserver)
 class FilteringLogObserver(object):
     """
@@ -102,7 +113,7 @@ class FilteringLogObserver(object):
 
     def __init__(
         self, observer, predicates,
-        negativeObserver=lambda event: None
+        negativeObserver=_ignoreEvent
     ):
         """
         @param observer: An observer to which this observer will forward
@@ -118,7 +129,8 @@ class FilteringLogObserver(object):
         @type negativeObserver: L{ILogObserver}
         """
         self._observer = observer
-        self._shouldLogEvent = partial(shouldLogEvent, list(predicates))
+        self._predicates = list(predicates)
+        self._shouldLogEvent = partial(shouldLogEvent, self._predicates)
         self._negativeObserver = negativeObserver
 
 
@@ -134,6 +146,37 @@ class FilteringLogObserver(object):
             self._negativeObserver(event)
 
 
+    def _minimumPriority(self, namespace):
+        """
+        Determine the priority of the lowest L{LogLevel} of events in a
+        namespace that this observer might forward, from the
+        L{LogLevelFilterPredicate}s it checks before any other predicate and
+        from what the wrapped observer might do anything with.
+
+        @param namespace: A logging namespace.
+        @type namespace: L{str} (native string)
+
+        @return: A priority as given by L{LogLevel._priorityForLevel}, or
+            L{None} if events of any level may be of interest.
+        @rtype: L{int} or L{None}
+        """
+        if self._negativeObserver is not _ignoreEvent:
+            return None
+        priorities = []
+        for predicate in self._predicates:
+            if not isinstance(predicate, LogLevelFilterPredicate):
+                # It may say yes to events of any level.
+                break
+            priorities.append(LogLevel._priorityForLevel(
+                predicate.logLevelForNamespace(namespace)))
+        observerPriority = _minimumPriority(self._observer, namespace)
+        if observerPriority is not None:
+            priorities.append(observerPriority)
+        if not priorities:
+            return None
+        return max(priorities)
+
+
 
 @implementer(ILogFilterPredicate)
 class LogLevelFilterPredicate(object):
@@ -205,6 +248,7 @@ class LogLevelFilterPredicate(object):
             self._logLevelsByNamespace[namespace] = level
         else:
             self._logLevelsByNamespace[None] = level
+        _levelsChanged()
 
 
     def clearLogLevels(self):
@@ -213,6 +257,7 @@ class LogLevelFilterPredicate(object):
         """
         self._logLevelsByNamespace.clear()
         self._logLevelsByNamespace[None] = self.defaultLogLevel
+        _levelsChanged()
 
 
     def __call__(self, event):
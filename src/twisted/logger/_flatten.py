@@ -15,6 +15,36 @@ from twisted.python.compat import unicode
 
 aFormatter = Formatter()
 
+_parsedFormats = {}
+_MAXIMUM_PARSED_FORMATS = 1024
+
+
+
+def _parseFormat(format):
+    """
+    Parse a PEP-3101-style format string with L{string.Formatter.parse},
+    remembering the result for the next event with the same format.
+
+    At most C{_MAXIMUM_PARSED_FORMATS} formats are remembered, so that
+    messages built on the fly rather than given as format strings cannot use
+    up memory.
+
+    @param format: A format string.
+    @type format: L{unicode} or L{str}
+
+    @return: The C{(literalText, fieldName, formatSpec, conversion)} tuples
+        for C{format}.
+    @rtype: L{tuple} of L{tuple}s
+    """
+    try:
+        return _parsedFormats[format]
+    except KeyError:
+        parsed = tuple(aFormatter.parse(format))
+        if len(_parsedFormats) >= _MAXIMUM_PARSED_FORMATS:
+            _parsedFormats.clear()
+        _parsedFormats[format] = parsed
+        return parsed
+
 
 
 class KeyFlattener(object):
@@ -84,7 +114,7 @@ def flattenEvent(event):
     keyFlattener = KeyFlattener()
 
     for (literalText, fieldName, formatSpec, conversion) in (
-        aFormatter.parse(event["log_format"])
+        _parseFormat(event["log_format"])
     ):
         if fieldName is None:
             continue
@@ -145,7 +175,7 @@ def extractField(field, event):
     @raise KeyError: if the field is not found in the given event.
     """
     keyFlattener = KeyFlattener()
-    [[literalText, fieldName, formatSpec, conversion]] = aFormatter.parse(
+    [[literalText, fieldName, formatSpec, conversion]] = _parseFormat(
         "{" + field + "}"
     )
     key = keyFlattener.flatKey(fieldName, formatSpec, conversion)
@@ -168,7 +198,7 @@ def flatFormat(event):
     fieldValues = event["log_flattened"]
     s = []
     keyFlattener = KeyFlattener()
-    formatFields = aFormatter.parse(event["log_format"])
+    formatFields = _parseFormat(event["log_format"])
     for literalText, fieldName, formatSpec, conversion in formatFields:
         s.append(literalText)
         if fieldName is not None:
@@ -13,7 +13,7 @@ from twisted.python.failure import Failure
 from twisted.python.reflect import safe_repr
 from twisted.python._tzhelper import FixedOffsetTimeZone
 
-from ._flatten import flatFormat, aFormatter
+from ._flatten import flatFormat, aFormatter, _parseFormat
 
 timeFormatRFC3339 = "%Y-%m-%dT%H:%M:%S%z"
 
@@ -276,6 +276,22 @@ def formatWithCall(formatString, mapping):
     @return: The string with formatted values interpolated.
     @rtype: L{unicode}
     """
-    return unicode(
-        aFormatter.vformat(formatString, (), CallMapping(mapping))
-    )
+    mapping = CallMapping(mapping)
+    parsed = _parseFormat(formatString)
+    for literalText, fieldName, formatSpec, conversion in parsed:
+        if fieldName is not None and (
+                not fieldName or fieldName[0].isdigit() or
+                u"{" in formatSpec):
+            # Positional and nested fields are left to the formatter, which
+            # knows how to complain about them.
+            return unicode(aFormatter.vformat(formatString, (), mapping))
+
+    text = []
+    for literalText, fieldName, formatSpec, conversion in parsed:
+        text.append(literalText)
+        if fieldName is None:
+            continue
+        value = aFormatter.get_field(fieldName, (), mapping)[0]
+        value = aFormatter.convert_field(value, conversion)
+        text.append(aFormatter.format_field(value, formatSpec))
+    return unicode(u"".join(text))
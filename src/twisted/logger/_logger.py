@@ -100,6 +100,11 @@ class Logger(object):
         """
         Emit a log event to all log observers at the given level.
 
+        If this logger's observer can tell that it has no use for events at
+        C{level} in this logger's namespace, as a L{LogPublisher} whose
+        observers all filter them out with L{LogLevelFilterPredicate
+        <twisted.logger.LogLevelFilterPredicate>}s can, no event is built.
+
         @param level: a L{LogLevel}
 
         @param format: a message format using new-style (PEP 3101)
@@ -111,7 +116,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
-        if level not in LogLevel.iterconstants():
+        try:
+            priority = LogLevel._levelPriorities[level]
+        except (KeyError, TypeError):
             self.failure(
                 "Got invalid log level {invalidLevel!r} in {logger}.emit().",
                 Failure(InvalidLogLevelError(level)),
@@ -120,6 +127,13 @@ class Logger(object):
             )
             return
 
+        minimumPriority = getattr(self.observer, "_minimumPriority", None)
+        if minimumPriority is not None:
+            # Don't bother building an event none of the observers want.
+            minimum = minimumPriority(self.namespace)
+            if minimum is not None and priority < minimum:
+                return
+
         event = kwargs
         event.update(
             log_logger=self, log_level=level, log_namespace=self.namespace,
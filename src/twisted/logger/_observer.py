@@ -17,6 +17,45 @@ OBSERVER_DISABLED = (
     "Temporarily disabling observer {observer} due to exception: {log_failure}"
 )
 
+_levelsGeneration = 0
+
+
+
+def _levelsChanged():
+    """
+    Note that the levels of events some observer is interested in may have
+    changed, so that L{LogPublisher}s work them out again.
+    """
+    global _levelsGeneration
+    _levelsGeneration += 1
+
+
+
+def _minimumPriority(observer, namespace):
+    """
+    Determine the priority of the lowest L{LogLevel} of events in a namespace
+    that an observer might do anything with.
+
+    Observers tell by having a C{_minimumPriority} method taking the
+    namespace, as L{LogPublisher} and L{FilteringLogObserver
+    <twisted.logger.FilteringLogObserver>} do; any other observer may be
+    interested in events of any level.
+
+    @param observer: An observer.
+    @type observer: L{ILogObserver}
+
+    @param namespace: A logging namespace.
+    @type namespace: L{str} (native string)
+
+    @return: A priority as given by L{LogLevel._priorityForLevel}, or L{None}
+        if events of any level may be of interest.
+    @rtype: L{int} or L{None}
+    """
+    minimumPriority = getattr(observer, "_minimumPriority", None)
+    if minimumPriority is None:
+        return None
+    return minimumPriority(namespace)
+
 
 
 class ILogObserver(Interface):
@@ -78,6 +117,8 @@ class LogPublisher(object):
 
     def __init__(self, *observers):
         self._observers = list(observers)
+        self._minimumPriorities = {}
+        self._minimumPrioritiesGeneration = None
         self.log = Logger(observer=self)
 
 
@@ -91,6 +132,7 @@ class LogPublisher(object):
             raise TypeError("Observer is not callable: {0!r}".format(observer))
         if observer not in self._observers:
             self._observers.append(observer)
+            _levelsChanged()
 
 
     def removeObserver(self, observer):
@@ -103,6 +145,45 @@ class LogPublisher(object):
             self._observers.remove(observer)
         except ValueError:
             pass
+        else:
+            _levelsChanged()
+
+
+    def _minimumPriority(self, namespace):
+        """
+        Determine the priority of the lowest L{LogLevel} of events in a
+        namespace that any observer of this publisher might do anything with,
+        so that L{Logger} need not even build events below it.
+
+        The answer is remembered until observers are added or removed, or the
+        levels of a L{LogLevelFilterPredicate
+        <twisted.logger.LogLevelFilterPredicate>} are changed, anywhere.
+
+        @param namespace: A logging namespace.
+        @type namespace: L{str} (native string)
+
+        @return: A priority as given by L{LogLevel._priorityForLevel}, or
+            L{None} if events of any level may be of interest.
+        @rtype: L{int} or L{None}
+        """
+        if self._minimumPrioritiesGeneration != _levelsGeneration:
+            self._minimumPriorities = {}
+            self._minimumPrioritiesGeneration = _levelsGeneration
+        try:
+            return self._minimumPriorities[namespace]
+        except KeyError:
+            pass
+
+        priorities = [
+            _minimumPriority(observer, namespace)
+            for observer in self._observers
+        ]
+        if priorities and None not in priorities:
+            priority = min(priorities)
+        else:
+            priority = None
+        self._minimumPriorities[namespace] = priority
+        return priority
 
 
     def __call__(self, event):
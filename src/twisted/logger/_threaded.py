@@ -0,0 +1,192 @@
+# -*- test-case-name: twisted.logger.test.test_threaded -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Log observer that hands events to another observer on a worker thread.
+"""
+
+import sys
+from collections import deque
+from threading import Condition, Lock, Thread, current_thread
+
+from constantly import NamedConstant, Names
+from zope.interface import implementer
+
+from twisted.python.failure import Failure
+from ._observer import ILogObserver, _minimumPriority
+from ._file import FileLogObserver
+
+
+_DEFAULT_QUEUE_MAXIMUM = 64 * 1024
+
+
+
+class OverflowPolicy(Names):
+    """
+    What a L{ThreadedLogObserver} does with an event when its queue is full.
+
+    @cvar dropNewest: Drop the event being observed.
+    @cvar dropOldest: Drop the oldest event in the queue to make room.
+    @cvar block: Wait in the emitting thread until there is room.  Events
+        emitted by the worker thread itself are dropped instead, as waiting
+        there would never end.
+    """
+    dropNewest = NamedConstant()
+    dropOldest = NamedConstant()
+    block = NamedConstant()
+
+
+
+@implementer(ILogObserver)
+class ThreadedLogObserver(object):
+    """
+    L{ILogObserver} that queues events in a bounded buffer and passes them to
+    another observer on a worker thread, so that formatting events and
+    writing them out does not hold up the code emitting them::
+
+        observer = ThreadedLogObserver(jsonFileLogObserver(io.open(
+            "log.json", "a")))
+        globalLogBeginner.beginLoggingTo([observer])
+        reactor.addSystemEventTrigger("after", "shutdown", observer.stop)
+
+    When the wrapped observer is a L{FileLogObserver}, all the events which
+    have queued up while it was busy are written with a single C{write} and
+    C{flush}.
+
+    As events are formatted later, on another thread, the objects they refer
+    to should not be changed after they are logged.
+
+    @ivar dropped: The number of events dropped because the queue was full.
+    @type dropped: L{int}
+    """
+
+    def __init__(self, observer, size=_DEFAULT_QUEUE_MAXIMUM,
+                 policy=OverflowPolicy.dropNewest):
+        """
+        @param observer: The observer to pass events to on the worker thread.
+        @type observer: L{ILogObserver}
+
+        @param size: The maximum number of events to queue.
+        @type size: L{int}
+
+        @param policy: What to do with events when C{size} events are queued
+            already.
+        @type policy: L{OverflowPolicy}
+        """
+        self._observer = observer
+        self._size = size
+        self._policy = policy
+        self._events = deque()
+        self._lock = Lock()
+        self._notEmpty = Condition(self._lock)
+        self._notFull = Condition(self._lock)
+        self._stopped = False
+        self.dropped = 0
+        self._thread = Thread(target=self._run,
+                              name="ThreadedLogObserver worker")
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def __call__(self, event):
+        """
+        Queue an event for the worker thread, or if this observer has been
+        stopped, pass it on to the wrapped observer right away.
+
+        @param event: An event.
+        @type event: L{dict}
+        """
+        with self._lock:
+            if not self._stopped:
+                if len(self._events) >= self._size:
+                    policy = self._policy
+                    if policy is OverflowPolicy.dropOldest:
+                        self._events.popleft()
+                        self.dropped += 1
+                    elif (policy is OverflowPolicy.block and
+                            current_thread() is not self._thread):
+                        while (len(self._events) >= self._size and
+                               not self._stopped):
+                            self._notFull.wait()
+                    else:
+                        self.dropped += 1
+                        return
+                if not self._stopped:
+                    self._events.append(event)
+                    if len(self._events) == 1:
+                        self._notEmpty.notify()
+                    return
+        self._observer(event)
+
+
+    def _minimumPriority(self, namespace):
+        """
+        Determine the priority of the lowest L{LogLevel
+        <twisted.logger.LogLevel>} of events in a namespace that the wrapped
+        observer might do anything with.
+
+        @param namespace: A logging namespace.
+        @type namespace: L{str} (native string)
+
+        @return: A priority, or L{None} if events of any level may be of
+            interest.
+        @rtype: L{int} or L{None}
+        """
+        return _minimumPriority(self._observer, namespace)
+
+
+    def stop(self):
+        """
+        Write out the events still queued, and stop the worker thread.
+        Events observed afterwards are passed on to the wrapped observer
+        straight away.
+        """
+        with self._lock:
+            self._stopped = True
+            self._notEmpty.notify()
+            self._notFull.notify_all()
+        if current_thread() is not self._thread:
+            self._thread.join()
+
+
+    def _run(self):
+        """
+        Pass queued events to the wrapped observer until stopped.
+        """
+        while True:
+            with self._lock:
+                while not self._events and not self._stopped:
+                    self._notEmpty.wait()
+                events, self._events = self._events, deque()
+                stopped = self._stopped
+                self._notFull.notify_all()
+            if events:
+                self._observe(events)
+            if stopped:
+                return
+
+
+    def _observe(self, events):
+        """
+        Pass a batch of events to the wrapped observer.
+
+        Errors cannot be logged as usual from here, as they would be queued
+        for this same thread, so they are reported on the original standard
+        error instead.
+
+        @param events: The events to pass on.
+        @type events: L{deque} of L{dict}
+        """
+        observer = self._observer
+        if isinstance(observer, FileLogObserver):
+            try:
+                observer._writeEvents(events)
+            except Exception:
+                Failure().printTraceback(sys.__stderr__)
+        else:
+            for event in events:
+                try:
+                    observer(event)
+                except Exception:
+                    Failure().printTraceback(sys.__stderr__)
@@ -134,6 +134,37 @@ class FileLogObserverTests(TestCase):
             self.assertEqual(output, expected)
 
 
+    def test_writeEvents(self):
+        """
+        L{FileLogObserver._writeEvents} writes several events, with the
+        tracebacks of their failures, in a single write and flush.
+        """
+        events = [dict(x=1), dict(log_failure=object()), dict(x=3)]
+        with StringIO() as fileHandle:
+            observer = FileLogObserver(fileHandle, lambda e: unicode(e))
+            observer._writeEvents(events)
+            self.assertEqual(
+                fileHandle.getvalue(),
+                u"{0}{1}\n(UNABLE TO OBTAIN TRACEBACK FROM EVENT)\n{2}".format(
+                    *[unicode(event) for event in events]))
+
+        with DummyFile() as fileHandle:
+            observer = FileLogObserver(fileHandle, lambda e: unicode(e))
+            observer._writeEvents(events)
+            self.assertEqual((fileHandle.writes, fileHandle.flushes), (1, 1))
+
+
+    def test_writeEventsEmpty(self):
+        """
+        L{FileLogObserver._writeEvents} does not write to the given file if
+        the events all format to nothing.
+        """
+        with DummyFile() as fileHandle:
+            observer = FileLogObserver(fileHandle, lambda e: None)
+            observer._writeEvents([dict(x=1), dict(x=2)])
+            self.assertEqual(fileHandle.writes, 0)
+
+
 
 class TextFileLogObserverTests(TestCase):
     """
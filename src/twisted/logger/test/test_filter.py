@@ -272,6 +272,72 @@ class FilteringLogObserverTests(unittest.TestCase):
 
 
 
+    def test_minimumPriority(self):
+        """
+        L{FilteringLogObserver._minimumPriority} is the priority of the
+        highest level that its L{LogLevelFilterPredicate}s require of events
+        in a namespace.
+        """
+        warn = LogLevelFilterPredicate(LogLevel.warn)
+        info = LogLevelFilterPredicate(LogLevel.info)
+        info.setLogLevelForNamespace("loud", LogLevel.error)
+        observer = FilteringLogObserver(lambda event: None, [info, warn])
+        self.assertEqual(
+            observer._minimumPriority("quiet"),
+            LogLevel._priorityForLevel(LogLevel.warn))
+        self.assertEqual(
+            observer._minimumPriority("loud.more"),
+            LogLevel._priorityForLevel(LogLevel.error))
+
+
+    def test_minimumPriorityOtherPredicates(self):
+        """
+        L{FilteringLogObserver._minimumPriority} only takes into account the
+        L{LogLevelFilterPredicate}s before any other predicate, as others may
+        let through events of any level.
+        """
+        warn = LogLevelFilterPredicate(LogLevel.warn)
+        error = LogLevelFilterPredicate(LogLevel.error)
+        other = lambda event: PredicateResult.yes
+        observer = FilteringLogObserver(
+            lambda event: None, [warn, other, error])
+        self.assertEqual(
+            observer._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.warn))
+        observer = FilteringLogObserver(lambda event: None, [other, warn])
+        self.assertIsNone(observer._minimumPriority("ns"))
+
+
+    def test_minimumPriorityNegativeObserver(self):
+        """
+        A L{FilteringLogObserver} with a negative observer may do something
+        with events of any level.
+        """
+        observer = FilteringLogObserver(
+            lambda event: None, [LogLevelFilterPredicate(LogLevel.warn)],
+            lambda event: None)
+        self.assertIsNone(observer._minimumPriority("ns"))
+
+
+    def test_minimumPriorityWrapped(self):
+        """
+        L{FilteringLogObserver._minimumPriority} takes into account the
+        levels the wrapped observer filters out.
+        """
+        inner = FilteringLogObserver(
+            lambda event: None, [LogLevelFilterPredicate(LogLevel.error)])
+        observer = FilteringLogObserver(
+            inner, [LogLevelFilterPredicate(LogLevel.warn)])
+        self.assertEqual(
+            observer._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.error))
+        observer = FilteringLogObserver(inner, [])
+        self.assertEqual(
+            observer._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.error))
+
+
+
 class LogLevelFilterPredicateTests(unittest.TestCase):
     """
     Tests for L{LogLevelFilterPredicate}.
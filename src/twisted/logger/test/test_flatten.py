@@ -20,8 +20,9 @@ from twisted.trial import unittest
 
 from .._format import formatEvent
 from .._flatten import (
-    flattenEvent, extractField, KeyFlattener, aFormatter
+    flattenEvent, extractField, KeyFlattener, aFormatter, _parseFormat
 )
+from .. import _flatten
 
 
 
@@ -304,3 +305,28 @@ class FlatFormattingTests(unittest.TestCase):
                 'log_format': 'simple message',
             }
         )
+
+
+    def test_parseFormat(self):
+        """
+        L{_parseFormat} parses a format string as L{string.Formatter.parse}
+        does, and gives the same result for the same format again without
+        parsing it again.
+        """
+        format = u"Hello, {who!r:>5}. {}{{}}"
+        parsed = _parseFormat(format)
+        self.assertEqual(parsed, tuple(aFormatter.parse(format)))
+        self.assertIs(_parseFormat(format), parsed)
+
+
+    def test_parseFormatLimit(self):
+        """
+        L{_parseFormat} forgets the formats it has parsed rather than
+        remember more than C{_MAXIMUM_PARSED_FORMATS} of them.
+        """
+        self.patch(_flatten, "_parsedFormats", {})
+        self.patch(_flatten, "_MAXIMUM_PARSED_FORMATS", 2)
+        for n in range(5):
+            _parseFormat(u"{0}".format(n))
+        self.assertEqual(
+            _flatten._parsedFormats, {u"4": ((u"4", None, None, None),)})
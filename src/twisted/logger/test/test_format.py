@@ -421,6 +421,31 @@ class FormatFieldTests(unittest.TestCase):
         )
 
 
+    def test_formatWithCallSpecs(self):
+        """
+        L{formatWithCall} applies conversions and format specs, including
+        nested ones, and attribute and item lookups.
+        """
+        self.assertEqual(
+            formatWithCall(
+                u"{a!r:>6}|{b[0]:03d}|{c.real}|{d:{width}}|",
+                dict(a="x", b=[7], c=2, d="y", width=3)
+            ),
+            u"   'x'|007|2|y  |"
+        )
+
+
+    def test_formatWithCallPositional(self):
+        """
+        L{formatWithCall} does not accept positional fields.
+        """
+        self.assertRaises(
+            IndexError, formatWithCall, u"{0}", dict(x=1))
+        # Python 2 looks automatically numbered fields up by name.
+        self.assertRaises(
+            (IndexError, KeyError), formatWithCall, u"{}", dict(x=1))
+
+
 
 class Unformattable(object):
     """
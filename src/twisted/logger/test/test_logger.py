@@ -12,6 +12,8 @@ from .._levels import LogLevel
 from .._format import formatEvent
 from .._logger import Logger
 from .._global import globalLogPublisher
+from .._observer import LogPublisher
+from .._filter import FilteringLogObserver, LogLevelFilterPredicate
 
 
 
@@ -240,6 +242,36 @@ class LoggerTests(unittest.TestCase):
         self.assertEqual(len(errors), 1)
 
 
+    def test_belowMinimumLevel(self):
+        """
+        Events below the level that all of a L{LogPublisher}'s observers
+        filter out are not even passed to it.
+        """
+        class CountingPredicate(LogLevelFilterPredicate):
+            calls = 0
+
+            def __call__(self, event):
+                self.calls += 1
+                return LogLevelFilterPredicate.__call__(self, event)
+
+        events = []
+        predicate = CountingPredicate(LogLevel.info)
+        publisher = LogPublisher(
+            FilteringLogObserver(events.append, [predicate]))
+        log = Logger(observer=publisher)
+
+        log.debug("Not interesting.")
+        self.assertEqual((predicate.calls, events), (0, []))
+
+        log.info("Interesting.")
+        self.assertEqual(predicate.calls, 1)
+        self.assertEqual(len(events), 1)
+
+        predicate.setLogLevelForNamespace(log.namespace, LogLevel.debug)
+        log.debug("Interesting now.")
+        self.assertEqual(len(events), 2)
+
+
     def test_trace(self):
         """
         Tracing keeps track of forwarding to the publisher.
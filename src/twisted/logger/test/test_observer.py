@@ -12,6 +12,8 @@ from twisted.trial import unittest
 from .._logger import Logger
 from .._observer import ILogObserver
 from .._observer import LogPublisher
+from .._levels import LogLevel
+from .._filter import FilteringLogObserver, LogLevelFilterPredicate
 
 
 
@@ -112,6 +114,45 @@ class LogPublisherTests(unittest.TestCase):
         self.assertIn(event, events3)
 
 
+    def test_minimumPriority(self):
+        """
+        L{LogPublisher._minimumPriority} is the priority of the lowest level
+        any of its observers might want events in a namespace at, kept up to
+        date as observers and their levels change.
+        """
+        warn = LogLevelFilterPredicate(LogLevel.warn)
+        error = LogLevelFilterPredicate(LogLevel.error)
+        plain = lambda event: None
+        publisher = LogPublisher(
+            FilteringLogObserver(plain, [warn]),
+            FilteringLogObserver(plain, [error]),
+        )
+        self.assertEqual(
+            publisher._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.warn))
+
+        warn.setLogLevelForNamespace("ns", LogLevel.critical)
+        self.assertEqual(
+            publisher._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.error))
+
+        publisher.addObserver(plain)
+        self.assertIsNone(publisher._minimumPriority("ns"))
+
+        publisher.removeObserver(plain)
+        self.assertEqual(
+            publisher._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.error))
+
+
+    def test_minimumPriorityNoObservers(self):
+        """
+        L{LogPublisher._minimumPriority} is L{None} for a publisher without
+        observers.
+        """
+        self.assertIsNone(LogPublisher()._minimumPriority("ns"))
+
+
     def test_observerRaises(self):
         """
         Observer raises an exception during fan out: a failure is logged, but
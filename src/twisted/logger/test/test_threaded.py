@@ -0,0 +1,222 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Test cases for L{twisted.logger._threaded}.
+"""
+
+import sys
+from io import StringIO
+from threading import Event, Thread
+
+from zope.interface.verify import verifyObject, BrokenMethodImplementation
+
+from twisted.trial import unittest
+
+from twisted.python.compat import unicode
+from .._levels import LogLevel
+from .._observer import ILogObserver
+from .._filter import FilteringLogObserver, LogLevelFilterPredicate
+from .._file import FileLogObserver
+from .._threaded import ThreadedLogObserver, OverflowPolicy
+from .test_file import DummyFile
+
+
+
+class GatedObserver(object):
+    """
+    Observer which records events, and which stops on its first event until
+    it is let through.
+
+    @ivar events: The events observed.
+
+    @ivar started: Set once the first event has arrived.
+
+    @ivar gate: To be set to let the first event through.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.started = Event()
+        self.gate = Event()
+
+
+    def __call__(self, event):
+        self.started.set()
+        self.gate.wait()
+        self.events.append(event)
+
+
+
+class ThreadedLogObserverTests(unittest.TestCase):
+    """
+    Tests for L{ThreadedLogObserver}.
+    """
+
+    def threaded(self, observer, *args, **kwargs):
+        """
+        Make a L{ThreadedLogObserver} which is stopped after the test.
+        """
+        threaded = ThreadedLogObserver(observer, *args, **kwargs)
+        self.addCleanup(threaded.stop)
+        return threaded
+
+
+    def blocked(self, size, policy):
+        """
+        Make a L{ThreadedLogObserver} wrapping a L{GatedObserver}, with its
+        worker thread held up by the first event.
+        """
+        observer = GatedObserver()
+        self.addCleanup(observer.gate.set)
+        threaded = self.threaded(observer, size, policy)
+        threaded(dict(n=0))
+        observer.started.wait()
+        return threaded, observer
+
+
+    def test_interface(self):
+        """
+        L{ThreadedLogObserver} provides L{ILogObserver}.
+        """
+        observer = self.threaded(lambda event: None)
+        try:
+            verifyObject(ILogObserver, observer)
+        except BrokenMethodImplementation as e:
+            self.fail(e)
+
+
+    def test_observe(self):
+        """
+        Events are passed to the wrapped observer in order, and all of them
+        have been by the time L{ThreadedLogObserver.stop} returns.
+        """
+        events = []
+        observer = ThreadedLogObserver(events.append)
+        for n in range(100):
+            observer(dict(n=n))
+        observer.stop()
+        self.assertEqual(events, [dict(n=n) for n in range(100)])
+        self.assertEqual(observer.dropped, 0)
+
+
+    def test_afterStop(self):
+        """
+        Events observed after L{ThreadedLogObserver.stop} are passed to the
+        wrapped observer straight away.
+        """
+        events = []
+        observer = ThreadedLogObserver(events.append)
+        observer.stop()
+        observer(dict(n=1))
+        self.assertEqual(events, [dict(n=1)])
+
+
+    def test_fileBatches(self):
+        """
+        The events queued while a wrapped L{FileLogObserver} is busy are
+        written with a single write.
+        """
+        started = Event()
+        gate = Event()
+        self.addCleanup(gate.set)
+
+        def formatEvent(event):
+            if event["n"] == 0:
+                started.set()
+                gate.wait()
+            return unicode(event["n"])
+
+        with DummyFile() as fileHandle:
+            observer = ThreadedLogObserver(
+                FileLogObserver(fileHandle, formatEvent))
+            observer(dict(n=0))
+            started.wait()
+            for n in range(1, 4):
+                observer(dict(n=n))
+            gate.set()
+            observer.stop()
+            self.assertEqual((fileHandle.writes, fileHandle.flushes), (2, 2))
+
+
+    def test_dropNewest(self):
+        """
+        With L{OverflowPolicy.dropNewest}, events observed while the queue is
+        full are dropped, and counted in L{ThreadedLogObserver.dropped}.
+        """
+        threaded, observer = self.blocked(2, OverflowPolicy.dropNewest)
+        for n in range(1, 5):
+            threaded(dict(n=n))
+        self.assertEqual(threaded.dropped, 2)
+        observer.gate.set()
+        threaded.stop()
+        self.assertEqual(observer.events, [dict(n=0), dict(n=1), dict(n=2)])
+
+
+    def test_dropOldest(self):
+        """
+        With L{OverflowPolicy.dropOldest}, the oldest queued events are
+        dropped to make room for new ones, and counted in
+        L{ThreadedLogObserver.dropped}.
+        """
+        threaded, observer = self.blocked(2, OverflowPolicy.dropOldest)
+        for n in range(1, 5):
+            threaded(dict(n=n))
+        self.assertEqual(threaded.dropped, 2)
+        observer.gate.set()
+        threaded.stop()
+        self.assertEqual(observer.events, [dict(n=0), dict(n=3), dict(n=4)])
+
+
+    def test_block(self):
+        """
+        With L{OverflowPolicy.block}, observing an event while the queue is
+        full waits until there is room for it.
+        """
+        threaded, observer = self.blocked(1, OverflowPolicy.block)
+        threaded(dict(n=1))
+        emitter = Thread(target=threaded, args=(dict(n=2),))
+        emitter.start()
+        emitter.join(0.1)
+        self.assertTrue(emitter.is_alive())
+        observer.gate.set()
+        emitter.join()
+        threaded.stop()
+        self.assertEqual(observer.events, [dict(n=0), dict(n=1), dict(n=2)])
+        self.assertEqual(threaded.dropped, 0)
+
+
+    def test_observerError(self):
+        """
+        Errors from the wrapped observer are reported on the original
+        standard error, and later events are still passed on.
+        """
+        stderr = StringIO()
+        self.patch(sys, "__stderr__", stderr)
+        events = []
+
+        def observer(event):
+            if event["n"] == 0:
+                raise ZeroDivisionError()
+            events.append(event)
+
+        threaded = ThreadedLogObserver(observer)
+        threaded(dict(n=0))
+        threaded(dict(n=1))
+        threaded.stop()
+        self.assertIn("ZeroDivisionError", stderr.getvalue())
+        self.assertEqual(events, [dict(n=1)])
+
+
+    def test_minimumPriority(self):
+        """
+        L{ThreadedLogObserver._minimumPriority} is that of the wrapped
+        observer.
+        """
+        observer = self.threaded(FilteringLogObserver(
+            lambda event: None, [LogLevelFilterPredicate(LogLevel.warn)]))
+        self.assertEqual(
+            observer._minimumPriority("ns"),
+            LogLevel._priorityForLevel(LogLevel.warn))
+        self.assertIsNone(
+            self.threaded(lambda event: None)._minimumPriority("ns"))
@@ -60,10 +60,26 @@ def getSerial(filename = '/tmp/twisted-names.serial'):
 
 
 
+class _Answer(tuple):
+    """
+    The answer, authority and additional records L{FileAuthority} found for a
+    query, along with the encoded responses made up of them so far.
+
+    @ivar encodings: Encoded responses for L{dns.Message._encodings}, shared
+        by all the copies of this answer handed out until the zone changes.
+    @type encodings: L{dict}
+    """
+
+
+
 class FileAuthority(common.ResolverBase):
     """
     An Authority that is loaded from a file.
 
+    The answers to queries are worked out once and kept, along with the
+    responses encoded from them, until C{records} or C{soa} is replaced, as
+    loading the zone again or transferring it does.
+
     @ivar _ADDITIONAL_PROCESSING_TYPES: Record types for which additional
         processing will be done.
 
@@ -72,6 +88,16 @@ class FileAuthority(common.ResolverBase):
 
     @ivar soa: A 2-tuple containing the SOA domain name as a L{bytes} and a
         L{dns.Record_SOA}.
+
+    @ivar _cache: The sections of the answers found so far, and their
+        encodings, keyed by name, class and type.
+    @type _cache: L{dict} or L{None}
+
+    @ivar _cacheSize: The largest number of answers kept in C{_cache}.
+    @type _cacheSize: L{int}
+
+    @ivar _cachedZone: The C{records} and C{soa} which the answers in
+        C{_cache} were found from.
     """
     # See https://twistedmatrix.com/trac/ticket/6650
     _ADDITIONAL_PROCESSING_TYPES = (dns.CNAME, dns.MX, dns.NS)
@@ -80,10 +106,20 @@ class FileAuthority(common.ResolverBase):
     soa = None
     records = None
 
+    _cache = None
+    _cacheSize = 10000
+    _cachedZone = None
+
     def __init__(self, filename):
         common.ResolverBase.__init__(self)
         self.loadFile(filename)
-        self._cache = {}
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ('_cache', '_cachedZone'):
+            state.pop(attribute, None)
+        return state
 
 
     def __setstate__(self, state):
@@ -146,6 +182,48 @@ class FileAuthority(common.ResolverBase):
             I{additional} sections of a DNS response) or with a L{Failure} if
             there is a problem processing the query.
         """
+        cache = self._cache
+        zone = self._cachedZone
+        if (cache is None or zone[0] is not self.records or
+                zone[1] is not self.soa):
+            cache = self._cache = {}
+            self._cachedZone = (self.records, self.soa)
+
+        key = (name, cls, type)
+        cached = cache.get(key)
+        if cached is None:
+            try:
+                sections = self._findAnswer(name, type)
+            except (error.DomainError, error.AuthoritativeDomainError):
+                return defer.fail()
+            if len(cache) >= self._cacheSize:
+                cache.popitem()
+            cached = cache[key] = (sections, {})
+
+        sections, encodings = cached
+        answer = _Answer([list(section) for section in sections])
+        answer.encodings = encodings
+        return defer.succeed(answer)
+
+
+    def _findAnswer(self, name, type):
+        """
+        Find the records to respond to a particular DNS query with.
+
+        @param name: The name which is being queried.
+        @type name: L{bytes}
+
+        @param type: The type of records being queried.
+        @type type: L{int}
+
+        @return: The records for the I{answer}, I{authority} and
+            I{additional} sections of the response.
+        @rtype: L{tuple} of three L{list}s of L{dns.RRHeader}
+
+        @raise dns.AuthoritativeDomainError: If C{name} is in this zone but
+            has no records.
+        @raise error.DomainError: If C{name} is not in this zone.
+        """
         cnames = []
         results = []
         authority = []
@@ -195,18 +273,18 @@ class FileAuthority(common.ResolverBase):
                 authority.append(
                     dns.RRHeader(self.soa[0], dns.SOA, dns.IN, ttl, self.soa[1], auth=True)
                     )
-            return defer.succeed((results, authority, additional))
+            return (results, authority, additional)
         else:
             if dns._isSubdomainOf(name, self.soa[0]):
                 # We may be the authority and we didn't find it.
                 # XXX: The QNAME may also be in a delegated child zone. See
                 # #6581 and #6580
-                return defer.fail(failure.Failure(dns.AuthoritativeDomainError(name)))
+                raise dns.AuthoritativeDomainError(name)
             else:
                 # The QNAME is not a descendant of this zone. Fail with
                 # DomainError so that the next chained authority or
                 # resolver will be queried.
-                return defer.fail(failure.Failure(error.DomainError(name)))
+                raise error.DomainError(name)
 
 
     def lookupZone(self, name, timeout = 10):
@@ -8,80 +8,280 @@ An in-memory caching resolver.
 
 from __future__ import division, absolute_import
 
+import heapq
+import math
+from collections import OrderedDict
+
 from twisted.names import dns, common
 from twisted.python import failure, log
 from twisted.internet import defer
 
 
 
+class _CacheEntry(object):
+    """
+    A result held by a L{CacheResolver}.
+
+    @ivar when: The time at which the result was cached.
+
+    @ivar payload: A 3-tuple of lists of L{dns.RRHeader} records: the
+        answers, authority and additional records of the result.
+
+    @ivar expires: The time after which the result must no longer be served.
+
+    @ivar nameError: Whether the result is that the name does not exist, in
+        which case C{payload} holds the authority records of that answer.
+
+    @ivar hits: The number of times the result has been served.
+
+    @ivar prefetching: Whether the result is being fetched again before it
+        expires.
+
+    @ivar _age: The age, in whole seconds, of the records in C{_records}.
+
+    @ivar _records: The records last served, with TTLs reduced by C{_age}.
+    """
+    def __init__(self, when, payload, expires, nameError=False):
+        self.when = when
+        self.payload = payload
+        self.expires = expires
+        self.nameError = nameError
+        self.hits = 0
+        self.prefetching = False
+        self._age = None
+        self._records = None
+
+
+    def records(self, age):
+        """
+        Get the records of this result, with their TTLs reduced by C{age}.
+
+        The records are only rebuilt when C{age} changes.
+
+        @param age: The age of the result, in whole seconds.
+        @type age: L{int}
+
+        @return: A 3-tuple of new lists of L{dns.RRHeader}s.
+
+        @raise ValueError: If a record has outlived its TTL.
+        """
+        if age != self._age:
+            self._records = tuple(
+                [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - age,
+                              r.payload) for r in section]
+                for section in self.payload)
+            self._age = age
+        ans, auth, add = self._records
+        return list(ans), list(auth), list(add)
+
+
+
+def _negativeLifetime(authority):
+    """
+    Determine for how long a negative answer may be cached, following
+    U{RFC 2308, section 5<https://tools.ietf.org/html/rfc2308#section-5>}.
+
+    @param authority: The authority records of the answer.
+    @type authority: L{list} of L{dns.RRHeader}
+
+    @return: The smaller of the TTL and the minimum field of the I{SOA} record
+        in C{authority}, or L{None} if there is no such record, in which case
+        the answer should not be cached.
+    @rtype: L{int} or L{None}
+    """
+    for record in authority:
+        if record.type == dns.SOA:
+            return min(record.ttl, record.payload.minimum)
+    return None
+
+
+
 class CacheResolver(common.ResolverBase):
     """
     A resolver that serves records from a local, memory cache.
 
+    Results are kept for the smallest TTL of their records, or for negative
+    answers as long as RFC 2308 allows, and at most C{maximumSize} of them
+    are kept, the least recently used being evicted first.  A single timer
+    removes expired results.
+
     @ivar _reactor: A provider of L{interfaces.IReactorTime}.
+
+    @ivar cache: A mapping of L{dns.Query} to L{_CacheEntry}, least recently
+        used first.
+    @type cache: L{OrderedDict}
+
+    @ivar maximumSize: The largest number of results to keep.
+    @type maximumSize: L{int}
+
+    @ivar staleTime: How many seconds results are kept after they expire, to
+        be served by L{staleResult} if they cannot be looked up again.
+    @type staleTime: L{int}
+
+    @ivar staleTTL: The largest TTL given to the records of stale results.
+    @type staleTTL: L{int}
+
+    @ivar prefetch: If not L{None}, a resolver with which results that have
+        been served at least C{prefetchHits} times are looked up again once
+        they are within the last C{prefetchWindow} of their lifetime.
+    @type prefetch: L{IResolver} or L{None}
+
+    @ivar hits: The number of lookups answered from the cache.
+    @ivar misses: The number of lookups the cache could not answer.
+    @ivar evictions: The number of results evicted to make room for others.
+
+    @ivar _nameErrors: The number of negative results for missing names in
+        C{cache}.
+
+    @ivar _expiries: A heap of C{(time, sequence, query, entry)} tuples,
+        giving when to remove each entry of C{cache} and possibly entries
+        which have since been replaced or evicted.
+
+    @ivar _expiryCall: The delayed call which will remove the entries due
+        to expire first, if any.
     """
     cache = None
+    maximumSize = 10000
+    staleTime = 0
+    prefetch = None
+    prefetchHits = 3
+    prefetchWindow = 0.1
+    staleTTL = 30
+
+    def __init__(self, cache=None, verbose=0, reactor=None,
+                 maximumSize=10000, staleTime=0, prefetch=None):
+        """
+        @param cache: Results to start with, as a mapping of L{dns.Query} to
+            C{(when, payload)} tuples, as passed to L{cacheResult}.
+
+        @param verbose: How much to log.
+
+        @param reactor: A provider of L{interfaces.IReactorTime}, or L{None}
+            for the global reactor.
 
-    def __init__(self, cache=None, verbose=0, reactor=None):
+        @param maximumSize: See L{CacheResolver.maximumSize}.
+
+        @param staleTime: See L{CacheResolver.staleTime}.
+
+        @param prefetch: See L{CacheResolver.prefetch}.
+        """
         common.ResolverBase.__init__(self)
 
-        self.cache = {}
         self.verbose = verbose
-        self.cancel = {}
+        self.maximumSize = maximumSize
+        self.staleTime = staleTime
+        self.prefetch = prefetch
         if reactor is None:
             from twisted.internet import reactor
         self._reactor = reactor
+        self._clear()
 
         if cache:
             for query, (seconds, payload) in cache.items():
                 self.cacheResult(query, payload, seconds)
 
 
+    def _clear(self):
+        """
+        Empty the cache and reset its counters.
+        """
+        self.cache = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+        self._nameErrors = 0
+        self._expiries = []
+        self._expirySequence = 0
+        self._expiryCall = None
+        self._expiryTime = None
+
+
     def __setstate__(self, state):
+        entries = state.pop('cache')
+        state.pop('cancel', None)
         self.__dict__ = state
+        self._clear()
 
-        now = self._reactor.seconds()
-        for (k, (when, (ans, add, ns))) in self.cache.items():
-            diff = now - when
-            for rec in ans + add + ns:
-                if rec.ttl < diff:
-                    del self.cache[k]
-                    break
+        for query, entry in entries.items():
+            if isinstance(entry, tuple):
+                # Pickled before entries had their own type.
+                when, payload = entry
+                self.cacheResult(query, payload, when)
+            else:
+                self._store(query, entry)
+        self._expire()
 
 
     def __getstate__(self):
-        for c in self.cancel.values():
-            c.cancel()
-        self.cancel.clear()
-        return self.__dict__
+        state = self.__dict__.copy()
+        state['_expiries'] = []
+        state['_expiryCall'] = None
+        state['_expiryTime'] = None
+        return state
 
 
     def _lookup(self, name, cls, type, timeout):
         now = self._reactor.seconds()
         q = dns.Query(name, type, cls)
-        try:
-            when, (ans, auth, add) = self.cache[q]
-        except KeyError:
-            if self.verbose > 1:
-                log.msg('Cache miss for ' + repr(name))
-            return defer.fail(failure.Failure(dns.DomainError(name)))
-        else:
-            if self.verbose:
-                log.msg('Cache hit for ' + repr(name))
-            diff = now - when
-
-            try:
-                result = (
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in ans],
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in auth],
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in add])
-            except ValueError:
-                return defer.fail(failure.Failure(dns.DomainError(name)))
+        entry = self.cache.get(q)
+        if entry is not None:
+            if entry.nameError:
+                if now <= entry.expires:
+                    self._hit(q, entry, now)
+                    return defer.fail(failure.Failure(
+                        dns.AuthoritativeDomainError(name)))
             else:
-                return defer.succeed(result)
+                try:
+                    records = entry.records(int(math.ceil(now - entry.when)))
+                except ValueError:
+                    records = None
+                # Entries without any records only go once they are removed.
+                if records is not None and (
+                        now <= entry.expires or not any(entry.payload)):
+                    self._hit(q, entry, now)
+                    return defer.succeed(records)
+
+        self.misses += 1
+        if self.verbose > 1:
+            log.msg('Cache miss for ' + repr(name))
+        return defer.fail(failure.Failure(dns.DomainError(name)))
+
+
+    def _hit(self, query, entry, now):
+        """
+        Count a hit on an entry, mark it as the most recently used, and
+        prefetch it if it is popular and about to expire.
+
+        @param query: The query of the entry.
+        @type query: L{dns.Query}
+
+        @param entry: The entry.
+        @type entry: L{_CacheEntry}
+
+        @param now: The current time.
+        @type now: L{float}
+        """
+        if self.verbose:
+            log.msg('Cache hit for ' + repr(query.name.name))
+        self.hits += 1
+        entry.hits += 1
+        del self.cache[query]
+        self.cache[query] = entry
+
+        if (self.prefetch is not None and not entry.prefetching and
+                entry.hits >= self.prefetchHits and
+                entry.expires - now <=
+                (entry.expires - entry.when) * self.prefetchWindow):
+            entry.prefetching = True
+            d = self.prefetch.query(query)
+            d.addCallback(
+                lambda payload: self.cacheResult(query, payload))
+
+            def prefetchFailed(reason):
+                entry.prefetching = False
+                if self.verbose > 1:
+                    log.msg('Prefetch of %r failed: %s' % (
+                        query, reason.getErrorMessage()))
+
+            d.addErrback(prefetchFailed)
 
 
     def lookupAllRecords(self, name, timeout = None):
@@ -92,6 +292,10 @@ class CacheResolver(common.ResolverBase):
         """
         Cache a DNS entry.
 
+        An answer with no answer records but an I{SOA} record in its
+        authority section is cached for no longer than RFC 2308 allows
+        negative answers to be.
+
         @param query: a L{dns.Query} instance.
 
         @param payload: a 3-tuple of lists of L{dns.RRHeader} records, the
@@ -104,12 +308,10 @@ class CacheResolver(common.ResolverBase):
         if self.verbose > 1:
             log.msg('Adding %r to cache' % query)
 
-        self.cache[query] = (cacheTime or self._reactor.seconds(), payload)
-
-        if query in self.cancel:
-            self.cancel[query].cancel()
+        when = cacheTime or self._reactor.seconds()
+        payload = tuple(list(section) for section in payload)
 
-        s = list(payload[0]) + list(payload[1]) + list(payload[2])
+        s = payload[0] + payload[1] + payload[2]
         if s:
             m = s[0].ttl
             for r in s:
@@ -117,9 +319,140 @@ class CacheResolver(common.ResolverBase):
         else:
             m = 0
 
-        self.cancel[query] = self._reactor.callLater(m, self.clearEntry, query)
+        if not payload[0]:
+            negative = _negativeLifetime(payload[1])
+            if negative is not None:
+                m = min(m, negative)
+
+        self._store(query, _CacheEntry(when, payload, when + m))
+
+
+    def cacheNameError(self, query, authority, cacheTime=None):
+        """
+        Cache the answer that the name of a query does not exist, for as long
+        as RFC 2308 allows.  Answers without an I{SOA} record in their
+        authority section are not cached.
+
+        Until it expires, looking up the same query fails with
+        L{dns.AuthoritativeDomainError}, so that resolution stops there.
+
+        @param query: a L{dns.Query} instance.
+
+        @param authority: The authority records of the answer.
+        @type authority: L{list} of L{dns.RRHeader}
+
+        @param cacheTime: The time (seconds since epoch) at which the entry is
+            considered to have been added to the cache. If L{None} is given,
+            the current time is used.
+        """
+        lifetime = _negativeLifetime(authority)
+        if lifetime is None:
+            return
+        if self.verbose > 1:
+            log.msg('Adding name error for %r to cache' % query)
+        when = cacheTime or self._reactor.seconds()
+        self._store(query, _CacheEntry(
+            when, ([], list(authority), []), when + lifetime, nameError=True))
+
+
+    def staleResult(self, query):
+        """
+        Get a result even if it has expired, as long as it is still kept
+        because of C{staleTime}, with the TTLs of its records limited to
+        C{staleTTL}, for use when the query cannot be answered otherwise.
+
+        @param query: a L{dns.Query} instance.
+
+        @return: A 3-tuple of lists of L{dns.RRHeader}s, or L{None} if there
+            is no such result.
+        """
+        entry = self.cache.get(query)
+        if entry is None or entry.nameError:
+            return None
+        ttl = self.staleTTL
+        return tuple(
+            [dns.RRHeader(r.name.name, r.type, r.cls, min(r.ttl, ttl),
+                          r.payload) for r in section]
+            for section in entry.payload)
 
 
     def clearEntry(self, query):
-        del self.cache[query]
-        del self.cancel[query]
+        """
+        Remove the result of a query from the cache.
+
+        @param query: a L{dns.Query} instance.
+        """
+        entry = self.cache.pop(query)
+        if entry.nameError:
+            self._nameErrors -= 1
+
+
+    def _store(self, query, entry):
+        """
+        Add an entry to the cache, evicting the least recently used entries
+        if there are too many, and arrange for it to be removed once it
+        expires.
+
+        @param query: a L{dns.Query} instance.
+
+        @param entry: The entry.
+        @type entry: L{_CacheEntry}
+        """
+        if query in self.cache:
+            self.clearEntry(query)
+        self.cache[query] = entry
+        if entry.nameError:
+            self._nameErrors += 1
+
+        while len(self.cache) > self.maximumSize:
+            evicted, evictedEntry = self.cache.popitem(last=False)
+            if evictedEntry.nameError:
+                self._nameErrors -= 1
+            self.evictions += 1
+
+        if len(self._expiries) > 2 * len(self.cache) + 64:
+            # Forget about entries which are no longer in the cache.
+            self._expiries = [
+                item for item in self._expiries
+                if self.cache.get(item[2]) is item[3]]
+            heapq.heapify(self._expiries)
+
+        removeAt = entry.expires
+        if not entry.nameError:
+            removeAt += self.staleTime
+        self._expirySequence += 1
+        heapq.heappush(
+            self._expiries, (removeAt, self._expirySequence, query, entry))
+        self._scheduleExpiry()
+
+
+    def _scheduleExpiry(self):
+        """
+        Make sure the timer removing expired entries is set for when the
+        first of them expires.
+        """
+        if not self._expiries:
+            return
+        first = self._expiries[0][0]
+        if self._expiryTime is not None and self._expiryTime <= first:
+            return
+        if self._expiryCall is not None and self._expiryCall.active():
+            self._expiryCall.cancel()
+        self._expiryTime = first
+        self._expiryCall = self._reactor.callLater(
+            max(0, first - self._reactor.seconds()), self._expire)
+
+
+    def _expire(self):
+        """
+        Remove expired entries, and set the timer again for the next ones.
+        """
+        self._expiryCall = None
+        self._expiryTime = None
+        now = self._reactor.seconds()
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= now:
+            removeAt, sequence, query, entry = heapq.heappop(expiries)
+            if self.cache.get(query) is entry:
+                self.clearEntry(query)
+        self._scheduleExpiry()
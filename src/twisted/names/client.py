@@ -439,6 +439,386 @@ class Resolver(common.ResolverBase):
 
 
 
+class _ServerStatistics(object):
+    """
+    How quickly a name server has been answering, smoothed as in U{RFC 6298
+    <https://tools.ietf.org/html/rfc6298>}.
+
+    @ivar queries: The number of queries sent to the server.
+    @type queries: L{int}
+
+    @ivar responses: The number of responses received from it.
+    @type responses: L{int}
+
+    @ivar timeouts: The number of queries it did not answer in time.
+    @type timeouts: L{int}
+
+    @ivar rtt: The smoothed round trip time, in seconds, or L{None} if it has
+        not been measured yet.
+    @type rtt: L{float} or L{None}
+
+    @ivar rttVariance: The smoothed variation of the round trip time.
+    @type rttVariance: L{float}
+    """
+    def __init__(self):
+        self.queries = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.rtt = None
+        self.rttVariance = 0.0
+
+
+    def answered(self, rtt):
+        """
+        Record a response.
+
+        @param rtt: The seconds it took to arrive.
+        @type rtt: L{float}
+        """
+        self.responses += 1
+        if self.rtt is None:
+            self.rtt = rtt
+            self.rttVariance = rtt / 2.0
+        else:
+            self.rttVariance = (
+                0.75 * self.rttVariance + 0.25 * abs(self.rtt - rtt))
+            self.rtt = 0.875 * self.rtt + 0.125 * rtt
+
+
+    def timedOut(self, waited):
+        """
+        Record a query which was not answered in time.  The round trip time is
+        taken to be at least as long as was waited.
+
+        @param waited: The seconds waited.
+        @type waited: L{float}
+        """
+        self.timeouts += 1
+        if self.rtt is None:
+            self.rtt = waited
+            self.rttVariance = waited / 2.0
+        else:
+            self.rtt = max(self.rtt, waited)
+
+
+    def asDict(self):
+        """
+        @return: These statistics.
+        @rtype: L{dict}
+        """
+        return dict(queries=self.queries, responses=self.responses,
+                    timeouts=self.timeouts, rtt=self.rtt,
+                    rttVariance=self.rttVariance)
+
+
+
+class _RacingQuery(object):
+    """
+    A query made by an L{AdaptiveResolver}.
+
+    Each attempt sends the query to the fastest server, and if that server
+    has not answered after the delay given by L{AdaptiveResolver._raceDelay},
+    to the next fastest as well.  The first response wins.  Once every server
+    queried in an attempt has timed out, the next attempt is made, with the
+    next timeout.
+
+    @ivar deferred: The L{Deferred} which fires with the response.
+
+    @ivar _timeout: The timeouts of the attempts still to be made.
+    @type _timeout: L{list} of L{int}
+
+    @ivar _outstanding: The L{Deferred}s of the queries sent in this attempt
+        which are still waiting for a response.
+
+    @ivar _raceCall: The delayed call which will send the query to a second
+        server in this attempt, or L{None}.
+    """
+    def __init__(self, resolver, queries, timeout):
+        self._resolver = resolver
+        self._queries = queries
+        self._timeout = list(timeout)
+        self._outstanding = []
+        self._raceCall = None
+        self.deferred = defer.Deferred(lambda deferred: self._stop())
+
+
+    def start(self):
+        """
+        Make the first attempt.
+
+        @return: L{_RacingQuery.deferred}
+        """
+        self._attempt()
+        return self.deferred
+
+
+    def _attempt(self):
+        """
+        Send the query to the fastest server, and arrange for it to be raced
+        against the next fastest.
+        """
+        if not self._timeout:
+            self.deferred.errback(defer.TimeoutError(self._queries))
+            return
+        timeout = self._timeout.pop(0)
+        addresses = self._resolver._rankServers()
+        self._send(addresses[0], timeout)
+        if len(addresses) > 1:
+            delay = self._resolver._raceDelay(addresses[0])
+            if delay < timeout:
+                self._raceCall = self._resolver._reactor.callLater(
+                    delay, self._race, addresses[1], timeout - delay)
+
+
+    def _race(self, address, timeout):
+        """
+        Send the query to a second server.
+        """
+        self._raceCall = None
+        self._send(address, timeout)
+
+
+    def _send(self, address, timeout):
+        """
+        Send the query to a server.
+        """
+        d = self._resolver._sendQuery(address, self._queries, timeout)
+        self._outstanding.append(d)
+        d.addCallbacks(self._answered, self._failed,
+                       callbackArgs=(d,), errbackArgs=(d,))
+
+
+    def _answered(self, message, d):
+        """
+        Stop waiting for any other server and pass on the response.
+        """
+        self._outstanding.remove(d)
+        self._stop()
+        self.deferred.callback(message)
+
+
+    def _failed(self, reason, d):
+        """
+        Make the next attempt if every server queried in this one has timed
+        out, or give up if the query could not be sent.
+        """
+        self._outstanding.remove(d)
+        if reason.check(defer.CancelledError):
+            return
+        if not reason.check(dns.DNSQueryTimeoutError):
+            self._stop()
+            self.deferred.errback(reason)
+        elif not self._outstanding and self._raceCall is None:
+            self._attempt()
+
+
+    def _stop(self):
+        """
+        Stop waiting for responses, and do not send any more queries.
+        """
+        if self._raceCall is not None:
+            self._raceCall.cancel()
+            self._raceCall = None
+        for d in self._outstanding[:]:
+            d.cancel()
+
+
+
+class AdaptiveResolver(Resolver):
+    """
+    A L{Resolver} which prefers the name servers that answer fastest.
+
+    Rather than going through the servers in turn, each query is sent to the
+    server with the smallest smoothed round trip time.  Servers yet to be
+    measured are tried first, and the times of the servers passed over decay
+    a little with each query, so that a server which was slow once is tried
+    again eventually.  If the fastest server does not answer within its usual
+    round trip time and variation, the query is also sent to the next fastest
+    one, and the first response is used.
+
+    Queries are sent from a pool of up to C{socketCount} UDP sockets, bound
+    to random ports and kept open, rather than from a new socket each time.
+    Each query still gets a random ID.  Call L{close} to close them.
+
+    @ivar socketCount: The number of UDP sockets to send queries from.
+    @type socketCount: L{int}
+
+    @ivar initialRaceDelay: The seconds to wait for a server whose round trip
+        time has not been measured yet, before also querying the next one.
+    @type initialRaceDelay: L{float}
+
+    @ivar minimumRaceDelay: The fewest seconds to wait for any server before
+        also querying the next one.
+    @type minimumRaceDelay: L{float}
+
+    @ivar rttDecay: The factor by which the round trip times of the servers
+        not picked for a query are multiplied.
+    @type rttDecay: L{float}
+
+    @ivar _statistics: A L{dict} mapping server addresses to their
+        L{_ServerStatistics}.
+
+    @ivar _protocols: The L{dns.DNSDatagramProtocol}s of the pool.
+
+    @since: 16.5
+    """
+    socketCount = 4
+    initialRaceDelay = 0.5
+    minimumRaceDelay = 0.05
+    rttDecay = 0.98
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accepts the same arguments as L{Resolver.__init__}.
+        """
+        self._statistics = {}
+        self._protocols = []
+        Resolver.__init__(self, *args, **kwargs)
+
+
+    def __getstate__(self):
+        d = Resolver.__getstate__(self)
+        d['_protocols'] = []
+        return d
+
+
+    def serverStatistics(self):
+        """
+        Get how quickly each name server queried so far has been answering.
+
+        @return: A L{dict} mapping server addresses to L{dict}s with the
+            number of C{queries} sent to the server, and of C{responses} and
+            C{timeouts}, and the smoothed round trip time C{rtt} and its
+            variation C{rttVariance}, in seconds.  C{rtt} is L{None} for a
+            server which has not answered any query yet.
+        """
+        return dict((address, statistics.asDict())
+                    for address, statistics in self._statistics.items())
+
+
+    def close(self):
+        """
+        Close the sockets of the pool.  Further queries will open new ones.
+        """
+        pooled, self._protocols = self._protocols, []
+        for proto in pooled:
+            if proto.transport is not None:
+                proto.transport.stopListening()
+
+
+    def pickServer(self):
+        """
+        Return the address of the fastest nameserver.
+        """
+        addresses = self._rankServers()
+        if addresses:
+            return addresses[0]
+        return None
+
+
+    def _rankServers(self):
+        """
+        Get the addresses of the nameservers, fastest first, making the round
+        trip times of all but the fastest decay.
+
+        @return: The addresses, servers not measured yet first, in the order
+            they are configured.
+        @rtype: L{list}
+        """
+        addresses = self.servers + list(self.dynServers)
+        order = dict((address, i) for i, address in enumerate(addresses))
+        statistics = self._statistics
+
+        def rtt(address):
+            server = statistics.get(address)
+            if server is None or server.rtt is None:
+                return (0, order[address])
+            return (server.rtt, order[address])
+
+        addresses.sort(key=rtt)
+        for address in addresses[1:]:
+            server = statistics.get(address)
+            if server is not None and server.rtt is not None:
+                server.rtt *= self.rttDecay
+        return addresses
+
+
+    def _raceDelay(self, address):
+        """
+        Get the seconds to wait for a nameserver to answer before also
+        querying another one.
+
+        @param address: The address of the server.
+        """
+        server = self._statistics.get(address)
+        if server is None or server.rtt is None:
+            return self.initialRaceDelay
+        return max(self.minimumRaceDelay,
+                   server.rtt + 4 * server.rttVariance)
+
+
+    def _pooledProtocol(self):
+        """
+        Get a L{dns.DNSDatagramProtocol} from the pool, at random, opening a
+        new one if the pool is not full yet.
+        """
+        if len(self._protocols) < self.socketCount:
+            proto = self._connectedProtocol()
+            self._protocols.append(proto)
+            return proto
+        return self._protocols[dns.randomSource() % len(self._protocols)]
+
+
+    def _sendQuery(self, address, queries, timeout):
+        """
+        Send queries to a nameserver from the pool, keeping track of how long
+        it takes to answer.
+
+        @return: A L{Deferred} which fires with the response.
+        """
+        server = self._statistics.get(address)
+        if server is None:
+            server = self._statistics[address] = _ServerStatistics()
+        server.queries += 1
+        sent = self._reactor.seconds()
+
+        def cbAnswered(message):
+            server.answered(self._reactor.seconds() - sent)
+            return message
+
+        def ebTimedOut(reason):
+            if reason.check(dns.DNSQueryTimeoutError):
+                server.timedOut(self._reactor.seconds() - sent)
+            return reason
+
+        d = self._pooledProtocol().query(address, queries, timeout)
+        d.addCallbacks(cbAnswered, ebTimedOut)
+        return d
+
+
+    def queryUDP(self, queries, timeout=None):
+        """
+        Make a number of DNS queries via UDP, racing the fastest servers.
+
+        @type queries: A C{list} of C{dns.Query} instances
+        @param queries: The queries to make.
+
+        @type timeout: Sequence of C{int}
+        @param timeout: Number of seconds after which to reissue the query.
+            When the last timeout expires, the query is considered failed.
+
+        @rtype: C{Deferred}
+        @raise C{twisted.internet.defer.TimeoutError}: When the query times
+            out.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if not self.servers and not self.dynServers:
+            return defer.fail(IOError("No domain name servers available"))
+        return _RacingQuery(self, queries, timeout).start()
+
+
+
 class AXFRController:
     timeoutCall = None
 
@@ -2008,6 +2008,241 @@ class Record_SPF(Record_TXT):
 
 
 
+# Precompiled formats of the fixed size parts of a message, used by
+# Message.toStr and Message.fromStr.
+_POINTER = struct.Struct("!H")
+_TYPE_AND_CLASS = struct.Struct("!HH")
+_RECORD_HEADER = struct.Struct(RRHeader.fmt)
+
+
+
+def _encodeName(name, buffer, compDict):
+    """
+    Append a domain name to a message being encoded, compressing it against
+    the names already in the message.
+
+    @param name: The name.
+    @type name: L{bytes}
+
+    @param buffer: The message so far, header included.
+    @type buffer: L{bytearray}
+
+    @param compDict: A L{dict} mapping the names and name suffixes already in
+        the message to their offsets, which is added to.
+    """
+    while name:
+        pointer = compDict.get(name)
+        if pointer is not None:
+            buffer += _POINTER.pack(0xc000 | pointer)
+            return
+        position = len(buffer)
+        if position < 0x4000:
+            compDict[name] = position
+        ind = name.find(b'.')
+        if ind > 0:
+            label, name = name[:ind], name[ind + 1:]
+        else:
+            label, name = name, None
+        buffer.append(len(label))
+        buffer += label
+    buffer.append(0)
+
+
+
+def _decodeName(data, octets, offset):
+    """
+    Decode a domain name from a message.
+
+    @param data: The message.
+    @type data: L{bytes}
+
+    @param octets: The message again, as a sequence of L{int}s.
+
+    @param offset: Where the name starts.
+    @type offset: L{int}
+
+    @raise EOFError: If the message ends before the name does.
+
+    @raise ValueError: If the name cannot be decoded because it contains a
+        loop.
+
+    @return: The name, and the offset just past it.
+    @rtype: L{tuple} of L{bytes} and L{int}
+    """
+    labels = []
+    end = None
+    visited = None
+    size = len(data)
+    while True:
+        if offset >= size:
+            raise EOFError()
+        length = octets[offset]
+        if length == 0:
+            offset += 1
+            break
+        if (length >> 6) == 3:
+            if offset + 1 >= size:
+                raise EOFError()
+            pointer = (length & 63) << 8 | octets[offset + 1]
+            if visited is None:
+                visited = set()
+            elif pointer in visited:
+                raise ValueError("Compression loop in encoded name")
+            visited.add(pointer)
+            if end is None:
+                end = offset + 2
+            offset = pointer
+            continue
+        offset += 1
+        label = data[offset:offset + length]
+        if len(label) < length:
+            raise EOFError()
+        labels.append(label)
+        offset += length
+    if end is None:
+        end = offset
+    return b'.'.join(labels), end
+
+
+
+class _BufferWriter(object):
+    """
+    A file-like view of a message being encoded into a L{bytearray}, for
+    objects which can only encode themselves to a file.
+
+    Offsets are relative to the end of the message header, as they are for
+    the file passed to L{IEncodable.encode} by L{Message.encode}.
+    """
+    def __init__(self, buffer):
+        """
+        @param buffer: The message so far, header included.  Writes go to its
+            end until L{seek} is called.
+        @type buffer: L{bytearray}
+        """
+        self._buffer = buffer
+        self._position = len(buffer)
+
+
+    def tell(self):
+        return self._position - Message.headerSize
+
+
+    def seek(self, offset, whence=0):
+        self._position = offset + Message.headerSize
+
+
+    def write(self, data):
+        end = self._position + len(data)
+        self._buffer[self._position:end] = data
+        self._position = end
+
+
+
+def _encodeAddress(payload, buffer, compDict):
+    """
+    Append the data of a L{Record_A} or L{Record_AAAA} to a message.
+    """
+    buffer += payload.address
+
+
+
+def _encodeSimpleRecord(payload, buffer, compDict):
+    """
+    Append the data of a L{SimpleRecord} to a message.
+    """
+    _encodeName(payload.name.name, buffer, compDict)
+
+
+
+_PAYLOAD_ENCODERS = {
+    Record_A: _encodeAddress,
+    Record_AAAA: _encodeAddress,
+    }
+for _simpleRecord in (Record_NS, Record_MD, Record_MF, Record_CNAME,
+                      Record_MB, Record_MG, Record_MR, Record_PTR,
+                      Record_DNAME):
+    _PAYLOAD_ENCODERS[_simpleRecord] = _encodeSimpleRecord
+del _simpleRecord
+
+
+
+def _encodeRecord(header, buffer, compDict):
+    """
+    Append a resource record to a message.
+
+    @type header: L{RRHeader}
+
+    @param buffer: The message so far, header included.
+    @type buffer: L{bytearray}
+
+    @param compDict: The offsets of the names already in the message.
+    @type compDict: L{dict}
+    """
+    _encodeName(header.name.name, buffer, compDict)
+    buffer += _RECORD_HEADER.pack(header.type, header.cls, header.ttl, 0)
+    payload = header.payload
+    if payload:
+        start = len(buffer)
+        encoder = _PAYLOAD_ENCODERS.get(payload.__class__)
+        if encoder is None:
+            payload.encode(_BufferWriter(buffer), compDict)
+        else:
+            encoder(payload, buffer, compDict)
+        _POINTER.pack_into(buffer, start - 2, len(buffer) - start)
+
+
+
+class _LazyRRHeader(RRHeader, object):
+    """
+    An L{RRHeader} decoded by L{Message.fromStr}, whose payload is only
+    decoded when it is first used.
+
+    @ivar _rdata: L{None} once the payload has been decoded, or the message,
+        the offset of the payload in it, the TTL and the L{IRecord} class to
+        decode it with.
+    """
+    _rdata = None
+    _payload = None
+
+    def _getPayload(self):
+        """
+        Decode the payload if that has not been done yet.
+
+        A payload which cannot be decoded, because it is truncated or
+        otherwise malformed, becomes an L{UnknownRecord} holding its bytes.
+        """
+        if self._rdata is not None:
+            data, start, ttl, recordType = self._rdata
+            payload = recordType(ttl=ttl)
+            strio = BytesIO(data)
+            strio.seek(start)
+            try:
+                payload.decode(strio, self.rdlength)
+            except (EOFError, ValueError, struct.error):
+                payload = UnknownRecord(
+                    data[start:start + self.rdlength], ttl=ttl)
+            self._rdata = None
+            self._payload = payload
+        return self._payload
+
+
+    def _setPayload(self, payload):
+        self._rdata = None
+        self._payload = payload
+
+    payload = property(_getPayload, _setPayload)
+
+
+    def __getstate__(self):
+        """
+        Decode the payload before pickling, rather than keep the message.
+        """
+        state = self.__dict__.copy()
+        state.update(_payload=self.payload, _rdata=None)
+        return state
+
+
+
 def _responseFromMessage(responseConstructor, message, **kwargs):
     """
     Generate a L{Message} like instance suitable for use as the response to
@@ -2164,6 +2399,14 @@ class Message(tputil.FancyEqMixin):
         header fields.
     @ivar _sectionNames: The names of attributes representing the record
         sections of this message.
+
+    @ivar _encodings: If not L{None}, encoded forms of this message which
+        L{toStr} may reuse, as set by whatever made up C{answers},
+        C{authority} and C{additional}.  Keys are the name, type and class
+        of each of C{queries} along with C{maxSize}; values are what follows
+        the header, and whether it was truncated.  Only the header is encoded
+        again, so the records must not be changed while this is set.
+    @type _encodings: L{dict} or L{None}
     """
     compareAttributes = (
         'id', 'answer', 'opCode', 'recDes', 'recAv',
@@ -2174,10 +2417,13 @@ class Message(tputil.FancyEqMixin):
 
     headerFmt = "!H2B4H"
     headerSize = struct.calcsize(headerFmt)
+    _headerStruct = struct.Struct(headerFmt)
 
     # Question, answer, additional, and nameserver lists
     queries = answers = add = ns = None
 
+    _encodings = None
+
     def __init__(self, id=0, answer=0, opCode=0, recDes=0, recAv=0,
                        auth=0, rCode=OK, trunc=0, maxSize=512,
                        authenticData=0, checkingDisabled=0):
@@ -2410,11 +2656,66 @@ class Message(tputil.FancyEqMixin):
         Encode this L{Message} into a byte string in the format described by RFC
         1035.
 
+        This gives the same result as L{Message.encode}, but encodes queries,
+        record headers and the most common kinds of record straight into a
+        single buffer.
+
         @rtype: L{bytes}
         """
-        strio = BytesIO()
-        self.encode(strio)
-        return strio.getvalue()
+        encodings = self._encodings
+        if encodings is None:
+            body, truncated = self._encodeSections()
+        else:
+            key = (tuple([(q.name.name, q.type, q.cls) for q in self.queries]),
+                   self.maxSize)
+            encoded = encodings.get(key)
+            if encoded is None:
+                encoded = encodings[key] = self._encodeSections()
+            body, truncated = encoded
+        if truncated:
+            self.trunc = 1
+        byte3 = (( ( self.answer & 1 ) << 7 )
+                 | ((self.opCode & 0xf ) << 3 )
+                 | ((self.auth & 1 ) << 2 )
+                 | ((self.trunc & 1 ) << 1 )
+                 | ( self.recDes & 1 ) )
+        byte4 = ( ( (self.recAv & 1 ) << 7 )
+                  | ((self.authenticData & 1) << 5)
+                  | ((self.checkingDisabled & 1) << 4)
+                  | (self.rCode & 0xf ) )
+        return self._headerStruct.pack(
+            self.id, byte3, byte4,
+            len(self.queries), len(self.answers),
+            len(self.authority), len(self.additional)) + body
+
+
+    def _encodeSections(self):
+        """
+        Encode the queries and records of this L{Message}, truncating them to
+        C{maxSize} along with the header.
+
+        @return: The encoded sections, and whether they were truncated.
+        @rtype: 2-L{tuple} of L{bytes} and L{bool}
+        """
+        buffer = bytearray(self.headerSize)
+        compDict = {}
+        for q in self.queries:
+            if q.__class__ is Query:
+                _encodeName(q.name.name, buffer, compDict)
+                buffer += _TYPE_AND_CLASS.pack(q.type, q.cls)
+            else:
+                q.encode(_BufferWriter(buffer), compDict)
+        for section in (self.answers, self.authority, self.additional):
+            for rr in section:
+                if rr.__class__ is RRHeader or rr.__class__ is _LazyRRHeader:
+                    _encodeRecord(rr, buffer, compDict)
+                else:
+                    rr.encode(_BufferWriter(buffer), compDict)
+
+        truncated = bool(self.maxSize) and len(buffer) > self.maxSize
+        if truncated:
+            del buffer[self.maxSize:]
+        return bytes(buffer[self.headerSize:]), truncated
 
 
     def fromStr(self, str):
@@ -2422,10 +2723,68 @@ class Message(tputil.FancyEqMixin):
         Decode a byte string in the format described by RFC 1035 into this
         L{Message}.
 
+        This gives the same result as L{Message.decode}, except that records
+        whose data runs past the end of the message are dropped straight
+        away, and the payloads of records are only decoded when first used.
+
         @param str: L{bytes}
         """
-        strio = BytesIO(str)
-        self.decode(strio)
+        data = str
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        if _PY3:
+            octets = data
+        else:
+            octets = bytearray(data)
+        size = len(data)
+
+        self.maxSize = 0
+        if size < self.headerSize:
+            raise EOFError()
+        (self.id, byte3, byte4,
+         nqueries, nans, nns, nadd) = self._headerStruct.unpack_from(data)
+        self.answer = ( byte3 >> 7 ) & 1
+        self.opCode = ( byte3 >> 3 ) & 0xf
+        self.auth = ( byte3 >> 2 ) & 1
+        self.trunc = ( byte3 >> 1 ) & 1
+        self.recDes = byte3 & 1
+        self.recAv = ( byte4 >> 7 ) & 1
+        self.authenticData = ( byte4 >> 5 ) & 1
+        self.checkingDisabled = ( byte4 >> 4 ) & 1
+        self.rCode = byte4 & 0xf
+
+        self.queries = []
+        offset = self.headerSize
+        try:
+            for i in range(nqueries):
+                name, offset = _decodeName(data, octets, offset)
+                if offset + 4 > size:
+                    raise EOFError()
+                type, cls = _TYPE_AND_CLASS.unpack_from(data, offset)
+                offset += 4
+                self.queries.append(Query(name, type, cls))
+
+            for (l, n) in ((self.answers, nans),
+                           (self.authority, nns),
+                           (self.additional, nadd)):
+                for i in range(n):
+                    name, offset = _decodeName(data, octets, offset)
+                    if offset + 10 > size:
+                        raise EOFError()
+                    type, cls, ttl, rdlength = _RECORD_HEADER.unpack_from(
+                        data, offset)
+                    offset += 10
+                    if offset + rdlength > size:
+                        raise EOFError()
+                    header = _LazyRRHeader(name, type, cls, ttl,
+                                           auth=self.auth)
+                    header.rdlength = rdlength
+                    header._rdata = (
+                        data, offset, ttl, self.lookupRecordType(type))
+                    l.append(header)
+                    offset += rdlength
+        except EOFError:
+            return
 
 
 
@@ -2795,7 +3154,8 @@ class DNSMixin(object):
         @rtype: C{Deferred}
         @return: a C{Deferred} which will be fired with the result of the
             query, or errbacked with any errors that could happen (exceptions
-            during writing of the query, timeout errors, ...).
+            during writing of the query, timeout errors, ...).  Cancelling it
+            stops waiting for the response.
         """
         m = Message(id, recDes=1)
         m.queries = queries
@@ -2805,12 +3165,24 @@ class DNSMixin(object):
         except:
             return defer.fail()
 
-        resultDeferred = defer.Deferred()
+        resultDeferred = defer.Deferred(
+            lambda deferred: self._clearCancelled(deferred, id))
         cancelCall = self.callLater(timeout, self._clearFailed, resultDeferred, id)
         self.liveMessages[id] = (resultDeferred, cancelCall)
 
         return resultDeferred
 
+
+    def _clearCancelled(self, deferred, id):
+        """
+        Clean the Deferred of a cancelled query.
+        """
+        live = self.liveMessages.get(id)
+        if live is not None and live[0] is deferred:
+            del self.liveMessages[id]
+            live[1].cancel()
+
+
     def _clearFailed(self, deferred, id):
         """
         Clean the Deferred after a timeout.
@@ -2825,14 +3197,20 @@ class DNSMixin(object):
 class DNSDatagramProtocol(DNSMixin, protocol.DatagramProtocol):
     """
     DNS protocol over UDP.
+
+    @ivar _liveAddresses: A L{dict} mapping the IDs of C{liveMessages} to the
+        address of the server each was sent to, which is the only one whose
+        response is accepted.
     """
     resends = None
+    _liveAddresses = None
 
     def stopProtocol(self):
         """
         Stop protocol: reset state variables.
         """
         self.liveMessages = {}
+        self._liveAddresses = {}
         self.resends = {}
         self.transport = None
 
@@ -2841,6 +3219,7 @@ class DNSDatagramProtocol(DNSMixin, protocol.DatagramProtocol):
         Upon start, reset internal state.
         """
         self.liveMessages = {}
+        self._liveAddresses = {}
         self.resends = {}
 
     def writeMessage(self, message, address):
@@ -2874,6 +3253,11 @@ class DNSDatagramProtocol(DNSMixin, protocol.DatagramProtocol):
             return
 
         if m.id in self.liveMessages:
+            expected = self._liveAddresses.get(m.id)
+            if expected is not None and tuple(addr[:2]) != tuple(expected[:2]):
+                log.msg("Dropping response to query %d from %s instead of %s"
+                        % (m.id, addr, expected))
+                return
             d, canceller = self.liveMessages[m.id]
             del self.liveMessages[m.id]
             canceller.cancel()
@@ -2923,7 +3307,19 @@ class DNSDatagramProtocol(DNSMixin, protocol.DatagramProtocol):
         def writeMessage(m):
             self.writeMessage(m, address)
 
-        return self._query(queries, timeout, id, writeMessage)
+        d = self._query(queries, timeout, id, writeMessage)
+        if id in self.liveMessages:
+            self._liveAddresses[id] = address
+            d.addBoth(self._forgetAddress, id)
+        return d
+
+
+    def _forgetAddress(self, result, id):
+        """
+        Forget the address a query was sent to, once it is over.
+        """
+        self._liveAddresses.pop(id, None)
+        return result
 
 
 class DNSProtocol(DNSMixin, protocol.Protocol):
@@ -6,11 +6,15 @@ from __future__ import absolute_import, division
 
 __all__ = ['SecondaryAuthority', 'SecondaryAuthorityService']
 
-from twisted.internet import task, defer
+import itertools
+
+from twisted.internet import task, defer, error
 from twisted.names import dns
 from twisted.names import common
 from twisted.names import client
 from twisted.names import resolve
+from twisted.names.error import DomainError, DNSFormatError
+from twisted.names._rfc1982 import SerialNumber
 from twisted.names.authority import FileAuthority
 
 from twisted.python import log, failure
@@ -80,6 +84,194 @@ class SecondaryAuthorityService(service.Service):
 
 
 
+def _sameRecord(a, b):
+    """
+    Determine whether two records are the same apart from their TTL, as
+    records deleted by an incremental zone transfer are matched.
+
+    @type a: L{dns.IRecord} provider
+    @type b: L{dns.IRecord} provider
+
+    @rtype: L{bool}
+    """
+    if a.__class__ is not b.__class__:
+        return False
+    return all(
+        getattr(a, name) == getattr(b, name)
+        for name in a.compareAttributes if name != 'ttl')
+
+
+
+class _IncrementalTransfer(object):
+    """
+    Controller for a L{dns.DNSProtocol} which asks the primary server of a
+    zone for the changes made to it since the version a L{SecondaryAuthority}
+    holds, as described by U{RFC 1995 <https://tools.ietf.org/html/rfc1995>}.
+
+    The changes are collected as a L{list} of steps from one version of the
+    zone to the next, each a pair of L{list}s of the L{dns.RRHeader}s it
+    deletes and adds.  The first record of each is the I{SOA} record of the
+    version it goes from or to.  If the primary sends the whole zone instead,
+    there is a single step, which deletes L{None} - everything - and adds the
+    whole zone.  If the zone is up to date, there are no steps.
+
+    @ivar authority: The L{SecondaryAuthority} bringing its zone up to date.
+
+    @ivar deferred: The L{Deferred} to fire with the steps, or L{None} once it
+        has fired.
+
+    @ivar changes: The steps collected so far.
+
+    @ivar pending: Always empty, as L{client.DNSClientFactory} expects of a
+        controller.
+
+    @ivar timeoutCall: The delayed call which gives up on the transfer.
+
+    @ivar _serial: The serial number of the version of the zone on the
+        primary.
+
+    @ivar _soa: The I{SOA} record of the primary's version of the zone.
+
+    @ivar _step: The step being collected.
+
+    @ivar _state: The method to which the next record received is passed.
+        It returns L{True} if that was the last record of the transfer.
+    """
+    timeoutCall = None
+    _soa = _step = None
+
+    def __init__(self, authority, deferred):
+        self.authority = authority
+        self.deferred = deferred
+        self.changes = []
+        self.pending = []
+        self._serial = None
+        self._state = self._first
+
+
+    def connectionMade(self, protocol):
+        """
+        Ask for the changes since the version of the zone held.
+        """
+        name, soa = self.authority.soa
+        message = dns.Message(protocol.pickID(), recDes=0)
+        message.queries = [dns.Query(self.authority.domain, dns.IXFR, dns.IN)]
+        message.authority = [
+            dns.RRHeader(name, dns.SOA, dns.IN, soa.ttl or 0, soa)]
+        protocol.writeMessage(message)
+
+
+    def connectionLost(self, protocol):
+        pass
+
+
+    def messageReceived(self, message, protocol):
+        """
+        Collect the records in a message from the primary, and fire
+        C{deferred} once the last of them has been received or the primary
+        has returned an error.
+        """
+        if self.deferred is None:
+            return
+        if message.rCode != dns.OK:
+            self._done(failure.Failure(
+                self.authority.exceptionForCode(message.rCode)(message)))
+            return
+        for record in message.answers:
+            try:
+                finished = self._state(record)
+            except ValueError:
+                self._done(failure.Failure(DNSFormatError(message)))
+                return
+            if finished:
+                self._done(self.changes)
+                return
+
+
+    def _done(self, result):
+        """
+        Stop waiting for the transfer and fire C{deferred}.
+        """
+        if self.timeoutCall is not None:
+            self.timeoutCall.cancel()
+            self.timeoutCall = None
+        d, self.deferred = self.deferred, None
+        d.callback(result)
+
+
+    def _first(self, record):
+        """
+        Handle the I{SOA} record of the primary's version of the zone, which
+        comes first.
+        """
+        if record.type != dns.SOA:
+            raise ValueError("IXFR response does not start with an SOA record")
+        self._serial = record.payload.serial
+        held = self.authority.soa[1].serial
+        if not SerialNumber(self._serial) > SerialNumber(held):
+            return True
+        self._soa = record
+        self._state = self._second
+        return False
+
+
+    def _second(self, record):
+        """
+        Handle the second record, an I{SOA} record for an older version if
+        the changes follow, or else the first record of the whole zone.
+        """
+        if record.type == dns.SOA and record.payload.serial != self._serial:
+            self._step = ([record], [])
+            self.changes.append(self._step)
+            self._state = self._deleting
+            return False
+        self._step = (None, [self._soa])
+        self.changes.append(self._step)
+        self._state = self._whole
+        return self._whole(record)
+
+
+    def _whole(self, record):
+        """
+        Handle a record of the whole zone, up to the I{SOA} record closing
+        it.
+        """
+        if record.type == dns.SOA:
+            return True
+        self._step[1].append(record)
+        return False
+
+
+    def _deleting(self, record):
+        """
+        Handle a record deleted by a step, up to the I{SOA} record of the
+        version the step goes to.
+        """
+        if record.type == dns.SOA:
+            self._step[1].append(record)
+            self._state = self._adding
+        else:
+            self._step[0].append(record)
+        return False
+
+
+    def _adding(self, record):
+        """
+        Handle a record added by a step, up to the I{SOA} record starting the
+        next step or closing the transfer.
+        """
+        if record.type == dns.SOA:
+            if self._step[1][0].payload.serial == self._serial:
+                return True
+            self._step = ([record], [])
+            self.changes.append(self._step)
+            self._state = self._deleting
+        else:
+            self._step[1].append(record)
+        return False
+
+
+
 class SecondaryAuthority(FileAuthority):
     """
     An Authority that keeps itself updated by performing zone transfers.
@@ -94,12 +286,25 @@ class SecondaryAuthority(FileAuthority):
 
     @ivar _reactor: The reactor to use to perform the zone transfers, or L{None}
         to use the global reactor.
+
+    @ivar _cooperator: The L{task.Cooperator} to build large zones with, or
+        L{None} to use the global one.
+
+    @ivar _chunkSize: The number of records to build a zone with at a time.
+    @type _chunkSize: L{int}
+
+    @ivar _transferAgain: Whether to transfer the zone again once the
+        transfer under way is over, as a newer version has been announced.
+    @type _transferAgain: L{bool}
     """
 
     transferring = False
     soa = records = None
     _port = 53
     _reactor = None
+    _cooperator = None
+    _chunkSize = 1000
+    _transferAgain = False
 
     def __init__(self, primaryIP, domain):
         """
@@ -139,20 +344,125 @@ class SecondaryAuthority(FileAuthority):
 
 
     def transfer(self):
+        """
+        Bring the zone up to date with the primary server.
+
+        Once the zone has been transferred, only the changes made since the
+        version held are asked for, with an incremental zone transfer
+        (I{IXFR}).  If the primary cannot give them, the whole zone is
+        transferred (I{AXFR}) instead.  The new version is built alongside the
+        one being served, which it replaces all at once.
+
+        @return: A L{Deferred} which fires when the zone is up to date or the
+            transfer has failed, or L{None} if a transfer is under way
+            already.
+        """
         if self.transferring:
             return
-        self.transfering = True
+        self.transferring = True
 
         reactor = self._reactor
         if reactor is None:
             from twisted.internet import reactor
 
+        if self.soa is None:
+            d = self._transferZone(reactor)
+        else:
+            d = self._transferChanges(reactor)
+            d.addCallbacks(
+                self._applyChanges, self._ebChanges, errbackArgs=(reactor,))
+        return d.addErrback(self._ebZone).addBoth(self._cbTransferred)
+
+
+    def notify(self, name, serial, host):
+        """
+        Handle a I{NOTIFY} message from a server, telling that a zone has
+        changed, as described by U{RFC 1996
+        <https://tools.ietf.org/html/rfc1996>}.
+
+        If it is from the primary server for this zone and the version held is
+        older than the one the message gives, the zone is transferred, after
+        the transfer under way if there is one.
+
+        @param name: The name of the zone which changed.
+        @type name: L{bytes}
+
+        @param serial: The serial number of the new version of the zone, or
+            L{None} if the message does not give it.
+        @type serial: L{int} or L{None}
+
+        @param host: The address of the server which sent the message.
+        @type host: L{str}
+
+        @return: L{True} if this is the authority for the zone and the server
+            is its primary, otherwise L{False}.
+        @rtype: L{bool}
+        """
+        if dns.Name(name) != dns.Name(self.domain) or host != self.primary:
+            return False
+        if (serial is None or self.soa is None or
+                SerialNumber(serial) > SerialNumber(self.soa[1].serial)):
+            if self.transferring:
+                self._transferAgain = True
+            else:
+                self.transfer()
+        return True
+
+
+    def _transferZone(self, reactor):
+        """
+        Transfer the whole zone from the primary server.
+
+        @return: A L{Deferred} which fires when the zone has been replaced.
+        """
         resolver = client.Resolver(
             servers=[(self.primary, self._port)], reactor=reactor)
-        return resolver.lookupZone(self.domain
-            ).addCallback(self._cbZone
-            ).addErrback(self._ebZone
-            )
+        return resolver.lookupZone(self.domain).addCallback(self._cbZone)
+
+
+    def _transferChanges(self, reactor, timeout=10):
+        """
+        Ask the primary server for the changes made to the zone since the
+        version held.
+
+        @param timeout: The number of seconds to wait for all the changes.
+        @type timeout: L{int}
+
+        @return: A L{Deferred} which fires with the changes, as collected by
+            L{_IncrementalTransfer}.
+        """
+        d = defer.Deferred()
+        controller = _IncrementalTransfer(self, d)
+        factory = client.DNSClientFactory(controller, timeout)
+        factory.noisy = False
+
+        connector = reactor.connectTCP(self.primary, self._port, factory)
+        controller.timeoutCall = reactor.callLater(
+            timeout, self._timeoutChanges, controller, timeout)
+
+        def disconnect(result):
+            connector.disconnect()
+            return result
+        return d.addBoth(disconnect)
+
+
+    def _timeoutChanges(self, controller, seconds):
+        controller.timeoutCall = None
+        controller._done(failure.Failure(error.TimeoutError(
+            "Incremental zone transfer timed out after %d seconds" %
+            (seconds,))))
+
+
+    def _ebChanges(self, reason, reactor):
+        """
+        Transfer the whole zone if the primary server answered the request
+        for the changes to it with an error, as it does if it does not
+        support incremental zone transfers.
+        """
+        reason.trap(DomainError)
+        log.msg("Incremental transfer of %s from %s failed, transferring "
+                "the whole zone" % (self.domain, self.primary))
+        return self._transferZone(reactor)
 
 
     def _lookup(self, name, cls, type, timeout=None):
@@ -162,13 +472,87 @@ class SecondaryAuthority(FileAuthority):
 
 
     def _cbZone(self, zone):
+        """
+        Replace the zone with the one transferred by an I{AXFR} request.
+
+        @param zone: The records of the zone, starting and ending with its
+            I{SOA} record, as the first element of a L{tuple}.
+
+        @return: A L{Deferred} which fires when the zone has been replaced.
+        """
         ans, _, _ = zone
-        self.records = r = {}
-        for rec in ans:
-            if not self.soa and rec.type == dns.SOA:
-                self.soa = (str(rec.name).lower(), rec.payload)
-            else:
-                r.setdefault(str(rec.name).lower(), []).append(rec.payload)
+        return self._applyChanges([(None, ans[:-1])])
+
+
+    def _applyChanges(self, changes):
+        """
+        Build the version of the zone which some changes lead to, and serve
+        it from then on.
+
+        Large zones are built C{_chunkSize} records at a time by a
+        L{task.Cooperator}, so that the version held can be served meanwhile.
+
+        @param changes: Steps from one version of the zone to the next, as
+            collected by L{_IncrementalTransfer}.
+        @type changes: L{list}
+
+        @return: A L{Deferred} which fires when the new version is served.
+        """
+        work = self._buildZone(changes)
+        try:
+            next(work)
+        except StopIteration:
+            return defer.succeed(None)
+        if self._cooperator is None:
+            cooperate = task.cooperate
+        else:
+            cooperate = self._cooperator.cooperate
+        return cooperate(work).whenDone().addCallback(lambda ignored: None)
+
+
+    def _buildZone(self, changes):
+        """
+        Build the version of the zone which some changes lead to, and replace
+        C{soa} and C{records} with it in one go.
+
+        Each name's records are shared with the version held, unless the
+        changes touch them.
+
+        @param changes: See L{_applyChanges}.
+
+        @return: An iterator which yields after every C{_chunkSize} records.
+        """
+        soa, records, copied = self.soa, self.records, set()
+        done = 0
+        for deleted, added in changes:
+            if deleted is None:
+                records, copied, deleted = {}, set(), ()
+            elif records is self.records:
+                records = dict(records)
+            for adding, record in itertools.chain(
+                    ((False, record) for record in deleted),
+                    ((True, record) for record in added)):
+                name = str(record.name).lower()
+                if name not in copied:
+                    records[name] = list(records.get(name, ()))
+                    copied.add(name)
+                existing = records[name]
+                if adding:
+                    existing.append(record.payload)
+                    if record.type == dns.SOA:
+                        soa = (name, record.payload)
+                else:
+                    for i, payload in enumerate(existing):
+                        if _sameRecord(payload, record.payload):
+                            del existing[i]
+                            break
+                    if not existing:
+                        del records[name]
+                        copied.discard(name)
+                done += 1
+                if not done % self._chunkSize:
+                    yield None
+        self.soa, self.records = soa, records
 
 
     def _ebZone(self, failure):
@@ -177,14 +561,11 @@ class SecondaryAuthority(FileAuthority):
 
 
     def update(self):
-        self.transfer().addCallbacks(self._cbTransferred, self._ebTransferred)
+        self.transfer()
 
 
     def _cbTransferred(self, result):
         self.transferring = False
-
-
-    def _ebTransferred(self, failure):
-        self.transferred = False
-        log.msg("Transferring %s from %s failed after zone transfer" % (self.domain, self.primary))
-        log.err(failure)
+        if self._transferAgain:
+            self._transferAgain = False
+            self.transfer()
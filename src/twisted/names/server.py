@@ -21,7 +21,7 @@ from __future__ import division, absolute_import
 import time
 
 from twisted.internet import protocol
-from twisted.names import dns, resolve
+from twisted.names import authority, dns, error, resolve
 from twisted.python import log
 
 
@@ -275,6 +275,9 @@ class DNSServerFactory(protocol.ServerFactory):
         The resolved answers count will be logged if C{DNSServerFactory.verbose}
         is C{>1}.
 
+        If the records come from an authority which keeps its answers, the
+        response is encoded once and only its header after that.
+
         @param response: Answer records, authority records and additional records
         @type response: L{tuple} of L{list} of L{dns.RRHeader} instances
 
@@ -291,9 +294,13 @@ class DNSServerFactory(protocol.ServerFactory):
         @type address: L{tuple} or L{None}
         """
         ans, auth, add = response
+        encodings = None
+        if isinstance(response, authority._Answer):
+            encodings = response.encodings
         response = self._responseFromMessage(
             message=message, rCode=dns.OK,
             answers=ans, authority=auth, additional=add)
+        response._encodings = encodings
         self.sendReply(protocol, response, address)
 
         l = len(ans) + len(auth) + len(add)
@@ -313,6 +320,10 @@ class DNSServerFactory(protocol.ServerFactory):
         Constructs a response message from the original query message by
         assigning a suitable error code to C{rCode}.
 
+        If C{DNSServerFactory.cache} is set and supports it, name errors from
+        C{clients} are cached, and server failures and other unexpected errors
+        are answered with a stale result from the cache if it has one.
+
         An error message will be logged if C{DNSServerFactory.verbose} is C{>1}.
 
         @param failure: The reason for the failed resolution (as reported by
@@ -331,6 +342,31 @@ class DNSServerFactory(protocol.ServerFactory):
             or L{None} if C{protocol} is a stream protocol.
         @type address: L{tuple} or L{None}
         """
+        if self.cache is not None and message.queries:
+            query = message.queries[0]
+            if failure.check(error.DNSNameError):
+                # Remember that the name does not exist, if the answer says
+                # for how long.
+                answer = failure.value.args and failure.value.args[0]
+                cacheNameError = getattr(self.cache, 'cacheNameError', None)
+                if cacheNameError is not None and isinstance(
+                        answer, dns.Message):
+                    cacheNameError(query, answer.authority)
+            elif (failure.check(error.DNSServerError) or not failure.check(
+                    dns.DomainError, dns.AuthoritativeDomainError)):
+                staleResult = getattr(self.cache, 'staleResult', None)
+                stale = None
+                if staleResult is not None:
+                    stale = staleResult(query)
+                if stale is not None:
+                    self._verboseLog("Lookup failed, serving a stale result")
+                    ans, auth, add = stale
+                    response = self._responseFromMessage(
+                        message=message, rCode=dns.OK,
+                        answers=ans, authority=auth, additional=add)
+                    self.sendReply(protocol, response, address)
+                    return
+
         if failure.check(dns.DomainError, dns.AuthoritativeDomainError):
             rCode = dns.ENAME
         else:
@@ -446,12 +482,17 @@ class DNSServerFactory(protocol.ServerFactory):
         Called by L{DNSServerFactory.messageReceived} when a notify message is
         received.
 
-        Replies with a I{Not Implemented} error by default.
+        The message is passed on to the C{notify} method of those authorities
+        which have one, such as
+        L{SecondaryAuthority<twisted.names.secondary.SecondaryAuthority>}, with
+        the name of the zone, the serial number from its I{SOA} record if the
+        message gives one, and the address of the server which sent it.
+        Replies with no error if one of them accepts the message, and with a
+        I{Refused} error if none of them does.  If there are no such
+        authorities, replies with a I{Not Implemented} error.
 
         An error message will be logged if C{DNSServerFactory.verbose} is C{>1}.
 
-        Override in a subclass.
-
         @param protocol: The DNS protocol instance to which to send a response
             message.
         @type protocol: L{dns.DNSDatagramProtocol} or L{dns.DNSProtocol}
@@ -464,9 +505,39 @@ class DNSServerFactory(protocol.ServerFactory):
             or L{None} if C{protocol} is a stream protocol.
         @type address: L{tuple} or L{None}
         """
-        message.rCode = dns.ENOTIMP
-        self.sendReply(protocol, message, address)
         self._verboseLog("Notify message from %r" % (address,))
+        notifiable = []
+        resolvers = list(self.resolver.resolvers)
+        while resolvers:
+            resolver = resolvers.pop(0)
+            if isinstance(resolver, resolve.ResolverChain):
+                resolvers[:0] = resolver.resolvers
+            elif getattr(resolver, 'notify', None) is not None:
+                notifiable.append(resolver)
+        if not notifiable:
+            message.rCode = dns.ENOTIMP
+            self.sendReply(protocol, message, address)
+            return
+
+        serial = None
+        for record in message.answers:
+            if record.type == dns.SOA:
+                serial = record.payload.serial
+        if address is None:
+            host = protocol.transport.getPeer().host
+        else:
+            host = address[0]
+
+        rCode = dns.EREFUSED
+        if message.queries:
+            name = message.queries[0].name.name
+            for resolver in notifiable:
+                if resolver.notify(name, serial, host):
+                    rCode = dns.OK
+                    break
+        response = self._responseFromMessage(message=message, rCode=rCode)
+        response.opCode = message.opCode
+        self.sendReply(protocol, response, address)
 
 
     def handleOther(self, message, protocol, address):
@@ -14,7 +14,7 @@ from zope.interface.verify import verifyClass
 from twisted.trial import unittest
 
 from twisted.names import dns, cache
-from twisted.internet import task, interfaces
+from twisted.internet import defer, task, interfaces
 
 
 class CachingTests(unittest.TestCase):
@@ -142,3 +142,214 @@ class CachingTests(unittest.TestCase):
 
         return self.assertFailure(
             c.lookupAddress(b"example.com"), dns.DomainError)
+
+
+    def _aRecord(self, name=b"example.com", ttl=60):
+        """
+        Make a result with a single I{A} record.
+        """
+        return ([dns.RRHeader(name, dns.A, dns.IN, ttl,
+                              dns.Record_A("127.0.0.1", ttl))], [], [])
+
+
+    def _soaAuthority(self, ttl=300, minimum=60):
+        """
+        Make an authority section with an I{SOA} record.
+        """
+        return [dns.RRHeader(b"example.com", dns.SOA, dns.IN, ttl,
+                             dns.Record_SOA(minimum=minimum, ttl=ttl))]
+
+
+    def test_counters(self):
+        """
+        L{cache.CacheResolver} counts the lookups it answers in C{hits} and
+        the ones it cannot in C{misses}.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(dns.Query(b"example.com", dns.A, dns.IN),
+                      self._aRecord())
+        self.successResultOf(c.lookupAddress(b"example.com"))
+        self.successResultOf(c.lookupAddress(b"example.com"))
+        self.failureResultOf(c.lookupAddress(b"example.org"), dns.DomainError)
+        self.assertEqual((c.hits, c.misses), (2, 1))
+
+
+    def test_leastRecentlyUsedEvicted(self):
+        """
+        Once C{maximumSize} results are cached, caching another evicts the
+        least recently used one, and is counted in C{evictions}.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock, maximumSize=2)
+        names = [b"a.example.com", b"b.example.com", b"c.example.com"]
+        queries = [dns.Query(name, dns.A, dns.IN) for name in names]
+        c.cacheResult(queries[0], self._aRecord(names[0]))
+        c.cacheResult(queries[1], self._aRecord(names[1]))
+        self.successResultOf(c.lookupAddress(names[0]))
+        c.cacheResult(queries[2], self._aRecord(names[2]))
+        self.assertEqual(list(c.cache), [queries[0], queries[2]])
+        self.assertEqual(c.evictions, 1)
+
+
+    def test_singleTimer(self):
+        """
+        L{cache.CacheResolver} uses a single delayed call to remove expired
+        results, set for the first of them to expire.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        for ttl in (30, 10, 20):
+            name = b"%d.example.com" % (ttl,)
+            c.cacheResult(dns.Query(name, dns.A, dns.IN),
+                          self._aRecord(name, ttl))
+        [call] = clock.getDelayedCalls()
+        self.assertEqual(call.getTime(), 10)
+        clock.advance(10)
+        [call] = clock.getDelayedCalls()
+        self.assertEqual(call.getTime(), 20)
+        self.assertEqual(len(c.cache), 2)
+        clock.advance(20)
+        self.assertEqual(clock.getDelayedCalls(), [])
+        self.assertEqual(len(c.cache), 0)
+
+
+    def test_replacedResult(self):
+        """
+        A result cached again for the same query replaces the old one, and is
+        not removed when the old one would have expired.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        c.cacheResult(query, self._aRecord(ttl=10))
+        clock.advance(5)
+        c.cacheResult(query, self._aRecord(ttl=10))
+        clock.advance(5)
+        self.assertIn(query, c.cache)
+        clock.advance(5)
+        self.assertNotIn(query, c.cache)
+
+
+    def test_noDataLifetime(self):
+        """
+        A result with no answers and an I{SOA} record in its authority
+        section is cached for the smaller of the TTL and minimum field of
+        that record.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        c.cacheResult(query, ([], self._soaAuthority(300, 60), []))
+        clock.advance(59)
+        self.assertIn(query, c.cache)
+        clock.advance(1)
+        self.assertNotIn(query, c.cache)
+
+
+    def test_cacheNameError(self):
+        """
+        L{cache.CacheResolver.cacheNameError} caches the answer that a name
+        does not exist, making lookups fail with
+        L{dns.AuthoritativeDomainError} until it expires.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        c.cacheNameError(query, self._soaAuthority(30, 60))
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.AuthoritativeDomainError)
+        self.assertEqual(c.hits, 1)
+        clock.advance(31)
+        self.assertNotIn(query, c.cache)
+        self.failureResultOf(c.lookupAddress(b"example.com"), dns.DomainError)
+
+
+    def test_cacheNameErrorWithoutSOA(self):
+        """
+        L{cache.CacheResolver.cacheNameError} does not cache answers without
+        an I{SOA} record.
+        """
+        c = cache.CacheResolver(reactor=task.Clock())
+        c.cacheNameError(dns.Query(b"example.com", dns.A, dns.IN), [])
+        self.assertEqual(len(c.cache), 0)
+
+
+    def test_staleResult(self):
+        """
+        Results are kept for C{staleTime} after they expire, not to be looked
+        up, but to be had from L{cache.CacheResolver.staleResult} with TTLs
+        of at most C{staleTTL}.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock, staleTime=100)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        self.assertIsNone(c.staleResult(query))
+        c.cacheResult(query, self._aRecord(ttl=60))
+        clock.advance(61)
+        self.failureResultOf(c.lookupAddress(b"example.com"), dns.DomainError)
+        [answer], authority, additional = c.staleResult(query)
+        self.assertEqual(answer.ttl, c.staleTTL)
+        clock.advance(100)
+        self.assertIsNone(c.staleResult(query))
+
+
+    def test_prefetch(self):
+        """
+        A result served at least C{prefetchHits} times is looked up again
+        with C{prefetch} once it is within the last C{prefetchWindow} of its
+        lifetime, and replaced with the new result.
+        """
+        queries = []
+
+        class Upstream(object):
+            def query(self, query, timeout=None):
+                queries.append(query)
+                self.result = defer.Deferred()
+                return self.result
+
+        upstream = Upstream()
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock, prefetch=upstream)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        c.cacheResult(query, self._aRecord(ttl=100))
+        for i in range(3):
+            self.successResultOf(c.lookupAddress(b"example.com"))
+        self.assertEqual(queries, [])
+
+        clock.advance(95)
+        self.successResultOf(c.lookupAddress(b"example.com"))
+        self.successResultOf(c.lookupAddress(b"example.com"))
+        self.assertEqual(queries, [query])
+
+        upstream.result.callback(self._aRecord(ttl=100))
+        clock.advance(10)
+        [answer], authority, additional = self.successResultOf(
+            c.lookupAddress(b"example.com"))
+        self.assertEqual(answer.ttl, 90)
+
+
+    def test_state(self):
+        """
+        The state of a L{cache.CacheResolver} can be restored, along with the
+        results it had which have not expired, including state saved when
+        results were kept as C{(when, payload)} tuples.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        query = dns.Query(b"example.com", dns.A, dns.IN)
+        c.cacheResult(query, self._aRecord(ttl=60))
+        state = c.__getstate__()
+        self.assertIsNone(state["_expiryCall"])
+
+        restored = cache.CacheResolver(reactor=clock)
+        restored.__setstate__(state)
+        self.assertEqual(list(restored.cache), [query])
+
+        oldState = dict(state, cache={query: (0, self._aRecord(ttl=60))},
+                        cancel={})
+        restored = cache.CacheResolver(reactor=clock)
+        restored.__setstate__(oldState)
+        self.assertEqual(list(restored.cache), [query])
+        clock.advance(61)
+        self.assertEqual(list(restored.cache), [])
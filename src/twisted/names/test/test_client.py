@@ -10,6 +10,7 @@ from __future__ import division, absolute_import
 from zope.interface.verify import verifyClass, verifyObject
 
 from twisted.python import failure
+from twisted.python.compat import intToBytes
 from twisted.python.filepath import FilePath
 from twisted.python.runtime import platform
 
@@ -1194,6 +1195,178 @@ class RetryLogicTests(unittest.TestCase):
 
 
 
+class AdaptiveResolverTests(unittest.TestCase):
+    """
+    Tests for L{client.AdaptiveResolver}.
+    """
+    servers = [('1.1.1.1', 53), ('2.2.2.2', 53)]
+
+    def setUp(self):
+        self.reactor = MemoryReactor()
+        self.resolver = client.AdaptiveResolver(
+            servers=self.servers, reactor=self.reactor)
+
+
+    def sent(self):
+        """
+        Get the queries sent since this was last called.
+
+        @return: A L{list} of 3-tuples of the L{dns.Message}, the address it
+            was sent to, and the transport it was sent on.
+        """
+        sent = []
+        for transport in self.reactor.udpPorts.values():
+            for datagram, address in transport._sentPackets:
+                message = dns.Message()
+                message.fromStr(datagram)
+                sent.append((message, address, transport))
+            del transport._sentPackets[:]
+        return sent
+
+
+    def answer(self, sent, ip='127.0.0.1'):
+        """
+        Answer a query.
+
+        @param sent: One of the 3-tuples returned by L{sent}.
+        """
+        message, address, transport = sent
+        response = dns.Message(message.id, answer=True)
+        response.queries = message.queries
+        response.answers = [dns.RRHeader(
+            message.queries[0].name.name, payload=dns.Record_A(ip))]
+        transport._protocol.datagramReceived(response.toStr(), address)
+
+
+    def test_socketPool(self):
+        """
+        L{client.AdaptiveResolver} sends queries from at most C{socketCount}
+        sockets, which it keeps open until L{client.AdaptiveResolver.close}
+        is called.
+        """
+        for i in range(10):
+            self.resolver.lookupAddress(intToBytes(i) + b'.example.com')
+            [query] = self.sent()
+            self.answer(query)
+        self.assertEqual(len(self.reactor.udpPorts), 4)
+        self.resolver.close()
+        for transport in self.reactor.udpPorts.values():
+            self.assertIsNone(transport._protocol.transport)
+
+
+    def test_fastestServer(self):
+        """
+        Servers are tried in turn until they have all answered once, and then
+        queries are sent to the server which answers fastest.
+        """
+        for address, delay in zip(self.servers, (0.2, 0.1)):
+            self.resolver.lookupAddress(b'example.com')
+            [query] = self.sent()
+            self.assertEqual(query[1], address)
+            self.reactor.advance(delay)
+            self.answer(query)
+
+        self.resolver.lookupAddress(b'example.org')
+        [(message, address, transport)] = self.sent()
+        self.assertEqual(address, self.servers[1])
+        self.assertEqual(self.resolver.pickServer(), self.servers[1])
+
+
+    def test_race(self):
+        """
+        If the server a query is sent to does not answer in time, the query
+        is sent to the next server as well, and the first answer is used.
+        """
+        d = self.resolver.lookupAddress(b'example.com')
+        [first] = self.sent()
+        self.reactor.advance(self.resolver.initialRaceDelay)
+        [second] = self.sent()
+        self.assertEqual([first[1], second[1]], self.servers)
+        self.assertEqual(first[0].queries, second[0].queries)
+
+        self.answer(second, '10.0.0.2')
+        [answer], authority, additional = self.successResultOf(d)
+        self.assertEqual(answer.payload.dottedQuad(), '10.0.0.2')
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+        self.answer(first)
+        self.assertEqual(
+            self.resolver.serverStatistics()[self.servers[0]]['responses'], 0)
+
+
+    def test_raceDelay(self):
+        """
+        Once a server has been measured, the query is sent to the next server
+        after the server's round trip time and four times its variation.
+        """
+        self.resolver.lookupAddress(b'example.com')
+        [query] = self.sent()
+        self.reactor.advance(0.1)
+        self.answer(query)
+        self.resolver.lookupAddress(b'example.org')
+        [query] = self.sent()
+        self.assertEqual(query[1], self.servers[1])
+        self.reactor.advance(0.1)
+        self.answer(query)
+
+        self.resolver.lookupAddress(b'example.net')
+        [query] = self.sent()
+        self.reactor.advance(0.29)
+        self.assertEqual(self.sent(), [])
+        self.reactor.advance(0.02)
+        self.assertEqual(len(self.sent()), 1)
+
+
+    def test_timeout(self):
+        """
+        Once every server queried in an attempt has timed out, the next
+        attempt is made, with the next timeout, and the query fails with
+        L{defer.TimeoutError} once the last one has timed out.
+        """
+        d = self.resolver.lookupAddress(b'example.com', timeout=(1, 3))
+        self.reactor.advance(0.5)
+        self.assertEqual(len(self.sent()), 2)
+        self.reactor.advance(0.5)
+        [(message, address, transport)] = self.sent()
+        self.assertEqual(address, self.servers[1])
+        self.assertNoResult(d)
+        self.reactor.advance(1.5)
+        self.assertEqual(len(self.sent()), 1)
+        self.reactor.advance(1.5)
+        self.failureResultOf(d, defer.TimeoutError)
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+        for address in self.servers:
+            statistics = self.resolver.serverStatistics()[address]
+            self.assertEqual(
+                (statistics['queries'], statistics['timeouts']), (2, 2))
+
+
+    def test_cancel(self):
+        """
+        Cancelling a query stops waiting for its response.
+        """
+        d = self.resolver.query(dns.Query(b'example.com'))
+        d.cancel()
+        self.failureResultOf(d, defer.CancelledError)
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_serverStatistics(self):
+        """
+        L{client.AdaptiveResolver.serverStatistics} gives the number of
+        queries sent to each server, of responses and timeouts, and the
+        smoothed round trip time and its variation.
+        """
+        self.resolver.lookupAddress(b'example.com')
+        [query] = self.sent()
+        self.reactor.advance(0.25)
+        self.answer(query)
+        self.assertEqual(
+            self.resolver.serverStatistics(),
+            {self.servers[0]: dict(queries=1, responses=1, timeouts=0,
+                                   rtt=0.25, rttVariance=0.125)})
+
+
+
 class ThreadedResolverTests(unittest.TestCase):
     """
     Tests for L{client.ThreadedResolver}.
@@ -14,9 +14,10 @@ import struct
 
 from zope.interface.verify import verifyClass
 
+from twisted.python.compat import intToBytes
 from twisted.python.failure import Failure
 from twisted.python.util import FancyEqMixin, FancyStrMixin
-from twisted.internet import address, task
+from twisted.internet import address, defer, task
 from twisted.internet.error import CannotListenError, ConnectionDone
 from twisted.trial import unittest
 from twisted.names import dns
@@ -889,6 +890,201 @@ class MessageTests(unittest.SynchronousTestCase):
         self.assertTrue(message.answers[0].auth)
 
 
+    def _completeMessage(self):
+        """
+        Make a L{dns.Message} with records of many kinds, and names to be
+        compressed.
+        """
+        m = dns.Message(id=1234, answer=1, auth=1, recDes=1, recAv=1,
+                        maxSize=0)
+        m.queries = [dns.Query(b'www.example.com', dns.ALL_RECORDS)]
+        m.answers = [
+            dns.RRHeader(b'www.example.com', dns.A, ttl=60,
+                         payload=dns.Record_A('10.0.0.1', ttl=60)),
+            dns.RRHeader(b'www.example.com', dns.AAAA, ttl=60,
+                         payload=dns.Record_AAAA('::1', ttl=60)),
+            dns.RRHeader(b'www.example.com', dns.CNAME, ttl=60,
+                         payload=dns.Record_CNAME(b'web.example.com', 60)),
+            dns.RRHeader(b'www.example.com', dns.MX, ttl=60,
+                         payload=dns.Record_MX(10, b'mail.example.com', 60)),
+            dns.RRHeader(b'www.example.com', dns.TXT, ttl=60,
+                         payload=dns.Record_TXT(b'text', ttl=60)),
+            dns.RRHeader(b'www.example.com', 65280, ttl=60,
+                         payload=dns.UnknownRecord(b'data', ttl=60)),
+            ]
+        m.authority = [
+            dns.RRHeader(b'example.com', dns.SOA, ttl=60,
+                         payload=dns.Record_SOA(
+                             b'ns1.example.com', b'admin.example.com',
+                             serial=1, ttl=60)),
+            dns.RRHeader(b'example.com', dns.NS, ttl=60,
+                         payload=dns.Record_NS(b'ns1.example.com', 60)),
+            ]
+        m.additional = [
+            dns.RRHeader(b'ns1.example.com', dns.A, ttl=60,
+                         payload=dns.Record_A('10.0.0.2', ttl=60)),
+            dns._OPTHeader(udpPayloadSize=1232),
+            ]
+        return m
+
+
+    def test_toStrLikeEncode(self):
+        """
+        L{dns.Message.toStr} encodes a message the same way as
+        L{dns.Message.encode}.
+        """
+        strio = BytesIO()
+        self._completeMessage().encode(strio)
+        self.assertEqual(self._completeMessage().toStr(), strio.getvalue())
+
+
+    def test_fromStrLikeDecode(self):
+        """
+        L{dns.Message.fromStr} decodes a message the same way as
+        L{dns.Message.decode}.
+        """
+        encoded = self._completeMessage().toStr()
+        decoded = dns.Message()
+        decoded.decode(BytesIO(encoded))
+        m = dns.Message()
+        m.fromStr(encoded)
+        self.assertEqual(m, decoded)
+        self.assertEqual(decoded, m)
+
+
+    def test_fromStrLazyPayload(self):
+        """
+        The payloads of the records decoded by L{dns.Message.fromStr} are
+        only decoded when first used.
+        """
+        m = dns.Message()
+        m.fromStr(self._completeMessage().toStr())
+        header = m.answers[0]
+        self.assertIsNotNone(header._rdata)
+        self.assertEqual(header.payload, dns.Record_A('10.0.0.1', ttl=60))
+        self.assertIsNone(header._rdata)
+
+
+    def test_fromStrPickle(self):
+        """
+        The records decoded by L{dns.Message.fromStr} are pickled with their
+        decoded payload, rather than the message they came from.
+        """
+        m = dns.Message()
+        m.fromStr(self._completeMessage().toStr())
+        state = m.answers[0].__getstate__()
+        self.assertIsNone(state['_rdata'])
+        self.assertEqual(state['_payload'], dns.Record_A('10.0.0.1', ttl=60))
+
+
+    def test_fromStrTruncatedRecord(self):
+        """
+        L{dns.Message.fromStr} drops a record whose data runs past the end of
+        the message, along with the records after it.
+        """
+        encoded = self._completeMessage().toStr()
+        m = dns.Message()
+        m.fromStr(encoded[:-1])
+        self.assertEqual(len(m.answers), 6)
+        self.assertEqual(len(m.additional), 1)
+
+
+    def test_fromStrMalformedPayload(self):
+        """
+        The payload of a record decoded by L{dns.Message.fromStr} which runs
+        past its own data becomes an L{dns.UnknownRecord} holding that data,
+        rather than raising an exception when it is first used.
+        """
+        m = dns.Message()
+        m.answers = [dns.RRHeader(
+            b'example.com', dns.MX, ttl=60,
+            payload=dns.Record_MX(10, b'mail.example.com', ttl=60))]
+        encoded = m.toStr()
+        # Shorten both the record data and the message by 5 bytes.
+        rdlength = len(encoded) - 12 - (len(b'example.com') + 2) - 10
+        header = 12 + len(b'example.com') + 2 + 8
+        encoded = (encoded[:header] + struct.pack('!H', rdlength - 5) +
+                   encoded[header + 2:-5])
+        decoded = dns.Message()
+        decoded.fromStr(encoded)
+        self.assertEqual(
+            decoded.answers[0].payload,
+            dns.UnknownRecord(encoded[header + 2:], ttl=60))
+
+
+    def test_fromStrCompressionLoop(self):
+        """
+        L{dns.Message.fromStr} raises L{ValueError} for a name which points
+        back to itself.
+        """
+        m = dns.Message()
+        self.assertRaises(
+            ValueError, m.fromStr,
+            b'\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00'
+            b'\xc0\x0c\x00\x01\x00\x01')
+
+
+    def test_toStrLongMessage(self):
+        """
+        L{dns.Message.toStr} does not point back to names beyond the first
+        16 kilobytes of a message, which compression pointers cannot reach.
+        """
+        m = dns.Message(maxSize=0)
+        m.answers = [
+            dns.RRHeader(b'name' + intToBytes(i) + b'.example.com', dns.TXT,
+                         payload=dns.Record_TXT(b'x' * 200, ttl=0))
+            for i in range(100)]
+        m.answers.append(dns.RRHeader(
+            b'www.name99.example.com', dns.A,
+            payload=dns.Record_A('10.0.0.1', ttl=0)))
+        decoded = dns.Message()
+        decoded.fromStr(m.toStr())
+        self.assertEqual(decoded.answers, m.answers)
+
+
+    def test_toStrEncodings(self):
+        """
+        L{dns.Message.toStr} keeps what follows the header in
+        C{_encodings}, and reuses it for a message with the same queries,
+        encoding only the header again.
+        """
+        encodings = {}
+        m = self._completeMessage()
+        m._encodings = encodings
+        first = m.toStr()
+        self.assertEqual(first, self._completeMessage().toStr())
+        self.assertEqual(list(encodings), [
+            (((b'www.example.com', dns.ALL_RECORDS, dns.IN),), m.maxSize)])
+
+        m = self._completeMessage()
+        m._encodings = encodings
+        m.id, m.recDes = 1234, 1
+        m.answers[0] = dns.RRHeader(
+            b'www.example.com', payload=dns.Record_A('10.0.0.9', ttl=60))
+        expected = self._completeMessage()
+        expected.id, expected.recDes = 1234, 1
+        self.assertEqual(m.toStr(), expected.toStr())
+
+
+    def test_toStrEncodingsTruncated(self):
+        """
+        A message whose encoding is reused is marked as truncated if the
+        encoding was.
+        """
+        encodings = {}
+        m = self._completeMessage()
+        m.maxSize = 100
+        m._encodings = encodings
+        first = m.toStr()
+        self.assertEqual(m.trunc, 1)
+
+        m = self._completeMessage()
+        m.maxSize = 100
+        m._encodings = encodings
+        self.assertEqual(m.toStr(), first)
+        self.assertEqual(m.trunc, 1)
+
+
 
 class MessageComparisonTests(ComparisonTestsMixin,
                              unittest.SynchronousTestCase):
@@ -1194,6 +1390,50 @@ class DatagramProtocolTests(unittest.TestCase):
         return d
 
 
+    def test_queryCancelled(self):
+        """
+        Cancelling the L{defer.Deferred} returned by
+        L{DNSDatagramProtocol.query} stops waiting for the response, and its
+        timeout.
+        """
+        d = self.proto.query(('127.0.0.1', 21345), [dns.Query(b'foo')])
+        d.cancel()
+        self.failureResultOf(d, defer.CancelledError)
+        self.assertEqual(self.proto.liveMessages, {})
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_responseFromOtherAddress(self):
+        """
+        L{DNSDatagramProtocol.datagramReceived} drops a response to a query
+        which comes from another address than the query was sent to, and
+        keeps waiting for the real one.
+        """
+        d = self.proto.query(('127.0.0.1', 21345), [dns.Query(b'foo')])
+        m = dns.Message()
+        m.id = next(iter(self.proto.liveMessages.keys()))
+        self.proto.datagramReceived(m.toStr(), ('127.0.0.2', 21345))
+        self.proto.datagramReceived(m.toStr(), ('127.0.0.1', 53))
+        self.assertNoResult(d)
+        self.proto.datagramReceived(m.toStr(), ('127.0.0.1', 21345))
+        self.assertEqual(self.successResultOf(d).id, m.id)
+        self.assertEqual(self.proto._liveAddresses, {})
+
+
+    def test_queryOverForgetsAddress(self):
+        """
+        The address a query was sent to is forgotten once the query times out
+        or is cancelled.
+        """
+        d = self.proto.query(('127.0.0.1', 21345), [dns.Query(b'foo')])
+        self.clock.advance(10)
+        self.failureResultOf(d, dns.DNSQueryTimeoutError)
+        d = self.proto.query(('127.0.0.1', 21345), [dns.Query(b'foo')])
+        d.cancel()
+        self.failureResultOf(d, defer.CancelledError)
+        self.assertEqual(self.proto._liveAddresses, {})
+
+
     def test_writeError(self):
         """
         Exceptions raised by the transport's write method should be turned into
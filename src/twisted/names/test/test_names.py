@@ -17,7 +17,7 @@ from struct import pack
 
 from twisted.trial import unittest
 
-from twisted.internet import reactor, defer, error
+from twisted.internet import reactor, defer, error, task
 from twisted.internet.defer import succeed
 from twisted.names import client, server, common, authority, dns
 from twisted.names.dns import SOA, Message, RRHeader, Record_A, Record_SOA
@@ -621,6 +621,73 @@ class AuthorityTests(unittest.TestCase):
         self._referralTest('lookupAllRecords')
 
 
+    def _cachingAuthority(self):
+        """
+        Make an authority with an I{A} record for the name of its zone.
+        """
+        return NoFileAuthority(
+            soa=(b'example.com', soa_record),
+            records={b'example.com': [soa_record, dns.Record_A('1.2.3.4')]})
+
+
+    def test_answerCached(self):
+        """
+        L{FileAuthority} keeps the answers it finds, handing out copies of
+        them which share one L{dict} of encodings.
+        """
+        authority = self._cachingAuthority()
+        first = self.successResultOf(authority.lookupAddress(b'example.com'))
+        authority.records[b'example.com'].append(dns.Record_A('1.2.3.5'))
+        second = self.successResultOf(authority.lookupAddress(b'example.com'))
+        self.assertEqual(first, second)
+        self.assertEqual(len(second[0]), 1)
+        self.assertIsNot(first[0], second[0])
+        self.assertIs(first.encodings, second.encodings)
+
+
+    def test_answerCacheZoneReplaced(self):
+        """
+        The answers L{FileAuthority} keeps are dropped when its records or
+        its I{SOA} are replaced.
+        """
+        authority = self._cachingAuthority()
+        first = self.successResultOf(authority.lookupAddress(b'example.com'))
+        authority.records = {b'example.com': [dns.Record_A('1.2.3.5')]}
+        second = self.successResultOf(authority.lookupAddress(b'example.com'))
+        self.assertEqual(
+            [r.payload for r in second[0]], [dns.Record_A('1.2.3.5')])
+        self.assertIsNot(first.encodings, second.encodings)
+
+        authority.soa = (b'example.com', soa_record)
+        third = self.successResultOf(authority.lookupAddress(b'example.com'))
+        self.assertIsNot(second.encodings, third.encodings)
+
+
+    def test_answerCacheErrors(self):
+        """
+        Lookups which fail are not kept, and fail again.
+        """
+        authority = self._cachingAuthority()
+        for i in range(2):
+            self.failureResultOf(
+                authority.lookupAddress(b'missing.example.com'),
+                dns.AuthoritativeDomainError)
+            self.failureResultOf(
+                authority.lookupAddress(b'example.org'), DomainError)
+        self.assertEqual(authority._cache, {})
+
+
+    def test_answerCacheSize(self):
+        """
+        L{FileAuthority} keeps no more than C{_cacheSize} answers.
+        """
+        authority = self._cachingAuthority()
+        authority._cacheSize = 2
+        for type in (dns.A, dns.SOA, dns.MX):
+            self.successResultOf(authority.query(dns.Query(b'example.com', type)))
+        self.assertEqual(len(authority._cache), 2)
+
+
 
 class AdditionalProcessingTests(unittest.TestCase):
     """
@@ -1035,3 +1102,281 @@ class SecondaryAuthorityTests(unittest.TestCase):
         result = self.successResultOf(secondary.lookupAddress('example.com'))
         self.assertEqual((
                 [RRHeader(b'example.com', payload=a, auth=True)], [], []), result)
+
+
+    def test_transferReplacesAnswers(self):
+        """
+        The answers a L{SecondaryAuthority} keeps are dropped when a zone
+        transfer completes.
+        """
+        secondary = SecondaryAuthority('192.168.1.1', b'example.com')
+        soa = RRHeader(b'example.com', type=SOA, payload=soa_record)
+        secondary._cbZone(([
+            soa, RRHeader(b'example.com', payload=Record_A('1.2.3.4')), soa],
+            [], []))
+        first = self.successResultOf(secondary.lookupAddress('example.com'))
+        secondary._cbZone(([
+            soa, RRHeader(b'example.com', payload=Record_A('1.2.3.5')), soa],
+            [], []))
+        second = self.successResultOf(secondary.lookupAddress('example.com'))
+        self.assertEqual(
+            [[r.payload for r in answer[0]] for answer in (first, second)],
+            [[Record_A('1.2.3.4')], [Record_A('1.2.3.5')]])
+
+
+
+class SecondaryAuthorityUpdateTests(unittest.TestCase):
+    """
+    Tests for how L{SecondaryAuthority} keeps its zone up to date, with
+    incremental zone transfers and I{NOTIFY} messages.
+    """
+
+    def setUp(self):
+        self.reactor = MemoryReactorClock()
+        self.secondary = SecondaryAuthority.fromServerAddressAndDomain(
+            ('192.168.1.2', 1234), b'example.com')
+        self.secondary._reactor = self.reactor
+        self.secondary._cbZone((
+            [self._soa(1), self._a('10.0.0.1'), self._a('10.0.0.2'),
+             self._soa(1)], [], []))
+
+
+    def _soa(self, serial):
+        """
+        Make an I{SOA} record for a version of I{example.com}.
+        """
+        return RRHeader(b'example.com', SOA, payload=Record_SOA(
+            b'ns1.example.com', b'admin.example.com', serial=serial, ttl=60))
+
+
+    def _a(self, address):
+        """
+        Make an I{A} record for I{example.com}.
+        """
+        return RRHeader(b'example.com', payload=Record_A(address, ttl=60))
+
+
+    def _connect(self):
+        """
+        Connect the latest zone transfer made by the secondary authority.
+
+        @return: The protocol connected, and the request it sent.
+        """
+        host, port, factory, timeout, bindAddress = (
+            self.reactor.tcpClients[-1])
+        self.assertEqual((host, port), ('192.168.1.2', 1234))
+        proto = factory.buildProtocol((host, port))
+        transport = StringTransport()
+        proto.makeConnection(transport)
+        request = Message()
+        request.fromStr(transport.value()[2:])
+        return proto, request
+
+
+    def _respond(self, proto, request, *answers, **kwargs):
+        """
+        Send messages with the given answers in response to a request.
+        """
+        for records in answers:
+            response = Message(id=request.id, answer=1, **kwargs)
+            response.answers = records
+            data = response.toStr()
+            proto.dataReceived(pack('!H', len(data)) + data)
+
+
+    def _addresses(self):
+        """
+        Look up the addresses of I{example.com}.
+        """
+        answers, authority, additional = self.successResultOf(
+            self.secondary.lookupAddress('example.com'))
+        return sorted(record.payload.dottedQuad() for record in answers)
+
+
+    def test_incrementalRequest(self):
+        """
+        Once it holds a zone, L{SecondaryAuthority.transfer} asks for the
+        changes to it since the version held, giving its I{SOA} record.
+        """
+        self.secondary.transfer()
+        proto, request = self._connect()
+        self.assertEqual(
+            request.queries, [dns.Query(b'example.com', dns.IXFR)])
+        self.assertEqual(
+            [record.payload.serial for record in request.authority], [1])
+
+
+    def test_incremental(self):
+        """
+        The changes received by an incremental zone transfer, in one or
+        more steps, are applied to the zone held.
+        """
+        d = self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(proto, request, [
+            self._soa(3),
+            self._soa(1), self._a('10.0.0.1'),
+            self._soa(2), self._a('10.0.0.3')], [
+            self._soa(2), self._a('10.0.0.2'),
+            self._soa(3), self._a('10.0.0.4'),
+            self._soa(3)])
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(self._addresses(), ['10.0.0.3', '10.0.0.4'])
+        self.assertEqual(self.secondary.soa[1].serial, 3)
+        self.assertEqual(
+            [record.serial for record in self.secondary.records['example.com']
+             if record.TYPE == SOA], [3])
+        self.assertFalse(self.secondary.transferring)
+        self.assertTrue(self.reactor.connectors[-1]._disconnected)
+
+
+    def test_incrementalUpToDate(self):
+        """
+        The zone held is kept if the primary answers an incremental zone
+        transfer with the version held.
+        """
+        records = self.secondary.records
+        d = self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(proto, request, [self._soa(1)])
+        self.successResultOf(d)
+        self.assertIs(self.secondary.records, records)
+        self.assertEqual(len(self.reactor.tcpClients), 1)
+
+
+    def test_incrementalWholeZone(self):
+        """
+        If the primary answers an incremental zone transfer with the whole
+        zone, the zone held is replaced.
+        """
+        d = self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(
+            proto, request,
+            [self._soa(2), self._a('10.0.0.5')], [self._soa(2)])
+        self.successResultOf(d)
+        self.assertEqual(self._addresses(), ['10.0.0.5'])
+        self.assertEqual(self.secondary.soa[1].serial, 2)
+
+
+    def test_incrementalError(self):
+        """
+        If the primary answers an incremental zone transfer with an error, the
+        whole zone is transferred instead.
+        """
+        self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(proto, request, [], rCode=dns.ENOTIMP)
+        proto, request = self._connect()
+        self.assertEqual(
+            request.queries, [dns.Query(b'example.com', dns.AXFR)])
+
+
+    def test_incrementalMalformed(self):
+        """
+        If the primary answers an incremental zone transfer with records
+        which do not start with an I{SOA} record, the whole zone is
+        transferred instead.
+        """
+        self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(proto, request, [self._a('10.0.0.5'), self._soa(2)])
+        proto, request = self._connect()
+        self.assertEqual(
+            request.queries, [dns.Query(b'example.com', dns.AXFR)])
+
+
+    def test_incrementalTimeout(self):
+        """
+        An incremental zone transfer which is not over within ten seconds
+        fails, and the zone held is kept.
+        """
+        records = self.secondary.records
+        d = self.secondary.transfer()
+        proto, request = self._connect()
+        self._respond(proto, request, [self._soa(2), self._soa(1)])
+        self.reactor.advance(10)
+        self.successResultOf(d)
+        self.assertEqual(len(self.flushLoggedErrors(error.TimeoutError)), 1)
+        self.assertIs(self.secondary.records, records)
+        self.assertFalse(self.secondary.transferring)
+        self.assertTrue(self.reactor.connectors[-1]._disconnected)
+
+
+    def test_swapInOneGo(self):
+        """
+        A zone built in several chunks is only served once it is complete.
+        """
+        steps = []
+        self.secondary._cooperator = task.Cooperator(
+            terminationPredicateFactory=lambda: lambda: True,
+            scheduler=steps.append)
+        self.secondary._chunkSize = 1
+        d = self.secondary._cbZone((
+            [self._soa(2), self._a('10.0.0.7'), self._a('10.0.0.8'),
+             self._soa(2)], [], []))
+        ticks = 0
+        while steps:
+            self.assertEqual(self._addresses(), ['10.0.0.1', '10.0.0.2'])
+            steps.pop(0)()
+            ticks += 1
+        self.assertEqual(ticks, 3)
+        self.successResultOf(d)
+        self.assertEqual(self._addresses(), ['10.0.0.7', '10.0.0.8'])
+
+
+    def test_notify(self):
+        """
+        L{SecondaryAuthority.notify} transfers the zone when its primary
+        announces a newer version of it.
+        """
+        self.assertTrue(self.secondary.notify(b'EXAMPLE.com', 2, '192.168.1.2'))
+        proto, request = self._connect()
+        self.assertEqual(
+            request.queries, [dns.Query(b'example.com', dns.IXFR)])
+
+
+    def test_notifyWithoutSerial(self):
+        """
+        L{SecondaryAuthority.notify} transfers the zone when the message from
+        its primary gives no serial number.
+        """
+        self.assertTrue(
+            self.secondary.notify(b'example.com', None, '192.168.1.2'))
+        self.assertEqual(len(self.reactor.tcpClients), 1)
+
+
+    def test_notifyOld(self):
+        """
+        L{SecondaryAuthority.notify} accepts an announcement of a version of
+        the zone which is not newer than the one held, without transferring
+        it.
+        """
+        self.assertTrue(self.secondary.notify(b'example.com', 1, '192.168.1.2'))
+        self.assertEqual(self.reactor.tcpClients, [])
+
+
+    def test_notifyOther(self):
+        """
+        L{SecondaryAuthority.notify} refuses messages about other zones, and
+        from other servers than its primary.
+        """
+        self.assertFalse(self.secondary.notify(b'example.org', 2, '192.168.1.2'))
+        self.assertFalse(self.secondary.notify(b'example.com', 2, '192.168.1.3'))
+        self.assertEqual(self.reactor.tcpClients, [])
+
+
+    def test_notifyWhileTransferring(self):
+        """
+        If a newer version is announced during a transfer, the zone is
+        transferred again once that transfer is over.
+        """
+        self.secondary.transfer()
+        proto, request = self._connect()
+        self.assertTrue(self.secondary.notify(b'example.com', 3, '192.168.1.2'))
+        self.assertEqual(len(self.reactor.tcpClients), 1)
+        self._respond(proto, request, [self._soa(2), self._soa(2)])
+        self.assertEqual(len(self.reactor.tcpClients), 2)
+        proto, request = self._connect()
+        self.assertEqual(
+            [record.payload.serial for record in request.authority], [2])
@@ -8,11 +8,13 @@ from __future__ import division, absolute_import
 
 from zope.interface.verify import verifyClass
 
-from twisted.internet import defer
+from twisted.internet import defer, task
+from twisted.internet.address import IPv4Address
 from twisted.internet.interfaces import IProtocolFactory
-from twisted.names import dns, error, resolve, server
+from twisted.names import authority, cache, dns, error, resolve, server
 from twisted.python import failure, log
 from twisted.trial import unittest
+from twisted.test.proto_helpers import StringTransport
 
 
 
@@ -141,6 +143,28 @@ class NoopProtocol(object):
 
 
 
+class NotifiableAuthority(object):
+    """
+    A fake authority which records the I{NOTIFY} messages passed on to it.
+
+    @ivar notified: The arguments L{notify} has been called with.
+
+    @ivar accept: What L{notify} returns.
+    """
+    def __init__(self, accept):
+        self.notified = []
+        self.accept = accept
+
+
+    def notify(self, name, serial, host):
+        """
+        Record a I{NOTIFY} message.
+        """
+        self.notified.append((name, serial, host))
+        return self.accept
+
+
+
 class RaisingResolver(object):
     """
     A partial fake L{IResolver} whose methods raise an exception containing the
@@ -749,6 +773,22 @@ class DNSServerFactoryTests(unittest.TestCase):
         self.assertIs(message.additional, additional)
 
 
+    def test_gotResolverResponseEncodings(self):
+        """
+        L{server.DNSServerFactory.gotResolverResponse} lets the response reuse
+        the encodings of answers kept by an authority.
+        """
+        f = server.DNSServerFactory()
+        answer = authority._Answer(([], [], []))
+        answer.encodings = encodings = {}
+        e = self.assertRaises(
+            RaisingProtocol.WriteMessageArguments,
+            f.gotResolverResponse, answer,
+            protocol=RaisingProtocol(), message=dns.Message(), address=None)
+        (message,), kwargs = e.args
+        self.assertIs(message._encodings, encodings)
+
+
     def test_gotResolverResponseCallsResponseFromMessage(self):
         """
         L{server.DNSServerFactory.gotResolverResponse} calls
@@ -1039,6 +1079,91 @@ class DNSServerFactoryTests(unittest.TestCase):
         self.assertEqual([dns.Message(rCode=3, answer=True)], responses)
 
 
+    def _cachingFactory(self):
+        """
+        Make a L{server.DNSServerFactory} with a L{cache.CacheResolver} on a
+        fake clock, which records the replies it sends.
+
+        @return: A 2-tuple of the factory and the list of its replies.
+        """
+        factory = server.DNSServerFactory(
+            caches=[cache.CacheResolver(reactor=task.Clock(), staleTime=60)])
+        responses = []
+        factory.sendReply = (
+            lambda protocol, response, address: responses.append(response)
+        )
+        return factory, responses
+
+
+    def test_gotResolverErrorCachesNameError(self):
+        """
+        L{server.DNSServerFactory.gotResolverError} caches name errors whose
+        answer has an I{SOA} record in its authority section.
+        """
+        factory, responses = self._cachingFactory()
+        query = dns.Query(b'example.com', dns.A, dns.IN)
+        answer = dns.Message(rCode=dns.ENAME)
+        answer.authority = [dns.RRHeader(
+            b'example.com', dns.SOA, dns.IN, 60, dns.Record_SOA(minimum=60))]
+        request = dns.Message()
+        request.queries = [query]
+        factory.gotResolverError(
+            failure.Failure(error.DNSNameError(answer)),
+            protocol=None, message=request, address=None)
+
+        self.assertEqual([dns.ENAME], [r.rCode for r in responses])
+        self.assertTrue(factory.cache.cache[query].nameError)
+
+
+    def test_gotResolverErrorServesStaleResult(self):
+        """
+        L{server.DNSServerFactory.gotResolverError} answers errors other than
+        name errors with an expired result from the cache, if it still has
+        one.
+        """
+        factory, responses = self._cachingFactory()
+        query = dns.Query(b'example.com', dns.A, dns.IN)
+        record = dns.RRHeader(
+            b'example.com', dns.A, dns.IN, 40, dns.Record_A('127.0.0.1', 40))
+        factory.cache.cacheResult(query, ([record], [], []))
+        factory.cache._reactor.advance(50)
+        request = dns.Message()
+        request.queries = [query]
+        factory.gotResolverError(
+            failure.Failure(error.DNSServerError()),
+            protocol=None, message=request, address=None)
+
+        [response] = responses
+        self.assertEqual(response.rCode, dns.OK)
+        self.assertEqual(
+            [(a.name.name, a.ttl) for a in response.answers],
+            [(b'example.com', factory.cache.staleTTL)])
+
+
+    def test_gotResolverErrorOtherCache(self):
+        """
+        L{server.DNSServerFactory.gotResolverError} answers with the error if
+        C{cache} has neither C{cacheNameError} nor C{staleResult}.
+        """
+        factory = server.DNSServerFactory(caches=[RaisingCache()])
+        responses = []
+        factory.sendReply = (
+            lambda protocol, response, address: responses.append(response)
+        )
+        request = dns.Message()
+        request.queries = [dns.Query(b'example.com', dns.A, dns.IN)]
+        factory.gotResolverError(
+            failure.Failure(error.DNSNameError(dns.Message(rCode=dns.ENAME))),
+            protocol=None, message=request, address=None)
+        factory.gotResolverError(
+            failure.Failure(RuntimeError()),
+            protocol=None, message=request, address=None)
+
+        self.assertEqual(
+            [dns.ENAME, dns.ESERVER], [r.rCode for r in responses])
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+
+
     def test_gotResolverResponseResetsResponseAttributes(self):
         """
         L{server.DNSServerFactory.gotResolverResponse} does not allow request
@@ -1221,6 +1346,77 @@ class DNSServerFactoryTests(unittest.TestCase):
         self.assertEqual(message.rCode, dns.ENOTIMP)
 
 
+    def _notify(self, authorities, address=('192.168.1.2', 53),
+                protocol=None):
+        """
+        Pass a I{NOTIFY} message for I{example.com}, version 5, to the
+        C{handleNotify} method of a L{server.DNSServerFactory} with the given
+        authorities.
+
+        @return: The response.
+        """
+        f = server.DNSServerFactory(authorities=authorities)
+        request = dns.Message(id=7, opCode=dns.OP_NOTIFY, auth=1)
+        request.queries = [dns.Query(b'example.com', dns.SOA)]
+        request.answers = [dns.RRHeader(
+            b'example.com', dns.SOA,
+            payload=dns.Record_SOA(b'ns1.example.com', serial=5))]
+        e = self.assertRaises(
+            RaisingProtocol.WriteMessageArguments,
+            f.handleNotify,
+            message=request, protocol=protocol or RaisingProtocol(),
+            address=address)
+        args, kwargs = e.args
+        return args[0]
+
+
+    def test_handleNotifyAuthority(self):
+        """
+        L{server.DNSServerFactory.handleNotify} passes the message on to the
+        authorities which have a C{notify} method, including those in a
+        L{resolve.ResolverChain}, until one of them accepts it, and replies
+        with no error.
+        """
+        refusing = NotifiableAuthority(False)
+        accepting = NotifiableAuthority(True)
+        later = NotifiableAuthority(True)
+        response = self._notify([
+            object(), refusing,
+            resolve.ResolverChain([accepting]), later])
+        self.assertEqual(
+            refusing.notified, [(b'example.com', 5, '192.168.1.2')])
+        self.assertEqual(accepting.notified, refusing.notified)
+        self.assertEqual(later.notified, [])
+        self.assertEqual(
+            (response.id, response.answer, response.opCode, response.rCode,
+             response.queries),
+            (7, 1, dns.OP_NOTIFY, dns.OK,
+             [dns.Query(b'example.com', dns.SOA)]))
+
+
+    def test_handleNotifyRefused(self):
+        """
+        L{server.DNSServerFactory.handleNotify} replies with a I{Refused} error
+        if none of the authorities accepts the message.
+        """
+        response = self._notify([NotifiableAuthority(False)])
+        self.assertEqual(response.rCode, dns.EREFUSED)
+
+
+    def test_handleNotifyStream(self):
+        """
+        L{server.DNSServerFactory.handleNotify} passes on the address of the
+        peer of a stream protocol.
+        """
+        protocol = RaisingProtocol()
+        protocol.transport = StringTransport(
+            peerAddress=IPv4Address('TCP', '192.168.1.3', 1234))
+        notifiable = NotifiableAuthority(True)
+        self._notify([notifiable], address=None, protocol=protocol)
+        self.assertEqual(
+            notifiable.notified, [(b'example.com', 5, '192.168.1.3')])
+
+
     def test_handleNotifyLogging(self):
         """
         L{server.DNSServerFactory.handleNotify} logs the message origin address
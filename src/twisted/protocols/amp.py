@@ -215,7 +215,8 @@ from twisted.python._tzhelper import (
 
 from twisted.python import log, filepath
 
-from twisted.internet.interfaces import IFileDescriptorReceiver
+from twisted.internet.interfaces import (
+    IBufferAwareProtocol, IFileDescriptorReceiver)
 from twisted.internet.main import CONNECTION_LOST
 from twisted.internet.error import PeerVerifyError, ConnectionLost
 from twisted.internet.error import ConnectionClosed
@@ -2280,7 +2281,7 @@ class _DescriptorExchanger(object):
 
 
 
-@implementer(IBoxSender)
+@implementer(IBoxSender, IBufferAwareProtocol)
 class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
                         _DescriptorExchanger):
     """
@@ -2406,7 +2407,9 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
         # If we already have an inner protocol, then we don't deliver data to
         # the protocol parser any more; we just hand it off.
         if self.innerProtocol is not None:
-            self.innerProtocol.dataReceived(data)
+            # The nested protocol may not be able to handle anything but
+            # bytes.
+            self.innerProtocol.dataReceived(bytes(data))
             return
         return Int16StringReceiver.dataReceived(self, data)
 
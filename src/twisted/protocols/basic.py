@@ -10,6 +10,7 @@ Basic protocols, such as line-oriented, netstring, and int prefixed strings.
 from __future__ import absolute_import, division
 
 # System imports
+import os
 import re
 from struct import pack, unpack, calcsize
 from io import BytesIO
@@ -888,6 +889,10 @@ class FileSender:
     This is a helper for protocols that, at some point, will take a
     file-like object, read its contents, and write them out to the network,
     optionally performing some transformation on the bytes in between.
+
+    If there is no transformation and the consumer provides
+    L{interfaces.ISendFileTransport}, the rest of the file is sent by the
+    consumer directly, without being read into memory.
     """
 
     CHUNK_SIZE = 2 ** 14
@@ -919,10 +924,65 @@ class FileSender:
         self.transform = transform
 
         self.deferred = deferred = defer.Deferred()
+        if (transform is None and
+                interfaces.ISendFileTransport.providedBy(consumer)):
+            try:
+                self._sendFile()
+            except NotImplementedError:
+                pass
+            else:
+                return deferred
         self.consumer.registerProducer(self, False)
         return deferred
 
 
+    def _sendFile(self):
+        """
+        Have the consumer send the rest of the file with
+        L{interfaces.ISendFileTransport.sendFile}.
+
+        @raise NotImplementedError: If the file cannot be sent that way.
+        """
+        try:
+            offset = self.file.tell()
+            size = os.fstat(self.file.fileno()).st_size - offset
+        except (AttributeError, ValueError, IOError, OSError):
+            raise NotImplementedError("%r has no file descriptor" % (
+                self.file,))
+        if size <= 0:
+            raise NotImplementedError("Nothing to send")
+        d = self.consumer.sendFile(self.file, offset, size)
+        # Register as a streaming producer so that the consumer does not ask
+        # for data, but will still tell us if it goes away.
+        self.consumer.registerProducer(self, True)
+        d.addCallbacks(self._fileSent, self._fileFailed,
+                       callbackArgs=(offset,))
+
+
+    def _fileSent(self, sent, offset):
+        """
+        The consumer has sent the file; finish the transfer.
+        """
+        if sent:
+            self.file.seek(offset + sent - 1)
+            self.lastSent = self.file.read(1)
+        self.file = None
+        self.consumer.unregisterProducer()
+        if self.deferred:
+            self.deferred.callback(self.lastSent)
+            self.deferred = None
+
+
+    def _fileFailed(self, reason):
+        """
+        The consumer failed to send the file.
+        """
+        self.file = None
+        if self.deferred:
+            self.deferred.errback(reason)
+            self.deferred = None
+
+
     def resumeProducing(self):
         chunk = ''
         if self.file:
@@ -395,6 +395,7 @@ _months = [
 
 
 @implementer(interfaces.IConsumer)
+@implementer(interfaces.ISendFileTransport)
 class DTP(object, protocol.Protocol):
     isConnected = False
 
@@ -486,6 +487,18 @@ class DTP(object, protocol.Protocol):
             return self.transport.write(data)
         raise Exception("Crap damn crap damn crap damn")
 
+    def sendFile(self, fileObject, offset, count):
+        """
+        Send part of a file over the data connection, directly from the file
+        if the transport supports that.
+
+        @see: L{twisted.internet.interfaces.ISendFileTransport.sendFile}
+        """
+        if not interfaces.ISendFileTransport.providedBy(self.transport):
+            raise NotImplementedError(
+                "%r cannot send files" % (self.transport,))
+        return self.transport.sendFile(fileObject, offset, count)
+
 
     # Pretend to be a producer, too.
     def _conswrite(self, bytes):
@@ -21,18 +21,38 @@ To connect to a server, create a factory for L{MemCacheProtocol}::
 All the operations of the memcache protocol are present, but
 L{MemCacheProtocol.set} and L{MemCacheProtocol.get} are the more important.
 
+To spread keys over several servers, use a L{MemCacheCluster}::
+
+    from twisted.internet import reactor
+    from twisted.internet.endpoints import TCP4ClientEndpoint
+    from twisted.protocols.memcache import MemCacheCluster, DEFAULT_PORT
+    cluster = MemCacheCluster({
+        "cache1": TCP4ClientEndpoint(reactor, "cache1", DEFAULT_PORT),
+        "cache2": TCP4ClientEndpoint(reactor, "cache2", DEFAULT_PORT)})
+    d = cluster.get(b"mykey")
+
 See U{http://code.sixapart.com/svn/memcached/trunk/server/doc/protocol.txt} for
 more information about the protocol.
 """
 
 from __future__ import absolute_import, division
 
-from collections import deque
+import struct
+
+from bisect import bisect
+from collections import OrderedDict, deque
+from hashlib import md5
+
+from zope.interface import implementer
 
 from twisted.protocols.basic import LineReceiver
 from twisted.protocols.policies import TimeoutMixin
-from twisted.internet.defer import Deferred, fail, TimeoutError
+from twisted.internet.defer import (
+    Deferred, fail, succeed, gatherResults, TimeoutError)
+from twisted.internet.interfaces import IBufferAwareProtocol
+from twisted.internet.protocol import Factory
 from twisted.python import log
+from twisted.python.failure import Failure
 from twisted.python.compat import (
     intToBytes, iteritems, nativeString, networkString)
 
@@ -107,6 +127,7 @@ class Command(object):
 
 
 
+@implementer(IBufferAwareProtocol)
 class MemCacheProtocol(LineReceiver, TimeoutMixin):
     """
     MemCache protocol: connect to a memcached server to store/retrieve values.
@@ -762,5 +783,445 @@ class MemCacheProtocol(LineReceiver, TimeoutMixin):
 
 
 
-__all__ = ["MemCacheProtocol", "DEFAULT_PORT", "NoSuchCommand", "ClientError",
-           "ServerError"]
+def _hash(data):
+    """
+    Hash some bytes to a position on a L{_HashRing}.
+
+    @param data: The bytes to hash.
+    @type data: L{bytes}
+
+    @return: The position, an unsigned 32-bit integer.
+    @rtype: L{int}
+    """
+    return struct.unpack(">I", md5(data).digest()[:4])[0]
+
+
+
+class _HashRing(object):
+    """
+    A consistent hash ring, which maps keys to servers so that adding or
+    removing a server only moves the keys of its neighbours on the ring.
+
+    @ivar _positions: The sorted positions of the points of the servers on
+        the ring.
+    @type _positions: L{list} of L{int}
+
+    @ivar _servers: The server at each of C{_positions}.
+    @type _servers: L{list}
+    """
+
+    def __init__(self, servers, replicas):
+        """
+        @param servers: The names of the servers.
+        @type servers: iterable of L{str}
+
+        @param replicas: The number of points of each server on the ring.
+            More points spread keys more evenly.
+        @type replicas: L{int}
+        """
+        points = sorted(
+            (_hash(networkString("%s-%d" % (server, i))), server)
+            for server in servers for i in range(replicas))
+        self._positions = [position for position, server in points]
+        self._servers = [server for position, server in points]
+
+
+    def serverForKey(self, key):
+        """
+        Find the server a key belongs to: the first one clockwise from the
+        key's position on the ring.
+
+        @param key: The key.
+        @type key: L{bytes}
+
+        @return: The name of the server.
+        """
+        index = bisect(self._positions, _hash(key))
+        if index == len(self._positions):
+            index = 0
+        return self._servers[index]
+
+
+
+class _MemCacheServer(object):
+    """
+    The connections of a L{MemCacheCluster} to one memcached server.
+
+    @ivar _connections: The connected protocols.
+    @type _connections: L{list} of L{MemCacheProtocol}
+
+    @ivar _connecting: The number of connections being established.
+    @type _connecting: L{int}
+
+    @ivar _waiting: L{Deferred}s waiting for a connection to be established,
+        because all of them are being established.
+    @type _waiting: L{list} of L{Deferred}
+    """
+
+    def __init__(self, endpoint, factory, maxConnections):
+        """
+        @param endpoint: The endpoint of the server.
+        @type endpoint: L{IStreamClientEndpoint
+            <twisted.internet.interfaces.IStreamClientEndpoint>}
+
+        @param factory: The factory of the L{MemCacheProtocol}s to connect.
+        @type factory: L{Factory}
+
+        @param maxConnections: The maximum number of connections to open.
+        @type maxConnections: L{int}
+        """
+        self._endpoint = endpoint
+        self._factory = factory
+        self._maxConnections = maxConnections
+        self._connections = []
+        self._connecting = 0
+        self._waiting = []
+
+
+    def getConnection(self):
+        """
+        Get a connection to send a command on: an idle one if there is one,
+        or a new one if the maximum isn't reached yet, or else the one with
+        the fewest commands in progress, on which the command is pipelined.
+
+        @return: A L{Deferred} which fires with the L{MemCacheProtocol}.
+        @rtype: L{Deferred}
+        """
+        self._connections = [
+            c for c in self._connections if not c._disconnected]
+        for connection in self._connections:
+            if not connection._current:
+                return succeed(connection)
+        if len(self._connections) + self._connecting < self._maxConnections:
+            return self._connect()
+        if self._connections:
+            return succeed(min(self._connections,
+                               key=lambda c: len(c._current)))
+        d = Deferred()
+        self._waiting.append(d)
+        return d
+
+
+    def _connect(self):
+        """
+        Open a new connection.
+
+        @return: A L{Deferred} which fires with the connected
+            L{MemCacheProtocol}.
+        @rtype: L{Deferred}
+        """
+        self._connecting += 1
+
+        def connected(protocol):
+            self._connecting -= 1
+            self._connections.append(protocol)
+            waiting, self._waiting = self._waiting, []
+            for d in waiting:
+                d.callback(protocol)
+            return protocol
+
+        def failed(reason):
+            self._connecting -= 1
+            if not self._connecting:
+                waiting, self._waiting = self._waiting, []
+                for d in waiting:
+                    d.errback(reason)
+            return reason
+
+        return self._endpoint.connect(self._factory).addCallbacks(
+            connected, failed)
+
+
+    def disconnect(self):
+        """
+        Close all the connections.
+        """
+        for connection in self._connections:
+            connection.transport.loseConnection()
+        self._connections = []
+
+
+
+class MemCacheCluster(object):
+    """
+    A memcache client for several servers, which spreads keys over them with
+    a consistent hash ring, keeps several pipelined connections open to each
+    of them, and batches the C{get}s issued in the same reactor iteration
+    into one multiple get per server.
+
+    The commands take the same arguments and fire with the same results as
+    the corresponding methods of L{MemCacheProtocol}.
+
+    @ivar _servers: The servers, keyed by name.
+    @type _servers: L{dict} of L{_MemCacheServer}
+
+    @ivar _ring: The hash ring mapping keys to server names.
+    @type _ring: L{_HashRing}
+
+    @ivar _pendingGets: The C{get}s waiting to be sent, as a mapping of
+        C{(server name, withIdentifier)} to L{OrderedDict}s mapping keys, in
+        the order they were first requested, to the L{Deferred}s waiting for
+        their values.
+    @type _pendingGets: L{dict}
+
+    @ivar _sendCall: The delayed call which will send C{_pendingGets}, or
+        L{None}.
+
+    @since: 16.5
+    """
+    MAX_KEY_LENGTH = MemCacheProtocol.MAX_KEY_LENGTH
+    _sendCall = None
+
+    def __init__(self, servers, connectionsPerServer=2, timeOut=60,
+                 replicas=160, reactor=None):
+        """
+        @param servers: The endpoints of the servers, keyed by server names.
+            Keys are mapped to servers by name, so keep the names of the
+            servers stable to keep keys on the same servers.
+        @type servers: L{dict} mapping L{str} to L{IStreamClientEndpoint
+            <twisted.internet.interfaces.IStreamClientEndpoint>}
+
+        @param connectionsPerServer: The maximum number of connections to
+            open to each server.
+        @type connectionsPerServer: L{int}
+
+        @param timeOut: The timeout of the connections, see
+            L{MemCacheProtocol}.
+        @type timeOut: L{int}
+
+        @param replicas: The number of points of each server on the hash
+            ring.
+        @type replicas: L{int}
+
+        @param reactor: The reactor to use, or L{None} for the global one.
+        """
+        if reactor is None:
+            from twisted.internet import reactor
+        self._reactor = reactor
+        self._timeOut = timeOut
+        factory = Factory.forProtocol(self._buildProtocol)
+        self._servers = dict(
+            (name, _MemCacheServer(endpoint, factory, connectionsPerServer))
+            for name, endpoint in iteritems(servers))
+        self._ring = _HashRing(list(servers), replicas)
+        self._pendingGets = {}
+
+
+    def _buildProtocol(self):
+        """
+        Build a protocol for a connection to one of the servers.
+
+        @rtype: L{MemCacheProtocol}
+        """
+        protocol = MemCacheProtocol(self._timeOut)
+        protocol.callLater = self._reactor.callLater
+        return protocol
+
+
+    def _checkKey(self, key):
+        """
+        Check that a key can be sent to a server.
+
+        @return: A failed L{Deferred} if it cannot, or L{None}.
+        """
+        if not isinstance(key, bytes):
+            return fail(ClientError(
+                "Invalid type for key: %s, expecting bytes" % (type(key),)))
+        if len(key) > self.MAX_KEY_LENGTH:
+            return fail(ClientError("Key too long"))
+        return None
+
+
+    def _call(self, method, key, *args):
+        """
+        Send a command about a single key to the server of the key.
+
+        @param method: The name of the L{MemCacheProtocol} method to call.
+        @type method: L{str}
+
+        @param key: The key, passed as the first argument of the method.
+        @type key: L{bytes}
+
+        @param args: The other arguments of the method.
+
+        @return: A L{Deferred} which fires with the result of the command.
+        """
+        failed = self._checkKey(key)
+        if failed is not None:
+            return failed
+        server = self._servers[self._ring.serverForKey(key)]
+        return server.getConnection().addCallback(
+            lambda protocol: getattr(protocol, method)(key, *args))
+
+
+    def set(self, key, val, flags=0, expireTime=0):
+        """
+        Set the given C{key}.  See L{MemCacheProtocol.set}.
+        """
+        return self._call("set", key, val, flags, expireTime)
+
+
+    def add(self, key, val, flags=0, expireTime=0):
+        """
+        Add the given C{key}.  See L{MemCacheProtocol.add}.
+        """
+        return self._call("add", key, val, flags, expireTime)
+
+
+    def replace(self, key, val, flags=0, expireTime=0):
+        """
+        Replace the given C{key}.  See L{MemCacheProtocol.replace}.
+        """
+        return self._call("replace", key, val, flags, expireTime)
+
+
+    def append(self, key, val):
+        """
+        Append data to the value of C{key}.  See L{MemCacheProtocol.append}.
+        """
+        return self._call("append", key, val)
+
+
+    def prepend(self, key, val):
+        """
+        Prepend data to the value of C{key}.  See
+        L{MemCacheProtocol.prepend}.
+        """
+        return self._call("prepend", key, val)
+
+
+    def checkAndSet(self, key, val, cas, flags=0, expireTime=0):
+        """
+        Set C{key} if it hasn't been modified.  See
+        L{MemCacheProtocol.checkAndSet}.
+        """
+        return self._call("checkAndSet", key, val, cas, flags, expireTime)
+
+
+    def increment(self, key, val=1):
+        """
+        Increment the value of C{key}.  See L{MemCacheProtocol.increment}.
+        """
+        return self._call("increment", key, val)
+
+
+    def decrement(self, key, val=1):
+        """
+        Decrement the value of C{key}.  See L{MemCacheProtocol.decrement}.
+        """
+        return self._call("decrement", key, val)
+
+
+    def delete(self, key):
+        """
+        Delete C{key}.  See L{MemCacheProtocol.delete}.
+        """
+        return self._call("delete", key)
+
+
+    def get(self, key, withIdentifier=False):
+        """
+        Get the given C{key}.  See L{MemCacheProtocol.get}.
+
+        The key is requested from its server together with all the other
+        keys of that server requested in the same reactor iteration.
+        """
+        failed = self._checkKey(key)
+        if failed is not None:
+            return failed
+        name = self._ring.serverForKey(key)
+        batch = self._pendingGets.setdefault(
+            (name, withIdentifier), OrderedDict())
+        d = Deferred()
+        batch.setdefault(key, []).append(d)
+        if self._sendCall is None:
+            self._sendCall = self._reactor.callLater(0, self._sendGets)
+        return d
+
+
+    def getMultiple(self, keys, withIdentifier=False):
+        """
+        Get the given list of C{keys}, from all the servers they are on.
+        See L{MemCacheProtocol.getMultiple}.
+        """
+        keys = list(keys)
+        for key in keys:
+            failed = self._checkKey(key)
+            if failed is not None:
+                return failed
+        d = gatherResults([self.get(key, withIdentifier) for key in keys],
+                          consumeErrors=True)
+        d.addErrback(lambda failure: failure.value.subFailure)
+        d.addCallback(lambda values: dict(zip(keys, values)))
+        return d
+
+
+    def _sendGets(self):
+        """
+        Send the pending C{get}s, as one multiple get per server.
+        """
+        self._sendCall = None
+        pending, self._pendingGets = self._pendingGets, {}
+        for (name, withIdentifier), batch in iteritems(pending):
+            d = self._servers[name].getConnection()
+            d.addCallback(lambda protocol, keys, withIdentifier:
+                              protocol.getMultiple(keys, withIdentifier),
+                          list(batch), withIdentifier)
+            d.addCallbacks(self._gotValues, self._getFailed,
+                           callbackArgs=(batch,), errbackArgs=(batch,))
+
+
+    def _gotValues(self, values, batch):
+        """
+        Hand the values received for a multiple get out to the C{get}s they
+        were batched for.
+        """
+        for key, waiting in iteritems(batch):
+            for d in waiting:
+                d.callback(values[key])
+
+
+    def _getFailed(self, reason, batch):
+        """
+        Fail the C{get}s batched into a multiple get which failed.
+        """
+        for waiting in batch.values():
+            for d in waiting:
+                d.errback(reason)
+
+
+    def flushAll(self):
+        """
+        Flush all cached values from all the servers.
+
+        @return: A L{Deferred} which fires with C{True} when all the servers
+            have been flushed.
+        @rtype: L{Deferred}
+        """
+        d = gatherResults([
+            server.getConnection().addCallback(
+                lambda protocol: protocol.flushAll())
+            for server in self._servers.values()], consumeErrors=True)
+        d.addErrback(lambda failure: failure.value.subFailure)
+        d.addCallback(lambda results: True)
+        return d
+
+
+    def disconnect(self):
+        """
+        Close the connections to all the servers, failing the C{get}s which
+        haven't been sent yet.
+        """
+        if self._sendCall is not None:
+            self._sendCall.cancel()
+            self._sendCall = None
+        pending, self._pendingGets = self._pendingGets, {}
+        for batch in pending.values():
+            self._getFailed(Failure(RuntimeError("not connected")), batch)
+        for server in self._servers.values():
+            server.disconnect()
+
+
+
+__all__ = ["MemCacheProtocol", "MemCacheCluster", "DEFAULT_PORT",
+           "NoSuchCommand", "ClientError", "ServerError"]
@@ -11,14 +11,15 @@ import sys
 import struct
 from io import BytesIO
 
+from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.python.compat import _PY3, iterbytes
 from twisted.trial import unittest
 from twisted.protocols import basic
 from twisted.python import reflect
-from twisted.internet import protocol, error, task
-from twisted.internet.interfaces import IProducer
+from twisted.internet import protocol, error, task, defer
+from twisted.internet.interfaces import IProducer, ISendFileTransport
 from twisted.test import proto_helpers
 
 _PY3NEWSTYLESKIP = "All classes are new style on Python 3."
@@ -1316,6 +1317,116 @@ class FileSenderTests(unittest.TestCase):
 
 
 
+@implementer(ISendFileTransport)
+class SendFileTransport(proto_helpers.StringTransport):
+    """
+    A L{proto_helpers.StringTransport} which records calls to C{sendFile}.
+
+    @ivar sent: A C{list} of the C{(fileObject, offset, count, Deferred)}
+        tuples for each call to C{sendFile}.
+
+    @ivar supported: If C{False}, C{sendFile} raises L{NotImplementedError}.
+    """
+    supported = True
+
+    def __init__(self):
+        proto_helpers.StringTransport.__init__(self)
+        self.sent = []
+
+
+    def sendFile(self, fileObject, offset, count):
+        if not self.supported:
+            raise NotImplementedError()
+        d = defer.Deferred()
+        self.sent.append((fileObject, offset, count, d))
+        return d
+
+
+
+class FileSenderSendFileTests(unittest.TestCase):
+    """
+    Tests for L{basic.FileSender} with a consumer which provides
+    L{ISendFileTransport}.
+    """
+    def setUp(self):
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(b"Test content")
+        self.source = open(path, "rb")
+        self.addCleanup(self.source.close)
+        self.source.seek(5)
+        self.consumer = SendFileTransport()
+
+
+    def test_sendFile(self):
+        """
+        L{basic.FileSender.beginFileTransfer} asks the consumer to send the
+        rest of the file, registering itself as a streaming producer until it
+        is done, then fires its L{Deferred} with the last byte sent.
+        """
+        sender = basic.FileSender()
+        d = sender.beginFileTransfer(self.source, self.consumer)
+        [(fileObject, offset, count, sent)] = self.consumer.sent
+        self.assertEqual((fileObject, offset, count), (self.source, 5, 7))
+        self.assertIs(self.consumer.producer, sender)
+        self.assertTrue(self.consumer.streaming)
+        self.assertNoResult(d)
+
+        sent.callback(7)
+        self.assertIsNone(self.consumer.producer)
+        self.assertEqual(b"t", self.successResultOf(d))
+        self.assertEqual(b"", self.consumer.value())
+
+
+    def test_sendFileFailed(self):
+        """
+        If the consumer fails to send the file, the L{Deferred} returned by
+        L{basic.FileSender.beginFileTransfer} fails the same way.
+        """
+        sender = basic.FileSender()
+        d = sender.beginFileTransfer(self.source, self.consumer)
+        self.consumer.sent[0][3].errback(error.ConnectionLost())
+        self.failureResultOf(d, error.ConnectionLost)
+
+
+    def test_sendFileUnsupported(self):
+        """
+        If the consumer cannot send the file, L{basic.FileSender} falls back
+        to reading it and writing the contents to the consumer.
+        """
+        self.consumer.supported = False
+        sender = basic.FileSender()
+        d = sender.beginFileTransfer(self.source, self.consumer)
+        self.assertFalse(self.consumer.streaming)
+        sender.resumeProducing()
+        sender.resumeProducing()
+        self.assertEqual(b"t", self.successResultOf(d))
+        self.assertEqual(b"content", self.consumer.value())
+
+
+    def test_sendFileWithTransform(self):
+        """
+        L{basic.FileSender} does not ask the consumer to send the file if the
+        data is to be transformed.
+        """
+        sender = basic.FileSender()
+        sender.beginFileTransfer(self.source, self.consumer, bytes.upper)
+        self.assertEqual(self.consumer.sent, [])
+
+
+    def test_sendFileWithoutDescriptor(self):
+        """
+        L{basic.FileSender} does not ask the consumer to send a file which is
+        not backed by a file descriptor.
+        """
+        sender = basic.FileSender()
+        sender.beginFileTransfer(BytesIO(b"Test content"), self.consumer)
+        self.assertEqual(self.consumer.sent, [])
+        self.assertIs(self.consumer.producer, sender)
+        self.assertFalse(self.consumer.streaming)
+
+
+
 class GPSDeprecationTests(unittest.TestCase):
     """
     Contains tests to make sure twisted.protocols.gps is marked as deprecated.
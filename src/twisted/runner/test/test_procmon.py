@@ -11,6 +11,7 @@ from twisted.internet.error import (ProcessDone, ProcessTerminated,
                                     ProcessExitedAlready)
 from twisted.internet.task import Clock
 from twisted.python.failure import Failure
+from twisted.python import log
 from twisted.test.proto_helpers import MemoryReactor
 
 
@@ -220,6 +221,26 @@ class ProcmonTests(unittest.TestCase):
         self.assertIn("foo", self.pm.timeStarted.keys())
 
 
+    def test_outputLogged(self):
+        """
+        Each line written to standard output or standard error by a monitored
+        process is logged, tagged with the name of the process, including a
+        final unterminated line.
+        """
+        messages = []
+        log.addObserver(messages.append)
+        self.addCleanup(log.removeObserver, messages.append)
+        self.pm.addProcess("foo", ["foo"])
+        self.pm.startProcess("foo")
+        protocol = self.pm.protocols["foo"]
+        protocol.outReceived(b"hello\nwor")
+        protocol.errReceived(b"ld\nbye")
+        protocol.processEnded(Failure(ProcessDone(0)))
+        self.assertEqual(
+            [u"".join(message["message"]) for message in messages],
+            [u"[foo] hello", u"[foo] world", u"[foo] bye"])
+
+
     def test_startProcessAlreadyStarted(self):
         """
         L{ProcessMonitor.startProcess} silently returns if the named process is
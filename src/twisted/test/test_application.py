@@ -776,6 +776,28 @@ class PluggableReactorTests(TwistedModulesMixin, unittest.TestCase):
         self.assertIs(installed, reactor)
 
 
+    def test_installReactorTimerWheel(self):
+        """
+        If L{reactors.installReactor} is given a C{timerWheelResolution}, it
+        tells the installed reactor to use a timer wheel with that resolution.
+        """
+        resolutions = []
+        class Reactor(object):
+            def useTimerWheel(self, resolution):
+                resolutions.append(resolution)
+        reactor = Reactor()
+        def install():
+            from twisted import internet
+            self.patch(internet, 'reactor', reactor)
+        name = 'fakereactortest'
+        package = __name__
+        description = 'description'
+        self.pluginResults = [FakeReactor(install, name, package, description)]
+        installed = reactors.installReactor(name, timerWheelResolution=0.5)
+        self.assertIs(installed, reactor)
+        self.assertEqual(resolutions, [0.5])
+
+
     def test_installReactorMultiplePlugins(self):
         """
         Test that the L{reactors.installReactor} function correctly installs
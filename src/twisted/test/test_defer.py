@@ -699,6 +699,55 @@ class DeferredTests(unittest.SynchronousTestCase, ImmediateFailureMixin):
         self.assertImmediateFailure(d2, RuntimeError)
 
 
+    def test_succeed(self):
+        """
+        L{defer.succeed} returns a L{defer.Deferred} which has been called back
+        with the given result.
+        """
+        d = defer.succeed(1)
+        self.assertTrue(d.called)
+        self.assertEqual(d.result, 1)
+        self.assertEqual(d.callbacks, [])
+        self.assertIsNone(d._debugInfo)
+        result = []
+        d.addCallback(result.append)
+        self.assertEqual(result, [1])
+
+
+    def test_succeedDebugging(self):
+        """
+        When debugging is enabled, L{defer.succeed} records where the
+        L{defer.Deferred} it returns was called back from.
+        """
+        defer.setDebugging(True)
+        self.addCleanup(defer.setDebugging, False)
+        d = defer.succeed(1)
+        self.assertEqual(d.result, 1)
+        self.assertIsNotNone(d._debugInfo.invoker)
+
+
+    def test_callbacksEntries(self):
+        """
+        Each of C{addCallbacks}, C{addCallback}, C{addErrback} and C{addBoth}
+        adds an entry of a callback and an errback, each with its arguments and
+        keyword arguments, to C{callbacks}, with L{defer.passthru} in place of
+        the one which isn't given.
+        """
+        def f(result):
+            pass
+        d = defer.Deferred()
+        d.addCallbacks(f)
+        d.addCallback(f, 1, a=2)
+        d.addErrback(f, 3)
+        d.addBoth(f)
+        passthru = (defer.passthru, None, None)
+        self.assertEqual(d.callbacks, [
+            ((f, None, None), passthru),
+            ((f, (1,), {'a': 2}), passthru),
+            (passthru, (f, (3,), {})),
+            ((f, (), {}), (f, (), {}))])
+
+
     def test_innerCallbacksPreserved(self):
         """
         When a L{Deferred} encounters a result which is another L{Deferred}
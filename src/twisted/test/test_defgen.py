@@ -7,6 +7,8 @@ Tests for L{twisted.internet.defer.deferredGenerator} and related APIs.
 
 from __future__ import division, absolute_import
 
+import gc
+
 from twisted.internet import reactor
 
 from twisted.trial import unittest
@@ -322,6 +324,53 @@ class InlineCallbacksTests(BaseDefgenTests, unittest.TestCase):
             str(self.assertRaises(TypeError, _noYield)))
 
 
+    def test_yieldFiredDeferreds(self):
+        """
+        Yielding L{Deferred}s which have already fired passes their results
+        back, and leaves them with a result of L{None}, so that a failure
+        thrown into the generator isn't reported as unhandled.
+        """
+        fired = defer.succeed(1)
+        failed = [defer.fail(TerminalException())]
+        def _test():
+            x = yield fired
+            try:
+                yield failed[0]
+            except TerminalException:
+                returnValue(x)
+        _test = inlineCallbacks(_test)
+
+        self.assertEqual(self.successResultOf(_test()), 1)
+        self.assertIsNone(fired.result)
+        self.assertIsNone(failed[0].result)
+        del failed[:]
+        gc.collect()
+        self.assertEqual(self.flushLoggedErrors(TerminalException), [])
+
+
+
+    def test_ensureDeferredReturnValue(self):
+        """
+        A generator run by L{defer.ensureDeferred} which calls L{returnValue}
+        fires its L{Deferred} with the value given, whether it returns right
+        away or after waiting for a L{Deferred}.
+        """
+        def _immediate():
+            yield defer.succeed(1)
+            returnValue(2)
+
+        later = Deferred()
+        def _later():
+            yield later
+            returnValue(3)
+
+        self.assertEqual(
+            self.successResultOf(defer.ensureDeferred(_immediate())), 2)
+        d = defer.ensureDeferred(_later())
+        self.assertNoResult(d)
+        later.callback(None)
+        self.assertEqual(self.successResultOf(d), 3)
+
 
 class DeprecateDeferredGeneratorTests(unittest.SynchronousTestCase):
     """
@@ -7,15 +7,18 @@ Test the memcache client protocol.
 
 from __future__ import absolute_import, division
 
-from twisted.internet.error import ConnectionDone
+from twisted.internet.error import ConnectionDone, ConnectionRefusedError
 
 from twisted.protocols.memcache import MemCacheProtocol, NoSuchCommand
 from twisted.protocols.memcache import ClientError, ServerError
+from twisted.protocols.memcache import MemCacheCluster, _HashRing
 
 from twisted.trial.unittest import TestCase
 from twisted.test.proto_helpers import StringTransportWithDisconnection
 from twisted.internet.task import Clock
 from twisted.internet.defer import Deferred, gatherResults, TimeoutError
+from twisted.internet.defer import succeed
+from twisted.python.compat import intToBytes
 from twisted.internet.defer import DeferredList
 
 
@@ -724,3 +727,278 @@ class CommandFailureTests(CommandMixin, TestCase):
         parameters except C{d} are ignored.
         """
         return self.assertFailure(d, RuntimeError)
+
+
+
+class FakeEndpoint(object):
+    """
+    An endpoint which connects the protocols it builds to
+    L{StringTransportWithDisconnection}s.
+
+    @ivar protocols: The protocols connected so far.
+
+    @ivar connecting: If not L{None}, the L{Deferred}s of connections which
+        are yet to be established are appended to this list instead of the
+        connections being established at once.
+    """
+    connecting = None
+
+    def __init__(self):
+        self.protocols = []
+
+
+    def connect(self, factory):
+        protocol = factory.buildProtocol(None)
+        transport = StringTransportWithDisconnection()
+        transport.protocol = protocol
+
+        def connected(ignored):
+            protocol.makeConnection(transport)
+            self.protocols.append(protocol)
+            return protocol
+
+        if self.connecting is None:
+            return succeed(None).addCallback(connected)
+        d = Deferred()
+        self.connecting.append(d)
+        return d.addCallback(connected)
+
+
+
+class HashRingTests(TestCase):
+    """
+    Tests for L{_HashRing}.
+    """
+
+    def test_spread(self):
+        """
+        Keys are spread over all the servers of the ring.
+        """
+        ring = _HashRing(["a", "b", "c"], 160)
+        servers = [ring.serverForKey(b"key" + intToBytes(i))
+                   for i in range(300)]
+        for server in "abc":
+            self.assertTrue(60 < servers.count(server) < 140)
+
+
+    def test_consistent(self):
+        """
+        Adding a server to the ring only moves keys to that server.
+        """
+        keys = [b"key" + intToBytes(i) for i in range(300)]
+        before = _HashRing(["a", "b", "c"], 160)
+        after = _HashRing(["a", "b", "c", "d"], 160)
+        for key in keys:
+            if after.serverForKey(key) != "d":
+                self.assertEqual(
+                    after.serverForKey(key), before.serverForKey(key))
+
+
+
+class MemCacheClusterTests(TestCase):
+    """
+    Tests for L{MemCacheCluster}.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.endpoints = {"a": FakeEndpoint(), "b": FakeEndpoint()}
+        self.cluster = MemCacheCluster(
+            self.endpoints, connectionsPerServer=2, reactor=self.clock)
+        ring = _HashRing(["a", "b"], 160)
+        self.keys = {"a": [], "b": []}
+        for i in range(20):
+            key = b"key" + intToBytes(i)
+            self.keys[ring.serverForKey(key)].append(key)
+
+
+    def sent(self, server):
+        """
+        Get the data sent on each connection to a server so far, clearing
+        it.
+        """
+        sent = []
+        for protocol in self.endpoints[server].protocols:
+            sent.append(protocol.transport.value())
+            protocol.transport.clear()
+        return sent
+
+
+    def test_routing(self):
+        """
+        Commands about a key are sent to the server the key belongs to.
+        """
+        keyA, keyB = self.keys["a"][0], self.keys["b"][0]
+        setA = self.cluster.set(keyA, b"foo")
+        setB = self.cluster.delete(keyB)
+        self.assertEqual(self.sent("a"),
+                         [b"set " + keyA + b" 0 0 3\r\nfoo\r\n"])
+        self.assertEqual(self.sent("b"), [b"delete " + keyB + b"\r\n"])
+
+        self.endpoints["a"].protocols[0].dataReceived(b"STORED\r\n")
+        self.endpoints["b"].protocols[0].dataReceived(b"NOT_FOUND\r\n")
+        self.assertTrue(self.successResultOf(setA))
+        self.assertFalse(self.successResultOf(setB))
+
+
+    def test_pipelining(self):
+        """
+        Once the maximum number of connections to a server are open, commands
+        are pipelined on the one with the fewest commands in progress.
+        """
+        keys = self.keys["a"]
+        results = [self.cluster.increment(key) for key in keys[:5]]
+        sent = self.sent("a")
+        self.assertEqual(len(sent), 2)
+        self.assertEqual([s.count(b"incr") for s in sent], [3, 2])
+
+        first, second = self.endpoints["a"].protocols
+        first.dataReceived(b"1\r\n2\r\n3\r\n")
+        second.dataReceived(b"4\r\n5\r\n")
+        self.assertEqual([self.successResultOf(d) for d in results],
+                         [1, 4, 2, 5, 3])
+
+
+    def test_batchedGets(self):
+        """
+        The C{get}s issued in the same reactor iteration are sent as one
+        multiple get per server, and each fires with the value of its key.
+        """
+        keyA1, keyA2 = self.keys["a"][:2]
+        keyB = self.keys["b"][0]
+        gets = [self.cluster.get(keyA1), self.cluster.get(keyB),
+                self.cluster.get(keyA2), self.cluster.get(keyA1)]
+        self.assertEqual(self.sent("a"), [])
+
+        self.clock.advance(0)
+        self.assertEqual(self.sent("a"),
+                         [b"get " + keyA1 + b" " + keyA2 + b"\r\n"])
+        self.assertEqual(self.sent("b"), [b"get " + keyB + b"\r\n"])
+
+        self.endpoints["a"].protocols[0].dataReceived(
+            b"VALUE " + keyA1 + b" 0 3\r\nfoo\r\nEND\r\n")
+        self.endpoints["b"].protocols[0].dataReceived(
+            b"VALUE " + keyB + b" 1 3\r\nbar\r\nEND\r\n")
+        self.assertEqual([self.successResultOf(d) for d in gets],
+                         [(0, b"foo"), (1, b"bar"), (0, None), (0, b"foo")])
+
+
+    def test_batchedGetsWithIdentifier(self):
+        """
+        C{get}s with an identifier are batched into a separate C{gets}.
+        """
+        key = self.keys["a"][0]
+        withIdentifier = self.cluster.get(key, withIdentifier=True)
+        without = self.cluster.get(key)
+        self.clock.advance(0)
+        self.assertEqual(sorted(self.sent("a")), [
+            b"get " + key + b"\r\n", b"gets " + key + b"\r\n"])
+
+        for protocol in self.endpoints["a"].protocols:
+            if protocol._current[0].command == b"gets":
+                protocol.dataReceived(
+                    b"VALUE " + key + b" 0 3 1234\r\nfoo\r\nEND\r\n")
+            else:
+                protocol.dataReceived(
+                    b"VALUE " + key + b" 0 3\r\nfoo\r\nEND\r\n")
+        self.assertEqual(self.successResultOf(withIdentifier),
+                         (0, b"1234", b"foo"))
+        self.assertEqual(self.successResultOf(without), (0, b"foo"))
+
+
+    def test_getMultiple(self):
+        """
+        L{MemCacheCluster.getMultiple} gets keys from all the servers they
+        are on, and fires with a dictionary of their values.
+        """
+        keyA, keyB = self.keys["a"][0], self.keys["b"][0]
+        d = self.cluster.getMultiple([keyA, keyB])
+        self.clock.advance(0)
+        self.endpoints["a"].protocols[0].dataReceived(
+            b"VALUE " + keyA + b" 0 3\r\nfoo\r\nEND\r\n")
+        self.assertNoResult(d)
+        self.endpoints["b"].protocols[0].dataReceived(b"END\r\n")
+        self.assertEqual(self.successResultOf(d),
+                         {keyA: (0, b"foo"), keyB: (0, None)})
+
+
+    def test_getFailed(self):
+        """
+        If the multiple get a C{get} was batched into fails, so does the
+        C{get}.
+        """
+        d = self.cluster.get(self.keys["a"][0])
+        self.clock.advance(0)
+        self.endpoints["a"].protocols[0].dataReceived(
+            b"SERVER_ERROR zomg\r\n")
+        self.failureResultOf(d, ServerError)
+        self.flushLoggedErrors(ServerError)
+
+
+    def test_invalidKey(self):
+        """
+        Commands about keys which aren't L{bytes} or are too long fail with
+        L{ClientError} without being sent.
+        """
+        self.failureResultOf(self.cluster.get(u"foo"), ClientError)
+        self.failureResultOf(self.cluster.set(b"a" * 251, b"foo"), ClientError)
+        self.failureResultOf(
+            self.cluster.getMultiple([b"foo", u"bar"]), ClientError)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_waitForConnection(self):
+        """
+        When all the connections to a server are still being established,
+        commands wait for one of them, and fail if they all fail.
+        """
+        connecting = self.endpoints["a"].connecting = []
+        keys = self.keys["a"]
+        results = [self.cluster.delete(key) for key in keys[:3]]
+        self.assertEqual(len(connecting), 2)
+        connecting[0].callback(None)
+        [sent] = self.sent("a")
+        self.assertEqual(
+            sorted(sent.splitlines()),
+            sorted([b"delete " + keys[0], b"delete " + keys[2]]))
+        connecting[1].errback(ConnectionRefusedError())
+        self.failureResultOf(results[1], ConnectionRefusedError)
+
+
+    def test_lostConnection(self):
+        """
+        Connections which have been lost are replaced.
+        """
+        key = self.keys["a"][0]
+        d = self.cluster.delete(key)
+        protocol = self.endpoints["a"].protocols[0]
+        protocol.transport.loseConnection()
+        self.failureResultOf(d, ConnectionDone)
+        self.cluster.delete(key)
+        self.cluster.delete(key)
+        self.assertEqual(len(self.endpoints["a"].protocols), 3)
+
+
+    def test_flushAll(self):
+        """
+        L{MemCacheCluster.flushAll} flushes all the servers.
+        """
+        d = self.cluster.flushAll()
+        for server in "ab":
+            self.assertEqual(self.sent(server), [b"flush_all\r\n"])
+            self.endpoints[server].protocols[0].dataReceived(b"OK\r\n")
+        self.assertTrue(self.successResultOf(d))
+
+
+    def test_disconnect(self):
+        """
+        L{MemCacheCluster.disconnect} closes all the connections and fails
+        the C{get}s which haven't been sent.
+        """
+        delete = self.cluster.delete(self.keys["a"][0])
+        get = self.cluster.get(self.keys["b"][0])
+        self.cluster.disconnect()
+        self.failureResultOf(delete, ConnectionDone)
+        self.failureResultOf(get, RuntimeError)
+        self.clock.advance(0)
+        self.assertEqual(self.endpoints["b"].protocols, [])
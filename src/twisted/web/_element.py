@@ -178,8 +178,15 @@ class Element(object):
         separately as the object to lookup renderers on and call
         L{Element.renderer} to look them up.  The resulting object from this
         method is not directly associated with this L{Element}.)
+
+        If the loader is one of those in L{twisted.web.template}, the template
+        is loaded with its static parts already flattened, so that they are
+        not flattened again each time the element is rendered.
         """
         loader = self.loader
         if loader is None:
             raise MissingTemplateLoader(self)
+        loadCompiled = getattr(loader, '_loadCompiled', None)
+        if loadCompiled is not None:
+            return loadCompiled()
         return loader.load()
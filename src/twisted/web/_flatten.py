@@ -11,11 +11,13 @@ from __future__ import division, absolute_import
 
 from io import BytesIO
 
+from functools import partial
 from sys import exc_info
 from types import GeneratorType
 from traceback import extract_tb
 
 from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
 from twisted.python.compat import unicode, nativeString, iteritems
 from twisted.web._stan import Tag, slot, voidElements, Comment, CDATA, CharRef
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
@@ -150,6 +152,192 @@ def escapedComment(data):
 
 
 
+class _Markup(object):
+    """
+    A fragment of a template which has been flattened ahead of time by
+    L{_compileTemplate}, and is written out as it is.
+
+    @ivar data: The flattened fragment.
+    @type data: L{bytes}
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def __repr__(self):
+        return '_Markup(%r)' % (self.data,)
+
+
+
+def _compileTemplate(document):
+    """
+    Flatten the static parts of a loaded template ahead of time, so that
+    only its slots, renderers and other dynamic parts are left to flatten
+    each time it is rendered.
+
+    The markup of the tags without renderers and with only strings as
+    attribute values, and their text, comments, CDATA sections and character
+    references, is escaped and serialized once, and adjacent pieces of it
+    are joined together into L{_Markup} fragments.  Tags with renderers are
+    kept as they are, children and all, because renderers may look at their
+    children.  Tags with filled slots or dynamic attributes are kept, with
+    their children compiled in turn.  The strings at the top level of the
+    document, including those in transparent tags there, are also kept as
+    they are, because they are escaped differently if the document is
+    flattened within an attribute.
+
+    @param document: The loaded template.
+    @type document: a L{list} of Stan objects.
+
+    @return: The compiled template.
+    @rtype: a L{list} of Stan objects and L{_Markup}.
+    """
+    return _compileChildren(document, False)
+
+
+
+def _compileChildren(children, inTag):
+    """
+    Compile a list of Stan objects for L{_compileTemplate}.
+
+    @param children: The Stan objects.
+    @type children: L{list}
+
+    @param inTag: Whether C{children} are the contents of a tag, so that
+        strings among them are escaped as content.
+    @type inTag: L{bool}
+
+    @return: The compiled objects.
+    @rtype: L{list}
+    """
+    compiled = []
+    markup = []
+    _compileInto(children, inTag, compiled, markup)
+    if markup:
+        compiled.append(_Markup(b''.join(markup)))
+    return compiled
+
+
+
+def _compileInto(root, inTag, compiled, markup):
+    """
+    Compile a Stan object for L{_compileTemplate}.
+
+    @param root: The Stan object.
+
+    @param inTag: Whether C{root} is within a tag.
+    @type inTag: L{bool}
+
+    @param compiled: The compiled objects so far, to which C{root} or its
+        compiled form is appended.
+    @type compiled: L{list}
+
+    @param markup: The flattened markup preceding C{root} which hasn't been
+        appended to C{compiled} yet, to which the markup of C{root} is
+        appended if it is static.
+    @type markup: L{list} of L{bytes}
+    """
+    def dynamic(obj):
+        if markup:
+            compiled.append(_Markup(b''.join(markup)))
+            del markup[:]
+        compiled.append(obj)
+
+    if isinstance(root, (bytes, unicode)):
+        if inTag:
+            markup.append(escapeForContent(root))
+        else:
+            dynamic(root)
+    elif isinstance(root, CDATA):
+        markup.append(b'<![CDATA[' + escapedCDATA(root.data) + b']]>')
+    elif isinstance(root, Comment):
+        markup.append(b'<!--' + escapedComment(root.data) + b'-->')
+    elif isinstance(root, CharRef):
+        markup.append(('&#%d;' % (root.ordinal,)).encode('ascii'))
+    elif isinstance(root, (tuple, list)):
+        for element in root:
+            _compileInto(element, inTag, compiled, markup)
+    elif not isinstance(root, Tag):
+        dynamic(root)
+    elif root.render is not None:
+        dynamic(root)
+    elif (root.slotData or
+          not all(isinstance(v, (bytes, unicode))
+                  for v in root.attributes.values())):
+        dynamic(Tag(root.tagName, attributes=root.attributes,
+                    children=_compileChildren(root.children, True),
+                    render=root.render, filename=root.filename,
+                    lineNumber=root.lineNumber,
+                    columnNumber=root.columnNumber))
+        compiled[-1].slotData = root.slotData
+    elif not root.tagName:
+        _compileInto(root.children, inTag, compiled, markup)
+    else:
+        tagName = root.tagName
+        if isinstance(tagName, unicode):
+            tagName = tagName.encode('ascii')
+        markup.append(b'<' + tagName)
+        for k, v in iteritems(root.attributes):
+            if isinstance(k, unicode):
+                k = k.encode('ascii')
+            markup.append(b' ' + k + b'="' +
+                          escapeForContent(v).replace(b'"', b'&quot;') +
+                          b'"')
+        if root.children or nativeString(tagName) not in voidElements:
+            markup.append(b'>')
+            _compileInto(root.children, True, compiled, markup)
+            markup.append(b'</' + tagName + b'>')
+        else:
+            markup.append(b' />')
+
+
+
+class _BufferedWriter(object):
+    """
+    Collect the many small writes of the flattener into fewer, larger ones.
+
+    @ivar bufferSize: How many bytes to collect before writing them.
+    @type bufferSize: L{int}
+
+    @ivar _buffer: The data collected so far.
+    @type _buffer: L{bytearray}
+    """
+    bufferSize = 2 ** 16
+
+    def __init__(self, write):
+        """
+        @param write: A callable which will be invoked with the collected
+            L{bytes}.
+        """
+        self._write = write
+        self._buffer = bytearray()
+
+
+    def write(self, data):
+        """
+        Collect some data, writing it out with the data collected before it
+        once there is enough.
+
+        @type data: L{bytes}
+        """
+        self._buffer += data
+        if len(self._buffer) >= self.bufferSize:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Write out the data collected so far.
+        """
+        if self._buffer:
+            data = bytes(self._buffer)
+            del self._buffer[:]
+            self._write(data)
+
+
+
 def _getSlotValue(name, slotData, default=None):
     """
     Find the value of the named slot in the given stack of slot data.
@@ -175,8 +363,8 @@ def _flattenElement(request, root, write, slotData, renderFactory,
 
     @param root: An object to be made flatter.  This may be of type C{unicode},
         L{str}, L{slot}, L{Tag <twisted.web.template.Tag>}, L{tuple}, L{list},
-        L{types.GeneratorType}, L{Deferred}, or an object that implements
-        L{IRenderable}.
+        L{types.GeneratorType}, L{Deferred}, L{_Markup}, or an object that
+        implements L{IRenderable}.
 
     @param write: A callable which will be invoked with each L{bytes} produced
         by flattening C{root}.
@@ -208,7 +396,9 @@ def _flattenElement(request, root, write, slotData, renderFactory,
                   renderFactory=renderFactory, write=write):
         return _flattenElement(request, newRoot, write, slotData,
                                renderFactory, dataEscaper)
-    if isinstance(root, (bytes, unicode)):
+    if isinstance(root, _Markup):
+        write(root.data)
+    elif isinstance(root, (bytes, unicode)):
         write(dataEscaper(root))
     elif isinstance(root, slot):
         slotValue = _getSlotValue(root.name, slotData, root.default)
@@ -235,6 +425,7 @@ def _flattenElement(request, root, write, slotData, renderFactory,
 
         if not root.tagName:
             yield keepGoing(root.children)
+            slotData.pop()
             return
 
         write(b'<')
@@ -267,6 +458,7 @@ def _flattenElement(request, root, write, slotData, renderFactory,
             write(b'</' + tagName + b'>')
         else:
             write(b' />')
+        slotData.pop()
 
     elif isinstance(root, (tuple, list, GeneratorType)):
         for element in root:
@@ -284,6 +476,242 @@ def _flattenElement(request, root, write, slotData, renderFactory,
 
 
 
+class _Blocked(Exception):
+    """
+    Raised by L{_flattenSynchronously} when it reaches a L{Deferred} which
+    hasn't fired yet, or when it is nested too deeply, to hand the rest of the
+    flattening over to L{_flattenElement}.
+
+    @ivar stack: Generators which finish flattening what the calls of
+        L{_flattenSynchronously} unwound by this exception were flattening,
+        the innermost first.
+    @type stack: L{list}
+    """
+    def __init__(self, generator):
+        Exception.__init__(self)
+        self.stack = [generator]
+
+
+
+def _resume(root, steps):
+    """
+    Finish flattening something after L{_flattenSynchronously} was unwound by
+    L{_Blocked} while flattening it.
+
+    @param root: The object that was being flattened, which is put in the
+        roots of a L{FlattenerError} raised while finishing it.
+
+    @param steps: The rest of the work: generators to be iterated like those
+        returned by L{_flattenElement}, and callables to be called, such as
+        writes of markup.
+    @type steps: An iterable of generators and callables.
+
+    @return: An iterator like those returned by L{_flattenElement}.
+    """
+    for step in steps:
+        if isinstance(step, GeneratorType):
+            yield step
+        else:
+            step()
+
+
+
+def _tagSteps(request, root, tagName, attributes, write, slotData,
+              renderFactory):
+    """
+    Build the steps for L{_resume} to flatten some attributes of a tag and
+    then the rest of it.
+
+    @param root: The L{Tag}.
+
+    @param tagName: The name of C{root}.
+    @type tagName: L{bytes}
+
+    @param attributes: The names and values of the attributes of C{root} which
+        are left to flatten.
+    @type attributes: L{list} of 2-L{tuple}s
+
+    @return: The steps.
+    @rtype: L{list}
+
+    @see: L{_flattenElement} for the other parameters.
+    """
+    steps = []
+    for k, v in attributes:
+        if isinstance(k, unicode):
+            k = k.encode('ascii')
+        steps.append(partial(write, b' ' + k + b'="'))
+        steps.append(_flattenElement(
+            request, v, writeWithAttributeEscaping(write), slotData,
+            renderFactory, attributeEscapingDoneOutside))
+        steps.append(partial(write, b'"'))
+    if root.children or nativeString(tagName) not in voidElements:
+        steps.append(partial(write, b'>'))
+        steps.append(_flattenElement(
+            request, root.children, write, slotData, renderFactory,
+            escapeForContent))
+        steps.append(partial(write, b'</' + tagName + b'>'))
+    else:
+        steps.append(partial(write, b' />'))
+    steps.append(slotData.pop)
+    return steps
+
+
+
+_maximumSynchronousDepth = 100
+
+def _flattenSynchronously(request, root, write, slotData, renderFactory,
+                          dataEscaper, roots):
+    """
+    Flatten C{root} completely with plain recursive calls, unless it turns out
+    to have to wait for a L{Deferred}.
+
+    This is the same as iterating L{_flattenElement} and the iterators it
+    yields, without making any of those iterators, as long as every
+    L{Deferred} it reaches has already fired.  When it reaches one which
+    hasn't, it raises L{_Blocked} with generators which finish flattening
+    C{root}, and which may be used in the place of the call stack unwound by
+    raising it.  It does so as well past a depth of
+    C{_maximumSynchronousDepth} calls, which L{_flattenElement} has no limit
+    on.
+
+    @param roots: The objects being flattened by the calls on the stack, the
+        outermost first, which are put in the roots of a L{FlattenerError}
+        if flattening fails.  C{root} is appended to it, and removed from it
+        again if flattening it is done.
+    @type roots: L{list}
+
+    @raise _Blocked: If flattening C{root} has to wait for a L{Deferred}, or
+        is nested too deeply.
+
+    @see: L{_flattenElement} for the other parameters.
+    """
+    if len(roots) >= _maximumSynchronousDepth:
+        raise _Blocked(_flattenElement(
+            request, root, write, slotData, renderFactory, dataEscaper))
+    roots.append(root)
+    if isinstance(root, (bytes, unicode)):
+        write(dataEscaper(root))
+    elif isinstance(root, Tag):
+        slotData.append(root.slotData)
+        if root.render is not None:
+            rendererName = root.render
+            rootClone = root.clone(False)
+            rootClone.render = None
+            renderMethod = renderFactory.lookupRenderMethod(rendererName)
+            result = renderMethod(request, rootClone)
+            try:
+                _flattenSynchronously(request, result, write, slotData,
+                                      renderFactory, dataEscaper, roots)
+            except _Blocked as e:
+                e.stack.append(_resume(root, [slotData.pop]))
+                raise
+            slotData.pop()
+        elif not root.tagName:
+            try:
+                _flattenSynchronously(request, root.children, write, slotData,
+                                      renderFactory, dataEscaper, roots)
+            except _Blocked as e:
+                e.stack.append(_resume(root, [slotData.pop]))
+                raise
+            slotData.pop()
+        else:
+            if isinstance(root.tagName, unicode):
+                tagName = root.tagName.encode('ascii')
+            else:
+                tagName = root.tagName
+            write(b'<' + tagName)
+            attributes = list(iteritems(root.attributes))
+            for i, (k, v) in enumerate(attributes):
+                if isinstance(k, unicode):
+                    k = k.encode('ascii')
+                write(b' ' + k + b'="')
+                try:
+                    _flattenSynchronously(
+                        request, v, writeWithAttributeEscaping(write),
+                        slotData, renderFactory, attributeEscapingDoneOutside,
+                        roots)
+                except _Blocked as e:
+                    e.stack.append(_resume(root, [partial(write, b'"')] +
+                        _tagSteps(request, root, tagName, attributes[i + 1:],
+                                  write, slotData, renderFactory)))
+                    raise
+                write(b'"')
+            if root.children or nativeString(tagName) not in voidElements:
+                write(b'>')
+                try:
+                    _flattenSynchronously(request, root.children, write,
+                                          slotData, renderFactory,
+                                          escapeForContent, roots)
+                except _Blocked as e:
+                    e.stack.append(_resume(
+                        root, [partial(write, b'</' + tagName + b'>'),
+                               slotData.pop]))
+                    raise
+                write(b'</' + tagName + b'>')
+            else:
+                write(b' />')
+            slotData.pop()
+    elif isinstance(root, (tuple, list, GeneratorType)):
+        elements = iter(root)
+        for element in elements:
+            try:
+                _flattenSynchronously(request, element, write, slotData,
+                                      renderFactory, dataEscaper, roots)
+            except _Blocked as e:
+                e.stack.append(_resume(root, (
+                    _flattenElement(request, rest, write, slotData,
+                                    renderFactory, dataEscaper)
+                    for rest in elements)))
+                raise
+    elif isinstance(root, slot):
+        slotValue = _getSlotValue(root.name, slotData, root.default)
+        _flattenSynchronously(request, slotValue, write, slotData,
+                              renderFactory, dataEscaper, roots)
+    elif isinstance(root, _Markup):
+        write(root.data)
+    elif isinstance(root, CharRef):
+        escaped = '&#%d;' % (root.ordinal,)
+        write(escaped.encode('ascii'))
+    elif isinstance(root, CDATA):
+        write(b'<![CDATA[' + escapedCDATA(root.data) + b']]>')
+    elif isinstance(root, Comment):
+        write(b'<!--' + escapedComment(root.data) + b'-->')
+    elif isinstance(root, Deferred):
+        if (root.called and not root.paused and not root.callbacks and
+                not isinstance(root.result, Failure)):
+            _flattenSynchronously(request, root.result, write, slotData,
+                                  renderFactory, dataEscaper, roots)
+        else:
+            raise _Blocked(_flattenElement(
+                request, root, write, slotData, renderFactory, dataEscaper))
+    elif IRenderable.providedBy(root):
+        result = root.render(request)
+        _flattenSynchronously(request, result, write, slotData, root,
+                              dataEscaper, roots)
+    else:
+        raise UnsupportedType(root)
+    roots.pop()
+
+
+
+def _withoutRecursion(frames):
+    """
+    Leave all but the innermost of the consecutive recursive calls of
+    L{_flattenSynchronously} out of a traceback, as they would be if
+    L{_flattenElement} had been used instead.
+
+    @param frames: The traceback, as returned by L{extract_tb}.
+
+    @return: The traceback without those calls.
+    @rtype: L{list}
+    """
+    name = _flattenSynchronously.__name__
+    return [frame for frame, following in zip(frames, frames[1:] + [None])
+            if frame[2] != name or following is None or following[2] != name]
+
+
+
 def _flattenTree(request, root, write):
     """
     Make C{root} into an iterable of L{bytes} and L{Deferred} by doing a depth
@@ -305,7 +733,19 @@ def _flattenTree(request, root, write):
         flattening C{root}.  The returned iterator must not be iterated again
         until the L{Deferred} is called back.
     """
-    stack = [_flattenElement(request, root, write, [], None, escapeForContent)]
+    # Flatten as much as possible with plain recursion, and only go on with
+    # a stack of generators from where it has to wait for a Deferred.
+    roots = []
+    try:
+        _flattenSynchronously(request, root, write, [], None,
+                              escapeForContent, roots)
+    except _Blocked as e:
+        stack = e.stack[::-1]
+    except Exception as e:
+        raise FlattenerError(
+            e, roots, _withoutRecursion(extract_tb(exc_info()[2])))
+    else:
+        return
     while stack:
         try:
             frame = stack[-1].gi_frame
@@ -330,16 +770,17 @@ def _flattenTree(request, root, write):
                 stack.append(element)
 
 
-def _writeFlattenedData(state, write, result):
+def _writeFlattenedData(state, flush, result):
     """
-    Take strings from an iterator and pass them to a writer function.
+    Iterate an iterator from L{_flattenTree} to write out the flattened data,
+    waiting for the L{Deferred}s it yields.
 
-    @param state: An iterator of L{str} and L{Deferred}.  L{str} instances will
-        be passed to C{write}.  L{Deferred} instances will be waited on before
+    @param state: An iterator of L{Deferred}s, which will be waited on before
         resuming iteration of C{state}.
 
-    @param write: A callable which will be invoked with each L{str}
-        produced by iterating C{state}.
+    @param flush: A callable which will be invoked to write out the data
+        buffered so far whenever the iteration of C{state} stops, before a
+        L{Deferred} is waited on or once it is over.
 
     @param result: A L{Deferred} which will be called back when C{state} has
         been completely flattened into C{write} or which will be errbacked if
@@ -350,14 +791,17 @@ def _writeFlattenedData(state, write, result):
     """
     while True:
         try:
-            element = next(state)
+            try:
+                element = next(state)
+            finally:
+                flush()
         except StopIteration:
             result.callback(None)
         except:
             result.errback()
         else:
             def cby(original):
-                _writeFlattenedData(state, write, result)
+                _writeFlattenedData(state, flush, result)
                 return original
             element.addCallbacks(cby, result.errback)
         break
@@ -380,16 +824,19 @@ def flatten(request, root, write):
         L{list}, L{types.GeneratorType}, L{Deferred}, or something that provides
         L{IRenderable}.
 
-    @param write: A callable which will be invoked with each L{bytes} produced
-        by flattening C{root}.
+    @param write: A callable which will be invoked with the L{bytes} produced
+        by flattening C{root}.  Adjacent pieces of output are joined together
+        into writes of up to L{_BufferedWriter.bufferSize} bytes, except
+        where flattening has to wait for a L{Deferred}.
 
     @return: A L{Deferred} which will be called back when C{root} has been
         completely flattened into C{write} or which will be errbacked if an
         unexpected exception occurs.
     """
     result = Deferred()
-    state = _flattenTree(request, root, write)
-    _writeFlattenedData(state, write, result)
+    writer = _BufferedWriter(write)
+    state = _flattenTree(request, root, writer.write)
+    _writeFlattenedData(state, writer.flush, result)
     return result
 
 
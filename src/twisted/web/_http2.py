@@ -103,9 +103,31 @@ class H2Connection(Protocol, TimeoutMixin):
     @ivar _sender: A handle to the data-sending loop, allowing it to be
         terminated if needed.
     @type _sender: L{twisted.internet.task.LoopingCall}
+
+    @ivar maxDataFrameSize: The largest DATA frame to send, or L{None} to
+        only be limited by the maximum frame size the peer allows.  Smaller
+        frames interleave the data of concurrent streams more finely.
+    @type maxDataFrameSize: L{int} or L{None}
+
+    @ivar maxBytesPerIteration: How much response data the data-sending loop
+        may send in one reactor iteration before letting other events run,
+        or L{None} for no limit.
+    @type maxBytesPerIteration: L{int} or L{None}
+
+    @ivar _flushCall: The delayed call which will write the frames generated
+        so far in this reactor iteration to the transport, or L{None} if
+        there is none.
+    @type _flushCall: L{twisted.internet.interfaces.IDelayedCall} or L{None}
+
+    @ivar _endedStreams: The IDs of the streams whose last frame has been
+        generated but not yet written, to clean up once it is.
+    @type _endedStreams: L{list} of L{int}
     """
     factory = None
     site = None
+    maxDataFrameSize = None
+    maxBytesPerIteration = 2 ** 16
+    _flushCall = None
 
     _log = Logger()
 
@@ -120,6 +142,7 @@ class H2Connection(Protocol, TimeoutMixin):
         self._sendingDeferred = None
         self._outboundStreamQueues = {}
         self._streamCleanupCallbacks = {}
+        self._endedStreams = []
         self._stillProducing = True
 
         if reactor is None:
@@ -151,6 +174,12 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self.resetTimeout()
 
+        # h2 throws away the frames it hasn't sent yet when it receives a
+        # GOAWAY frame, so send the frames waiting for the end of the
+        # reactor iteration first.
+        if self._flushCall is not None:
+            self._flush()
+
         try:
             events = self.conn.receive_data(data)
         except h2.exceptions.ProtocolError:
@@ -175,12 +204,12 @@ class H2Connection(Protocol, TimeoutMixin):
             elif isinstance(event, h2.events.PriorityUpdated):
                 self._handlePriorityUpdate(event)
             elif isinstance(event, h2.events.ConnectionTerminated):
+                # Send the frames generated before the connection went away.
+                self._flush()
                 self.transport.loseConnection()
                 self.connectionLost("Shutdown by remote peer")
 
-        dataToSend = self.conn.data_to_send()
-        if dataToSend:
-            self.transport.write(dataToSend)
+        self._flush()
 
 
     def timeoutConnection(self):
@@ -226,6 +255,9 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         self._stillProducing = False
         self.setTimeout(None)
+        if self._flushCall is not None:
+            self._flushCall.cancel()
+            self._flushCall = None
 
         for stream in self.streams.values():
             stream.connectionLost(reason)
@@ -268,8 +300,11 @@ class H2Connection(Protocol, TimeoutMixin):
     # 2. The _sendPrioritisedData() function spins in a tight loop. Each
     #    iteration it asks the priority implementation which stream should send
     #    next, and pops a data frame off that stream's queue. If, after sending
-    #    that frame, there is no data left on that stream's queue, the function
-    #    informs the priority implementation that the stream is blocked.
+    #    that frame, there is no data left on that stream's queue, or no room
+    #    left in its flow control window, the function informs the priority
+    #    implementation that the stream is blocked. The frames generated in
+    #    one reactor iteration, up to maxBytesPerIteration bytes of data, are
+    #    written to the transport all at once.
     #
     # If all streams are blocked, or if there are no outstanding streams, the
     # _sendPrioritisedData function waits to be awoken when more data is ready
@@ -322,6 +357,10 @@ class H2Connection(Protocol, TimeoutMixin):
         according to the priority signalled by the client, making sure that the
         connection is used with maximal efficiency.
 
+        Each call sends frames for as many streams as have data ready, up to
+        L{maxBytesPerIteration} bytes, and writes them all to the transport
+        at once.
+
         This function will execute if data is available: if all data is
         exhausted, the function will place a deferred onto the L{H2Connection}
         object and wait until it is called to resume executing.
@@ -330,62 +369,117 @@ class H2Connection(Protocol, TimeoutMixin):
         if not self._stillProducing:
             return
 
-        stream = None
+        budget = self.maxBytesPerIteration
+        sent = 0
 
-        while stream is None:
+        while budget is None or sent < budget:
             try:
                 stream = next(self.priority)
             except priority.DeadlockError:
                 # All streams are currently blocked or not progressing. Wait
                 # until a new one becomes available.
+                self._flush()
                 assert self._sendingDeferred is None
                 self._sendingDeferred = Deferred()
                 self._sendingDeferred.addCallback(self._sendPrioritisedData)
                 return
 
-        # Wait behind the transport.
-        if self._consumerBlocked is not None:
-            self._consumerBlocked.addCallback(self._sendPrioritisedData)
-            return
+            # Wait behind the transport.
+            if self._consumerBlocked is not None:
+                self._flush()
+                self._consumerBlocked.addCallback(self._sendPrioritisedData)
+                return
+
+            sent += self._sendFrame(stream)
+
+        self._flush()
+        self._reactor.callLater(0, self._sendPrioritisedData)
+
 
+    def _sendFrame(self, stream):
+        """
+        Generate the next frame of data for a stream, leaving it for
+        L{_flush} to write to the transport.
+
+        @param stream: The ID of the stream to send data on.
+        @type stream: L{int}
+
+        @return: The number of bytes of data sent.
+        @rtype: L{int}
+        """
         remainingWindow = self.conn.local_flow_control_window(stream)
         frameData = self._outboundStreamQueues[stream].popleft()
         maxFrameSize = min(self.conn.max_outbound_frame_size, remainingWindow)
+        if self.maxDataFrameSize is not None:
+            maxFrameSize = min(maxFrameSize, self.maxDataFrameSize)
 
         if frameData is _END_STREAM_SENTINEL:
             # There's no error handling here even though this can throw
             # ProtocolError because we really shouldn't encounter this problem.
             # If we do, that's a nasty bug.
             self.conn.end_stream(stream)
-            self.transport.write(self.conn.data_to_send())
 
-            # Clean up the stream
-            self._requestDone(stream)
-        else:
-            # Respect the max frame size.
-            if len(frameData) > maxFrameSize:
-                excessData = frameData[maxFrameSize:]
-                frameData = frameData[:maxFrameSize]
-                self._outboundStreamQueues[stream].appendleft(excessData)
-
-            # There's deliberately no error handling here, because this just
-            # absolutely should not happen.
-            # If for whatever reason the max frame length is zero and so we
-            # have no frame data to send, don't send any.
-            if frameData:
-                self.conn.send_data(stream, frameData)
-                self.transport.write(self.conn.data_to_send())
-
-            # If there's no data left, this stream is now blocked.
-            if not self._outboundStreamQueues[stream]:
-                self.priority.block(stream)
-
-            # Also, if the stream's flow control window is exhausted, tell it
-            # to stop.
-            if self.remainingOutboundWindow(stream) <= 0:
-                self.streams[stream].flowControlBlocked()
+            # Clean up the stream once its last frame has been written. It
+            # leaves the priority tree now, to give its share of the
+            # connection to the others.
+            self.priority.remove_stream(stream)
+            self._endedStreams.append(stream)
+            return 0
+
+        # Respect the max frame size.
+        if len(frameData) > maxFrameSize:
+            excessData = frameData[maxFrameSize:]
+            frameData = frameData[:maxFrameSize]
+            self._outboundStreamQueues[stream].appendleft(excessData)
+
+        # There's deliberately no error handling here, because this just
+        # absolutely should not happen.
+        # If for whatever reason the max frame length is zero and so we
+        # have no frame data to send, don't send any.
+        if frameData:
+            self.conn.send_data(stream, frameData)
+
+        # If there's no data left, or no room in the flow control window to
+        # send the data that is left, this stream is now blocked. A window
+        # update unblocks it.
+        queue = self._outboundStreamQueues[stream]
+        if not queue or (queue[0] is not _END_STREAM_SENTINEL and
+                         self.conn.local_flow_control_window(stream) <= 0):
+            self.priority.block(stream)
+
+        # Also, if the stream's flow control window is exhausted, tell it
+        # to stop.
+        if self.remainingOutboundWindow(stream) <= 0:
+            self.streams[stream].flowControlBlocked()
+
+        return len(frameData)
+
+
+    def _flush(self):
+        """
+        Write all the frames generated so far to the transport in one go,
+        then clean up the streams whose responses they completed.
+        """
+        if self._flushCall is not None:
+            if self._flushCall.active():
+                self._flushCall.cancel()
+            self._flushCall = None
+        dataToSend = self.conn.data_to_send()
+        if dataToSend:
+            self.transport.write(dataToSend)
+        endedStreams, self._endedStreams = self._endedStreams, []
+        for streamID in endedStreams:
+            if self._streamIsActive(streamID):
+                self._requestDone(streamID)
 
-        self._reactor.callLater(0, self._sendPrioritisedData)
+
+    def _flushLater(self):
+        """
+        Write the frames generated so far to the transport once the current
+        reactor iteration is done, together with any generated after them.
+        """
+        if self._flushCall is None and self._stillProducing:
+            self._flushCall = self._reactor.callLater(0, self._flush)
 
 
     # Internal functions.
@@ -515,7 +609,7 @@ class H2Connection(Protocol, TimeoutMixin):
             # when a connection is lost, so that's what we do too.
             return
         else:
-            self.transport.write(self.conn.data_to_send())
+            self._flushLater()
 
 
     def writeDataToStream(self, streamID, data):
@@ -569,7 +663,7 @@ class H2Connection(Protocol, TimeoutMixin):
         @type streamID: L{int}
         """
         self.conn.reset_stream(streamID)
-        self.transport.write(self.conn.data_to_send())
+        self._flush()
         self._requestDone(streamID)
 
 
@@ -582,7 +676,12 @@ class H2Connection(Protocol, TimeoutMixin):
         @type streamID: L{int}
         """
         del self._outboundStreamQueues[streamID]
-        self.priority.remove_stream(streamID)
+        try:
+            self.priority.remove_stream(streamID)
+        except priority.MissingStreamError:
+            # The data sending loop removes streams from the tree as soon as
+            # their last frame is generated.
+            pass
         del self.streams[streamID]
         cleanupCallback = self._streamCleanupCallbacks.pop(streamID)
         cleanupCallback.callback(streamID)
@@ -649,6 +748,14 @@ class H2Connection(Protocol, TimeoutMixin):
                 if self._outboundStreamQueues.get(stream.streamID):
                     self.priority.unblock(stream.streamID)
 
+        # Streams with data queued are blocked while their window is closed,
+        # so the data-sending loop may be waiting for them. Wake it up once
+        # the events being processed have been handled.
+        if self._sendingDeferred is not None:
+            d = self._sendingDeferred
+            self._sendingDeferred = None
+            self._reactor.callLater(0, d.callback, None)
+
 
     def getPeer(self):
         """
@@ -704,7 +811,7 @@ class H2Connection(Protocol, TimeoutMixin):
             pass
 
         self.conn.increment_flow_control_window(increment, stream_id=None)
-        self.transport.write(self.conn.data_to_send())
+        self._flushLater()
 
 
     def _isSecure(self):
@@ -729,7 +836,7 @@ class H2Connection(Protocol, TimeoutMixin):
         """
         headers = [(b':status', b'100')]
         self.conn.send_headers(headers=headers, stream_id=streamID)
-        self.transport.write(self.conn.data_to_send())
+        self._flushLater()
 
 
     def _respondToBadRequestAndDisconnect(self, streamID):
@@ -754,7 +861,7 @@ class H2Connection(Protocol, TimeoutMixin):
             stream_id=streamID,
             end_stream=True
         )
-        self.transport.write(self.conn.data_to_send())
+        self._flush()
 
         stream = self.streams[streamID]
         stream.connectionLost("Stream reset")
@@ -858,6 +965,8 @@ class H2Stream(object):
         self._hasStreamingProducer = None
         self._inboundDataBuffer = deque()
         self._conn = connection
+        self.site = connection.site
+        self.factory = connection.factory
         self._request = requestFactory(self, queued=False)
         self._buffer = io.BytesIO()
 
@@ -889,6 +998,7 @@ class H2Stream(object):
                 # This is essentially the Host: header from HTTP/1.1
                 _addHeaderToRequest(self._request, (b'host', header[1]))
 
+        self._request.allHeadersReceived(self.command, self.path, b'HTTP/2')
         if not gotLength:
             if self.command in (b'GET', b'HEAD'):
                 self._request.gotLength(0)
@@ -1212,14 +1322,8 @@ def _addHeaderToRequest(request, header):
     @return: If the header being added was the C{Content-Length} header.
     @rtype: L{bool}
     """
-    requestHeaders = request.requestHeaders
     name, value = header
-    values = requestHeaders.getRawHeaders(name)
-
-    if values is not None:
-        values.append(value)
-    else:
-        requestHeaders.setRawHeaders(name, [value])
+    request.requestHeaders.addRawHeader(name, value)
 
     if name == b'content-length':
         request.gotLength(int(value))
@@ -0,0 +1,720 @@
+# -*- test-case-name: twisted.web.test.test_http2client -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+HTTP/2 client implementation
+
+This is the client-side protocol used by L{twisted.web.client.Agent} when a
+server agrees to speak HTTP/2.  It issues the same L{Request} objects as
+L{twisted.web._newclient.HTTP11ClientProtocol} and delivers the same
+L{Response} objects, but sends each request on its own stream, so that many
+requests can be in progress over one connection.
+
+This API is currently considered private because it's in early draft form. When
+it has stabilised, it'll be made public.
+"""
+
+from __future__ import absolute_import, division
+
+from collections import deque
+
+from zope.interface import implementer
+
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+
+from twisted.internet.defer import Deferred, CancelledError, fail, succeed
+from twisted.internet.error import ConnectionLost
+from twisted.internet.interfaces import IConsumer, IPushProducer
+from twisted.internet.protocol import Protocol
+from twisted.logger import Logger
+from twisted.python.compat import intToBytes
+from twisted.python.failure import Failure
+from twisted.web._newclient import (
+    Response, RequestNotSent, RequestGenerationFailed, ResponseFailed,
+    ResponseNeverReceived)
+from twisted.web._responses import RESPONSES, NO_CONTENT, NOT_MODIFIED
+from twisted.web.http_headers import Headers
+from twisted.web.iweb import UNKNOWN_LENGTH
+
+
+# This API is currently considered private.
+__all__ = []
+
+
+# Request headers which are specific to an HTTP/1.1 connection, and which
+# must not be sent over HTTP/2 (RFC 7540, section 8.1.2.2).  The host header
+# becomes the :authority pseudo-header.
+_CONNECTION_HEADERS = frozenset([
+    b'connection', b'host', b'keep-alive', b'proxy-connection', b'te',
+    b'transfer-encoding', b'upgrade'])
+
+
+
+class H2ClientConnection(Protocol):
+    """
+    The client side of an HTTP/2 connection.
+
+    Each request issued with L{request} is sent on a new stream, as long as
+    the server allows that many streams to be open at once; requests beyond
+    that wait, in order, for a stream to finish.
+
+    @ivar conn: The HTTP/2 connection state machine.
+    @type conn: L{h2.connection.H2Connection}
+
+    @ivar _streams: A mapping of stream IDs to the L{_H2ClientStream} objects
+        for the requests in progress.
+
+    @ivar _pending: A L{deque} of C{(request, Deferred)} pairs for the
+        requests waiting for a stream.
+
+    @ivar _state: C{'CONNECTED'} until the connection is lost or the server
+        sends GOAWAY, then C{'CONNECTION_LOST'} or C{'CLOSING'}.
+
+    @ivar _quiescentCallback: Called with this protocol each time one of its
+        streams finishes, so that a connection pool can reuse it.
+
+    @ivar _lostCallback: Called with this protocol once its connection has
+        been lost.
+
+    @ivar _abortDeferreds: A list of L{Deferred} instances that will fire
+        when the connection is lost.
+    """
+    _log = Logger()
+
+    def __init__(self, quiescentCallback=lambda c: None,
+                 lostCallback=lambda c: None):
+        self.conn = h2.connection.H2Connection(
+            client_side=True, header_encoding=None
+        )
+        self._streams = {}
+        self._pending = deque()
+        self._state = 'CONNECTED'
+        self._quiescentCallback = quiescentCallback
+        self._lostCallback = lostCallback
+        self._abortDeferreds = []
+
+
+    @property
+    def state(self):
+        """
+        C{'QUIESCENT'} when no request is in progress, C{'MULTIPLEXING'}
+        while some are, or C{'CLOSING'} or C{'CONNECTION_LOST'}.
+        """
+        if self._state != 'CONNECTED':
+            return self._state
+        if self._streams or self._pending:
+            return 'MULTIPLEXING'
+        return 'QUIESCENT'
+
+
+    def canAcceptRequest(self):
+        """
+        Determine whether a request issued now would be sent right away.
+
+        @rtype: L{bool}
+        """
+        return (self._state == 'CONNECTED' and not self._pending and
+                len(self._streams) <
+                self.conn.remote_settings.max_concurrent_streams)
+
+
+    # Implementation of IProtocol
+    def connectionMade(self):
+        """
+        Send the connection preface.
+        """
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+
+    def dataReceived(self, data):
+        """
+        Called whenever a chunk of data is received from the transport.
+
+        @param data: The data received from the transport.
+        @type data: L{bytes}
+        """
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            # A remote protocol error terminates the connection.
+            self.transport.write(self.conn.data_to_send())
+            self.transport.loseConnection()
+            return
+
+        for event in events:
+            if isinstance(event, h2.events.ResponseReceived):
+                stream = self._streams.get(event.stream_id)
+                if stream is not None:
+                    stream.responseReceived(event.headers)
+            elif isinstance(event, h2.events.DataReceived):
+                self._responseDataReceived(event)
+            elif isinstance(event, h2.events.StreamEnded):
+                self._responseEnded(event)
+            elif isinstance(event, h2.events.StreamReset):
+                self._streamReset(event)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._handleWindowUpdate(event)
+            elif isinstance(event, h2.events.RemoteSettingsChanged):
+                self._startPendingRequests()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self._state = 'CLOSING'
+                self.transport.loseConnection()
+
+        dataToSend = self.conn.data_to_send()
+        if dataToSend:
+            self.transport.write(dataToSend)
+
+
+    def connectionLost(self, reason):
+        """
+        Called when the transport connection is lost.
+
+        Fails the requests in progress and the requests waiting for a stream,
+        then tells the lost callback.
+        """
+        self._state = 'CONNECTION_LOST'
+        streams, self._streams = self._streams, {}
+        for stream in streams.values():
+            stream.connectionLost(reason)
+        pending, self._pending = self._pending, deque()
+        for request, d in pending:
+            d.errback(Failure(RequestNotSent()))
+        for d in self._abortDeferreds:
+            d.callback(None)
+        self._abortDeferreds = []
+        self._lostCallback(self)
+
+
+    def request(self, request):
+        """
+        Issue C{request} on a new stream and return a L{Deferred} which will
+        fire with a L{Response} instance or an error.
+
+        @param request: The object defining the parameters of the request to
+           issue.
+        @type request: L{twisted.web._newclient.Request}
+
+        @rtype: L{Deferred}
+        @return: See L{twisted.web._newclient.HTTP11ClientProtocol.request}.
+        """
+        if self._state != 'CONNECTED':
+            return fail(RequestNotSent())
+
+        def cancelRequest(d):
+            reason = Failure(CancelledError())
+            if (request, d) in self._pending:
+                self._pending.remove((request, d))
+                d.errback(Failure(ResponseNeverReceived([reason])))
+                return
+            for stream in list(self._streams.values()):
+                if stream.request is request:
+                    self._resetStream(stream.streamID, h2.errors.CANCEL)
+                    stream.connectionLost(reason)
+
+        d = Deferred(cancelRequest)
+        if self.canAcceptRequest():
+            self._startRequest(request, d)
+        else:
+            self._pending.append((request, d))
+        return d
+
+
+    def abort(self):
+        """
+        Close the connection and cause all outstanding L{request} L{Deferred}s
+        to fire with an error.
+
+        @return: A L{Deferred} which fires when the connection is lost.
+        """
+        if self._state == 'CONNECTION_LOST':
+            return succeed(None)
+        d = Deferred()
+        self._abortDeferreds.append(d)
+        self.transport.abortConnection()
+        return d
+
+
+    def _startRequest(self, request, d):
+        """
+        Send the headers of C{request} on a new stream, then its body if it
+        has one.
+
+        @param request: The request to send.
+        @type request: L{twisted.web._newclient.Request}
+
+        @param d: The L{Deferred} returned by L{request}.
+        """
+        try:
+            headers = self._requestHeaders(request)
+            streamID = self.conn.get_next_available_stream_id()
+            self.conn.send_headers(
+                streamID, headers, end_stream=request.bodyProducer is None)
+        except:
+            d.errback(Failure(RequestGenerationFailed([Failure()])))
+            return
+
+        stream = _H2ClientStream(streamID, self, request, d)
+        self._streams[streamID] = stream
+        self.transport.write(self.conn.data_to_send())
+        if request.bodyProducer is not None:
+            stream.sendBody()
+
+
+    def _requestHeaders(self, request):
+        """
+        Build the header block for C{request}.
+
+        @param request: The request to send.
+        @type request: L{twisted.web._newclient.Request}
+
+        @return: A L{list} of C{(name, value)} pairs, pseudo-headers first.
+        """
+        hosts = request.headers.getRawHeaders(b'host', ())
+        if len(hosts) != 1:
+            raise ValueError(u"Exactly one Host header required")
+        if request._parsedURI is not None:
+            scheme = request._parsedURI.scheme
+        else:
+            scheme = b'https'
+        headers = [
+            (b':method', request.method),
+            (b':scheme', scheme),
+            (b':authority', hosts[0]),
+            (b':path', request.uri),
+        ]
+        for name, values in request.headers.getAllRawHeaders():
+            name = name.lower()
+            if name in _CONNECTION_HEADERS:
+                continue
+            headers.extend((name, value) for value in values)
+        producer = request.bodyProducer
+        if producer is not None and producer.length is not UNKNOWN_LENGTH:
+            headers.append((b'content-length', intToBytes(producer.length)))
+        return headers
+
+
+    def _startPendingRequests(self):
+        """
+        Send as many of the requests waiting for a stream as the server now
+        allows.
+        """
+        limit = self.conn.remote_settings.max_concurrent_streams
+        while (self._pending and self._state == 'CONNECTED' and
+               len(self._streams) < limit):
+            request, d = self._pending.popleft()
+            self._startRequest(request, d)
+
+
+    def _responseDataReceived(self, event):
+        """
+        Deliver a chunk of a response body to its stream.
+
+        @param event: The Hyper-h2 event for the received data.
+        @type event: L{h2.events.DataReceived}
+        """
+        # The connection window is reopened straight away so that a stream
+        # which isn't being read can't stall the others; the stream's own
+        # window is only reopened once its data has been consumed.
+        if event.flow_controlled_length:
+            self.conn.increment_flow_control_window(
+                event.flow_controlled_length, stream_id=None)
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream.dataReceived(event.data, event.flow_controlled_length)
+
+
+    def _responseEnded(self, event):
+        """
+        Finish the response of a stream.
+
+        @param event: The Hyper-h2 event for the end of the stream.
+        @type event: L{h2.events.StreamEnded}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream.responseEnded()
+
+
+    def _streamReset(self, event):
+        """
+        Fail the request of a stream reset by the server.
+
+        @param event: The Hyper-h2 event for the reset stream.
+        @type event: L{h2.events.StreamReset}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream.connectionLost(Failure(ConnectionLost(
+                u"Stream reset with error code %d" % (event.error_code,))))
+
+
+    def _handleWindowUpdate(self, event):
+        """
+        Send more of the request bodies which were waiting for the server to
+        open its flow control windows.
+
+        @param event: The Hyper-h2 event for the window change.
+        @type event: L{h2.events.WindowUpdated}
+        """
+        if event.stream_id:
+            streams = [self._streams.get(event.stream_id)]
+        else:
+            streams = list(self._streams.values())
+        for stream in streams:
+            if stream is not None:
+                stream.windowUpdated()
+
+
+    def _sendBodyData(self, streamID, buffer):
+        """
+        Send as much of a request body as the flow control windows and the
+        maximum frame size allow.
+
+        @param streamID: The ID of the stream to send on.
+        @type streamID: L{int}
+
+        @param buffer: The chunks of the body waiting to be sent.  Sent data
+            is removed from it.
+        @type buffer: L{deque} of L{bytes}
+
+        @return: L{True} if all of C{buffer} was sent.
+        """
+        while buffer:
+            size = min(self.conn.local_flow_control_window(streamID),
+                       self.conn.max_outbound_frame_size)
+            if size <= 0:
+                break
+            chunk = buffer.popleft()
+            if len(chunk) > size:
+                buffer.appendleft(chunk[size:])
+                chunk = chunk[:size]
+            self.conn.send_data(streamID, chunk)
+        self.transport.write(self.conn.data_to_send())
+        return not buffer
+
+
+    def _endStream(self, streamID):
+        """
+        Mark the end of a request body.
+
+        @param streamID: The ID of the stream to end.
+        @type streamID: L{int}
+        """
+        self.conn.end_stream(streamID)
+        self.transport.write(self.conn.data_to_send())
+
+
+    def _resetStream(self, streamID, errorCode):
+        """
+        Reset a stream, if the connection is still there.
+
+        @param streamID: The ID of the stream to reset.
+        @type streamID: L{int}
+
+        @param errorCode: The reason for the reset, one of the values in
+            L{h2.errors}.
+        """
+        if self._state == 'CONNECTION_LOST':
+            return
+        try:
+            self.conn.reset_stream(streamID, error_code=errorCode)
+        except h2.exceptions.StreamClosedError:
+            return
+        self.transport.write(self.conn.data_to_send())
+
+
+    def _openStreamWindow(self, streamID, increment):
+        """
+        Let the server send C{increment} more bytes on a stream, once they
+        have been consumed.
+
+        @param streamID: The ID of the stream.
+        @type streamID: L{int}
+
+        @param increment: The number of bytes.
+        @type increment: L{int}
+        """
+        try:
+            self.conn.increment_flow_control_window(
+                increment, stream_id=streamID)
+        except h2.exceptions.StreamClosedError:
+            # The stream ended before its data was consumed, which is fine.
+            return
+        self.transport.write(self.conn.data_to_send())
+
+
+    def _streamDone(self, streamID):
+        """
+        Forget about a stream whose request is over, start the next request
+        waiting for a stream, and tell the quiescent callback.
+
+        @param streamID: The ID of the finished stream.
+        @type streamID: L{int}
+        """
+        stream = self._streams.pop(streamID, None)
+        if stream is None or self._state != 'CONNECTED':
+            return
+        self._startPendingRequests()
+        if not (self._streams or self._pending or stream.request.persistent):
+            self.transport.loseConnection()
+            return
+        try:
+            self._quiescentCallback(self)
+        except:
+            # Keeping connections around is an optimisation, as with
+            # HTTP/1.1.
+            self._log.failure(u"Error in quiescent callback")
+            self.transport.loseConnection()
+
+
+
+@implementer(IConsumer, IPushProducer)
+class _H2ClientStream(object):
+    """
+    A single request and its response, on one stream of an
+    L{H2ClientConnection}.
+
+    It is the consumer of the request's body producer, and the transport
+    which the L{Response} is paused, resumed and stopped through.
+
+    @ivar streamID: The ID of the stream.
+
+    @ivar request: The request sent on this stream.
+
+    @ivar _finishedRequest: The L{Deferred} returned by
+        L{H2ClientConnection.request}.  L{None} once it has fired.
+
+    @ivar _response: The L{Response}, once its headers have been received.
+
+    @ivar _paused: Whether the response's consumer asked for no more data.
+        Response data is only acknowledged, letting the server send more,
+        while this is L{False}.
+
+    @ivar _unacknowledged: The number of bytes of response data received
+        while paused, and not acknowledged yet.
+
+    @ivar _bodyBuffer: Request body chunks waiting for flow control.
+
+    @ivar _bodyDone: Whether the body producer has finished.
+
+    @ivar _producerPaused: Whether the body producer has been paused
+        because of flow control.
+    """
+    _response = None
+    _paused = False
+    _unacknowledged = 0
+    _bodyDone = False
+    _producerPaused = False
+
+    def __init__(self, streamID, connection, request, finishedRequest):
+        self.streamID = streamID
+        self._connection = connection
+        self.request = request
+        self._finishedRequest = finishedRequest
+        self._bodyBuffer = deque()
+
+
+    def sendBody(self):
+        """
+        Start producing the request body into this stream.
+        """
+        d = self.request.bodyProducer.startProducing(self)
+
+        def cbProduced(ignored):
+            self._bodyDone = True
+            if not self._bodyBuffer:
+                self._connection._endStream(self.streamID)
+
+        def ebProduced(reason):
+            self._bodyDone = True
+            self._bodyBuffer.clear()
+            self._connection._streamDone(self.streamID)
+            self._connection._resetStream(
+                self.streamID, h2.errors.INTERNAL_ERROR)
+            self._fail(Failure(RequestGenerationFailed([reason])))
+
+        d.addCallbacks(cbProduced, ebProduced)
+
+
+    def responseReceived(self, headers):
+        """
+        Build the L{Response} from the headers received on this stream, and
+        fire the request's L{Deferred} with it.
+
+        @param headers: The response headers, pseudo-headers included.
+        @type headers: L{list} of C{(name, value)} pairs
+        """
+        responseHeaders = Headers()
+        code = None
+        for name, value in headers:
+            if name == b':status':
+                code = int(value)
+            elif not name.startswith(b':'):
+                responseHeaders.addRawHeader(name, value)
+
+        response = Response._construct(
+            (b'HTTP', 2, 0), code, RESPONSES.get(code, b''),
+            responseHeaders, self, self.request)
+        if (code in (NO_CONTENT, NOT_MODIFIED) or
+                self.request.method == b'HEAD'):
+            response.length = 0
+        else:
+            lengths = responseHeaders.getRawHeaders(b'content-length')
+            if lengths is not None and len(lengths) == 1:
+                response.length = int(lengths[0])
+        self._response = response
+
+        # Like HTTP11ClientProtocol, hold back the body until the
+        # application is ready for it.
+        self.pauseProducing()
+        d, self._finishedRequest = self._finishedRequest, None
+        d.callback(response)
+
+
+    def dataReceived(self, data, flowControlledLength):
+        """
+        Deliver a chunk of the response body.
+
+        @param data: The data.
+        @type data: L{bytes}
+
+        @param flowControlledLength: How much of the flow control window the
+            data used, padding included.
+        @type flowControlledLength: L{int}
+        """
+        if self._paused:
+            self._unacknowledged += flowControlledLength
+        elif flowControlledLength:
+            self._connection._openStreamWindow(
+                self.streamID, flowControlledLength)
+        self._response._bodyDataReceived(data)
+
+
+    def responseEnded(self):
+        """
+        The whole response has been received.
+        """
+        self._connection._streamDone(self.streamID)
+        if self._response is None:
+            self._fail(Failure(ResponseNeverReceived(
+                [Failure(ConnectionLost(u"Stream ended without a response"))])))
+        else:
+            self._response._bodyDataFinished()
+
+
+    def connectionLost(self, reason):
+        """
+        The stream or the whole connection went away, so fail whatever part
+        of the request or response is still outstanding.
+
+        @param reason: Why the stream went away.
+        @type reason: L{Failure}
+        """
+        self._connection._streamDone(self.streamID)
+        if self.request.bodyProducer is not None and not self._bodyDone:
+            self._bodyDone = True
+            self._bodyBuffer.clear()
+            self.request.bodyProducer.stopProducing()
+        if self._response is None:
+            self._fail(Failure(ResponseNeverReceived([reason])))
+        else:
+            self._response._bodyDataFinished(
+                Failure(ResponseFailed([reason], self._response)))
+
+
+    def windowUpdated(self):
+        """
+        The server opened its flow control windows: send more of the request
+        body, and resume its producer once everything is sent.
+        """
+        if not self._bodyBuffer:
+            return
+        if self._connection._sendBodyData(self.streamID, self._bodyBuffer):
+            if self._bodyDone:
+                self._connection._endStream(self.streamID)
+            elif self._producerPaused:
+                self._producerPaused = False
+                self.request.bodyProducer.resumeProducing()
+
+
+    def _fail(self, reason):
+        """
+        Fire the request's L{Deferred} with C{reason}, unless it has already
+        fired.
+        """
+        if self._finishedRequest is not None:
+            d, self._finishedRequest = self._finishedRequest, None
+            d.errback(reason)
+
+
+    # Implementation of IConsumer, for the request body.
+    def registerProducer(self, producer, streaming):
+        """
+        The body producer is given to L{sendBody}, so there is nothing to do.
+        """
+
+
+    def unregisterProducer(self):
+        """
+        See L{registerProducer}.
+        """
+
+
+    def write(self, data):
+        """
+        Send part of the request body, pausing the body producer if flow
+        control doesn't allow all of it to be sent now.
+
+        @param data: The data.
+        @type data: L{bytes}
+        """
+        if self._connection._state == 'CONNECTION_LOST' or not data:
+            return
+        self._bodyBuffer.append(data)
+        if not self._connection._sendBodyData(self.streamID, self._bodyBuffer):
+            if not self._producerPaused:
+                self._producerPaused = True
+                self.request.bodyProducer.pauseProducing()
+
+
+    # Implementation of IPushProducer, and of the transport seen by the
+    # response, for the response body.
+    def pauseProducing(self):
+        """
+        Stop letting the server send more of the response body.
+        """
+        self._paused = True
+
+
+    def resumeProducing(self):
+        """
+        Let the server send more of the response body.
+        """
+        self._paused = False
+        if self._unacknowledged:
+            increment, self._unacknowledged = self._unacknowledged, 0
+            self._connection._openStreamWindow(self.streamID, increment)
+
+
+    def stopProducing(self):
+        """
+        The response body is not wanted: reset the stream.
+        """
+        self._connection._resetStream(self.streamID, h2.errors.CANCEL)
+        self.connectionLost(Failure(ConnectionLost(u"Stream cancelled")))
+
+
+    def loseConnection(self):
+        """
+        Close this stream, which is all of the connection a response's body
+        protocol sees.
+        """
+        self.stopProducing()
+
+
+    abortConnection = loseConnection
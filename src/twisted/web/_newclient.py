@@ -1357,6 +1357,17 @@ class HTTP11ClientProtocol(Protocol):
 
     @ivar _abortDeferreds: A list of C{Deferred} instances that will fire when
         the connection is lost.
+
+    @ivar maxPipelinedRequests: The number of requests which may be sent
+        while waiting for the response to the current one (see
+        L{canPipeline}).  By default no requests are pipelined.
+    @type maxPipelinedRequests: L{int}
+
+    @ivar _pipeline: A L{list} of C{(request, Deferred)} pairs, for the
+        requests which have been sent behind the current one, in order.
+
+    @ivar _lostCallback: A callable called with this protocol once the
+        connection has been lost, used to tell a connection pool about it.
     """
     _state = 'QUIESCENT'
     _parser = None
@@ -1364,11 +1375,16 @@ class HTTP11ClientProtocol(Protocol):
     _currentRequest = None
     _transportProxy = None
     _responseDeferred = None
+    maxPipelinedRequests = 0
 
+    _PIPELINABLE_METHODS = (b'GET', b'HEAD', b'OPTIONS', b'TRACE')
 
-    def __init__(self, quiescentCallback=lambda c: None):
+    def __init__(self, quiescentCallback=lambda c: None,
+                 lostCallback=lambda c: None):
         self._quiescentCallback = quiescentCallback
+        self._lostCallback = lostCallback
         self._abortDeferreds = []
+        self._pipeline = []
 
 
     @property
@@ -1396,6 +1412,8 @@ class HTTP11ClientProtocol(Protocol):
             any more requests using this L{HTTP11ClientProtocol}.
         """
         if self._state != 'QUIESCENT':
+            if self.canPipeline(request):
+                return self._pipelineRequest(request)
             return fail(RequestNotSent())
 
         self._state = 'TRANSMITTING'
@@ -1441,6 +1459,91 @@ class HTTP11ClientProtocol(Protocol):
         return self._finishedRequest
 
 
+    def canPipeline(self, request):
+        """
+        Determine whether C{request} can be sent right away, without waiting
+        for the response to the request currently in progress.
+
+        Only requests with safe methods and no body are pipelined, behind a
+        persistent request which has been sent in full, and only as many of
+        them as L{maxPipelinedRequests} allows.
+
+        @param request: The request to send.
+        @type request: L{Request}
+
+        @rtype: L{bool}
+        """
+        return (self._state == 'WAITING' and
+                len(self._pipeline) < self.maxPipelinedRequests and
+                request.bodyProducer is None and
+                request.persistent and
+                request.method in self._PIPELINABLE_METHODS and
+                self._currentRequest is not None and
+                self._currentRequest.persistent)
+
+
+    def _pipelineRequest(self, request):
+        """
+        Send C{request} behind the request currently in progress.
+
+        @param request: A request for which L{canPipeline} is C{True}.
+        @type request: L{Request}
+
+        @return: See L{request}.
+        """
+        def cancelRequest(finished):
+            entry = (request, finished)
+            if entry in self._pipeline:
+                # Its response cannot be skipped, so the connection has to go.
+                self._pipeline.remove(entry)
+                self.transport.abortConnection()
+            elif self._finishedRequest is finished:
+                self.transport.abortConnection()
+                self._disconnectParser(Failure(CancelledError()))
+
+        finished = Deferred(cancelRequest)
+        try:
+            request.writeTo(self.transport)
+        except:
+            err = Failure()
+            self._giveUp(err)
+            return fail(RequestGenerationFailed([err]))
+        self._pipeline.append((request, finished))
+        return finished
+
+
+    def _startPipelinedRequest(self, rest):
+        """
+        Start receiving the response to the first pipelined request.
+
+        @param rest: Any bytes already received after the previous response,
+            which belong to this one.
+        @type rest: L{bytes}
+        """
+        request, self._finishedRequest = self._pipeline.pop(0)
+        self._currentRequest = request
+        self._transportProxy = TransportProxyProducer(self.transport)
+        self._parser = HTTPClientParser(request, self._finishResponse)
+        self._parser.makeConnection(self._transportProxy)
+        self._responseDeferred = self._parser._responseDeferred
+        self._responseDeferred.chainDeferred(self._finishedRequest)
+        if rest:
+            self.dataReceived(rest)
+
+
+    def _failPipeline(self, reason):
+        """
+        Fail all of the pipelined requests, none of whose responses will now
+        be received.
+
+        @param reason: Why the responses will not be received.
+        @type reason: L{Failure}
+        """
+        pipeline, self._pipeline = self._pipeline, []
+        for request, finished in pipeline:
+            finished.errback(Failure(ResponseNeverReceived([reason])))
+
+
     def _finishResponse(self, rest):
         """
         Called by an L{HTTPClientParser} to indicate that it has parsed a
@@ -1454,9 +1557,8 @@ class HTTP11ClientProtocol(Protocol):
 
 
     def _finishResponse_WAITING(self, rest):
-        # Currently the rest parameter is ignored. Don't forget to use it if
-        # we ever add support for pipelining. And maybe check what trailers
-        # mean.
+        # The rest parameter is only used when requests have been pipelined.
+        # Maybe check what trailers mean.
         if self._state == 'WAITING':
             self._state = 'QUIESCENT'
         else:
@@ -1479,6 +1581,15 @@ class HTTP11ClientProtocol(Protocol):
         if ((b'close' in connHeaders) or self._state != "QUIESCENT" or
             not self._currentRequest.persistent):
             self._giveUp(Failure(reason))
+            self._failPipeline(Failure(reason))
+        elif self._pipeline:
+            self.transport.resumeProducing()
+            # Finish the response which was just received, making sure that
+            # nothing can issue a request in the meantime, and carry on with
+            # the next one.
+            self._state = 'WAITING'
+            self._disconnectParser(reason)
+            self._startPipelinedRequest(rest)
         else:
             # Just in case we had paused the transport, resume it before
             # considering it quiescent again.
@@ -1547,9 +1658,17 @@ class HTTP11ClientProtocol(Protocol):
     def connectionLost(self, reason):
         """
         The underlying transport went away.  If appropriate, notify the parser
-        object.
+        object, then tell the lost callback.
+        """
+        self._connectionLost(reason)
+        self._lostCallback(self)
+
+
+    def _connectionLost(self, reason):
+        """
+        Dispatch the loss of the connection according to the current state.
         """
-    connectionLost = makeStatefulDispatcher('connectionLost', connectionLost)
+    _connectionLost = makeStatefulDispatcher('connectionLost', _connectionLost)
 
 
     def _connectionLost_QUIESCENT(self, reason):
@@ -1558,6 +1677,7 @@ class HTTP11ClientProtocol(Protocol):
         state but otherwise do nothing.
         """
         self._state = 'CONNECTION_LOST'
+        self._failPipeline(reason)
 
 
     def _connectionLost_GENERATION_FAILED(self, reason):
@@ -1599,6 +1719,7 @@ class HTTP11ClientProtocol(Protocol):
         """
         self._disconnectParser(reason)
         self._state = 'CONNECTION_LOST'
+        self._failPipeline(reason)
 
 
     def _connectionLost_ABORTING(self, reason):
@@ -1608,6 +1729,7 @@ class HTTP11ClientProtocol(Protocol):
         """
         self._disconnectParser(Failure(ConnectionAborted()))
         self._state = 'CONNECTION_LOST'
+        self._failPipeline(Failure(ConnectionAborted()))
         for d in self._abortDeferreds:
             d.callback(None)
         self._abortDeferreds = []
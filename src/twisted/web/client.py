@@ -39,6 +39,7 @@ from twisted.web import http
 from twisted.internet import defer, protocol, task, reactor
 from twisted.internet.abstract import isIPv6Address
 from twisted.internet.interfaces import IProtocol, IOpenSSLContextFactory
+from twisted.internet.interfaces import IHandshakeListener, INegotiated
 from twisted.internet.endpoints import TCP4ClientEndpoint, SSL4ClientEndpoint
 from twisted.python.util import InsensitiveDict
 from twisted.python.components import proxyForInterface
@@ -55,6 +56,14 @@ class PartialDownloadError(error.Error):
     """
 
 
+class ConnectionQueueTimeout(Exception):
+    """
+    No connection became available from an L{HTTPConnectionPool} before
+    the C{connectionQueueTimeout} of the pool expired.
+    """
+
+
+
 class HTTPPageGetter(http.HTTPClient):
     """
     Gets a resource via HTTP, then quits.
@@ -780,6 +789,10 @@ from twisted.web._newclient import RequestNotSent, RequestTransmissionFailed
 from twisted.web._newclient import (
     ResponseNeverReceived, PotentialDataLoss, _WrapperException)
 
+try:
+    from twisted.web._http2client import H2ClientConnection
+except ImportError:
+    H2ClientConnection = None
 
 
 try:
@@ -869,9 +882,15 @@ class WebClientContextFactory(object):
 class BrowserLikePolicyForHTTPS(object):
     """
     SSL connection creator for web clients.
+
+    @ivar _acceptableProtocols: The protocols to offer to servers with ALPN
+        or NPN, in order of preference, or L{None} to offer none.  Offer
+        C{[b'h2', b'http/1.1']} to speak HTTP/2 with servers supporting it,
+        through an L{HTTPConnectionPool} with C{negotiateHTTP2} set.
     """
-    def __init__(self, trustRoot=None):
+    def __init__(self, trustRoot=None, acceptableProtocols=None):
         self._trustRoot = trustRoot
+        self._acceptableProtocols = acceptableProtocols
 
 
     @_requireSSL
@@ -895,8 +914,9 @@ class BrowserLikePolicyForHTTPS(object):
         @rtype: L{client connection creator
             <twisted.internet.interfaces.IOpenSSLClientConnectionCreator>}
         """
-        return optionsForClientTLS(hostname.decode("ascii"),
-                                   trustRoot=self._trustRoot)
+        return optionsForClientTLS(
+            hostname.decode("ascii"), trustRoot=self._trustRoot,
+            acceptableProtocols=self._acceptableProtocols)
 
 
 
@@ -1099,14 +1119,129 @@ class _HTTP11ClientFactory(protocol.Factory):
     @ivar _quiescentCallback: The quiescent callback to be passed to protocol
         instances, used to return them to the connection pool.
 
+    @ivar _lostCallback: The lost callback to be passed to protocol
+        instances, used to tell the connection pool that they are gone.
+
     @since: 11.1
     """
-    def __init__(self, quiescentCallback):
+    def __init__(self, quiescentCallback, lostCallback=lambda c: None):
+        self._quiescentCallback = quiescentCallback
+        self._lostCallback = lostCallback
+
+
+    def buildProtocol(self, addr):
+        return HTTP11ClientProtocol(self._quiescentCallback,
+                                    self._lostCallback)
+
+
+
+@implementer(IHandshakeListener)
+class _NegotiatingHTTPClientProtocol(protocol.Protocol):
+    """
+    A protocol which waits for the TLS handshake of its connection to find
+    out whether the server selected HTTP/2, then hands the connection over
+    to an L{H2ClientConnection} if it did, or to an L{HTTP11ClientProtocol}
+    otherwise.  Connections without TLS go straight to HTTP/1.1.
+
+    @ivar negotiatedProtocol: The protocol selected, C{b'h2'} or
+        C{b'http/1.1'}, or L{None} until then.
+
+    @ivar _protocol: The protocol the connection was handed over to, or
+        L{None} until then.
+
+    @ivar _waiting: A L{list} of the L{Deferred}s returned by
+        L{whenNegotiated}.
+    """
+    negotiatedProtocol = None
+    _protocol = None
+
+    def __init__(self, quiescentCallback, lostCallback):
         self._quiescentCallback = quiescentCallback
+        self._lostCallback = lostCallback
+        self._waiting = []
+
+
+    def whenNegotiated(self):
+        """
+        Get the protocol the connection is handed over to.
+
+        @return: A L{Deferred} which fires with the L{H2ClientConnection} or
+            L{HTTP11ClientProtocol}, or fails if the connection is lost
+            first.
+        """
+        if self._protocol is not None:
+            return defer.succeed(self._protocol)
+        d = defer.Deferred()
+        self._waiting.append(d)
+        return d
+
+
+    def connectionMade(self):
+        """
+        Choose HTTP/1.1 straight away, unless the connection uses TLS.
+        """
+        if not INegotiated.providedBy(self.transport):
+            self._negotiated(b'http/1.1')
+
+
+    def handshakeCompleted(self):
+        """
+        Choose the protocol the server selected.
+        """
+        if self.transport.negotiatedProtocol == b'h2':
+            self._negotiated(b'h2')
+        else:
+            self._negotiated(b'http/1.1')
+
+
+    def _negotiated(self, negotiatedProtocol):
+        """
+        Hand the connection over to the protocol for C{negotiatedProtocol}.
+
+        @param negotiatedProtocol: C{b'h2'} or C{b'http/1.1'}.
+        """
+        if negotiatedProtocol == b'h2':
+            protocolClass = H2ClientConnection
+        else:
+            protocolClass = HTTP11ClientProtocol
+        self.negotiatedProtocol = negotiatedProtocol
+        self._protocol = protocolClass(self._quiescentCallback,
+                                       self._lostCallback)
+        self._protocol.makeConnection(self.transport)
+        waiting, self._waiting = self._waiting, []
+        for d in waiting:
+            d.callback(self._protocol)
+
 
+    def dataReceived(self, data):
+        """
+        Pass data on to the protocol the connection was handed over to.
+        """
+        self._protocol.dataReceived(data)
 
+
+    def connectionLost(self, reason):
+        """
+        Pass the loss of the connection on to the protocol it was handed over
+        to, or fail L{whenNegotiated} if there is none yet.
+        """
+        if self._protocol is not None:
+            self._protocol.connectionLost(reason)
+            return
+        waiting, self._waiting = self._waiting, []
+        for d in waiting:
+            d.errback(reason)
+
+
+
+class _NegotiatingHTTPClientFactory(_HTTP11ClientFactory):
+    """
+    A factory for L{_NegotiatingHTTPClientProtocol}, used by
+    L{HTTPConnectionPool} when C{negotiateHTTP2} is set.
+    """
     def buildProtocol(self, addr):
-        return HTTP11ClientProtocol(self._quiescentCallback)
+        return _NegotiatingHTTPClientProtocol(self._quiescentCallback,
+                                              self._lostCallback)
 
 
 
@@ -1175,6 +1310,61 @@ class _RetryingHTTP11ClientProtocol(object):
 
 
 
+class _PipeliningHTTP11ClientProtocol(object):
+    """
+    A wrapper for a busy L{HTTP11ClientProtocol} which pipelines a request
+    behind the one in progress if it can, and otherwise waits for a
+    connection from the pool.
+
+    @ivar _clientProtocol: The underlying L{HTTP11ClientProtocol}.
+
+    @ivar _waitForConnection: A callable returning a L{Deferred} which fires
+        with a connection from the pool.
+    """
+
+    def __init__(self, clientProtocol, waitForConnection):
+        self._clientProtocol = clientProtocol
+        self._waitForConnection = waitForConnection
+
+
+    def request(self, request):
+        """
+        Pipeline C{request} on the wrapped protocol, or issue it on the next
+        available connection if it cannot be pipelined.
+
+        @param request: A L{Request} instance.
+        """
+        if self._clientProtocol.canPipeline(request):
+            return self._clientProtocol.request(request)
+        return self._waitForConnection().addCallback(
+            lambda connection: connection.request(request))
+
+
+
+class _ConnectionWaiter(object):
+    """
+    A caller of L{HTTPConnectionPool.getConnection} waiting for a connection.
+
+    @ivar deferred: The L{Deferred} given to the caller.
+
+    @ivar endpoint: The endpoint to use if a new connection is opened for
+        the caller.
+
+    @ivar timeoutCall: The C{IDelayedCall} which will give up waiting, or
+        L{None}.
+
+    @ivar connecting: Once a new connection is being opened for the caller,
+        the L{Deferred} for it.
+    """
+    timeoutCall = None
+    connecting = None
+
+    def __init__(self, deferred, endpoint):
+        self.deferred = deferred
+        self.endpoint = endpoint
+
+
+
 class HTTPConnectionPool(object):
     """
     A pool of persistent HTTP connections.
@@ -1182,6 +1372,8 @@ class HTTPConnectionPool(object):
     Features:
      - Cached connections will eventually time out.
      - Limits on maximum number of persistent connections.
+     - Optionally, limits on the number of connections in use, with callers
+       waiting in line for one.
 
     Connections are stored using keys, which should be chosen such that any
     connections stored under a given key can be used interchangeably.
@@ -1203,27 +1395,98 @@ class HTTPConnectionPool(object):
     @ivar retryAutomatically: C{boolean} indicating whether idempotent
         requests should be retried once if no response was received.
 
+    @ivar maxActivePerHost: The maximum number of connections, being opened
+        or in use for a request, for a C{host:port} destination.  Callers of
+        L{getConnection} beyond that wait, first come first served, until a
+        connection is returned to the pool or lost.  If L{None}, the default,
+        there is no limit.  Retries of failed requests are not limited.
+    @type maxActivePerHost: C{int} or L{None}
+
+    @ivar connectionQueueTimeout: Number of seconds a caller of
+        L{getConnection} will wait for a connection before its L{Deferred}
+        fails with L{ConnectionQueueTimeout}, or L{None} to wait forever.
+
+    @ivar idleConnectionPolicy: Which cached connection L{getConnection}
+        reuses: C{"FIFO"}, the default, for the one which has been idle the
+        longest, so that load is spread across connections, or C{"LIFO"}
+        for the one which has been idle the shortest, so that surplus
+        connections time out.
+
+    @ivar maxPipelinedRequests: The number of requests which may be
+        pipelined behind the one in progress on each connection (see
+        L{HTTP11ClientProtocol.canPipeline}).  Requests are only pipelined
+        instead of waiting when L{maxActivePerHost} connections are in use.
+        By default no requests are pipelined.
+
+    @ivar negotiateHTTP2: Whether to speak HTTP/2 to servers which select it
+        during the TLS handshake (the HTTPS policy of the agent has to offer
+        it, see L{BrowserLikePolicyForHTTPS}).  An HTTP/2 connection is
+        shared by all the requests for its key, up to the number of streams
+        the server allows, and counts as one connection towards
+        C{maxActivePerHost}.  While a connection which may turn out to speak
+        HTTP/2 is being opened, callers of L{getConnection} for its key wait
+        for it instead of opening connections of their own, unless the last
+        connection opened for the key selected HTTP/1.1.  This only has an
+        effect if the C{h2} library is installed.
+
     @ivar _factory: The factory used to connect to the proxy.
 
+    @ivar _negotiatingFactory: The factory used instead of C{_factory} when
+        C{negotiateHTTP2} is set.
+
     @ivar _connections: Map (scheme, host, port) to lists of
         L{HTTP11ClientProtocol} instances.
 
     @ivar _timeouts: Map L{HTTP11ClientProtocol} instances to a
         C{IDelayedCall} instance of their timeout.
 
+    @ivar _active: Map keys to lists of the L{HTTP11ClientProtocol}
+        instances which have been given out by L{getConnection}.
+
+    @ivar _connecting: Map keys to the number of connections being opened.
+
+    @ivar _waiting: Map keys to lists of L{_ConnectionWaiter} instances, in
+        order of arrival.
+
+    @ivar _connectLatency: Map keys to C{(count, total)} pairs giving the
+        number of connections opened and the total number of seconds spent
+        opening them.
+
+    @ivar _multiplexed: Map keys to lists of the L{H2ClientConnection}
+        instances which requests for that key share.
+
+    @ivar _negotiating: Map keys to the number of connections being opened
+        which haven't selected a protocol yet.
+
+    @ivar _negotiatedProtocols: Map keys to the protocol selected by the last
+        connection opened for them, C{b'h2'} or C{b'http/1.1'}.
+
     @since: 12.1
     """
 
     _factory = _HTTP11ClientFactory
+    _negotiatingFactory = _NegotiatingHTTPClientFactory
     maxPersistentPerHost = 2
     cachedConnectionTimeout = 240
     retryAutomatically = True
+    maxActivePerHost = None
+    connectionQueueTimeout = None
+    idleConnectionPolicy = "FIFO"
+    maxPipelinedRequests = 0
+    negotiateHTTP2 = False
 
     def __init__(self, reactor, persistent=True):
         self._reactor = reactor
         self.persistent = persistent
         self._connections = {}
         self._timeouts = {}
+        self._active = {}
+        self._connecting = {}
+        self._waiting = {}
+        self._connectLatency = {}
+        self._multiplexed = {}
+        self._negotiating = {}
+        self._negotiatedProtocols = {}
 
 
     def getConnection(self, key, endpoint):
@@ -1247,21 +1510,160 @@ class HTTPConnectionPool(object):
         @return: A C{Deferred} that will fire with a L{HTTP11ClientProtocol}
            (or a wrapper) that can be used to send a single HTTP request.
         """
-        # Try to get cached version:
+        if self._waiting.get(key):
+            # Don't jump the queue.
+            return self._waitForConnection(key, endpoint)
+
+        connection = self._getMultiplexedConnection(key)
+        if connection is None:
+            connection = self._getCachedConnection(key, endpoint)
+        if connection is not None:
+            return defer.succeed(connection)
+
+        if self._awaitingHTTP2(key):
+            return self._waitForConnection(key, endpoint)
+
+        if not self._hasCapacity(key):
+            if self.maxPipelinedRequests:
+                for connection in self._active.get(key, ()):
+                    if connection.state == "WAITING":
+                        return defer.succeed(_PipeliningHTTP11ClientProtocol(
+                            connection,
+                            lambda: self._waitForConnection(key, endpoint)))
+            return self._waitForConnection(key, endpoint)
+
+        return self._newConnection(key, endpoint)
+
+
+    def _getMultiplexedConnection(self, key):
+        """
+        Find an HTTP/2 connection which can take another request right away.
+
+        @return: The L{H2ClientConnection}, or L{None}.
+        """
+        for connection in self._multiplexed.get(key, ()):
+            if connection.canAcceptRequest():
+                timeout = self._timeouts.pop(connection, None)
+                if timeout is not None:
+                    timeout.cancel()
+                return connection
+        return None
+
+
+    def _getCachedConnection(self, key, endpoint):
+        """
+        Take a cached connection out of the pool, according to
+        C{idleConnectionPolicy}.
+
+        @return: The connection (or a wrapper), or L{None} if no cached
+            connection is usable.
+        """
         connections = self._connections.get(key)
+        lifo = self.idleConnectionPolicy == "LIFO"
         while connections:
-            connection = connections.pop(0)
+            connection = connections.pop() if lifo else connections.pop(0)
             # Cancel timeout:
             self._timeouts[connection].cancel()
             del self._timeouts[connection]
             if connection.state == "QUIESCENT":
+                self._active.setdefault(key, []).append(connection)
                 if self.retryAutomatically:
                     newConnection = lambda: self._newConnection(key, endpoint)
                     connection = _RetryingHTTP11ClientProtocol(
                         connection, newConnection)
-                return defer.succeed(connection)
+                return connection
+        return None
 
-        return self._newConnection(key, endpoint)
+
+    def _hasCapacity(self, key):
+        """
+        Determine whether another connection may be opened or given out for
+        C{key} without exceeding C{maxActivePerHost}.
+        """
+        if self.maxActivePerHost is None:
+            return True
+        inUse = len(self._active.get(key, ())) + self._connecting.get(key, 0)
+        return inUse < self.maxActivePerHost
+
+
+    def _awaitingHTTP2(self, key):
+        """
+        Determine whether a connection which may turn out to speak HTTP/2 is
+        being opened for C{key}, so that callers should wait to share it
+        rather than open connections of their own.
+        """
+        return bool(self._negotiating.get(key) and
+                    self._negotiatedProtocols.get(key) != b'http/1.1')
+
+
+    def _waitForConnection(self, key, endpoint):
+        """
+        Wait in line for a connection for C{key}.
+
+        @return: A L{Deferred} like the one returned by L{getConnection}.
+        """
+        def cancel(d):
+            if waiter.connecting is not None:
+                waiter.connecting.cancel()
+            else:
+                self._removeWaiter(key, waiter)
+
+        def timedOut():
+            waiter.timeoutCall = None
+            self._removeWaiter(key, waiter)
+            waiter.deferred.errback(ConnectionQueueTimeout())
+
+        waiter = _ConnectionWaiter(defer.Deferred(cancel), endpoint)
+        if self.connectionQueueTimeout is not None:
+            waiter.timeoutCall = self._reactor.callLater(
+                self.connectionQueueTimeout, timedOut)
+        self._waiting.setdefault(key, []).append(waiter)
+        return waiter.deferred
+
+
+    def _removeWaiter(self, key, waiter):
+        """
+        Take C{waiter} out of the line for C{key}.
+        """
+        waiting = self._waiting[key]
+        waiting.remove(waiter)
+        if not waiting:
+            del self._waiting[key]
+        if waiter.timeoutCall is not None:
+            waiter.timeoutCall.cancel()
+            waiter.timeoutCall = None
+
+
+    def _scheduleWaiters(self, key):
+        """
+        Arrange for L{_serveWaiters} to run soon.  This happens from the
+        reactor, because connections are returned to the pool while the
+        response to their last request is still being finished.
+        """
+        self._reactor.callLater(0, self._serveWaiters, key)
+
+
+    def _serveWaiters(self, key):
+        """
+        Give connections to the callers waiting for one for C{key}, while
+        there are cached connections or room for new ones.
+        """
+        waiting = self._waiting.get(key)
+        while waiting:
+            waiter = waiting[0]
+            connection = self._getMultiplexedConnection(key)
+            if connection is None:
+                connection = self._getCachedConnection(key, waiter.endpoint)
+            if connection is not None:
+                self._removeWaiter(key, waiter)
+                waiter.deferred.callback(connection)
+            elif self._hasCapacity(key) and not self._awaitingHTTP2(key):
+                self._removeWaiter(key, waiter)
+                waiter.connecting = self._newConnection(key, waiter.endpoint)
+                waiter.connecting.chainDeferred(waiter.deferred)
+            else:
+                return
+            waiting = self._waiting.get(key)
 
 
     def _newConnection(self, key, endpoint):
@@ -1272,8 +1674,62 @@ class HTTPConnectionPool(object):
         """
         def quiescentCallback(protocol):
             self._putConnection(key, protocol)
-        factory = self._factory(quiescentCallback)
-        return endpoint.connect(factory)
+        def lostCallback(protocol):
+            self._lostConnection(key, protocol)
+        negotiate = self.negotiateHTTP2 and H2ClientConnection is not None
+        if negotiate:
+            factory = self._negotiatingFactory(quiescentCallback, lostCallback)
+        else:
+            factory = self._factory(quiescentCallback, lostCallback)
+
+        self._connecting[key] = self._connecting.get(key, 0) + 1
+        if negotiate:
+            self._negotiating[key] = self._negotiating.get(key, 0) + 1
+        started = self._reactor.seconds()
+
+        def negotiated(negotiatedProtocol):
+            self._negotiating[key] -= 1
+            if not self._negotiating[key]:
+                del self._negotiating[key]
+            if negotiatedProtocol is not None:
+                self._negotiatedProtocols[key] = negotiatedProtocol
+            if self._waiting.get(key):
+                self._scheduleWaiters(key)
+
+        def connected(protocol):
+            if isinstance(protocol, _NegotiatingHTTPClientProtocol):
+                # Wait for the TLS handshake to find out which protocol
+                # the connection speaks.
+                negotiating = protocol
+                return negotiating.whenNegotiated().addCallbacks(
+                    lambda protocol: ready(protocol,
+                                           negotiating.negotiatedProtocol),
+                    failed)
+            return ready(protocol, b'http/1.1')
+
+        def ready(protocol, negotiatedProtocol):
+            self._connecting[key] -= 1
+            self._active.setdefault(key, []).append(protocol)
+            if negotiatedProtocol == b'h2':
+                self._multiplexed.setdefault(key, []).append(protocol)
+            if negotiate:
+                negotiated(negotiatedProtocol)
+            if negotiatedProtocol != b'h2':
+                protocol.maxPipelinedRequests = self.maxPipelinedRequests
+            count, total = self._connectLatency.get(key, (0, 0.0))
+            self._connectLatency[key] = (
+                count + 1, total + self._reactor.seconds() - started)
+            return protocol
+
+        def failed(reason):
+            self._connecting[key] -= 1
+            if negotiate:
+                negotiated(None)
+            elif self._waiting.get(key):
+                self._scheduleWaiters(key)
+            return reason
+
+        return endpoint.connect(factory).addCallbacks(connected, failed)
 
 
     def _removeConnection(self, key, connection):
@@ -1285,11 +1741,34 @@ class HTTPConnectionPool(object):
         del self._timeouts[connection]
 
 
+    def _lostConnection(self, key, connection):
+        """
+        Forget about a connection which was in use and has been lost, making
+        room for a caller waiting for a connection.  This will be called by
+        L{HTTP11ClientProtocol} when its connection is lost.
+        """
+        multiplexed = self._multiplexed.get(key, [])
+        if connection in multiplexed:
+            multiplexed.remove(connection)
+            timeout = self._timeouts.pop(connection, None)
+            if timeout is not None:
+                timeout.cancel()
+        active = self._active.get(key, [])
+        if connection in active:
+            active.remove(connection)
+            if self._waiting.get(key):
+                self._scheduleWaiters(key)
+
+
     def _putConnection(self, key, connection):
         """
         Return a persistent connection to the pool. This will be called by
-        L{HTTP11ClientProtocol} when the connection becomes quiescent.
+        L{HTTP11ClientProtocol} when the connection becomes quiescent, and
+        by L{H2ClientConnection} whenever one of its streams finishes.
         """
+        if connection in self._multiplexed.get(key, ()):
+            self._putMultiplexedConnection(key, connection)
+            return
         if connection.state != "QUIESCENT":
             # Log with traceback for debugging purposes:
             try:
@@ -1298,6 +1777,9 @@ class HTTPConnectionPool(object):
             except:
                 log.err()
             return
+        active = self._active.get(key, [])
+        if connection in active:
+            active.remove(connection)
         connections = self._connections.setdefault(key, [])
         if len(connections) == self.maxPersistentPerHost:
             dropped = connections.pop(0)
@@ -1309,11 +1791,72 @@ class HTTPConnectionPool(object):
                                       self._removeConnection,
                                       key, connection)
         self._timeouts[connection] = cid
+        if self._waiting.get(key):
+            self._scheduleWaiters(key)
+
+
+    def _putMultiplexedConnection(self, key, connection):
+        """
+        Make use of the capacity freed by a finished stream of an HTTP/2
+        connection, and time the connection out if it has become idle.
+        """
+        if self._waiting.get(key):
+            self._scheduleWaiters(key)
+        if connection.state == "QUIESCENT" and connection not in self._timeouts:
+            self._timeouts[connection] = self._reactor.callLater(
+                self.cachedConnectionTimeout, self._removeMultiplexedConnection,
+                key, connection)
+
+
+    def _removeMultiplexedConnection(self, key, connection):
+        """
+        Disconnect an idle HTTP/2 connection and forget about it.
+        """
+        del self._timeouts[connection]
+        self._multiplexed[key].remove(connection)
+        connection.transport.loseConnection()
+
+
+    def getStatistics(self, key=None):
+        """
+        Report how the connections of this pool are being used.
+
+        @param key: The key to report on, or L{None} for all of them.
+
+        @return: A C{dict} with the number of connections in use
+            (C{"active"}), being opened (C{"connecting"}) and cached
+            (C{"idle"}), the number of callers waiting for a connection
+            (C{"queued"}), the number of connections opened so far
+            (C{"connects"}) and the mean number of seconds it took to open
+            them (C{"connectLatency"}, L{None} if none were opened).
+        """
+        if key is None:
+            keys = (set(self._active) | set(self._connecting) |
+                    set(self._connections) | set(self._waiting) |
+                    set(self._connectLatency))
+        else:
+            keys = [key]
+        stats = dict(active=0, connecting=0, idle=0, queued=0, connects=0)
+        totalLatency = 0.0
+        for k in keys:
+            stats["active"] += len(self._active.get(k, ()))
+            stats["connecting"] += self._connecting.get(k, 0)
+            stats["idle"] += len(self._connections.get(k, ()))
+            stats["queued"] += len(self._waiting.get(k, ()))
+            count, total = self._connectLatency.get(k, (0, 0.0))
+            stats["connects"] += count
+            totalLatency += total
+        if stats["connects"]:
+            stats["connectLatency"] = totalLatency / stats["connects"]
+        else:
+            stats["connectLatency"] = None
+        return stats
 
 
     def closeCachedConnections(self):
         """
         Close all persistent connections and remove them from the pool.
+        HTTP/2 connections are closed if no request is using them.
 
         @return: L{defer.Deferred} that fires when all connections have been
             closed.
@@ -1323,6 +1866,11 @@ class HTTPConnectionPool(object):
             for p in protocols:
                 results.append(p.abort())
         self._connections = {}
+        for protocols in itervalues(self._multiplexed):
+            for p in protocols[:]:
+                if p.state == "QUIESCENT":
+                    protocols.remove(p)
+                    results.append(p.abort())
         for dc in itervalues(self._timeouts):
             dc.cancel()
         self._timeouts = {}
@@ -2165,7 +2713,7 @@ def readBody(response):
 
 
 __all__ = [
-    'PartialDownloadError', 'HTTPPageGetter', 'HTTPPageDownloader',
+    'PartialDownloadError', 'ConnectionQueueTimeout', 'HTTPPageGetter', 'HTTPPageDownloader',
     'HTTPClientFactory', 'HTTPDownloader', 'getPage', 'downloadPage',
     'ResponseDone', 'Response', 'ResponseFailed', 'Agent', 'CookieAgent',
     'ProxyAgent', 'ContentDecoderAgent', 'GzipDecoder', 'RedirectAgent',
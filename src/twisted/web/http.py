@@ -227,6 +227,40 @@ def datetimeToString(msSinceEpoch=None):
 
 
 
+class _DatetimeCache(object):
+    """
+    A cache of the HTTP datetime string for the current second, so that every
+    response sent within the same second need not format its own I{Date}
+    header.
+
+    @ivar _reactor: An L{IReactorTime} provider giving the current time.
+
+    @ivar _second: The second for which C{_value} was formatted.
+    @type _second: L{int} or L{None}
+
+    @ivar _value: The cached datetime string.
+    @type _value: L{bytes} or L{None}
+    """
+
+    def __init__(self, reactor):
+        self._reactor = reactor
+        self._second = None
+        self._value = None
+
+
+    def __call__(self):
+        """
+        @return: The HTTP datetime string for the current time.
+        @rtype: L{bytes}
+        """
+        second = int(self._reactor.seconds())
+        if second != self._second:
+            self._value = datetimeToString(second)
+            self._second = second
+        return self._value
+
+
+
 def datetimeToLogString(msSinceEpoch=None):
     """
     Convert seconds since epoch to log datetime string.
@@ -539,11 +573,162 @@ class HTTPClient(basic.LineReceiver):
 # response codes that must have empty bodies
 NO_BODY_CODES = (204, 304)
 
+# The status lines of the standard responses, so that they need not be built
+# for every response.
+_STATUS_LINES = dict(
+    ((version, intToBytes(code), message),
+     version + b" " + intToBytes(code) + b" " + message + b"\r\n")
+    for version in (b"HTTP/1.0", b"HTTP/1.1")
+    for code, message in RESPONSES.items())
+
 
 # Sentinel object that detects people explicitly passing `queued` to Request.
 _QUEUED_SENTINEL = object()
 
 
+
+class _MemoryBudget(object):
+    """
+    A limit on the number of bytes of request bodies which may be held in
+    memory at once by all of the requests received through one
+    L{HTTPFactory}.
+
+    @ivar limit: The maximum number of bytes which may be reserved, or L{None}
+        for no limit.
+    @type limit: L{int} or L{None}
+
+    @ivar used: The number of bytes currently reserved.
+    @type used: L{int}
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.used = 0
+
+
+    def reserve(self, size):
+        """
+        Reserve C{size} bytes, if that does not take the budget over its limit.
+
+        @param size: The number of bytes to reserve.
+        @type size: L{int}
+
+        @return: C{True} if the bytes were reserved, C{False} otherwise.
+        @rtype: L{bool}
+        """
+        if self.limit is not None and self.used + size > self.limit:
+            return False
+        self.used += size
+        return True
+
+
+    def release(self, size):
+        """
+        Give back C{size} previously reserved bytes.
+
+        @param size: The number of bytes to release.
+        @type size: L{int}
+        """
+        self.used -= size
+
+
+
+class _SpooledContent(object):
+    """
+    A file-like object which keeps the body of a request in memory until it
+    grows beyond a threshold, or until the memory budget shared with the other
+    requests of its L{HTTPFactory} runs out, and in a temporary file after
+    that.
+
+    Any attribute not defined here is looked up on the underlying file, so
+    this can be used wherever a L{BytesIO} or a temporary file could.
+
+    @ivar _file: The L{BytesIO} or temporary file holding the body.
+
+    @ivar _threshold: The largest body, in bytes, which will be kept in
+        memory.
+    @type _threshold: L{int}
+
+    @ivar _budget: The budget from which memory is reserved, or L{None}.
+    @type _budget: L{_MemoryBudget} or L{None}
+
+    @ivar _reserved: The number of bytes reserved from C{_budget}.
+    @type _reserved: L{int}
+
+    @ivar rolledOver: C{False} while the body is in memory, C{True} once it
+        has been moved to a temporary file.
+    @type rolledOver: L{bool}
+    """
+    rolledOver = False
+
+    def __init__(self, threshold, budget=None):
+        self._file = StringIO()
+        self._threshold = threshold
+        self._budget = budget
+        self._reserved = 0
+
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['_file'], name)
+
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+    def write(self, data):
+        """
+        Write C{data} to the body, moving it to a temporary file first if
+        keeping it in memory would take it beyond the threshold or the budget.
+
+        @param data: Some of the body.
+        @type data: L{bytes}
+        """
+        if not self.rolledOver:
+            size = self._file.tell() + len(data)
+            if size > self._reserved:
+                if (size > self._threshold or (
+                        self._budget is not None and
+                        not self._budget.reserve(size - self._reserved))):
+                    self.rollover()
+                else:
+                    self._reserved = size
+        self._file.write(data)
+
+
+    def rollover(self):
+        """
+        Move the body to a temporary file, giving back the memory it used.
+        """
+        if self.rolledOver:
+            return
+        memory = self._file
+        self._file = tempfile.TemporaryFile()
+        self._file.write(memory.getvalue())
+        self._file.seek(memory.tell(), 0)
+        memory.close()
+        self._release()
+        self.rolledOver = True
+
+
+    def _release(self):
+        """
+        Give back any memory reserved from the budget.
+        """
+        if self._budget is not None:
+            self._budget.release(self._reserved)
+        self._reserved = 0
+
+
+    def close(self):
+        """
+        Close the underlying file and give back any memory reserved for it.
+        """
+        self._release()
+        self._file.close()
+
+
+
 @implementer(interfaces.IConsumer)
 class Request:
     """
@@ -578,6 +763,8 @@ class Request:
         which this request was received is closed and which is C{True} after
         that.
     @type _disconnected: C{bool}
+
+    @ivar _bodyReceiver: The object passed to L{setBodyReceiver}, if any.
     """
     producer = None
     finished = 0
@@ -594,6 +781,7 @@ class Request:
     args = None
     path = None
     content = None
+    _bodyReceiver = None
     _forceSSL = 0
     _disconnected = False
 
@@ -663,10 +851,56 @@ class Request:
             request headers.  L{None} if the request headers do not indicate a
             length.
         """
-        if length is not None and length < 100000:
+        if self._bodyReceiver is not None:
             self.content = StringIO()
-        else:
+            return
+        factory = getattr(self.channel, "factory", None)
+        threshold = getattr(
+            factory, "contentSpoolThreshold", HTTPFactory.contentSpoolThreshold)
+        if length is not None and length > threshold:
             self.content = tempfile.TemporaryFile()
+        else:
+            self.content = _SpooledContent(
+                threshold, getattr(factory, "_contentBudget", None))
+
+
+    def allHeadersReceived(self, command, path, version):
+        """
+        Called by channel when the request line and all of the headers of this
+        request have been received, before any of its body.
+
+        This method is not intended for users, but subclasses may override it
+        to call L{setBodyReceiver}.
+
+        @type command: C{bytes}
+        @param command: The HTTP verb of this request.
+
+        @type path: C{bytes}
+        @param path: The URI of this request.
+
+        @type version: C{bytes}
+        @param version: The HTTP version of this request.
+        """
+
+
+    def setBodyReceiver(self, receiver):
+        """
+        Deliver the body of this request to C{receiver} as it arrives, instead
+        of collecting it in C{content}.  C{content} will be empty when the
+        request is processed.
+
+        This must be called before any of the body has been received, for
+        example from L{allHeadersReceived}.
+
+        @param receiver: An object with a C{write} method, which will be
+            called with each chunk of the body as L{bytes}.
+
+        @since: 16.5
+        """
+        self._bodyReceiver = receiver
+        if self.content is not None:
+            self.content.close()
+            self.content = StringIO()
 
 
     def parseCookies(self):
@@ -697,7 +931,10 @@ class Request:
 
         This method is not intended for users.
         """
-        self.content.write(data)
+        if self._bodyReceiver is not None:
+            self._bodyReceiver.write(data)
+        else:
+            self.content.write(data)
 
 
     def requestReceived(self, command, path, version):
@@ -1158,8 +1395,8 @@ class Request:
         C{self.requestHeaders.getAllRawHeaders()} may be preferred.
         """
         headers = {}
-        for k, v in self.requestHeaders.getAllRawHeaders():
-            headers[k.lower()] = v[-1]
+        for k, v in self.requestHeaders.getAllRawPairs():
+            headers[k.lower()] = v
         return headers
 
 
@@ -1650,6 +1887,12 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         L{interfaces.IPushProducer}. Used to attempt to prevent the transport
         from producing excess data when we're responding to a request.
     @type _producer: L{interfaces.IPushProducer}
+
+    @ivar _batchParsing: Whether complete request headers which have been
+        received in one go are parsed all at once by L{dataReceived}, rather
+        than line by line by L{lineReceived} and L{headerReceived}.  This is
+        only done if neither of those methods has been overridden.
+    @type _batchParsing: L{bool}
     """
 
     maxHeaders = 500
@@ -1674,6 +1917,10 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self._handlingRequest = False
         self._dataBuffer = []
         self._transferDecoder = None
+        cls = self.__class__
+        self._batchParsing = (
+            cls.lineReceived == HTTPChannel.lineReceived and
+            cls.headerReceived == HTTPChannel.headerReceived)
 
 
     def connectionMade(self):
@@ -1683,6 +1930,121 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         )
 
 
+    def dataReceived(self, data):
+        """
+        Parse the request line and headers of each request which has been
+        received in its entirety at once, then handle anything else
+        (incomplete headers, request bodies, data received while a request is
+        being handled) as L{basic.LineReceiver} would.
+
+        @param data: The data received.
+        @type data: L{bytes}
+        """
+        if not self._batchParsing or self._busyReceiving:
+            return basic.LineReceiver.dataReceived(self, data)
+
+        self._buffer += data
+        self._busyReceiving = True
+        try:
+            while (self.line_mode and self.__first_line and self.persistent
+                   and not self._handlingRequest and not self.paused):
+                buffer = self._buffer
+                if buffer[:2] == b'\r\n':
+                    if self.__first_line == 1:
+                        # Like lineReceived, eat up the extraneous empty line
+                        # IE sends after a POST request, but only ONCE.
+                        self.__first_line = 2
+                        self._buffer = buffer[2:]
+                        continue
+                    break
+                end = buffer.find(b'\r\n\r\n')
+                if end == -1:
+                    break
+                block = buffer[:end]
+                if b'\r\n ' in block or b'\r\n\t' in block:
+                    # Leave multi line headers to lineReceived.
+                    break
+                self._buffer = buffer[end + 4:]
+                if not self._headerBlockReceived(block):
+                    return
+                if not self.line_mode:
+                    # Feed the start of the body straight to its decoder.
+                    data = self._buffer
+                    self._buffer = b''
+                    if data:
+                        self.rawDataReceived(data)
+        finally:
+            self._busyReceiving = False
+
+        if self._buffer:
+            basic.LineReceiver.dataReceived(self, b'')
+
+
+    def _headerBlockReceived(self, block):
+        """
+        Handle the request line and all of the headers of a request at once,
+        as L{lineReceived} would handle each of them and then the empty line
+        which ends them.
+
+        @param block: The request line and headers, each of them separated
+            from the next by the line delimiter, excluding the empty line.
+        @type block: L{bytes}
+
+        @return: A flag indicating whether the request line and headers were
+            valid.
+        @rtype: L{bool}
+        """
+        self.resetTimeout()
+
+        lines = block.split(b'\r\n')
+        if len(block) > self.MAX_LENGTH:
+            for line in lines:
+                if len(line) > self.MAX_LENGTH:
+                    self.lineLengthExceeded(line)
+                    return False
+
+        self._receivedHeaderSize += len(block) - 2 * (len(lines) - 1)
+        if self._receivedHeaderSize > self.totalHeadersSize:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        if not self._requestLineReceived(lines[0]):
+            return False
+
+        request = self.requests[-1]
+        names = []
+        lowered = []
+        values = []
+        for line in lines[1:]:
+            try:
+                header, data = line.split(b':', 1)
+            except ValueError:
+                self._respondToBadRequestAndDisconnect()
+                return False
+
+            data = data.strip()
+            name = header.lower()
+            if name == b'content-length' or name == b'transfer-encoding':
+                if not self._framingHeaderReceived(name, data):
+                    return False
+            names.append(header)
+            lowered.append(name)
+            values.append(data)
+        request.requestHeaders._extend(names, values, lowered)
+
+        self._receivedHeaderCount += len(lines) - 1
+        if self._receivedHeaderCount > self.maxHeaders:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        self.allHeadersReceived()
+        if self.length == 0:
+            self.allContentReceived()
+        else:
+            self.setRawMode()
+        return True
+
+
     def lineReceived(self, line):
         """
         Called for each line from request until the end of headers when
@@ -1715,29 +2077,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
                 self.__first_line = 2
                 return
 
-            # create a new Request object
-            if INonQueuedRequestFactory.providedBy(self.requestFactory):
-                request = self.requestFactory(self)
-            else:
-                request = self.requestFactory(self, len(self.requests))
-            self.requests.append(request)
-
-            self.__first_line = 0
-
-            parts = line.split()
-            if len(parts) != 3:
-                self._respondToBadRequestAndDisconnect()
-                return
-            command, request, version = parts
-            try:
-                command.decode("ascii")
-            except UnicodeDecodeError:
-                self._respondToBadRequestAndDisconnect()
-                return
-
-            self._command = command
-            self._path = request
-            self._version = version
+            self._requestLineReceived(line)
         elif line == b'':
             # End of headers.
             if self.__header:
@@ -1764,9 +2104,50 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self.__header = line
 
 
+    def _requestLineReceived(self, line):
+        """
+        Create a new request for a request line.
+
+        @param line: The request line, excluding the line delimiter.
+        @type line: L{bytes}
+
+        @return: A flag indicating whether the request line was valid.
+        @rtype: L{bool}
+        """
+        # create a new Request object
+        if INonQueuedRequestFactory.providedBy(self.requestFactory):
+            request = self.requestFactory(self)
+        else:
+            request = self.requestFactory(self, len(self.requests))
+        self.requests.append(request)
+
+        self.__first_line = 0
+
+        parts = line.split()
+        if len(parts) != 3:
+            self._respondToBadRequestAndDisconnect()
+            return False
+        command, request, version = parts
+        try:
+            command.decode("ascii")
+        except UnicodeDecodeError:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        self._command = command
+        self._path = request
+        self._version = version
+        return True
+
+
     def _finishRequestBody(self, data):
         self.allContentReceived()
-        self._dataBuffer.append(data)
+        if self._handlingRequest:
+            self._dataBuffer.append(data)
+        else:
+            # The request was handled straight away, so whatever followed its
+            # body is the start of the next one.
+            self.setLineMode(data)
 
 
     def headerReceived(self, line):
@@ -1787,8 +2168,33 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self._respondToBadRequestAndDisconnect()
             return False
 
-        header = header.lower()
         data = data.strip()
+        if not self._framingHeaderReceived(header.lower(), data):
+            return False
+        self.requests[-1].requestHeaders.addRawHeader(header, data)
+
+        self._receivedHeaderCount += 1
+        if self._receivedHeaderCount > self.maxHeaders:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        return True
+
+
+    def _framingHeaderReceived(self, header, data):
+        """
+        Set up the decoding of the request body if C{header} determines how it
+        is framed.
+
+        @param header: The lower-cased name of a header.
+        @type header: L{bytes}
+
+        @param data: The value of the header.
+        @type data: L{bytes}
+
+        @return: A flag indicating whether the header was valid.
+        @rtype: L{bool}
+        """
         if header == b'content-length':
             try:
                 self.length = int(data)
@@ -1804,18 +2210,6 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self.length = None
             self._transferDecoder = _ChunkedTransferDecoder(
                 self.requests[-1].handleContentChunk, self._finishRequestBody)
-        reqHeaders = self.requests[-1].requestHeaders
-        values = reqHeaders.getRawHeaders(header)
-        if values is not None:
-            values.append(data)
-        else:
-            reqHeaders.setRawHeaders(header, [data])
-
-        self._receivedHeaderCount += 1
-        if self._receivedHeaderCount > self.maxHeaders:
-            self._respondToBadRequestAndDisconnect()
-            return False
-
         return True
 
 
@@ -1864,6 +2258,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         req = self.requests[-1]
         req.parseCookies()
         self.persistent = self.checkPersistence(req, self._version)
+        req.allHeadersReceived(self._command, self._path, self._version)
         req.gotLength(self.length)
         # Handle 'Expect: 100-continue' with automated 100 response code,
         # a simplistic implementation of RFC 2686 8.2.3:
@@ -1983,13 +2378,14 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         @param headers: The headers to write to the transport.
         @type headers: L{twisted.web.http_headers.Headers}
         """
-        responseLine = version + b" " + code + b" " + reason + b"\r\n"
+        responseLine = _STATUS_LINES.get((version, code, reason))
+        if responseLine is None:
+            responseLine = version + b" " + code + b" " + reason + b"\r\n"
         headerSequence = [responseLine]
-        headerSequence.extend(
-            name + b': ' + value + b"\r\n" for name, value in headers
-        )
+        for name, value in headers:
+            headerSequence.extend((name, b": ", value, b"\r\n"))
         headerSequence.append(b"\r\n")
-        self.transport.writeSequence(headerSequence)
+        self.transport.write(b"".join(headerSequence))
 
 
     def write(self, data):
@@ -2361,7 +2757,19 @@ class HTTPFactory(protocol.ServerFactory):
         with native strings.
 
     @ivar _reactor: An L{IReactorTime} provider used to compute logging
-        timestamps.
+        timestamps and the I{Date} header of responses.
+
+    @ivar _currentDatetimeString: A L{_DatetimeCache} of the HTTP datetime
+        string for the current time by C{_reactor}, which
+        L{twisted.web.server.Request} sends as the I{Date} header.
+
+    @ivar contentSpoolThreshold: The size, in bytes, beyond which the body of
+        a request is written to a temporary file rather than kept in memory.
+    @type contentSpoolThreshold: L{int}
+
+    @ivar _contentBudget: The memory budget shared by the bodies of all of the
+        requests received through this factory.
+    @type _contentBudget: L{_MemoryBudget}
     """
 
     protocol = _genericHTTPChannelProtocolFactory
@@ -2370,19 +2778,38 @@ class HTTPFactory(protocol.ServerFactory):
 
     timeOut = 60 * 60 * 12
 
+    contentSpoolThreshold = 100000
+
     def __init__(self, logPath=None, timeout=60*60*12, logFormatter=None,
-                 reactor=None):
+                 reactor=None, contentSpoolThreshold=None,
+                 contentMemoryLimit=None):
         """
         @param logFormatter: An object to format requests into log lines for
             the access log.
         @type logFormatter: L{IAccessLogFormatter} provider
 
         @param reactor: A L{IReactorTime} provider used to compute logging
-            timestamps.
+            timestamps and the I{Date} header of responses.
+
+        @param contentSpoolThreshold: The size, in bytes, beyond which the
+            body of a request is written to a temporary file, or L{None} to
+            use the default.
+        @type contentSpoolThreshold: L{int} or L{None}
+
+        @param contentMemoryLimit: The maximum number of bytes of request
+            bodies to keep in memory at once across all connections, or
+            L{None} for no limit.  Bodies which do not fit are written to
+            temporary files.
+        @type contentMemoryLimit: L{int} or L{None}
         """
+        if contentSpoolThreshold is not None:
+            self.contentSpoolThreshold = contentSpoolThreshold
+        self._contentBudget = _MemoryBudget(contentMemoryLimit)
+
         if not reactor:
             from twisted.internet import reactor
         self._reactor = reactor
+        self._currentDatetimeString = _DatetimeCache(reactor)
 
         if logPath is not None:
             logPath = os.path.abspath(logPath)
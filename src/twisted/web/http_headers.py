@@ -41,12 +41,33 @@ class Headers(object):
     ensure no decoding or encoding is done, and L{Headers} will treat the keys
     and values as opaque byte strings.
 
+    Headers are kept as they were given, in the order they were added, until
+    one is first looked up by name.  Only then are they indexed by lowercased
+    name, so code which just passes headers along (see L{getAllRawPairs})
+    never pays for normalizing their names.
+
     @cvar _caseMappings: A L{dict} that maps lowercase header names
         to their canonicalized representation.
 
-    @ivar _rawHeaders: A L{dict} mapping header names as L{bytes} to L{list}s of
-        header values as L{bytes}.
+    @ivar _names: Until the headers are indexed, the names of the headers as
+        L{bytes}, as they were given, and L{None} after that.
+    @type _names: L{list} or L{None}
+
+    @ivar _values: Until the headers are indexed, the values of the headers
+        as L{bytes}, such that C{_values[i]} is a value of the header named
+        C{_names[i]}, and L{None} after that.
+    @type _values: L{list} or L{None}
+
+    @ivar _index: L{None} until the headers are indexed, and after that a
+        L{dict} mapping lowercased header names to the L{list} of their
+        values, which is what L{getRawHeaders} returns.
+
+    @ivar _rawNames: L{None} until the headers are indexed, and after that a
+        L{dict} mapping lowercased header names to the name they were first
+        given with.
     """
+    __slots__ = ('_names', '_values', '_index', '_rawNames')
+
     _caseMappings = {
         b'content-md5': b'Content-MD5',
         b'dnt': b'DNT',
@@ -57,7 +78,10 @@ class Headers(object):
         b'x-xss-protection': b'X-XSS-Protection'}
 
     def __init__(self, rawHeaders=None):
-        self._rawHeaders = {}
+        self._names = []
+        self._values = []
+        self._index = None
+        self._rawNames = None
         if rawHeaders is not None:
             for name, values in rawHeaders.items():
                 self.setRawHeaders(name, values)
@@ -67,7 +91,7 @@ class Headers(object):
         """
         Return a string fully describing the headers set on this object.
         """
-        return '%s(%r)' % (self.__class__.__name__, self._rawHeaders,)
+        return '%s(%r)' % (self.__class__.__name__, self._getIndex(),)
 
 
     def __cmp__(self, other):
@@ -77,11 +101,90 @@ class Headers(object):
         """
         if isinstance(other, Headers):
             return cmp(
-                sorted(self._rawHeaders.items()),
-                sorted(other._rawHeaders.items()))
+                sorted(self._getIndex().items()),
+                sorted(other._getIndex().items()))
         return NotImplemented
 
 
+    def _getIndex(self):
+        """
+        Get the index of the headers by lowercased name, indexing them if
+        necessary.
+
+        @return: See C{_index}.
+        @rtype: L{dict}
+        """
+        index = self._index
+        if index is None:
+            index = self._index = {}
+            rawNames = self._rawNames = {}
+            for name, value in zip(self._names, self._values):
+                lowered = name.lower()
+                values = index.get(lowered)
+                if values is None:
+                    index[lowered] = [value]
+                    rawNames[lowered] = name
+                else:
+                    values.append(value)
+            self._names = self._values = None
+        return index
+
+
+    def _append(self, name, value):
+        """
+        Add a header, encoded as L{bytes}, after all of the others.
+
+        @param name: The name of the header.
+        @type name: L{bytes}
+
+        @param value: The value of the header.
+        @type value: L{bytes}
+        """
+        index = self._index
+        if index is None:
+            self._names.append(name)
+            self._values.append(value)
+            return
+        lowered = name.lower()
+        values = index.get(lowered)
+        if values is None:
+            index[lowered] = [value]
+            self._rawNames[lowered] = name
+        else:
+            values.append(value)
+
+
+    def _extend(self, names, values, lowered=None):
+        """
+        Add headers, encoded as L{bytes}, after all of the others.
+
+        @param names: The names of the headers.
+        @type names: L{list} of L{bytes}
+
+        @param values: The values of the headers, one for each name.
+        @type values: L{list} of L{bytes}
+
+        @param lowered: The lowercased names of the headers, if the caller
+            already has them, in which case they are indexed straight away.
+        @type lowered: L{list} of L{bytes} or L{None}
+        """
+        if lowered is None and self._index is None:
+            self._names.extend(names)
+            self._values.extend(values)
+            return
+        index = self._getIndex()
+        rawNames = self._rawNames
+        if lowered is None:
+            lowered = [name.lower() for name in names]
+        for name, key, value in zip(names, lowered, values):
+            existing = index.get(key)
+            if existing is None:
+                index[key] = [value]
+                rawNames[key] = name
+            else:
+                existing.append(value)
+
+
     def _encodeName(self, name):
         """
         Encode the name of a header (eg 'Content-Type') to an ISO-8859-1 encoded
@@ -90,12 +193,12 @@ class Headers(object):
         @param name: A HTTP header name
         @type name: L{unicode} or L{bytes}
 
-        @return: C{name}, encoded if required, lowercased
+        @return: C{name}, encoded if required
         @rtype: L{bytes}
         """
         if isinstance(name, unicode):
-            return name.lower().encode('iso-8859-1')
-        return name.lower()
+            return name.encode('iso-8859-1')
+        return name
 
 
     def _encodeValue(self, value):
@@ -157,7 +260,15 @@ class Headers(object):
 
         @return: A new L{Headers}
         """
-        return self.__class__(self._rawHeaders)
+        copy = self.__class__()
+        if self._index is None:
+            copy._extend(self._names, self._values)
+        else:
+            copy._names = copy._values = None
+            copy._index = dict(
+                (name, list(values)) for name, values in self._index.items())
+            copy._rawNames = dict(self._rawNames)
+        return copy
 
 
     def hasHeader(self, name):
@@ -170,7 +281,7 @@ class Headers(object):
         @rtype: L{bool}
         @return: C{True} if the header exists, otherwise C{False}.
         """
-        return self._encodeName(name) in self._rawHeaders
+        return self._encodeName(name).lower() in self._getIndex()
 
 
     def removeHeader(self, name):
@@ -182,7 +293,9 @@ class Headers(object):
 
         @return: L{None}
         """
-        self._rawHeaders.pop(self._encodeName(name), None)
+        name = self._encodeName(name).lower()
+        self._getIndex().pop(name, None)
+        self._rawNames.pop(name, None)
 
 
     def setRawHeaders(self, name, values):
@@ -203,7 +316,9 @@ class Headers(object):
                             "instance of %r instead" % (name, type(values)))
 
         name = self._encodeName(name)
-        self._rawHeaders[name] = self._encodeValues(values)
+        lowered = name.lower()
+        self._getIndex()[lowered] = self._encodeValues(values)
+        self._rawNames[lowered] = name
 
 
     def addRawHeader(self, name, value):
@@ -216,14 +331,7 @@ class Headers(object):
         @type value: L{bytes} or L{unicode}
         @param value: The value to set for the named header.
         """
-        values = self.getRawHeaders(name)
-
-        if values is not None:
-            values.append(value)
-        else:
-            values = [value]
-
-        self.setRawHeaders(name, values)
+        self._append(self._encodeName(name), self._encodeValue(value))
 
 
     def getRawHeaders(self, name, default=None):
@@ -240,8 +348,7 @@ class Headers(object):
         @rtype: L{list} of strings, same type as C{name}
         @return: A L{list} of values for the given header.
         """
-        encodedName = self._encodeName(name)
-        values = self._rawHeaders.get(encodedName, default)
+        values = self._getIndex().get(self._encodeName(name).lower(), default)
 
         if isinstance(name, unicode):
             return self._decodeValues(values)
@@ -254,10 +361,40 @@ class Headers(object):
         object, as L{bytes}.  The keys are capitalized in canonical
         capitalization.
         """
-        for k, v in self._rawHeaders.items():
+        for k, v in self._getIndex().items():
             yield self._canonicalNameCaps(k), v
 
 
+    def getAllRawPairs(self):
+        """
+        Return an iterator of name, value pairs of all headers contained in
+        this object, as L{bytes}.  The names are as they were first given, and
+        a header with several values occurs once for each of them.
+
+        Until a header is looked up by name, the pairs are in the order they
+        were added.  After that, the values of each header come together.
+
+        This is cheaper than L{getAllRawHeaders}, as the names are neither
+        normalized nor canonicalized.
+
+        @since: 16.5
+        """
+        if self._index is None:
+            return iter(zip(self._names, self._values))
+        return self._indexedPairs()
+
+
+    def _indexedPairs(self):
+        """
+        Generate the pairs for L{getAllRawPairs} from the index.
+        """
+        rawNames = self._rawNames
+        for lowered, values in self._index.items():
+            name = rawNames[lowered]
+            for value in values:
+                yield name, value
+
+
     def _canonicalNameCaps(self, name):
         """
         Return the canonical name for the given header.
@@ -269,7 +406,10 @@ class Headers(object):
         @rtype: L{bytes}
         @return: The canonical name of the header.
         """
-        return self._caseMappings.get(name, _dashCapitalize(name))
+        canonical = self._caseMappings.get(name)
+        if canonical is None:
+            canonical = _dashCapitalize(name)
+        return canonical
 
 
 
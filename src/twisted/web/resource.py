@@ -9,7 +9,7 @@ Implementation of the lowest-level Resource class.
 from __future__ import division, absolute_import
 
 __all__ = [
-    'IResource', 'getChildForRequest',
+    'IResource', 'IStreamingBodyResource', 'getChildForRequest',
     'Resource', 'ErrorPage', 'NoResource', 'ForbiddenResource',
     'EncodingResourceWrapper']
 
@@ -355,6 +355,33 @@ class ForbiddenResource(ErrorPage):
 
 
 
+class IStreamingBodyResource(IResource):
+    """
+    A resource which can consume the body of a request as it arrives, rather
+    than finding it in C{request.content} once all of it has been received.
+
+    This only has an effect on a L{twisted.web.server.Site} with
+    C{streamRequestBodies} set.
+
+    @since: 16.5
+    """
+
+    def getBodyReceiver(request):
+        """
+        Called once the headers of C{request} have been received, before any
+        of its body.  C{request.content} will be empty when the resource is
+        rendered if a receiver is returned.
+
+        @param request: The request whose body is about to be received.
+        @type request: L{twisted.web.server.Request}
+
+        @return: An object with a C{write} method, which will be called with
+            each chunk of the body as L{bytes}, or L{None} to have the body
+            collected in C{request.content} as usual.
+        """
+
+
+
 class _IEncodingResource(Interface):
     """
     A resource which knows about L{_IRequestEncoderFactory}.
@@ -109,6 +109,7 @@ class Request(Copyable, http.Request, components.Componentized):
     __pychecker__ = 'unusednames=issuer'
     _inFakeHead = False
     _encoder = None
+    _resource = None
 
     def __init__(self, *args, **kw):
         http.Request.__init__(self, *args, **kw)
@@ -165,6 +166,42 @@ class Request(Copyable, http.Request, components.Componentized):
                 return name
 
 
+    def allHeadersReceived(self, command, path, version):
+        """
+        If the site streams request bodies, locate the resource for this
+        request before its body is received and, if the resource provides
+        L{resource.IStreamingBodyResource}, deliver the body to the receiver
+        it supplies.
+
+        Since the resource is located early, only the arguments from the query
+        string are available in C{args} while it is.
+
+        @see: L{http.Request.allHeadersReceived}
+        """
+        site = getattr(self.channel, "site", None)
+        if site is None or not site.streamRequestBodies:
+            return
+
+        self.site = site
+        self.method, self.uri = command, path
+        self.clientproto = version
+        self.path, _, argstring = self.uri.partition(b'?')
+        self.args = http.parse_qs(argstring, 1)
+        self.prepath = []
+        self.postpath = list(map(unquote, self.path[1:].split(b'/')))
+
+        try:
+            self._resource = site.getResourceFor(self)
+            if resource.IStreamingBodyResource.providedBy(self._resource):
+                receiver = self._resource.getBodyReceiver(self)
+                if receiver is not None:
+                    self.setBodyReceiver(receiver)
+        except:
+            # Locate the resource again, and report the failure, once the
+            # request has been received.
+            self._resource = None
+
+
     def process(self):
         """
         Process a request.
@@ -175,14 +212,18 @@ class Request(Copyable, http.Request, components.Componentized):
 
         # set various default headers
         self.setHeader(b'server', version)
-        self.setHeader(b'date', http.datetimeToString())
+        self.setHeader(b'date', self.site._currentDatetimeString())
 
-        # Resource Identification
-        self.prepath = []
-        self.postpath = list(map(unquote, self.path[1:].split(b'/')))
+        # Resource Identification, unless it was done before the body was
+        # received
+        resrc = self._resource
+        if resrc is None:
+            self.prepath = []
+            self.postpath = list(map(unquote, self.path[1:].split(b'/')))
 
         try:
-            resrc = self.site.getResourceFor(self)
+            if resrc is None:
+                resrc = self.site.getResourceFor(self)
             if resource._IEncodingResource.providedBy(resrc):
                 encoder = resrc.getEncoder(self)
                 if encoder is not None:
@@ -682,12 +723,17 @@ class Site(http.HTTPFactory):
         rendered pages. Default to C{True}.
     @ivar sessionFactory: factory for sessions objects. Default to L{Session}.
     @ivar sessionCheckTime: Deprecated.  See L{Session.sessionTimeout} instead.
+    @ivar streamRequestBodies: if set, resources are located as soon as the
+        headers of a request have been received, so that resources providing
+        L{resource.IStreamingBodyResource} can consume the request body as it
+        arrives.  Default to C{False}.
     """
     counter = 0
     requestFactory = Request
     displayTracebacks = True
     sessionFactory = Session
     sessionCheckTime = 1800
+    streamRequestBodies = False
     _entropy = os.urandom
 
     def __init__(self, resource, requestFactory=None, *args, **kwargs):
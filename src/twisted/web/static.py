@@ -554,19 +554,22 @@ class File(resource.Resource, filepath.FilePath):
         if byteRange is None:
             self._setContentHeaders(request)
             request.setResponseCode(http.OK)
-            return NoRangeStaticProducer(request, fileForReading)
+            return self._makeWholeFileProducer(request, fileForReading)
         try:
             parsedRanges = self._parseRangeHeader(byteRange)
         except ValueError:
             log.msg("Ignoring malformed Range header %r" % (byteRange.decode(),))
             self._setContentHeaders(request)
             request.setResponseCode(http.OK)
-            return NoRangeStaticProducer(request, fileForReading)
+            return self._makeWholeFileProducer(request, fileForReading)
 
         if len(parsedRanges) == 1:
             offset, size = self._doSingleRangeRequest(
                 request, parsedRanges[0])
             self._setContentHeaders(request, size)
+            if _canSendFile(request):
+                return SendfileStaticProducer(
+                    request, fileForReading, offset, size)
             return SingleRangeStaticProducer(
                 request, fileForReading, offset, size)
         else:
@@ -575,6 +578,21 @@ class File(resource.Resource, filepath.FilePath):
                 request, fileForReading, rangeInfo)
 
 
+    def _makeWholeFileProducer(self, request, fileForReading):
+        """
+        Make a L{StaticProducer} that will write the entire file to the
+        request, using a L{SendfileStaticProducer} if the request allows it.
+
+        @param request: The L{twisted.web.http.Request} object.
+        @param fileForReading: The file object containing the resource.
+        @return: A L{StaticProducer}.
+        """
+        if _canSendFile(request):
+            return SendfileStaticProducer(
+                request, fileForReading, 0, self.getFileSize())
+        return NoRangeStaticProducer(request, fileForReading)
+
+
     def render_GET(self, request):
         """
         Begin sending the contents of this L{File} (or a subset of the
@@ -759,6 +777,92 @@ class SingleRangeStaticProducer(StaticProducer):
 
 
 
+def _canSendFile(request):
+    """
+    Determine whether the response body for C{request} can be sent by its
+    transport directly from a file.
+
+    This is only possible if the transport provides
+    L{interfaces.ISendFileTransport} and the body is written to it unchanged:
+    not chunked, not encoded by an L{resource.EncodingResourceWrapper}, and
+    not multiplexed with other responses as it is over HTTP/2.
+
+    @param request: The L{twisted.web.http.Request} object.
+    @rtype: L{bool}
+    """
+    if getattr(request, "_encoder", None) is not None:
+        return False
+    if request.responseHeaders.getRawHeaders(b'content-length') is None:
+        return False
+    return interfaces.ISendFileTransport.providedBy(
+        getattr(request, "transport", None))
+
+
+
+class SendfileStaticProducer(StaticProducer):
+    """
+    A L{StaticProducer} that has the request's transport send a region of the
+    file directly, without reading it into memory, using
+    L{interfaces.ISendFileTransport}.
+
+    If the transport turns out to be unable to do this, it falls back to
+    writing the region with a L{SingleRangeStaticProducer}.
+
+    @since: 16.5
+    """
+
+    def __init__(self, request, fileObject, offset, size):
+        """
+        Initialize the instance.
+
+        @param request: See L{StaticProducer}.
+        @param fileObject: See L{StaticProducer}.
+        @param offset: The offset into the file of the region to be written.
+        @param size: The size of the region to write.
+        """
+        StaticProducer.__init__(self, request, fileObject)
+        self.offset = offset
+        self.size = size
+
+
+    def start(self):
+        # Write the response headers first; they are sent before the file.
+        self.request.write(b'')
+        try:
+            d = self.request.transport.sendFile(
+                self.fileObject, self.offset, self.size)
+        except NotImplementedError:
+            SingleRangeStaticProducer(
+                self.request, self.fileObject, self.offset, self.size).start()
+        else:
+            d.addCallbacks(self._sent, self._failed)
+
+
+    def resumeProducing(self):
+        # The transport sends the file by itself.
+        pass
+
+
+    def _sent(self, sent):
+        """
+        The transport has sent the file; finish the request.
+        """
+        if not self.request:
+            return
+        self.request.sentLength += sent
+        self.request.finish()
+        self.stopProducing()
+
+
+    def _failed(self, reason):
+        """
+        The connection was lost before the file was sent; the request learns
+        about that by itself, so just clean up.
+        """
+        self.stopProducing()
+
+
+
 class MultipleRangeStaticProducer(StaticProducer):
     """
     A L{StaticProducer} that writes several chunks of a file to the request.
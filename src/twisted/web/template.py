@@ -38,6 +38,7 @@ from twisted.python import log
 from twisted.python.compat import NativeStringIO, items
 from twisted.python.filepath import FilePath
 from twisted.web._stan import Tag, slot, Comment, CDATA, CharRef
+from twisted.web._flatten import _compileTemplate
 from twisted.web.iweb import ITemplateLoader
 
 TEMPLATE_NAMESPACE = 'http://twistedmatrix.com/ns/twisted.web.template/0.1'
@@ -386,7 +387,12 @@ class XMLString(object):
 
     @ivar _loadedTemplate: The loaded document.
     @type _loadedTemplate: a C{list} of Stan objects.
+
+    @ivar _compiledTemplate: The loaded document as compiled by
+        L{_compileTemplate}, or L{None}, if not compiled yet.
+    @type _compiledTemplate: a C{list} of Stan objects, or L{None}.
     """
+    _compiledTemplate = None
 
     def __init__(self, s):
         """
@@ -411,6 +417,19 @@ class XMLString(object):
         return self._loadedTemplate
 
 
+    def _loadCompiled(self):
+        """
+        Return the document with its static parts flattened ahead of time,
+        first compiling it if necessary.
+
+        @return: the compiled document.
+        @rtype: a C{list} of Stan objects.
+        """
+        if self._compiledTemplate is None:
+            self._compiledTemplate = _compileTemplate(self._loadedTemplate)
+        return self._compiledTemplate
+
+
 
 @implementer(ITemplateLoader)
 class XMLFile(object):
@@ -420,9 +439,20 @@ class XMLFile(object):
     @ivar _loadedTemplate: The loaded document, or L{None}, if not loaded.
     @type _loadedTemplate: a C{list} of Stan objects, or L{None}.
 
+    @ivar _compiledTemplate: The loaded document as compiled by
+        L{_compileTemplate}, or L{None}, if not compiled yet.
+    @type _compiledTemplate: a C{list} of Stan objects, or L{None}.
+
+    @ivar _modificationTime: The modification time of C{_path} when the
+        document was loaded, if C{_path} is a L{FilePath}.  The document is
+        loaded again if the file is modified after that.
+    @type _modificationTime: L{float}, or L{None}.
+
     @ivar _path: The L{FilePath}, file object, or filename that is being
         loaded from.
     """
+    _compiledTemplate = None
+    _modificationTime = None
 
     def __init__(self, path):
         """
@@ -450,6 +480,9 @@ class XMLFile(object):
         if not isinstance(self._path, FilePath):
             return _flatsaxParse(self._path)
         else:
+            self._path.restat(False)
+            if self._path.exists():
+                self._modificationTime = self._path.getModificationTime()
             with self._path.open('r') as f:
                 return _flatsaxParse(f)
 
@@ -465,11 +498,43 @@ class XMLFile(object):
         @return: the loaded document.
         @rtype: a C{list} of Stan objects.
         """
-        if self._loadedTemplate is None:
+        if self._loadedTemplate is None or self._modified():
             self._loadedTemplate = self._loadDoc()
+            self._compiledTemplate = None
         return self._loadedTemplate
 
 
+    def _loadCompiled(self):
+        """
+        Return the document with its static parts flattened ahead of time,
+        first loading and compiling it if necessary.
+
+        @return: the compiled document.
+        @rtype: a C{list} of Stan objects.
+        """
+        loadedTemplate = self.load()
+        if self._compiledTemplate is None:
+            self._compiledTemplate = _compileTemplate(loadedTemplate)
+        return self._compiledTemplate
+
+
+    def _modified(self):
+        """
+        Check whether the file has been modified since it was loaded.
+
+        @return: L{True} if C{_path} is a L{FilePath} whose modification time
+            has changed, otherwise L{False}.
+        @rtype: L{bool}
+        """
+        if not isinstance(self._path, FilePath):
+            return False
+        try:
+            self._path.restat()
+        except OSError:
+            return False
+        return self._path.getModificationTime() != self._modificationTime
+
+
 
 # Last updated October 2011, using W3Schools as a reference. Link:
 # http://www.w3schools.com/html5/html5_reference.asp
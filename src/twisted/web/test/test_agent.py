@@ -38,6 +38,7 @@ from twisted.web.http_headers import Headers
 from twisted.web._newclient import HTTP11ClientProtocol, Response
 
 from twisted.internet.interfaces import IOpenSSLClientConnectionCreator
+from twisted.internet.interfaces import INegotiated
 from zope.interface.declarations import implementer
 from twisted.web.iweb import IPolicyForHTTPS
 from twisted.python.deprecate import getDeprecationWarningString
@@ -383,7 +384,7 @@ class DummyFactory(Factory):
     """
     Create C{StubHTTPProtocol} instances.
     """
-    def __init__(self, quiescentCallback):
+    def __init__(self, quiescentCallback, lostCallback=None):
         pass
 
     protocol = StubHTTPProtocol
@@ -698,6 +699,407 @@ class HTTPConnectionPoolTests(TestCase, FakeReactorAndConnectMixin):
 
 
 
+    def test_maxActivePerHostQueues(self):
+        """
+        Once C{maxActivePerHost} connections are in use, callers of
+        L{HTTPConnectionPool.getConnection} wait, and the first one gets the
+        next connection put back in the pool.
+        """
+        self.pool.maxActivePerHost = 1
+        key = ("http", b"example.com", 80)
+        first = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        second = self.pool.getConnection(key, DummyEndpoint())
+        third = self.pool.getConnection(key, DummyEndpoint())
+        self.assertNoResult(second)
+        self.assertEqual(self.pool.getStatistics(key)["queued"], 2)
+
+        self.pool._putConnection(key, first)
+        self.assertNoResult(second)
+        self.fakeReactor.advance(0)
+        self.assertIdentical(self.successResultOf(second), first)
+        self.assertNoResult(third)
+        self.assertEqual(self.pool._connections[key], [])
+
+
+    def test_lostConnectionMakesRoom(self):
+        """
+        When a connection in use is lost, a caller waiting for a connection
+        gets a new one.
+        """
+        self.pool.maxActivePerHost = 1
+        key = ("http", b"example.com", 80)
+        first = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        second = self.pool.getConnection(key, DummyEndpoint())
+
+        self.pool._lostConnection(key, first)
+        self.fakeReactor.advance(0)
+        connection = self.successResultOf(second)
+        self.assertNotIdentical(connection, first)
+        self.assertEqual(self.pool._active[key], [connection])
+
+
+    def test_queueTimeout(self):
+        """
+        A caller which waits longer than C{connectionQueueTimeout} for a
+        connection gets a L{ConnectionQueueTimeout} failure.
+        """
+        self.pool.maxActivePerHost = 1
+        self.pool.connectionQueueTimeout = 5
+        key = ("http", b"example.com", 80)
+        self.pool.getConnection(key, DummyEndpoint())
+        waiting = self.pool.getConnection(key, DummyEndpoint())
+
+        self.fakeReactor.advance(4.9)
+        self.assertNoResult(waiting)
+        self.fakeReactor.advance(0.1)
+        self.failureResultOf(waiting, client.ConnectionQueueTimeout)
+        self.assertEqual(self.pool._waiting, {})
+
+
+    def test_cancelWaiting(self):
+        """
+        Cancelling the L{Deferred} of a caller waiting for a connection takes
+        it out of the queue and cancels its timeout.
+        """
+        self.pool.maxActivePerHost = 1
+        self.pool.connectionQueueTimeout = 5
+        key = ("http", b"example.com", 80)
+        self.pool.getConnection(key, DummyEndpoint())
+        waiting = self.pool.getConnection(key, DummyEndpoint())
+
+        waiting.cancel()
+        self.failureResultOf(waiting, CancelledError)
+        self.assertEqual(self.pool._waiting, {})
+        self.assertEqual(self.fakeReactor.getDelayedCalls(), [])
+
+
+    def test_idleConnectionPolicy(self):
+        """
+        By default, the cached connection which has been idle the longest is
+        reused first.  With C{idleConnectionPolicy} set to C{"LIFO"}, the one
+        which has been idle the shortest is.
+        """
+        key = ("http", b"example.com", 80)
+        older, newer = StubHTTPProtocol(), StubHTTPProtocol()
+        for policy, expected in [("FIFO", older), ("LIFO", newer)]:
+            self.pool.idleConnectionPolicy = policy
+            for p in [older, newer]:
+                p.makeConnection(StringTransport())
+                self.pool._putConnection(key, p)
+            self.assertIdentical(
+                self.successResultOf(
+                    self.pool.getConnection(key, BadEndpoint())),
+                expected)
+            self.pool._connections[key] = []
+
+
+    def test_pipelineWhenBusy(self):
+        """
+        With C{maxPipelinedRequests} set, once C{maxActivePerHost}
+        connections are in use, L{HTTPConnectionPool.getConnection} gives
+        out a connection which is waiting for a response, to pipeline the
+        request behind it.
+        """
+        self.pool.maxActivePerHost = 1
+        self.pool.maxPipelinedRequests = 1
+        key = ("http", b"example.com", 80)
+        busy = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        self.assertEqual(busy.maxPipelinedRequests, 1)
+        busy.state = "WAITING"
+        busy.canPipeline = lambda request: True
+
+        connection = self.successResultOf(
+            self.pool.getConnection(key, BadEndpoint()))
+        self.assertIsInstance(connection,
+                              client._PipeliningHTTP11ClientProtocol)
+        request = object()
+        connection.request(request)
+        self.assertEqual(busy.requests[0][0], request)
+
+
+    def test_pipelineFallsBackToWaiting(self):
+        """
+        If the request cannot be pipelined, it waits for a connection like
+        any other.
+        """
+        self.pool.maxActivePerHost = 1
+        self.pool.maxPipelinedRequests = 1
+        key = ("http", b"example.com", 80)
+        busy = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        busy.state = "WAITING"
+        busy.canPipeline = lambda request: False
+
+        connection = self.successResultOf(
+            self.pool.getConnection(key, BadEndpoint()))
+        request = object()
+        d = connection.request(request)
+        self.assertNoResult(d)
+        self.assertEqual(busy.requests, [])
+
+        busy.state = "QUIESCENT"
+        self.pool._putConnection(key, busy)
+        self.fakeReactor.advance(0)
+        self.assertEqual(busy.requests[0][0], request)
+
+
+    def test_getStatistics(self):
+        """
+        L{HTTPConnectionPool.getStatistics} reports the number of connections
+        in use, being opened and cached, the number of callers waiting and
+        the mean time taken to open a connection.
+        """
+        connecting = []
+
+        class Endpoint(object):
+            def connect(self, factory):
+                d = Deferred()
+                connecting.append(d)
+                return d
+
+        self.pool.maxActivePerHost = 2
+        key = ("http", b"example.com", 80)
+        first = self.pool.getConnection(key, Endpoint())
+        second = self.pool.getConnection(key, Endpoint())
+        self.pool.getConnection(key, Endpoint())
+        self.assertEqual(self.pool.getStatistics(),
+                         dict(active=0, connecting=2, idle=0, queued=1,
+                              connects=0, connectLatency=None))
+
+        self.fakeReactor.advance(1)
+        protocol = StubHTTPProtocol()
+        connecting[0].callback(protocol)
+        self.fakeReactor.advance(2)
+        connecting[1].callback(StubHTTPProtocol())
+        self.successResultOf(first)
+        self.successResultOf(second)
+        self.assertEqual(self.pool.getStatistics(key),
+                         dict(active=2, connecting=0, idle=0, queued=1,
+                              connects=2, connectLatency=2.0))
+
+        protocol.makeConnection(StringTransport())
+        self.pool._putConnection(key, protocol)
+        self.assertEqual(self.pool.getStatistics(key)["idle"], 1)
+        self.assertEqual(self.pool.getStatistics(key)["active"], 1)
+        self.assertEqual(
+            self.pool.getStatistics(("http", b"example.org", 80)),
+            dict(active=0, connecting=0, idle=0, queued=0,
+                 connects=0, connectLatency=None))
+
+
+
+@implementer(INegotiated)
+class NegotiatedStringTransport(StringTransport):
+    """
+    A L{StringTransport} for a connection on which the TLS handshake selected
+    an application protocol.
+
+    @ivar negotiatedProtocol: See L{INegotiated.negotiatedProtocol}.
+    """
+    negotiatedProtocol = None
+
+
+
+class NegotiatingHTTPClientProtocolTests(TestCase):
+    """
+    Tests for L{client._NegotiatingHTTPClientProtocol} and for the use of
+    HTTP/2 connections by L{HTTPConnectionPool}.
+    """
+    if client.H2ClientConnection is None:
+        skip = "HTTP/2 support not enabled"
+
+    def setUp(self):
+        self.quiescent = []
+        self.lost = []
+        self.protocol = client._NegotiatingHTTPClientProtocol(
+            self.quiescent.append, self.lost.append)
+
+
+    def test_withoutTLS(self):
+        """
+        On a connection without TLS, the connection is handed over to an
+        L{HTTP11ClientProtocol} as soon as it is made.
+        """
+        d = self.protocol.whenNegotiated()
+        self.protocol.makeConnection(StringTransport())
+        http11 = self.successResultOf(d)
+        self.assertIsInstance(http11, HTTP11ClientProtocol)
+        self.assertEqual(self.protocol.negotiatedProtocol, b'http/1.1')
+
+
+    def test_negotiatedHTTP2(self):
+        """
+        If the server selects I{h2} during the TLS handshake, the connection
+        is handed over to an L{H2ClientConnection}, which is then given the
+        data received.
+        """
+        transport = NegotiatedStringTransport()
+        self.protocol.makeConnection(transport)
+        d = self.protocol.whenNegotiated()
+        self.assertNoResult(d)
+        transport.negotiatedProtocol = b'h2'
+        self.protocol.handshakeCompleted()
+        h2 = self.successResultOf(d)
+        self.assertIsInstance(h2, client.H2ClientConnection)
+        self.assertIs(h2.transport, transport)
+        self.assertIs(self.successResultOf(self.protocol.whenNegotiated()), h2)
+
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(self.lost, [h2])
+
+
+    def test_negotiatedHTTP11(self):
+        """
+        If the server selects no protocol or I{http/1.1} during the TLS
+        handshake, the connection is handed over to an
+        L{HTTP11ClientProtocol}.
+        """
+        transport = NegotiatedStringTransport()
+        self.protocol.makeConnection(transport)
+        d = self.protocol.whenNegotiated()
+        self.protocol.handshakeCompleted()
+        self.assertIsInstance(self.successResultOf(d), HTTP11ClientProtocol)
+        self.assertEqual(self.protocol.negotiatedProtocol, b'http/1.1')
+
+
+    def test_lostBeforeNegotiation(self):
+        """
+        If the connection is lost before the TLS handshake completes, the
+        L{Deferred}s returned by C{whenNegotiated} fail.
+        """
+        self.protocol.makeConnection(NegotiatedStringTransport())
+        d = self.protocol.whenNegotiated()
+        self.protocol.connectionLost(Failure(ConnectionLost()))
+        self.failureResultOf(d, ConnectionLost)
+
+
+    def test_poolSharesHTTP2Connection(self):
+        """
+        With C{negotiateHTTP2} set, L{HTTPConnectionPool} gives out the same
+        HTTP/2 connection to several callers at once instead of opening more
+        connections.
+        """
+        connects = []
+
+        class Endpoint(object):
+            def connect(self, factory):
+                connects.append(factory)
+                protocol = factory.buildProtocol(None)
+                transport = NegotiatedStringTransport()
+                transport.negotiatedProtocol = b'h2'
+                protocol.makeConnection(transport)
+                protocol.handshakeCompleted()
+                return succeed(protocol)
+
+        pool = HTTPConnectionPool(Clock())
+        pool.negotiateHTTP2 = True
+        key = ("https", b"example.com", 443)
+        first = self.successResultOf(pool.getConnection(key, Endpoint()))
+        second = self.successResultOf(pool.getConnection(key, Endpoint()))
+        self.assertIsInstance(first, client.H2ClientConnection)
+        self.assertIs(first, second)
+        self.assertEqual(len(connects), 1)
+        self.assertEqual(pool.getStatistics(key)["active"], 1)
+
+        first.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(pool._multiplexed[key], [])
+        self.assertEqual(pool.getStatistics(key)["active"], 0)
+
+
+
+    def connectingPool(self):
+        """
+        Make an L{HTTPConnectionPool} with C{negotiateHTTP2} set, and an
+        endpoint whose TLS handshakes the test completes.
+
+        @return: The pool, the endpoint, and a list of the
+            L{client._NegotiatingHTTPClientProtocol}s connected by the
+            endpoint, in order.
+        """
+        connected = []
+
+        class Endpoint(object):
+            def connect(self, factory):
+                protocol = factory.buildProtocol(None)
+                protocol.makeConnection(NegotiatedStringTransport())
+                connected.append(protocol)
+                return succeed(protocol)
+
+        clock = Clock()
+        pool = HTTPConnectionPool(clock)
+        pool.negotiateHTTP2 = True
+        return pool, Endpoint(), connected
+
+
+    def test_poolWaitsForHTTP2Negotiation(self):
+        """
+        With C{negotiateHTTP2} set, callers of
+        L{HTTPConnectionPool.getConnection} wait for a connection which is
+        still negotiating its protocol, and share it if it selects HTTP/2.
+        """
+        pool, endpoint, connected = self.connectingPool()
+        key = ("https", b"example.com", 443)
+        first = pool.getConnection(key, endpoint)
+        second = pool.getConnection(key, endpoint)
+        self.assertNoResult(first)
+        self.assertNoResult(second)
+        self.assertEqual(len(connected), 1)
+        self.assertEqual(pool.getStatistics(key)["queued"], 1)
+
+        connected[0].transport.negotiatedProtocol = b'h2'
+        connected[0].handshakeCompleted()
+        h2 = self.successResultOf(first)
+        self.assertIsInstance(h2, client.H2ClientConnection)
+        pool._reactor.advance(0)
+        self.assertIs(self.successResultOf(second), h2)
+        self.assertEqual(len(connected), 1)
+
+
+    def test_poolConnectsAfterHTTP11Negotiation(self):
+        """
+        If the connection callers of L{HTTPConnectionPool.getConnection} were
+        waiting for selects HTTP/1.1, they open connections of their own, and
+        later callers no longer wait for negotiation.
+        """
+        pool, endpoint, connected = self.connectingPool()
+        key = ("https", b"example.com", 443)
+        first = pool.getConnection(key, endpoint)
+        second = pool.getConnection(key, endpoint)
+        connected[0].handshakeCompleted()
+        self.assertIsInstance(self.successResultOf(first),
+                              HTTP11ClientProtocol)
+        pool._reactor.advance(0)
+        self.assertEqual(len(connected), 2)
+        self.assertNoResult(second)
+
+        third = pool.getConnection(key, endpoint)
+        self.assertEqual(len(connected), 3)
+        self.assertNoResult(third)
+        connected[1].handshakeCompleted()
+        self.assertIsInstance(self.successResultOf(second),
+                              HTTP11ClientProtocol)
+
+
+    def test_poolConnectsAfterNegotiationFails(self):
+        """
+        If the connection callers of L{HTTPConnectionPool.getConnection} were
+        waiting for is lost before it selects a protocol, the next caller
+        opens a connection.
+        """
+        pool, endpoint, connected = self.connectingPool()
+        key = ("https", b"example.com", 443)
+        first = pool.getConnection(key, endpoint)
+        second = pool.getConnection(key, endpoint)
+        connected[0].connectionLost(Failure(ConnectionLost()))
+        self.failureResultOf(first, ConnectionLost)
+        pool._reactor.advance(0)
+        self.assertEqual(len(connected), 2)
+        self.assertNoResult(second)
+
+
 class AgentTestsMixin(object):
     """
     Tests for any L{IAgent} implementation.
@@ -1365,6 +1767,22 @@ class AgentHTTPSTests(TestCase, FakeReactorAndConnectMixin):
         self.assertIs(trustRoot.context, connection.get_context())
 
 
+    def test_acceptableProtocols(self):
+        """
+        L{BrowserLikePolicyForHTTPS.creatorForNetloc} offers the
+        C{acceptableProtocols} given to the policy to the server.
+        """
+        calls = []
+        def optionsForClientTLS(hostname, **kw):
+            calls.append((hostname, kw))
+        self.patch(client, "optionsForClientTLS", optionsForClientTLS)
+        policy = BrowserLikePolicyForHTTPS(
+            acceptableProtocols=[b'h2', b'http/1.1'])
+        policy.creatorForNetloc(b"thingy", 4321)
+        self.assertEqual(calls, [(u"thingy", dict(
+            trustRoot=None, acceptableProtocols=[b'h2', b'http/1.1']))])
+
+
 
 class WebClientContextFactoryTests(TestCase):
     """
@@ -1545,7 +1963,7 @@ class HTTPConnectionPoolRetryTests(TestCase, FakeReactorAndConnectMixin):
         If L{client.HTTPConnectionPool.getConnection} returns a new
         connection, it will be returned as is.
         """
-        pool = client.HTTPConnectionPool(None)
+        pool = client.HTTPConnectionPool(Clock())
         d = pool.getConnection(123, DummyEndpoint())
 
         def gotConnection(connection):
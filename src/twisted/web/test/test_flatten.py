@@ -18,13 +18,16 @@ from zope.interface import implementer
 from twisted.trial.unittest import TestCase
 from twisted.test.testutils import XMLAssertionMixin
 
-from twisted.internet.defer import passthru, succeed, gatherResults
+from twisted.internet.defer import (
+    passthru, succeed, fail, gatherResults, Deferred)
 
 from twisted.web.iweb import IRenderable
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 
 from twisted.web.template import tags, Tag, Comment, CDATA, CharRef, slot
 from twisted.web.template import Element, renderer, TagLoader, flattenString
+from twisted.web.template import flatten, XMLString
+from twisted.web._flatten import _compileTemplate, _Markup, _BufferedWriter
 
 from twisted.web.test._util import FlattenTestCase
 
@@ -375,6 +378,16 @@ class SerializationTests(FlattenTestCase, XMLAssertionMixin):
         ])
 
 
+    def test_serializeSlotsOfSiblings(self):
+        """
+        The slots filled on a tag are only used for its contents, and not for
+        the tags following it.
+        """
+        t = tags.div(tags.p(slot('x')).fillSlots(x='inner'), tags.p(slot('x')))
+        t.fillSlots(x='outer')
+        return self.assertFlattensTo(t, b'<div><p>inner</p><p>outer</p></div>')
+
+
     def test_serializeDeferredSlots(self):
         """
         Test that a slot with a deferred as its value will be flattened using
@@ -392,6 +405,284 @@ class SerializationTests(FlattenTestCase, XMLAssertionMixin):
         return self.assertFlatteningRaises(None, UnsupportedType)
 
 
+class CompileTemplateTests(FlattenTestCase):
+    """
+    Tests for L{_compileTemplate}.
+    """
+    template = (
+        '<html xmlns:t="http://twistedmatrix.com/ns/twisted.web.template/0.1">'
+        '<p class="a&amp;&quot;b">x &lt; y<br /></p>'
+        '<!-- note --><![CDATA[<raw>]]>&#9731;'
+        '<ul t:render="items"><li><t:slot name="item" /></li></ul>'
+        '<t:transparent>static</t:transparent>'
+        '</html>')
+
+    def test_static(self):
+        """
+        The markup of a document without renderers or slots is flattened into
+        a single L{_Markup}, which is flattened as it is.
+        """
+        compiled = _compileTemplate(XMLString(
+            '<p class="a&amp;b">x &lt; y<br /><!-- c --></p>').load())
+        self.assertEqual(len(compiled), 1)
+        self.assertIsInstance(compiled[0], _Markup)
+        self.assertEqual(compiled[0].data,
+                         b'<p class="a&amp;b">x &lt; y<br /><!-- c --></p>')
+        self.assertFlattensImmediately(compiled, compiled[0].data)
+
+
+    def test_sameOutput(self):
+        """
+        A compiled document flattens to the same bytes as the document it was
+        compiled from, with renderers and slots still working.
+        """
+        class Items(Element):
+            @renderer
+            def items(self, request, tag):
+                for item in [u'one', u'<two>']:
+                    yield tag.clone().fillSlots(item=item)
+
+        document = XMLString(self.template).load()
+        compiled = _compileTemplate(document)
+        self.assertEqual([type(each) for each in compiled],
+                         [_Markup, Tag, _Markup])
+        expected = self.assertFlattensImmediately(
+            Items(TagLoader(document)),
+            b'<html><p class="a&amp;&quot;b">x &lt; y<br /></p>'
+            b'<!-- note --><![CDATA[<raw>]]>\xe2\x98\x83'
+            b'<ul><li>one</li></ul><ul><li>&lt;two&gt;</li></ul>'
+            b'static</html>')
+        self.assertFlattensImmediately(
+            Items(TagLoader(compiled)), expected)
+
+
+    def test_dynamicTag(self):
+        """
+        Tags with filled slots or with attributes which aren't strings are
+        kept, with their children compiled, and aren't modified.
+        """
+        original = tags.p(
+            tags.em('a', CharRef(9731)), slot('b'), class_=slot('c'))
+        original.fillSlots(b='B', c='C')
+        [compiled] = _compileTemplate([original])
+        self.assertIsNot(compiled, original)
+        self.assertEqual(compiled.slotData, {'b': 'B', 'c': 'C'})
+        self.assertIsInstance(compiled.children[0], _Markup)
+        self.assertEqual(compiled.children[0].data, b'<em>a&#9731;</em>')
+        self.assertIsInstance(original.children[0], Tag)
+        self.assertFlattensImmediately(
+            compiled, b'<p class="C"><em>a&#9731;</em>B</p>')
+
+
+    def test_rendererChildren(self):
+        """
+        Tags with renderers are kept as they are, so that their renderers are
+        given the children they were loaded with.
+        """
+        class Items(Element):
+            loader = XMLString(
+                '<ul xmlns:t="http://twistedmatrix.com/ns/twisted.web.'
+                'template/0.1" t:render="items"><li>one</li><li>two</li></ul>')
+
+            @renderer
+            def items(self, request, tag):
+                children.extend(tag.children)
+                return tag(tag.children[0].clone())
+
+        children = []
+        self.assertFlattensImmediately(
+            Items(), b'<ul><li>one</li><li>two</li><li>one</li></ul>')
+        self.assertEqual([type(child) for child in children], [Tag, Tag])
+
+
+    def test_transparentInAttribute(self):
+        """
+        The strings in a transparent tag at the top level of a document are
+        escaped only once when the compiled document is flattened within an
+        attribute.
+        """
+        class Transparent(Element):
+            loader = XMLString(
+                '<t:transparent xmlns:t="http://twistedmatrix.com/ns/twisted.'
+                'web.template/0.1">a &amp; b</t:transparent>')
+
+        self.assertFlattensImmediately(
+            tags.a(href=Transparent()),
+            b'<a href="a &amp; b"></a>')
+
+
+    def test_topLevelStrings(self):
+        """
+        Strings at the top level of a document are kept as they are, so that
+        they are quoted properly when the document is flattened within an
+        attribute.
+        """
+        compiled = _compileTemplate([u'a"b', tags.br()])
+        self.assertEqual(compiled[0], u'a"b')
+        self.assertFlattensImmediately(
+            tags.p(title=compiled), b'<p title="a&quot;b&lt;br /&gt;"></p>')
+
+
+
+class FlattenWriteTests(TestCase):
+    """
+    Tests for the writes L{flatten} makes.
+    """
+    def test_joined(self):
+        """
+        The output of L{flatten} is joined into a single write if it doesn't
+        have to wait for a L{Deferred}.
+        """
+        written = []
+        d = flatten(None, tags.p('a', tags.em('b'), 'c'), written.append)
+        self.successResultOf(d)
+        self.assertEqual(written, [b'<p>a<em>b</em>c</p>'])
+
+
+    def test_waitingForDeferred(self):
+        """
+        The output preceding a L{Deferred} which hasn't fired is written
+        before waiting for it.
+        """
+        written = []
+        later = Deferred()
+        d = flatten(None, tags.p('a', later, 'c'), written.append)
+        self.assertEqual(written, [b'<p>a'])
+        later.callback('b')
+        self.successResultOf(d)
+        self.assertEqual(written, [b'<p>a', b'bc</p>'])
+
+
+    def test_error(self):
+        """
+        The output preceding an error is written.
+        """
+        written = []
+        d = flatten(None, tags.p('a', None), written.append)
+        self.failureResultOf(d, FlattenerError)
+        self.assertEqual(written, [b'<p>a'])
+
+
+    def test_bufferSize(self):
+        """
+        L{_BufferedWriter} writes out the data it collects once there are
+        C{bufferSize} bytes of it.
+        """
+        written = []
+        writer = _BufferedWriter(written.append)
+        writer.bufferSize = 4
+        writer.write(b'ab')
+        self.assertEqual(written, [])
+        writer.write(b'cde')
+        writer.write(b'f')
+        self.assertEqual(written, [b'abcde'])
+        writer.flush()
+        writer.flush()
+        self.assertEqual(written, [b'abcde', b'f'])
+
+
+
+class SynchronousFlattenTests(FlattenTestCase):
+    """
+    Tests for flattening with plain recursion, and for falling back to
+    generators once a L{Deferred} has to be waited for.
+    """
+    def test_resumeAfterDeferred(self):
+        """
+        If a L{Deferred} which hasn't fired is reached within an attribute,
+        the contents of a tag, a list and the result of a renderer, the rest
+        of each is flattened once it fires, with each renderer called once
+        and in order.
+        """
+        later = [Deferred(), Deferred()]
+        calls = []
+        class Later(Element):
+            @renderer
+            def first(self, request, tag):
+                calls.append('first')
+                return tag(later[0], tags.em(slot('x')))
+            @renderer
+            def second(self, request, tag):
+                calls.append('second')
+                return tag(later[1])
+        div = tags.div(
+            tags.p(render='first', title=['a', later[1], 'b']),
+            [tags.span(render='second'), 'after'],
+            tags.br)
+        div.fillSlots(x='<x>')
+        root = Later(TagLoader(div))
+        written = []
+        d = flatten(None, root, written.append)
+        self.assertEqual(calls, ['first'])
+        self.assertEqual(written, [b'<div><p title="a'])
+
+        later[1].callback('"')
+        self.assertEqual(calls, ['first'])
+        later[0].callback(tags.i('y'))
+        self.assertEqual(calls, ['first', 'second'])
+        self.successResultOf(d)
+        self.assertEqual(
+            b''.join(written),
+            b'<div><p title="a&quot;b"><i>y</i><em>&lt;x&gt;</em></p>'
+            b'<span>"</span>after<br /></div>')
+
+
+    def test_firedDeferred(self):
+        """
+        A L{Deferred} which has already fired is flattened without waiting,
+        and its result is left as it is.
+        """
+        d = succeed(tags.em('a'))
+        self.assertFlattensImmediately(tags.p(d), b'<p><em>a</em></p>')
+        self.assertIsInstance(self.successResultOf(d), Tag)
+
+
+    def test_failedDeferred(self):
+        """
+        Flattening a L{Deferred} which has failed fails with its failure.
+        """
+        written = []
+        d = flatten(None, tags.p(fail(RuntimeError())), written.append)
+        self.failureResultOf(d, RuntimeError)
+        self.assertEqual(written, [b'<p>'])
+
+
+    def test_deeplyNested(self):
+        """
+        A tree nested more deeply than the maximum depth of recursion is
+        flattened too.
+        """
+        root = leaf = tags.div()
+        for i in range(1000):
+            leaf = leaf(tags.div())
+            leaf = leaf.children[0]
+        self.assertFlattensImmediately(
+            root, b'<div>' * 1001 + b'</div>' * 1001)
+
+
+    def test_errorRoots(self):
+        """
+        If flattening fails, the L{FlattenerError} has the objects which were
+        being flattened, the outermost first, and a traceback with only the
+        innermost of the recursive calls of the flattener.
+        """
+        class Failing(Element):
+            @renderer
+            def fails(self, request, tag):
+                raise RuntimeError()
+        inner = tags.em(render='fails')
+        outer = tags.p(inner)
+        root = Failing(TagLoader(outer))
+        failure = self.failureResultOf(
+            flattenString(None, root), FlattenerError)
+        self.assertEqual(failure.value._roots,
+                         [root, [outer], outer, outer.children, inner])
+        names = [frame[2] for frame in failure.value._traceback]
+        self.assertEqual(names.count('_flattenSynchronously'), 1)
+        self.assertEqual(names[-1], 'fails')
+
+
+
 # Use the co_filename mechanism (instead of the __file__ mechanism) because
 # it is the mechanism traceback formatting uses.  The two do not necessarily
 # agree with each other.  This requires a code object compiled in this file.
@@ -44,6 +44,22 @@ class DateTimeTests(unittest.TestCase):
             self.assertEqual(time, time2)
 
 
+    def test_cachedDatetimeString(self):
+        """
+        L{http._DatetimeCache} returns the HTTP datetime string for the
+        current time, formatting it only once per second.
+        """
+        clock = Clock()
+        clock.advance(1000000000.25)
+        cache = http._DatetimeCache(clock)
+        first = cache()
+        self.assertEqual(first, http.datetimeToString(1000000000))
+        clock.advance(0.5)
+        self.assertIs(cache(), first)
+        clock.advance(0.5)
+        self.assertEqual(cache(), http.datetimeToString(1000000001))
+
+
 
 class DummyHTTPHandler(http.Request):
 
@@ -1047,11 +1063,7 @@ class ParsingTests(unittest.TestCase):
         transport = StringTransport()
 
         channel.makeConnection(transport)
-        # one byte at a time, to stress it.
-        for byte in iterbytes(httpRequest):
-            if channel.transport.disconnecting:
-                break
-            channel.dataReceived(byte)
+        self.deliver(channel, httpRequest)
         channel.connectionLost(IOError("all done"))
 
         if success:
@@ -1061,6 +1073,22 @@ class ParsingTests(unittest.TestCase):
         return channel
 
 
+    def deliver(self, channel, data):
+        """
+        Deliver C{data} to C{channel} one byte at a time, to stress it.
+
+        @param channel: The channel to deliver to.
+        @type channel: L{HTTPChannel}
+
+        @param data: The data to deliver.
+        @type data: L{bytes}
+        """
+        for byte in iterbytes(data):
+            if channel.transport.disconnecting:
+                break
+            channel.dataReceived(byte)
+
+
     def test_invalidNonAsciiMethod(self):
         """
         When client sends invalid HTTP method containing
@@ -1530,6 +1558,75 @@ abasdfg
         self.assertEqual(processed[0].args, {b"text": [b"abasdfg"]})
 
 
+    def test_headerNamesPreserved(self):
+        """
+        The names of the request headers are kept as they were received, and
+        can still be looked up regardless of case.
+        """
+        httpRequest = b'''\
+GET / HTTP/1.0
+X-Custom-Header: foo
+x-other: bar
+
+'''
+        pairs = []
+        values = []
+        testcase = self
+
+        class MyRequest(http.Request):
+            def process(self):
+                pairs.extend(self.requestHeaders.getAllRawPairs())
+                values.append(self.getHeader(b"x-custom-header"))
+                values.append(self.getHeader(b"X-Other"))
+                testcase.didRequest = True
+                self.finish()
+
+        self.runRequest(httpRequest, MyRequest)
+        self.assertEqual(
+            pairs, [(b"X-Custom-Header", b"foo"), (b"x-other", b"bar")])
+        self.assertEqual(values, [b"foo", b"bar"])
+
+
+    def test_bodyReceiver(self):
+        """
+        If L{http.Request.setBodyReceiver} is called from
+        L{http.Request.allHeadersReceived}, each chunk of the request body is
+        delivered to the receiver as it arrives, before the request is
+        processed, and C{content} is left empty.
+        """
+        httpRequest = b'''\
+POST / HTTP/1.1
+Transfer-Encoding: chunked
+
+6
+Hello,
+6
+ world
+0
+
+'''
+        received = []
+        content = []
+        testcase = self
+
+        class Receiver(object):
+            def write(self, data):
+                received.append(data)
+
+        class MyRequest(http.Request):
+            def allHeadersReceived(self, command, path, version):
+                self.setBodyReceiver(Receiver())
+
+            def process(self):
+                content.append(b"".join(received))
+                content.append(self.content.read())
+                testcase.didRequest = True
+                self.finish()
+
+        self.runRequest(httpRequest, MyRequest)
+        self.assertEqual(content, [b"Hello, world", b""])
+
+
     def test_chunkedEncoding(self):
         """
         If a request uses the I{chunked} transfer encoding, the request body is
@@ -1554,7 +1651,7 @@ Hello,
         testcase = self
         class MyRequest(http.Request):
             def process(self):
-                content.append(self.content.fileno())
+                content.append(self.content.rolledOver)
                 content.append(self.content.read())
                 method.append(self.method)
                 path.append(self.path)
@@ -1563,13 +1660,9 @@ Hello,
                 self.finish()
 
         self.runRequest(httpRequest, MyRequest)
-        # The tempfile API used to create content returns an
-        # instance of a different type depending on what platform
-        # we're running on.  The point here is to verify that the
-        # request body is in a file that's on the filesystem.
-        # Having a fileno method that returns an int is a somewhat
-        # close approximation of this. -exarkun
-        self.assertIsInstance(content[0], int)
+        # Although its length was not known in advance, the body is small
+        # enough to be kept in memory.
+        self.assertEqual(content[0], False)
         self.assertEqual(content[1], b'Hello, spam,eggs spam spam')
         self.assertEqual(method, [b'GET'])
         self.assertEqual(path, [b'/'])
@@ -1611,6 +1704,111 @@ Hello,
 
 
 
+class BatchParsingTests(ParsingTests):
+    """
+    Tests for protocol parsing in L{HTTPChannel} when whole requests are
+    received at once, so that their request lines and headers are parsed
+    all at once.
+    """
+    def deliver(self, channel, data):
+        """
+        Deliver C{data} to C{channel} all at once.
+
+        @param channel: The channel to deliver to.
+        @type channel: L{HTTPChannel}
+
+        @param data: The data to deliver.
+        @type data: L{bytes}
+        """
+        channel.dataReceived(data)
+
+
+    def test_noLineByLineParsing(self):
+        """
+        The request line and headers of a request received at once are parsed
+        without calling L{HTTPChannel.lineReceived} or
+        L{HTTPChannel.headerReceived}.
+        """
+        processed = []
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append(self)
+                self.finish()
+
+        def unexpected(line):
+            self.fail("Unexpected call with {!r}".format(line))
+
+        channel = http.HTTPChannel()
+        channel.lineReceived = channel.headerReceived = unexpected
+        self.runRequest(
+            b"GET / HTTP/1.1\nFoo: bar\nFoo: baz\n\n", MyRequest, 0,
+            channel)
+        [request] = processed
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"foo"), [b"bar", b"baz"])
+
+
+    def test_overriddenHeaderReceived(self):
+        """
+        If a subclass of L{HTTPChannel} overrides C{headerReceived}, it is
+        called for each header even when the whole request is received at
+        once.
+        """
+        headers = []
+        class MyChannel(http.HTTPChannel):
+            def headerReceived(self, line):
+                headers.append(line)
+                return http.HTTPChannel.headerReceived(self, line)
+
+        class MyRequest(http.Request):
+            def process(self):
+                self.finish()
+
+        self.runRequest(
+            b"GET / HTTP/1.1\nFoo: bar\nBaz: quux\n\n", MyRequest, 0,
+            MyChannel())
+        self.assertEqual(headers, [b"Foo: bar", b"Baz: quux"])
+
+
+    def test_pipelinedWithBodies(self):
+        """
+        Several pipelined requests received at once, some of them with bodies
+        in either encoding, are all processed in order.
+        """
+        processed = []
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append((self.method, self.content.read()))
+                self.finish()
+
+        requestLines = [
+            b"GET /a HTTP/1.1",
+            b"",
+            b"POST /b HTTP/1.1",
+            b"Content-Length: 5",
+            b"",
+            b"hello"
+            b"POST /c HTTP/1.1",
+            b"Transfer-Encoding: chunked",
+            b"",
+            b"3",
+            b"abc",
+            b"0",
+            b"",
+            b"GET /d HTTP/1.1",
+            b"",
+            b""]
+        channel = http.HTTPChannel()
+        channel.requestFactory = MyRequest
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(b"\r\n".join(requestLines))
+        self.assertEqual(
+            processed,
+            [(b"GET", b""), (b"POST", b"hello"), (b"POST", b"abc"),
+             (b"GET", b"")])
+
+
+
 class QueryArgumentsTests(unittest.TestCase):
     def testParseqs(self):
         self.assertEqual(
@@ -2640,6 +2838,181 @@ class RequestTests(unittest.TestCase, ResponseTestMixin):
         self.assertEqual(trans.producerState, 'producing')
 
 
+    def test_gotLengthSpools(self):
+        """
+        L{http.Request.gotLength} stores a body of unknown length, or of a
+        length no greater than L{http.HTTPFactory.contentSpoolThreshold}, in a
+        spooled file which starts out in memory, and a longer body directly in
+        a temporary file.
+        """
+        req = http.Request(DummyChannel(), False)
+        req.gotLength(None)
+        self.assertIsInstance(req.content, http._SpooledContent)
+        self.assertFalse(req.content.rolledOver)
+        req.content.close()
+
+        req.gotLength(http.HTTPFactory.contentSpoolThreshold)
+        self.assertIsInstance(req.content, http._SpooledContent)
+        req.content.close()
+
+        req.gotLength(http.HTTPFactory.contentSpoolThreshold + 1)
+        self.assertNotIsInstance(req.content, http._SpooledContent)
+        self.assertIsInstance(req.content.fileno(), int)
+        req.content.close()
+
+
+    def test_gotLengthFromFactory(self):
+        """
+        L{http.Request.gotLength} uses the spool threshold and the memory
+        budget of the factory of the channel the request was received on.
+        """
+        factory = http.HTTPFactory(
+            contentSpoolThreshold=10, contentMemoryLimit=15)
+        channel = DummyChannel()
+        channel.factory = factory
+
+        req = http.Request(channel, False)
+        req.gotLength(11)
+        self.assertNotIsInstance(req.content, http._SpooledContent)
+        req.content.close()
+
+        first = http.Request(channel, False)
+        first.gotLength(None)
+        first.handleContentChunk(b"x" * 10)
+        self.assertFalse(first.content.rolledOver)
+        self.assertEqual(factory._contentBudget.used, 10)
+
+        second = http.Request(channel, False)
+        second.gotLength(None)
+        second.handleContentChunk(b"y" * 6)
+        self.assertTrue(second.content.rolledOver)
+        self.assertEqual(factory._contentBudget.used, 10)
+
+        first.connectionLost(Failure(ConnectionLost()))
+        second.connectionLost(Failure(ConnectionLost()))
+        self.assertEqual(factory._contentBudget.used, 0)
+
+
+    def test_setBodyReceiverAfterGotLength(self):
+        """
+        L{http.Request.setBodyReceiver} discards any content store already
+        created by L{http.Request.gotLength}, giving back the memory it used.
+        """
+        budget = http._MemoryBudget()
+        req = http.Request(DummyChannel(), False)
+        req.content = http._SpooledContent(100, budget)
+        req.content.write(b"abc")
+        received = []
+        req.setBodyReceiver(Receiver(received))
+        req.handleContentChunk(b"def")
+        self.assertEqual(received, [b"def"])
+        self.assertEqual(req.content.read(), b"")
+        self.assertEqual(budget.used, 0)
+
+
+    def test_writeHeaders(self):
+        """
+        L{HTTPChannel.writeHeaders} writes the status line, using the
+        precomputed one for a standard response, and the headers to the
+        transport in a single write.
+        """
+        channel = http.HTTPChannel()
+        transport = StringTransport()
+        writes = []
+        transport.write = writes.append
+        channel.makeConnection(transport)
+        channel.writeHeaders(
+            b"HTTP/1.1", b"404", b"Not Found",
+            [(b"Content-Length", b"0"), (b"X-Foo", b"bar")])
+        channel.writeHeaders(b"HTTP/1.0", b"200", b"Fine", [])
+        self.assertEqual(
+            writes,
+            [b"HTTP/1.1 404 Not Found\r\n"
+             b"Content-Length: 0\r\n"
+             b"X-Foo: bar\r\n"
+             b"\r\n",
+             b"HTTP/1.0 200 Fine\r\n\r\n"])
+        self.assertIn(b"HTTP/1.1 404 Not Found\r\n",
+                      http._STATUS_LINES.values())
+
+
+
+class Receiver(object):
+    """
+    A body receiver which records the chunks written to it.
+    """
+    def __init__(self, received):
+        self.write = received.append
+
+
+
+class SpooledContentTests(unittest.TestCase):
+    """
+    Tests for L{http._SpooledContent} and L{http._MemoryBudget}.
+    """
+    def test_inMemory(self):
+        """
+        Data up to the threshold is kept in memory, and can be read back like
+        from any other file.
+        """
+        content = http._SpooledContent(10)
+        content.write(b"hello")
+        content.write(b"world")
+        self.assertFalse(content.rolledOver)
+        self.assertEqual(content.getvalue(), b"helloworld")
+        content.seek(0, 0)
+        self.assertEqual(content.read(), b"helloworld")
+        content.seek(0, 0)
+        self.assertEqual(list(content), [b"helloworld"])
+
+
+    def test_rolloverAtThreshold(self):
+        """
+        A write which takes the content beyond the threshold moves it to a
+        temporary file, keeping what was written so far and the position.
+        """
+        content = http._SpooledContent(10)
+        content.write(b"hello")
+        content.write(b"world!")
+        self.assertTrue(content.rolledOver)
+        self.assertIsInstance(content.fileno(), int)
+        self.assertEqual(content.tell(), 11)
+        content.seek(0, 0)
+        self.assertEqual(content.read(), b"helloworld!")
+        content.close()
+        self.assertTrue(content.closed)
+
+
+    def test_budget(self):
+        """
+        Memory is reserved from the budget as content is written, the content
+        which does not fit in the budget is moved to a temporary file, and the
+        memory is given back when the content is rolled over or closed.
+        """
+        budget = http._MemoryBudget(8)
+        first = http._SpooledContent(100, budget)
+        second = http._SpooledContent(100, budget)
+        first.write(b"12345")
+        second.write(b"123")
+        self.assertEqual(budget.used, 8)
+        second.write(b"4")
+        self.assertTrue(second.rolledOver)
+        self.assertEqual(budget.used, 5)
+        first.close()
+        second.close()
+        self.assertEqual(budget.used, 0)
+
+
+    def test_unlimitedBudget(self):
+        """
+        A L{http._MemoryBudget} without a limit accepts any reservation.
+        """
+        budget = http._MemoryBudget()
+        self.assertTrue(budget.reserve(2 ** 40))
+        budget.release(2 ** 40)
+        self.assertEqual(budget.used, 0)
+
+
 
 class MultilineHeadersTests(unittest.TestCase):
     """
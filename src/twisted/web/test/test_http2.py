@@ -809,17 +809,19 @@ class HTTP2ServerTests(unittest.TestCase, HTTP2TestHelpers):
         self.assertTrue(request._requestReceived)
         self.assertTrue(request._data, b"hello world, it's http/2!")
 
-        # *That* will have also caused the H2Connection object to emit almost
-        # all the data it needs. That'll be a Headers frame, as well as two
-        # WindowUpdate frames.
+        # *That* will have also caused the H2Connection object to generate
+        # almost all the data it needs: a Headers frame, as well as two
+        # WindowUpdate frames. They are written out together with the Data
+        # frames once the reactor gets to spin.
         frames = framesFromBytes(b.value())
-        self.assertEqual(len(frames), 4)
+        self.assertEqual(len(frames), 1)
 
         def validate(streamID):
             # Confirm that the response is ok.
             frames = framesFromBytes(b.value())
 
-            # The only new frames here are the two Data frames.
+            # The Headers frame, the two WindowUpdate frames and the two Data
+            # frames.
             self.assertEqual(len(frames), 6)
             self.assertTrue('END_STREAM' in frames[-1].flags)
 
@@ -2287,6 +2289,118 @@ class HTTP2SchedulingTests(unittest.TestCase, HTTP2TestHelpers):
 
 
 
+    def connectWithRequests(self, paths, requestFactory=ChunkedHTTPHandler):
+        """
+        Set up a L{H2Connection} running in a L{task.Clock}, and send it GET
+        requests.
+
+        @param paths: The paths to request, one per stream.
+        @type paths: L{list} of L{bytes}
+
+        @param requestFactory: The L{Request} factory to use with the
+            connection.
+
+        @return: The clock, the connection, and a list of the individual
+            writes to its transport since the requests were received.
+        """
+        writes = []
+        reactor = task.Clock()
+        conn = H2Connection(reactor)
+        conn.requestFactory = requestFactory
+        transport = StringTransport()
+        transport.write = writes.append
+        conn.makeConnection(transport)
+
+        f = FrameFactory()
+        requestBytes = f.clientConnectionPreface()
+        for streamID, path in enumerate(paths):
+            headers = HTTP2ServerTests.getRequestHeaders[:]
+            headers[2] = (b':path', path)
+            requestBytes += buildRequestBytes(
+                headers, [], f, streamID * 2 + 1)
+        conn.dataReceived(requestBytes)
+        del writes[:]
+        return reactor, conn, writes
+
+
+    def dataFrames(self, data):
+        """
+        Get the data of the Data frames in some bytes sent by a
+        L{H2Connection}.
+        """
+        return [f.data for f in framesFromBytes(data)
+                if isinstance(f, hyperframe.frame.DataFrame)]
+
+
+    def test_coalescesFrames(self):
+        """
+        The frames generated for the responses on all streams during one
+        reactor iteration are written to the transport at once.
+        """
+        reactor, conn, writes = self.connectWithRequests(
+            [b'/chunked/2'] * 10)
+
+        reactor.advance(0)
+        self.assertEqual(len(writes), 1)
+        frames = framesFromBytes(writes[0])
+        self.assertEqual(
+            set(f.stream_id for f in frames), set(range(1, 21, 2)))
+        self.assertEqual(
+            len([f for f in frames if 'END_STREAM' in f.flags]), 10)
+        self.assertEqual(conn.streams, {})
+
+
+    def test_coalescesHeadersWithData(self):
+        """
+        Frames generated outside of the data-sending loop, such as the
+        headers of a response, are written to the transport together with
+        the data generated in the same reactor iteration.
+        """
+        reactor, conn, writes = self.connectWithRequests(
+            [b'/'], DummyProducerHandler)
+        request = conn.streams[1]._request
+        request.write(b'hello')
+        self.assertEqual(writes, [])
+
+        reactor.advance(0)
+        self.assertEqual(len(writes), 1)
+        frames = framesFromBytes(writes[0])
+        self.assertTrue(isinstance(frames[0], hyperframe.frame.HeadersFrame))
+        self.assertEqual(self.dataFrames(writes[0]), [b'hello'])
+
+
+    def test_maxBytesPerIteration(self):
+        """
+        The data-sending loop sends at most
+        L{H2Connection.maxBytesPerIteration} bytes of data per reactor
+        iteration, plus the rest of the frame which goes over it.
+        """
+        reactor, conn, writes = self.connectWithRequests([b'/chunked/5'])
+        conn.maxBytesPerIteration = 20
+
+        reactor.advance(0)
+        chunk = ChunkedHTTPHandler.chunkData
+        self.assertEqual(
+            [self.dataFrames(data) for data in writes],
+            [[chunk, chunk], [chunk, chunk], [chunk, b'']])
+        self.assertTrue(
+            'END_STREAM' in framesFromBytes(writes[-1])[-1].flags)
+
+
+    def test_maxDataFrameSize(self):
+        """
+        Data frames are no larger than L{H2Connection.maxDataFrameSize}.
+        """
+        reactor, conn, writes = self.connectWithRequests([b'/chunked/1'])
+        conn.maxDataFrameSize = 5
+
+        reactor.advance(0)
+        self.assertEqual(
+            self.dataFrames(b''.join(writes)),
+            [b'hello', b' worl', b'd!', b''])
+
+
+
 class HTTP2TimeoutTests(unittest.TestCase, HTTP2TestHelpers):
     """
     The L{H2Connection} object times out idle connections.
@@ -0,0 +1,287 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web._http2client}.
+"""
+
+from __future__ import absolute_import, division
+
+from twisted.internet.defer import CancelledError
+from twisted.internet.error import ConnectionDone
+from twisted.python.failure import Failure
+from twisted.test.proto_helpers import StringTransport, AccumulatingProtocol
+from twisted.trial.unittest import TestCase
+from twisted.web._newclient import (
+    Request, RequestNotSent, ResponseDone, ResponseNeverReceived)
+from twisted.web.http_headers import Headers
+from twisted.web.test.test_newclient import StringProducer
+
+skipH2 = None
+
+try:
+    from twisted.web._http2client import H2ClientConnection
+
+    # These third-party imports are guaranteed to be present if HTTP/2 support
+    # is compiled in. We do not use them in the main code: only in the tests.
+    import h2.connection
+    import h2.events
+    import h2.settings
+except ImportError:
+    skipH2 = "HTTP/2 support not enabled"
+
+
+
+class FakeServer(object):
+    """
+    The server side of an HTTP/2 connection to a L{H2ClientConnection},
+    driven by hand through the h2 state machine.
+
+    @ivar conn: The server's HTTP/2 connection state machine.
+
+    @ivar events: The h2 events received from the client so far.
+    """
+    def __init__(self, client, transport):
+        self.client = client
+        self.transport = transport
+        self.conn = h2.connection.H2Connection(
+            client_side=False, header_encoding=None)
+        self.conn.initiate_connection()
+        self.events = []
+
+
+    def receive(self):
+        """
+        Process the bytes the client has written so far.
+        """
+        data = self.transport.value()
+        self.transport.clear()
+        self.events.extend(self.conn.receive_data(data))
+
+
+    def send(self):
+        """
+        Deliver the bytes the server has to send to the client, then process
+        the client's answer.
+        """
+        self.client.dataReceived(self.conn.data_to_send())
+        self.receive()
+
+
+    def eventsOfType(self, eventType):
+        """
+        Get the events of a given type received from the client so far.
+        """
+        return [e for e in self.events if isinstance(e, eventType)]
+
+
+
+class H2ClientConnectionTests(TestCase):
+    """
+    Tests for L{H2ClientConnection}.
+    """
+    if skipH2:
+        skip = skipH2
+
+    def setUp(self):
+        self.quiescent = []
+        self.lost = []
+        self.transport = StringTransport()
+        self.protocol = H2ClientConnection(
+            self.quiescent.append, self.lost.append)
+        self.protocol.makeConnection(self.transport)
+        self.server = FakeServer(self.protocol, self.transport)
+        self.server.receive()
+        self.server.send()
+
+
+    def request(self, method=b'GET', uri=b'/', bodyProducer=None,
+                persistent=True):
+        """
+        Issue a request on the client connection.
+        """
+        headers = Headers({b'host': [b'example.com'],
+                           b'connection': [b'keep-alive'],
+                           b'x-foo': [b'bar']})
+        return self.protocol.request(
+            Request(method, uri, headers, bodyProducer, persistent))
+
+
+    def respond(self, streamID, status=b'200', body=None):
+        """
+        Respond to the request on C{streamID}.
+        """
+        self.server.conn.send_headers(
+            streamID, [(b':status', status), (b'content-length',
+                                              str(len(body or b'')).encode())],
+            end_stream=body is None)
+        if body is not None:
+            self.server.conn.send_data(streamID, body, end_stream=True)
+        self.server.send()
+
+
+    def test_request(self):
+        """
+        L{H2ClientConnection.request} sends the request headers on a new
+        stream, with pseudo-headers and without connection-specific headers,
+        and fires with a L{Response} once the response headers arrive.
+        """
+        d = self.request(uri=b'/foo')
+        self.server.receive()
+        [received] = self.server.eventsOfType(h2.events.RequestReceived)
+        self.assertEqual(received.headers, [
+            (b':method', b'GET'), (b':scheme', b'https'),
+            (b':authority', b'example.com'), (b':path', b'/foo'),
+            (b'x-foo', b'bar')])
+        self.assertNoResult(d)
+
+        self.respond(received.stream_id, body=b'hello')
+        response = self.successResultOf(d)
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.phrase, b'OK')
+        self.assertEqual(response.version, (b'HTTP', 2, 0))
+        self.assertEqual(response.length, 5)
+
+        body = AccumulatingProtocol()
+        response.deliverBody(body)
+        self.assertEqual(body.data, b'hello')
+        body.closedReason.trap(ResponseDone)
+        self.assertEqual(self.quiescent, [self.protocol])
+        self.assertEqual(self.protocol.state, 'QUIESCENT')
+
+
+    def test_multiplexed(self):
+        """
+        Requests issued while others are in progress are sent on their own
+        streams, and their responses may arrive in any order.
+        """
+        first = self.request(uri=b'/1')
+        second = self.request(uri=b'/2')
+        self.server.receive()
+        streams = [e.stream_id for e in
+                   self.server.eventsOfType(h2.events.RequestReceived)]
+        self.assertEqual(streams, [1, 3])
+        self.assertEqual(self.protocol.state, 'MULTIPLEXING')
+
+        self.respond(3, status=b'404')
+        self.assertEqual(self.successResultOf(second).code, 404)
+        self.assertNoResult(first)
+        self.respond(1)
+        self.assertEqual(self.successResultOf(first).code, 200)
+
+
+    def test_streamLimit(self):
+        """
+        Requests beyond the number of streams the server allows wait for a
+        stream to finish.
+        """
+        self.server.conn.update_settings(
+            {h2.settings.MAX_CONCURRENT_STREAMS: 1})
+        self.server.send()
+        first = self.request()
+        self.assertTrue(self.protocol.canAcceptRequest() is False)
+        second = self.request()
+        self.server.receive()
+        self.assertEqual(
+            len(self.server.eventsOfType(h2.events.RequestReceived)), 1)
+
+        self.respond(1)
+        self.successResultOf(first)
+        self.server.receive()
+        self.assertEqual(
+            len(self.server.eventsOfType(h2.events.RequestReceived)), 2)
+        self.respond(3)
+        self.successResultOf(second)
+
+
+    def test_bodyFlowControl(self):
+        """
+        A request body is sent as far as the server's flow control window
+        allows, with the body producer paused until the window opens.
+        """
+        self.server.conn.update_settings(
+            {h2.settings.INITIAL_WINDOW_SIZE: 5})
+        self.server.send()
+        producer = StringProducer(10)
+        producer.paused = False
+        producer.pauseProducing = lambda: setattr(producer, 'paused', True)
+        producer.resumeProducing = lambda: setattr(producer, 'paused', False)
+        self.request(method=b'POST', bodyProducer=producer)
+        self.server.receive()
+        [received] = self.server.eventsOfType(h2.events.RequestReceived)
+        self.assertIn((b'content-length', b'10'), received.headers)
+
+        producer.consumer.write(b'0123456789')
+        self.assertTrue(producer.paused)
+        self.server.receive()
+        data = self.server.eventsOfType(h2.events.DataReceived)
+        self.assertEqual(b''.join(e.data for e in data), b'01234')
+
+        self.server.conn.increment_flow_control_window(5, stream_id=1)
+        self.server.send()
+        self.assertFalse(producer.paused)
+        data = self.server.eventsOfType(h2.events.DataReceived)
+        self.assertEqual(b''.join(e.data for e in data), b'0123456789')
+        self.assertEqual(self.server.eventsOfType(h2.events.StreamEnded), [])
+
+        producer.finished.callback(None)
+        self.server.receive()
+        self.assertEqual(
+            len(self.server.eventsOfType(h2.events.StreamEnded)), 1)
+
+
+    def test_streamReset(self):
+        """
+        If the server resets the stream of a request before responding, the
+        request fails with L{ResponseNeverReceived}.
+        """
+        d = self.request()
+        self.server.receive()
+        self.server.conn.reset_stream(1)
+        self.server.send()
+        self.failureResultOf(d, ResponseNeverReceived)
+        self.assertEqual(self.protocol.state, 'QUIESCENT')
+
+
+    def test_cancel(self):
+        """
+        Cancelling a request resets its stream.
+        """
+        d = self.request()
+        d.cancel()
+        failure = self.failureResultOf(d, ResponseNeverReceived)
+        failure.value.reasons[0].trap(CancelledError)
+        self.server.receive()
+        self.assertEqual(
+            len(self.server.eventsOfType(h2.events.StreamReset)), 1)
+
+
+    def test_connectionLost(self):
+        """
+        When the connection is lost, requests in progress fail with
+        L{ResponseNeverReceived}, requests waiting for a stream with
+        L{RequestNotSent}, and the lost callback is called.
+        """
+        self.server.conn.update_settings(
+            {h2.settings.MAX_CONCURRENT_STREAMS: 1})
+        self.server.send()
+        first = self.request()
+        second = self.request()
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(first, ResponseNeverReceived)
+        self.failureResultOf(second, RequestNotSent)
+        self.assertEqual(self.lost, [self.protocol])
+        self.failureResultOf(self.request(), RequestNotSent)
+
+
+    def test_nonPersistent(self):
+        """
+        Once a non-persistent request is done and no other request is in
+        progress, the connection is closed.
+        """
+        d = self.request(persistent=False)
+        self.server.receive()
+        self.respond(1)
+        self.successResultOf(d)
+        self.assertTrue(self.transport.disconnecting)
+        self.assertEqual(self.quiescent, [])
@@ -255,6 +255,89 @@ class BytesHeadersTests(TestCase):
         self.assertEqual(h.getRawHeaders(b'test'), [b'foo', b'bar'])
 
 
+    def test_getAllRawPairs(self):
+        """
+        L{Headers.getAllRawPairs} returns an iterable of C{(name, value)}
+        pairs for every header value, in the order they were added, with the
+        names as they were given.
+        """
+        h = Headers()
+        h.addRawHeader(b'X-Foo', b'1')
+        h.addRawHeader(b'x-bar', b'2')
+        h.addRawHeader(b'X-FOO', b'3')
+        self.assertEqual(
+            list(h.getAllRawPairs()),
+            [(b'X-Foo', b'1'), (b'x-bar', b'2'), (b'X-FOO', b'3')])
+        self.assertEqual(h.getRawHeaders(b'x-foo'), [b'1', b'3'])
+
+
+    def test_lazyIndex(self):
+        """
+        Headers are only indexed by lowercased name once one is looked up by
+        name, and the index is kept up to date as headers are added after
+        that.
+        """
+        h = Headers()
+        h.addRawHeader(b'Foo', b'1')
+        list(h.getAllRawPairs())
+        self.assertIsNone(h._index)
+        self.assertTrue(h.hasHeader(b'foo'))
+        self.assertEqual(h._index, {b'foo': [b'1']})
+        h.addRawHeader(b'FOO', b'2')
+        h.addRawHeader(b'Bar', b'3')
+        self.assertEqual(h._index, {b'foo': [b'1', b'2'], b'bar': [b'3']})
+        self.assertEqual(
+            sorted(h.getAllRawPairs()),
+            [(b'Bar', b'3'), (b'Foo', b'1'), (b'Foo', b'2')])
+
+
+    def test_setRawHeadersReplaces(self):
+        """
+        L{Headers.setRawHeaders} replaces all of the values of an existing
+        header with the new ones.
+        """
+        h = Headers()
+        h.addRawHeader(b'a', b'1')
+        h.addRawHeader(b'b', b'2')
+        h.addRawHeader(b'a', b'3')
+        h.setRawHeaders(b'A', [b'5', b'6'])
+        self.assertEqual(
+            sorted(h.getAllRawPairs()),
+            [(b'A', b'5'), (b'A', b'6'), (b'b', b'2')])
+        h.setRawHeaders(b'b', [b'7'])
+        self.assertEqual(h.getRawHeaders(b'b'), [b'7'])
+
+
+    def test_setRawHeadersEmpty(self):
+        """
+        Setting a header to an empty list of values with
+        L{Headers.setRawHeaders} keeps the header.
+        """
+        h = Headers()
+        h.addRawHeader(b'a', b'1')
+        h.setRawHeaders(b'a', [])
+        self.assertTrue(h.hasHeader(b'a'))
+        self.assertEqual(h.getRawHeaders(b'a'), [])
+
+
+    def test_getRawHeadersReturnsStoredList(self):
+        """
+        Adding to the list returned by L{Headers.getRawHeaders} adds to the
+        values of the header, whether or not the headers were indexed before.
+        """
+        h = Headers()
+        h.addRawHeader(b'test', b'foo')
+        h.getRawHeaders(b'test').append(b'bar')
+        self.assertEqual(h.getRawHeaders(b'test'), [b'foo', b'bar'])
+
+
+    def test_slots(self):
+        """
+        L{Headers} instances have no instance dictionary.
+        """
+        self.assertFalse(hasattr(Headers(), '__dict__'))
+
+
 
 class UnicodeHeadersTests(TestCase):
     """
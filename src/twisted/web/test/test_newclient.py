@@ -1729,6 +1729,133 @@ class HTTP11ClientProtocolTests(TestCase):
         return self.assertCancelDuringBodyProduction(UNKNOWN_LENGTH)
 
 
+    def test_lostCallback(self):
+        """
+        The C{lostCallback} passed to L{HTTP11ClientProtocol} is called with
+        the protocol once its connection is lost.
+        """
+        lost = []
+        protocol = HTTP11ClientProtocol(lostCallback=lost.append)
+        protocol.makeConnection(StringTransport())
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(lost, [protocol])
+        self.assertEqual(protocol.state, 'CONNECTION_LOST')
+
+
+
+class HTTP11ClientProtocolPipeliningTests(TestCase):
+    """
+    Tests for pipelining requests with L{HTTP11ClientProtocol}.
+    """
+    def setUp(self):
+        """
+        Create an L{HTTP11ClientProtocol} which pipelines up to two requests,
+        connected to a fake transport, and send it a first request.
+        """
+        self.quiescent = []
+        self.transport = StringTransport()
+        self.protocol = HTTP11ClientProtocol(self.quiescent.append)
+        self.protocol.maxPipelinedRequests = 2
+        self.protocol.makeConnection(self.transport)
+        self.first = self.protocol.request(
+            Request(b'GET', b'/1', _boringHeaders, None, persistent=True))
+        self.transport.clear()
+
+
+    def test_pipelined(self):
+        """
+        While waiting for a response, a request with a safe method and no
+        body is written right away, and its response is parsed once the
+        previous one is done.
+        """
+        second = self.protocol.request(
+            Request(b'HEAD', b'/2', _boringHeaders, None, persistent=True))
+        self.assertTrue(self.transport.value().startswith(b'HEAD /2 '))
+
+        self.protocol.dataReceived(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Length: 0\r\n"
+            b"\r\n"
+            b"HTTP/1.1 404 Not Found\r\n"
+            b"Content-Length: 10\r\n"
+            b"\r\n")
+        self.assertEqual(self.successResultOf(self.first).code, 200)
+        response = self.successResultOf(second)
+        self.assertEqual(response.code, 404)
+        self.assertEqual(
+            response.headers.getRawHeaders(b"content-length"), [b"10"])
+        self.assertEqual(self.quiescent, [self.protocol])
+        self.assertEqual(self.protocol.state, 'QUIESCENT')
+
+
+    def test_notPipelined(self):
+        """
+        Requests with a body or an unsafe method, non-persistent requests,
+        and requests beyond C{maxPipelinedRequests} are not sent and fail
+        with L{RequestNotSent}.
+        """
+        def request(method, bodyProducer=None, persistent=True):
+            return self.protocol.request(
+                Request(method, b'/', _boringHeaders, bodyProducer,
+                        persistent=persistent))
+
+        self.failureResultOf(request(b'POST'), RequestNotSent)
+        self.failureResultOf(
+            request(b'GET', StringProducer(3)), RequestNotSent)
+        self.failureResultOf(request(b'GET', persistent=False), RequestNotSent)
+        self.assertEqual(self.transport.value(), b'')
+
+        request(b'GET')
+        request(b'GET')
+        self.transport.clear()
+        self.failureResultOf(request(b'GET'), RequestNotSent)
+        self.assertEqual(self.transport.value(), b'')
+
+
+    def test_connectionClose(self):
+        """
+        If the response to the current request closes the connection, the
+        pipelined requests fail with L{ResponseNeverReceived}.
+        """
+        second = self.protocol.request(
+            Request(b'GET', b'/2', _boringHeaders, None, persistent=True))
+        self.protocol.dataReceived(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Connection: close\r\n"
+            b"Content-Length: 0\r\n"
+            b"\r\n")
+        self.assertEqual(self.successResultOf(self.first).code, 200)
+        self.failureResultOf(second, ResponseNeverReceived)
+        self.assertTrue(self.transport.disconnecting)
+        self.assertEqual(self.quiescent, [])
+
+
+    def test_connectionLost(self):
+        """
+        If the connection is lost, the pipelined requests fail with
+        L{ResponseNeverReceived}.
+        """
+        second = self.protocol.request(
+            Request(b'GET', b'/2', _boringHeaders, None, persistent=True))
+        self.protocol.connectionLost(Failure(ConnectionLost()))
+        self.failureResultOf(self.first, ResponseNeverReceived)
+        self.failureResultOf(second, ResponseNeverReceived)
+
+
+    def test_cancelPipelined(self):
+        """
+        Cancelling a pipelined request aborts the connection, since its
+        response cannot be skipped.
+        """
+        aborted = []
+        self.transport.abortConnection = lambda: aborted.append(True)
+        second = self.protocol.request(
+            Request(b'GET', b'/2', _boringHeaders, None, persistent=True))
+        second.cancel()
+        self.failureResultOf(second, CancelledError)
+        self.assertEqual(aborted, [True])
+
+
 
 @implementer(IBodyProducer)
 class StringProducer:
@@ -13,9 +13,12 @@ import re
 
 from io import BytesIO as StringIO
 
+from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.internet import abstract, interfaces
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionLost
 from twisted.python.runtime import platform
 from twisted.python.filepath import FilePath
 from twisted.python import log
@@ -538,6 +541,52 @@ class StaticMakeProducerTests(TestCase):
             self.assertIsInstance(producer, static.SingleRangeStaticProducer)
 
 
+    def test_noRangeHeaderSendFileTransport(self):
+        """
+        makeProducer when no Range header is set returns a
+        L{static.SendfileStaticProducer} for the whole file if the request's
+        transport provides L{interfaces.ISendFileTransport}.
+        """
+        resource = self.makeResourceWithContent(b'abcdef')
+        request = DummyRequest([])
+        request.transport = SendFileTransport()
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.SendfileStaticProducer)
+            self.assertEqual((producer.offset, producer.size), (0, 6))
+
+
+    def test_encodedNoSendFile(self):
+        """
+        makeProducer does not return a L{static.SendfileStaticProducer} if the
+        response body is to be encoded, for example by
+        L{resource.EncodingResourceWrapper}.
+        """
+        resource = self.makeResourceWithContent(b'abcdef')
+        request = DummyRequest([])
+        request.transport = SendFileTransport()
+        request._encoder = object()
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.NoRangeStaticProducer)
+
+
+    def test_singleRangeSendFileTransport(self):
+        """
+        makeProducer when the Range header requests a single byte range
+        returns a L{static.SendfileStaticProducer} for that range if the
+        request's transport provides L{interfaces.ISendFileTransport}.
+        """
+        request = DummyRequest([])
+        request.requestHeaders.addRawHeader(b'range', b'bytes=1-3')
+        request.transport = SendFileTransport()
+        resource = self.makeResourceWithContent(b'abcdef')
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.SendfileStaticProducer)
+            self.assertEqual((producer.offset, producer.size), (1, 3))
+
+
     def test_singleRangeSets206PartialContent(self):
         """
         makeProducer when the Range header requests a single, satisfiable byte
@@ -927,6 +976,108 @@ class SingleRangeStaticProducerTests(TestCase):
 
 
 
+@implementer(interfaces.ISendFileTransport)
+class SendFileTransport(object):
+    """
+    A fake L{interfaces.ISendFileTransport} provider.
+
+    @ivar sent: A C{list} of the C{(fileObject, offset, count, Deferred)}
+        tuples for each call to C{sendFile}.
+
+    @ivar supported: If C{False}, C{sendFile} raises L{NotImplementedError}.
+    """
+    supported = True
+
+    def __init__(self):
+        self.sent = []
+
+
+    def sendFile(self, fileObject, offset, count):
+        if not self.supported:
+            raise NotImplementedError()
+        d = Deferred()
+        self.sent.append((fileObject, offset, count, d))
+        return d
+
+
+
+class SendfileStaticProducerTests(TestCase):
+    """
+    Tests for L{SendfileStaticProducer}.
+    """
+    def setUp(self):
+        self.request = DummyRequest([])
+        self.request.sentLength = 0
+        self.request.transport = SendFileTransport()
+        self.fileObject = StringIO(b'abcdef')
+
+
+    def test_implementsIPullProducer(self):
+        """
+        L{SendfileStaticProducer} implements L{IPullProducer}.
+        """
+        verifyObject(
+            interfaces.IPullProducer,
+            static.SendfileStaticProducer(None, None, None, None))
+
+
+    def test_start(self):
+        """
+        L{SendfileStaticProducer.start} writes the response headers and then
+        asks the transport to send the region of the file.
+        """
+        producer = static.SendfileStaticProducer(
+            self.request, self.fileObject, 1, 3)
+        producer.start()
+        self.assertEqual([b''], self.request.written)
+        [(fileObject, offset, count, d)] = self.request.transport.sent
+        self.assertEqual(
+            (self.fileObject, 1, 3), (fileObject, offset, count))
+
+
+    def test_finishedWhenSent(self):
+        """
+        Once the transport has sent the file, L{SendfileStaticProducer}
+        finishes the request and closes the file.
+        """
+        finished = self.request.notifyFinish()
+        producer = static.SendfileStaticProducer(
+            self.request, self.fileObject, 1, 3)
+        producer.start()
+        self.assertNoResult(finished)
+        self.request.transport.sent[0][3].callback(3)
+        self.successResultOf(finished)
+        self.assertEqual(3, self.request.sentLength)
+        self.assertTrue(self.fileObject.closed)
+
+
+    def test_connectionLost(self):
+        """
+        If the transport fails to send the file, L{SendfileStaticProducer}
+        closes it without finishing the request.
+        """
+        producer = static.SendfileStaticProducer(
+            self.request, self.fileObject, 1, 3)
+        producer.start()
+        self.request.transport.sent[0][3].errback(ConnectionLost())
+        self.assertTrue(self.fileObject.closed)
+        self.assertEqual(0, self.request.finished)
+
+
+    def test_fallback(self):
+        """
+        If the transport cannot send the file, L{SendfileStaticProducer} writes
+        the region of the file to the request itself.
+        """
+        self.request.transport.supported = False
+        producer = static.SendfileStaticProducer(
+            self.request, self.fileObject, 1, 3)
+        producer.start()
+        self.assertEqual(b'bcd', b''.join(self.request.written))
+        self.assertEqual(1, self.request.finished)
+
+
+
 class MultipleRangeStaticProducerTests(TestCase):
     """
     Tests for L{MultipleRangeStaticProducer}.
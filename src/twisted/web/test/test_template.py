@@ -7,6 +7,8 @@ Tests for L{twisted.web.template}
 
 from __future__ import division, absolute_import
 
+import os
+
 from zope.interface.verify import verifyObject
 
 from twisted.internet.defer import succeed, gatherResults
@@ -22,6 +24,7 @@ from twisted.web.error import (FlattenerError, MissingTemplateLoader,
 
 from twisted.web.template import renderElement
 from twisted.web._element import UnexposedMethodError
+from twisted.web._flatten import _Markup
 from twisted.web.test._util import FlattenTestCase
 from twisted.web.test.test_web import DummyRequest
 from twisted.web.server import NOT_DONE_YET
@@ -161,6 +164,21 @@ class ElementTests(TestCase):
         self.assertEqual(element.render(None), "result")
 
 
+    def test_renderCompiled(self):
+        """
+        L{Element.render} loads the compiled document from loaders which can
+        provide one, and compiles it only once.
+        """
+        class StubElement(Element):
+            loader = XMLString('<p>Hello, world.</p>')
+
+        compiled = StubElement().render(None)
+        self.assertEqual(len(compiled), 1)
+        self.assertIsInstance(compiled[0], _Markup)
+        self.assertEqual(compiled[0].data, b'<p>Hello, world.</p>')
+        self.assertIs(StubElement().render(None), compiled)
+
+
     def test_misuseRenderer(self):
         """
         If the L{renderer} decorator  is called without any arguments, it will
@@ -285,6 +303,27 @@ class XMLFileWithFilePathTests(TestCase, XMLLoaderTestsMixin):
         return XMLFile(fp)
 
 
+    def test_reloadModified(self):
+        """
+        If the file is modified after the document has been loaded, the
+        document is loaded and compiled again.
+        """
+        loader = self.loaderFactory()
+        loader.load()
+        compiled = loader._loadCompiled()
+        self.assertIs(loader._loadCompiled(), compiled)
+
+        loader._path.setContent(b'<p>Goodbye.</p>')
+        loader._path.changed()
+        modificationTime = loader._path.getModificationTime()
+        os.utime(loader._path.path,
+                 (modificationTime + 10, modificationTime + 10))
+        tag, = loader.load()
+        self.assertEqual(tag.children, [u'Goodbye.'])
+        compiled = loader._loadCompiled()
+        self.assertEqual(compiled[0].data, b'<p>Goodbye.</p>')
+
+
 
 class XMLFileWithFileTests(TestCase, XMLLoaderTestsMixin):
     """
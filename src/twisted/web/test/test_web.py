@@ -18,6 +18,7 @@ from twisted.trial import unittest
 from twisted.internet import reactor
 from twisted.internet.address import IPv4Address
 from twisted.internet.task import Clock
+from twisted.test.proto_helpers import StringTransport
 from twisted.web import server, resource
 from twisted.web import iweb, http, error
 
@@ -184,6 +185,131 @@ class SiteTest(unittest.TestCase):
         self.assertRaises(KeyError, site.getSession, b'no-such-uid')
 
 
+
+@implementer(resource.IStreamingBodyResource)
+class StreamingBodyResource(resource.Resource):
+    """
+    A resource which consumes the bodies of requests as they arrive.
+
+    @ivar received: The chunks of request bodies received so far.
+    @ivar rendered: The request bodies found in C{request.content} when
+        rendering, along with the chunks received by then.
+    """
+    isLeaf = True
+
+    def __init__(self):
+        resource.Resource.__init__(self)
+        self.received = []
+        self.rendered = []
+
+
+    def getBodyReceiver(self, request):
+        self.received.append(request.args)
+        return self
+
+
+    def write(self, data):
+        self.received.append(data)
+
+
+    def render_POST(self, request):
+        self.rendered.append((request.content.read(), self.received[:]))
+        return b"done"
+
+
+
+class StreamingBodyTests(unittest.TestCase):
+    """
+    Tests for L{server.Site.streamRequestBodies} and
+    L{resource.IStreamingBodyResource}.
+    """
+    def setUp(self):
+        self.resource = StreamingBodyResource()
+        root = resource.Resource()
+        root.putChild(b"upload", self.resource)
+        self.site = server.Site(root, reactor=Clock())
+        self.site.startFactory()
+        self.addCleanup(self.site.stopFactory)
+
+
+    def request(self, data):
+        """
+        Deliver C{data} to a new channel for C{self.site}.
+
+        @return: The response written to the channel.
+        @rtype: L{bytes}
+        """
+        channel = self.site.buildProtocol(None)
+        transport = StringTransport()
+        channel.makeConnection(transport)
+        channel.dataReceived(data)
+        channel.connectionLost(None)
+        return transport.value()
+
+
+    def test_streamed(self):
+        """
+        When L{server.Site.streamRequestBodies} is set, a resource providing
+        L{resource.IStreamingBodyResource} is asked for a body receiver once
+        the request headers have been received, with the query arguments
+        available, and the body is written to the receiver rather than stored
+        in C{request.content}.
+        """
+        self.site.streamRequestBodies = True
+        response = self.request(
+            b"POST /upload?a=b HTTP/1.1\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"\r\n"
+            b"3\r\nabc\r\n3\r\ndef\r\n0\r\n\r\n")
+        self.assertEqual(
+            self.resource.rendered,
+            [(b"", [{b"a": [b"b"]}, b"abc", b"def"])])
+        self.assertTrue(response.endswith(b"done"))
+
+
+    def test_notStreamed(self):
+        """
+        By default, resources providing L{resource.IStreamingBodyResource}
+        find the request body in C{request.content}.
+        """
+        response = self.request(
+            b"POST /upload HTTP/1.1\r\n"
+            b"Content-Length: 3\r\n"
+            b"\r\n"
+            b"abc")
+        self.assertEqual(self.resource.rendered, [(b"abc", [])])
+        self.assertTrue(response.endswith(b"done"))
+
+
+    def test_streamingSiteOrdinaryResource(self):
+        """
+        When L{server.Site.streamRequestBodies} is set, resources which do
+        not provide L{resource.IStreamingBodyResource} are located only once
+        and find the request body in C{request.content}.
+        """
+        self.site.streamRequestBodies = True
+        located = []
+
+        class Ordinary(resource.Resource):
+            isLeaf = True
+
+            def render_POST(self, request):
+                return request.content.read()
+
+        root = resource.Resource()
+        ordinary = Ordinary()
+        root.getChild = lambda name, request: (
+            located.append(name) or ordinary)
+        self.site.resource = root
+        response = self.request(
+            b"POST /ordinary HTTP/1.1\r\n"
+            b"Content-Length: 5\r\n"
+            b"\r\n"
+            b"hello")
+        self.assertEqual(located, [b"ordinary"])
+        self.assertTrue(response.endswith(b"hello"))
+
+
 class SessionTests(unittest.TestCase):
     """
     Tests for L{server.Session}.
@@ -479,6 +605,23 @@ class RequestTests(unittest.TestCase):
             verifyObject(iweb.IRequest, server.Request(DummyChannel(), True)))
 
 
+    def test_dateHeader(self):
+        """
+        L{server.Request.process} sets the I{Date} header to the current time
+        by the reactor of the site.
+        """
+        clock = Clock()
+        clock.advance(1000000000.5)
+        channel = DummyChannel()
+        channel.site = server.Site(SimpleResource(), reactor=clock)
+        request = server.Request(channel, True)
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/', b'HTTP/1.0')
+        self.assertEqual(
+            request.responseHeaders.getRawHeaders(b'date'),
+            [http.datetimeToString(1000000000)])
+
+
     def testChildLink(self):
         request = server.Request(DummyChannel(), 1)
         request.gotLength(0)